@@ -1,11 +1,11 @@
-from src.app.application import Application
+from src.app.application import Application, SESSION_DIRECTORY
 from src.auth.authentication import AuthenticationModule
 from src.app.ui import TkinterUI
 from src.database.mongo_module import MongoModule
 from src.app.state_machine.splash_state import SplashState
 
 if __name__ == '__main__':
-    app = Application()
+    app = Application(session_directory=SESSION_DIRECTORY)
     ui = TkinterUI(app)
     app.ui = ui
     app._state = SplashState(app) # pylint: disable=protected-access
@@ -4,15 +4,35 @@ The Application defines the interface of interest to clients.
 
 from __future__ import annotations
 
+import os
 import random
 
-from src.calendar_elements.element_management import ElementManagement
 from src.schedule.schedule_management import ScheduleManagement
 from src.auth.authentication import AuthenticationModule
-from src.database.mongo_module import MongoModule
+from src.auth.password_hasher import PasswordHasher
+from src.auth.session import SessionStore, InvalidSessionError, \
+    persistent_store
+from src.database.mongo_module import MongoModule, NonExistentIDError
+from src.database.memory_module import MemoryModule, FileModule
 from src.database.utils import TimeoutDecorator
+from src.database.retry_decorator import RetryDecorator
+from src.database.updated_at_decorator import UpdatedAtDecorator
+from src.database.change_feed import open_change_feed
+from src.cache.cache_invalidator import CacheInvalidator
+from src.context.calendar_context import CalendarContext
 from src.database.export_module import ExportModule
-from src.user.user_management import UserManagement
+from src.app.background_loader import BackgroundLoader
+from src.app.events_tree import EventsTree, add_to_tree
+from src.calendar_elements.daily_aggregates import DailyAggregates
+
+
+# seconds between the polls of the writes of other clients
+CACHE_INVALIDATION_INTERVAL = 1.0
+# seconds the records of the deleted documents are kept for the polls
+DELETIONS_MAX_AGE = 24 * 60 * 60
+# directory of the session secret and of the token of the last session, so
+# the user stays logged in across restarts
+SESSION_DIRECTORY = os.path.join(os.path.expanduser("~"), ".calendar_app")
 
 
 class Application:
@@ -21,55 +41,174 @@ class Application:
     """
     _state = None
 
-    def __init__(self, state = None, ui = None, db = None) -> None:
+    def __init__(self, state = None, ui = None, db = None,
+                 sessions = None, session_directory = None) -> None:
         self._state = state
         self._ui = ui
         self._db = db
         self._user = None
+        # with a session_directory, the secret of the sessions and the token
+        # of the last one are kept there, so the session is resumed after a
+        # restart (see restore_session)
+        self.session_path = None
+        if session_directory is not None:
+            os.makedirs(session_directory, mode=0o700, exist_ok=True)
+            self.session_path = os.path.join(session_directory,
+                                             "session_token")
+            sessions = sessions or persistent_store(
+                os.path.join(session_directory, "session_secret"))
+        self.sessions = sessions or SessionStore()
+        self.session = None
         self.selected_schedules = []
+        # the database module with the managers of this application
+        self.context = None
+        self.unit_of_work = None
+        self._loader = None
+        self._events_tree = None
+        self._daily_aggregates = None
+        self.cache_invalidator = None
+        self._invalidation_job = None
 
     def initialize_database(self, database_url, database_port, database_user, database_password):
         """
-        Initialize the database
+        Initialize the database.
+        The url "memory" uses an in-process database, and "file:<path>" an
+        in-process database persisted to <path>.
         """
+        if database_url == "memory" or database_url.startswith("file:"):
+            if database_url == "memory":
+                self._db = MemoryModule(database_name="calendar_app")
+            else:
+                self._db = FileModule(database_url[len("file:"):],
+                                      database_name="calendar_app")
+            self._db.connect()
+            print(f"\033[92mDatabase initialized: {self._db}\033[0m")
+            self.initialize_managers()
+            self.restore_session()
+            return
+
         if database_user == "None" or database_password == "":
             database_user = None
             database_password = None
         if database_password == "None" or database_password == "":
             database_password = None
         database_port = int(database_port)
-        MongoModule._instance = None
         user = {}
         if database_user:
             user = {"user": database_user, "password": database_password}
-        self._db = TimeoutDecorator(
-                    MongoModule(host = database_url,
+        mongo_module = MongoModule(host = database_url,
                         port = database_port,
                         database_name = "calendar_app",
+                        shared = False,
                         **user)
-                    , 5)
+        # the writes are stamped so the other instances sharing the
+        # database can find them (see start_cache_invalidator)
+        self._db = UpdatedAtDecorator(RetryDecorator(TimeoutDecorator(
+                    mongo_module, 5)))
 
         self._db.connect()
+        self._db.purge_deletions(DELETIONS_MAX_AGE)
         print(f"\033[92mDatabase initialized: {self._db}\033[0m")
 
         self.initialize_managers()
+        self.start_cache_invalidator(mongo_module)
+        self.restore_session()
+
+    def start_cache_invalidator(self, mongo_module=None):
+        """
+        Keep the caches of the managers consistent with the writes of the
+        other instances sharing the database, read from a change stream of
+        mongo_module or, without one, from polls of the stamps of the
+        UpdatedAtDecorator.
+
+        The feed and the changed documents are read on the loader, and the
+        changes are applied on the Tk thread without querying the database,
+        so the managers, the events tree and the selected schedules are only
+        changed by the thread that runs the states.
+        """
+        self.stop_cache_invalidator()
+        feed = open_change_feed(self._db.decorated,
+                                instance_id=self._db.instance_id,
+                                mongo_module=mongo_module)
+        self.cache_invalidator = CacheInvalidator(feed, self.context.managers)
+        self._schedule_cache_invalidation()
+
+    def _schedule_cache_invalidation(self):
+        """
+        Read the writes of the other instances after the polling interval.
+        """
+        self._invalidation_job = self._ui.root.after(
+            int(CACHE_INVALIDATION_INTERVAL * 1000),
+            self._fetch_remote_changes)
+
+    def _fetch_remote_changes(self):
+        """
+        Read the writes of the other instances, and the documents they
+        changed, on the loader.
+        """
+        self._invalidation_job = None
+        invalidator = self.cache_invalidator
+        self.loader.submit(
+            invalidator, invalidator.fetch,
+            lambda changes: self._apply_remote_changes(invalidator, changes),
+            lambda error: self._apply_remote_changes(invalidator, [], error))
+
+    def _apply_remote_changes(self, invalidator, changes, error=None):
+        """
+        Apply the writes read by the loader to the managers. Runs on the Tk
+        thread.
+        """
+        if invalidator is not self.cache_invalidator:
+            return
+        try:
+            if error is not None:
+                raise error
+            invalidator.apply(changes)
+        except Exception as apply_error: # pylint: disable=broad-except
+            print(f"\033[91mCache invalidation failed: {apply_error}\033[0m")
+        self._schedule_cache_invalidation()
+
+    def stop_cache_invalidator(self):
+        """
+        Stop reading the writes of the other instances.
+        """
+        if self._invalidation_job is not None:
+            self._ui.root.after_cancel(self._invalidation_job)
+            self._invalidation_job = None
+        if self.cache_invalidator is not None:
+            if self._loader is not None:
+                self._loader.cancel(self.cache_invalidator)
+            self.cache_invalidator.stop()
+            self.cache_invalidator = None
 
     def initialize_managers(self):
         """
         Initialize the managers
         """
         # initialize modules
-        ScheduleManagement._instance = None
-        ElementManagement._instance = None
-        UserManagement._instance = None
-        ScheduleManagement.get_instance(database_module=self._db)
-        ElementManagement.get_instance(database_module=self._db)
-        UserManagement.get_instance(database_module=self._db)
+        self.reset_view_caches()
+        # observer-triggered writes are batched and flushed at the end of
+        # each UI action (see flush)
+        self.context = CalendarContext(self._db)
+        self.unit_of_work = self.context.unit_of_work
+        # the states run on the Tk thread and look the managers up with
+        # get_instance
+        self.context.activate()
+
+    def flush(self):
+        """
+        Write the pending changes of the managers to the database.
+        """
+        if self.unit_of_work is not None:
+            self.unit_of_work.flush()
 
     def transition_to(self, state) -> None:
         """
         The Application allows changing the State object at runtime.
         """
+        # every UI action ends with a transition, so it is the transaction
+        # boundary of the write-behind unit of work
+        self.flush()
         if self._state is not None:
             self._state.clear()
         print(f"Application: Transition to {type(state).__name__}")
@@ -96,11 +235,99 @@ class Application:
     @user.setter
     def user(self, user):
         self._user = user
+        self.reset_view_caches()
         if user:
-            self.selected_schedules = user.schedules
+            self.selected_schedules = list(user.schedules)
         else:
             self.selected_schedules = []
 
+    @property
+    def events_tree(self):
+        """
+        The events tree of the selected schedules, created on first use and
+        kept up to date by the changes published by the managers.
+        """
+        if self._events_tree is None:
+            self._events_tree = EventsTree(self.context.element_management,
+                                           self.selected_schedules)
+            self.context.element_management.subscribe(
+                self._events_tree.element_changed)
+            self.context.schedule_management.subscribe(self.schedule_changed)
+        return self._events_tree
+
+    @property
+    def daily_aggregates(self):
+        """
+        The daily counts of the elements shown as badges in the month grid,
+        created on first use and kept up to date by the changes published
+        by the managers.
+        """
+        if self._daily_aggregates is None:
+            self._daily_aggregates = DailyAggregates(
+                self._db, self.context.element_management)
+            self.context.element_management.subscribe(
+                self._daily_aggregates.element_changed)
+            self.context.schedule_management.subscribe(
+                self._daily_aggregates.schedule_changed)
+        return self._daily_aggregates
+
+    def reset_view_caches(self):
+        """
+        Drop the events tree and the daily aggregates, e.g. when the user or
+        the managers change.
+        """
+        if self._events_tree is not None:
+            self.context.element_management.unsubscribe(
+                self._events_tree.element_changed)
+            self.context.schedule_management.unsubscribe(
+                self.schedule_changed)
+            self._events_tree = None
+        if self._daily_aggregates is not None:
+            self.context.element_management.unsubscribe(
+                self._daily_aggregates.element_changed)
+            self.context.schedule_management.unsubscribe(
+                self._daily_aggregates.schedule_changed)
+            self._daily_aggregates = None
+
+    def schedule_changed(self, change, schedule):
+        """
+        Unselect a schedule when it is deleted.
+        """
+        if change == ScheduleManagement.DELETED and \
+                schedule.id in self.selected_schedules:
+            self.toggle_schedule(schedule.id)
+
+    def toggle_schedule(self, schedule_id):
+        """
+        Select or unselect a schedule, patching the events tree. The events
+        of a selected schedule are queried by the next get_user_events,
+        which the states run on the loader, so this does not block the Tk
+        thread on the database.
+        """
+        if schedule_id in self.selected_schedules:
+            self.selected_schedules.remove(schedule_id)
+        else:
+            self.selected_schedules.append(schedule_id)
+        if self._events_tree is not None:
+            self._events_tree.set_schedule_ids(self.selected_schedules)
+
+    @property
+    def loader(self):
+        """
+        The BackgroundLoader of the states, created with the ui root.
+        """
+        if self._loader is None:
+            self._loader = BackgroundLoader(self._ui.root)
+        return self._loader
+
+    def cancel_loads(self, key) -> None:
+        """
+        Cancel the background loads started by key, e.g. a state that is
+        being left.
+        """
+        if self._loader is not None:
+            self._loader.cancel(key)
+
     @property
     def ui(self):
         return self._ui
@@ -121,41 +348,161 @@ class Application:
         The Application delegates part of its behavior to the current State
         object.
         """
+        if self._loader is not None:
+            self._loader.shutdown()
+        self.stop_cache_invalidator()
+        self.flush()
 
-    def login(self, user_id, password):
+    def check_password(self, user_id, password):
         """
-        The Application delegates part of its behavior to the current State
-        object.
+        Start the login of a user. The user is read on the calling thread
+        and only bcrypt runs in the background, on the worker pool of the
+        PasswordHasher; pass the result of the future to login.
+
+        Returns the user and the Future of True if the password is right.
+        Raises UserNotFound if the user does not exist.
         """
-        auth = AuthenticationModule()
+        return AuthenticationModule().authenticate_async(user_id, password)
 
-        if auth.authenticate_user(user_id, password):
-            print(f"\033[92mUser {user_id} authenticated.\033[0m")
-            self.user = UserManagement(self._db).get_user(user_id)
-            return True
-        else:
+    def login(self, user, password, verified):
+        """
+        Log in a user whose password was checked with check_password. Runs
+        on the Tk thread, like every other change of the user, the session
+        and the managers.
+
+        Returns True if the user logged in.
+        """
+        if not verified:
             print("Login failed.")
+            return False
+        self.flush()
+        hasher = PasswordHasher.get_instance()
+        if hasher.needs_rehash(user.get_hashed_password()):
+            # the hash was made with another cost factor, so it is replaced
+            # with a new one, also computed in the background
+            self.loader.submit(
+                user, hasher.hash_async(password).result,
+                lambda hashed: user.set_hashed_password(
+                    hashed.decode('utf-8')))
+        print(f"\033[92mUser {user.id} authenticated.\033[0m")
+        self.user = user
+        self.session = self.sessions.create(user.id)
+        self._save_session()
+        return True
+
+    def resume_session(self, token):
+        """
+        Log in with the token of a session, without checking the password
+        again.
+
+        Returns True if the session is valid.
+        """
+        try:
+            session = self.sessions.validate(token)
+            user = self.context.user_management.get_user(session.user_id)
+        except (InvalidSessionError, NonExistentIDError) as error:
+            print(f"Session not resumed: {error}")
+            return False
+        self.user = user
+        self.session = session
+        return True
+
+    def restore_session(self):
+        """
+        Drop the expired sessions and revocations of the store, and resume
+        the session saved by the last login, if it is still valid. Called
+        once the database is initialized.
+
+        Returns True if the session was resumed.
+        """
+        self.sessions.purge_expired()
+        if self.session_path is None:
+            return False
+        try:
+            with open(self.session_path, encoding="utf-8") as file:
+                token = file.read().strip()
+        except FileNotFoundError:
+            return False
+        if self.resume_session(token):
+            return True
+        self._save_session()
+        return False
+
+    def check_session(self):
+        """
+        Check that the session of the logged in user is still valid, e.g.
+        before showing its calendar, logging it out if it expired or was
+        revoked.
+
+        Returns True if the session is valid.
+        """
+        if self.session is None:
+            return False
+        try:
+            self.sessions.validate(self.session.token)
+        except InvalidSessionError as error:
+            print(f"Session ended: {error}")
+            self.flush()
+            self.session = None
+            self.user = None
+            self._save_session()
+            return False
+        return True
+
+    def _save_session(self):
+        """
+        Save the token of the current session for the next start, or remove
+        the saved one if there is no session.
+        """
+        if self.session_path is None:
+            return
+        if self.session is None:
+            try:
+                os.remove(self.session_path)
+            except FileNotFoundError:
+                pass
+            return
+        descriptor = os.open(self.session_path,
+                             os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(self.session.token)
 
     def logout(self):
         """
         The Application delegates part of its behavior to the current State
         object.
         """
+        self.flush()
+        if self.session is not None:
+            self.sessions.revoke(self.session.token)
+            self.session = None
+            self._save_session()
         self.user = None
 
-    def sign_up(self, user_id, username, email, password):
+    def hash_password(self, password):
         """
-        The Application delegates part of its behavior to the current State
-        object.
+        Start hashing the password of a new user on the worker pool of the
+        PasswordHasher; pass the result of the future to sign_up.
+
+        Returns the Future of the hashed password.
         """
-        user_management = UserManagement.get_instance()
+        return PasswordHasher.get_instance().hash_async(password)
 
-        user = user_management.create_user(username, email, password, user_id=user_id)
+    def sign_up(self, user_id, username, email, hashed_password):
+        """
+        Create a user, with a password hashed by hash_password, and its
+        private schedule, and log it in. Runs on the Tk thread.
+        """
+        user_management = self.context.user_management
+
+        user = user_management.create_user(
+            username, email, None, user_id=user_id,
+            hashed_password=hashed_password.decode('utf-8'))
 
         if user:
             print(f"\033[92mSign up successful! User {username} created.\033[0m")
 
-            schedule_management = ScheduleManagement.get_instance()
+            schedule_management = self.context.schedule_management
             schedule_id = f"{user_id}_schedule"
             schedule_title = "Private schedule"
             schedule_description = f"Private schedule of {username}"
@@ -166,13 +513,17 @@ class Application:
             print(f"\033[92mSchedule created: {schedule}\033[0m")
             print(f"\033[92mUser schedules: {user.schedules}\033[0m")
 
-            self.login(user_id, password)
+            # the password was just set, so there is no need to check it
+            self.flush()
+            self.user = user
+            self.session = self.sessions.create(user_id)
+            self._save_session()
 
             return True
         else:
             print("Sign up failed.")
 
-    def get_user_events(self):
+    def get_user_events(self, start=None, end=None):
         """
         Return the user's events as a dictionary in the tree format:
         {
@@ -187,36 +538,25 @@ class Application:
             }
         }
 
+        If start and end are given, only the events of the days in that
+        window are returned, from the incrementally maintained events tree.
         """
-        elements = self.user.get_elements(self.selected_schedules)
+        if start is not None and end is not None:
+            return self.events_tree.window(start, end)
 
-        # get user events
-        events = elements
         elements = {}
-
-        for event in events:
-            date = event.get_display_interval()[0]
-
-            yearly_events = elements.get(date.year, {})
-            monthly_events = yearly_events.get(date.month, {})
-            daily_events = monthly_events.get(date.day, {})
-            hourly_events = daily_events.get(date.hour, {})
-            minutely_events = hourly_events.get(date.minute, [])
-
-            minutely_events.append(event)
-
-            hourly_events[date.minute] = minutely_events
-            daily_events[date.hour] = hourly_events
-            monthly_events[date.day] = daily_events
-            yearly_events[date.month] = monthly_events
-
-            elements[date.year] = yearly_events
-
-
-        print(f"\033[92mUser events: {elements}, with len ={len(elements)}\033[0m")
-
+        for event in self.user.get_elements(self.selected_schedules):
+            add_to_tree(elements, event)
         return elements
 
+    def get_day_counts(self, year, month):
+        """
+        Return the daily counts of the elements of the selected schedules in
+        a month, by date (see DailyAggregates).
+        """
+        return self.daily_aggregates.month(self.selected_schedules, year,
+                                           month)
+
     def create_event(self, element_type: str, title: str,
                        schedules: list, **kwargs):
         """
@@ -224,7 +564,7 @@ class Application:
         object.
         """
         element_id = self.user.id + "_" + title + str(random.randint(0, 1000))
-        element_management = ElementManagement.get_instance()
+        element_management = self.context.element_management
         event = element_management.create_element(element_type = element_type,
             element_id = element_id, title = title, schedules = schedules, **kwargs)
 
@@ -235,13 +575,16 @@ class Application:
         """
         Deleting a element
         """
-        element_management = ElementManagement.get_instance()
+        element_management = self.context.element_management
         element_management.delete_element(element.id)
 
     def export_data(self):
         """
         Handle export data request.
         """
+        # the export reads the database, so the changes still pending in the
+        # unit of work are written first
+        self.flush()
         user_id = self.user.id
 
         export_module = ExportModule(self._db)
@@ -0,0 +1,167 @@
+"""
+Background loading of the data shown by the states.
+
+Tk widgets can only be used from the thread that runs the main loop, so the
+slow calls (database queries) run on a thread pool and their results are
+handed back to the Tk thread with root.after, where the callbacks can update
+the view.
+"""
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LoadHandle:
+    """
+    A load submitted to the BackgroundLoader.
+
+    attributes:
+        key: the owner of the load, e.g. the state that started it.
+        cancelled: True if the load was cancelled; its callbacks are not
+            called.
+    """
+
+    def __init__(self, key, on_done, on_error):
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        True if the load was cancelled.
+        """
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Cancels the load. If it did not start it will not run; if it is
+        running, its result is dropped.
+        """
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundLoader:
+    """
+    Runs functions on a thread pool and calls their callbacks on the Tk
+    thread.
+
+    args:
+        root: the Tk root, used to schedule the callbacks with after.
+        max_workers: the number of worker threads.
+        poll_interval: milliseconds between the checks for finished loads.
+
+    methods:
+        submit: runs a function in the background.
+        cancel: cancels the loads of a key, or every load.
+        shutdown: stops the worker threads.
+    """
+
+    def __init__(self, root, max_workers: int = 2, poll_interval: int = 20):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="loader")
+        self._finished = queue.Queue()
+        self._loads = []
+        self._lock = threading.Lock()
+        self._polling = False
+
+    def submit(self, key, function, on_done, on_error=None) -> LoadHandle:
+        """
+        Runs a function in the background, cancelling the loads of the same
+        key still in flight.
+
+        args:
+            key: the owner of the load.
+            function: the function to run, without arguments.
+            on_done: called on the Tk thread with the result.
+            on_error: called on the Tk thread with the exception, if the
+                function raises.
+
+        returns:
+            The handle of the load.
+        """
+        self.cancel(key)
+        handle = LoadHandle(key, on_done, on_error)
+        with self._lock:
+            self._loads.append(handle)
+        # run in a copy of the caller's context, so a deadline set around
+        # the submit also bounds the load
+        context = contextvars.copy_context()
+        handle.future = self._executor.submit(context.run, self._run, handle,
+                                              function)
+        self._start_polling()
+        return handle
+
+    def cancel(self, key=None) -> None:
+        """
+        Cancels the loads of a key, or every load if no key is given.
+
+        args:
+            key: the owner of the loads.
+        """
+        with self._lock:
+            cancelled = [handle for handle in self._loads
+                         if key is None or handle.key is key]
+            self._loads = [handle for handle in self._loads
+                           if handle not in cancelled]
+        for handle in cancelled:
+            handle.cancel()
+
+    def shutdown(self) -> None:
+        """
+        Cancels every load and stops the worker threads.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, handle: LoadHandle, function) -> None:
+        """
+        Runs a function on a worker thread and queues its outcome.
+        """
+        if handle.cancelled:
+            return
+        try:
+            outcome = (True, function())
+        except Exception as error: # pylint: disable=broad-except
+            outcome = (False, error)
+        self._finished.put((handle, outcome))
+
+    def _start_polling(self) -> None:
+        """
+        Schedules the check for finished loads on the Tk thread.
+        """
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self) -> None:
+        """
+        Calls the callbacks of the finished loads. Runs on the Tk thread.
+        """
+        while True:
+            try:
+                handle, (succeeded, value) = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                if handle in self._loads:
+                    self._loads.remove(handle)
+            if handle.cancelled:
+                continue
+            if succeeded:
+                handle.on_done(value)
+            elif handle.on_error is not None:
+                handle.on_error(value)
+
+        with self._lock:
+            pending = bool(self._loads)
+        self._polling = False
+        if pending:
+            self._start_polling()
@@ -0,0 +1,209 @@
+"""
+Events tree shown by the views, kept up to date incrementally.
+
+The tree has the format:
+{
+    year: {
+        month: {
+            day: {
+                hour: {
+                    minute: [event1, event2, ...]
+                }
+            }
+        }
+    }
+}
+
+Each window (e.g. a month) is loaded from the ElementManagement once. After
+that, created, changed and deleted elements and changes of the selected
+schedules only patch the buckets they touch, so navigating between windows
+already loaded does not query or rebuild anything.
+"""
+import datetime
+import threading
+
+from src.calendar_elements.element_management import merge_window
+from src.observer.observer import Publisher
+
+
+def add_to_tree(tree: dict, element) -> list:
+    """
+    Add an element to the bucket of the minute its display interval starts.
+
+    Returns the bucket.
+    """
+    date = element.get_display_interval()[0]
+    bucket = tree.setdefault(date.year, {}).setdefault(date.month, {}) \
+        .setdefault(date.day, {}).setdefault(date.hour, {}) \
+        .setdefault(date.minute, [])
+    bucket.append(element)
+    return bucket
+
+
+class EventsTree:
+    """
+    Events of the selected schedules in the tree format of the views.
+
+    attributes:
+        schedule_ids: the selected schedules.
+
+    methods:
+        window: returns the events displayed in a window.
+        set_schedule_ids: changes the selected schedules.
+        element_changed: patches the tree with a created, changed or
+            deleted element; subscribed to the ElementManagement.
+    """
+
+    def __init__(self, element_management, schedule_ids: list):
+        self._element_management = element_management
+        self.schedule_ids = list(schedule_ids)
+        self._tree = {}
+        self._windows = []
+        # element id -> {occurrence start: occurrence} of the placed events
+        self._placed = {}
+        # schedules selected since the loaded windows were loaded, whose
+        # events are loaded by the next call to window
+        self._unloaded = []
+        # incremented by every change of the tree or the selection, so a
+        # load that ran meanwhile is not merged with stale results
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def window(self, start: datetime.datetime, end: datetime.datetime) -> dict:
+        """
+        Returns the events of the days in [start, end), loading the window
+        the first time it is asked for.
+
+        The result is a copy of the part of the tree in the window, so the
+        views can keep it while the tree changes.
+
+        The queries run without the lock, so the Tk thread can change the
+        selection and patch the tree meanwhile; if it does, the results are
+        dropped and the queries run again, answered by the time-range
+        indexes this time.
+        """
+        while True:
+            with self._lock:
+                added, self._unloaded = self._unloaded, []
+                windows = list(self._windows)
+                schedule_ids = list(self.schedule_ids)
+                generation = self._generation
+                loaded = any(loaded_start <= start and end <= loaded_end
+                             for loaded_start, loaded_end in windows)
+                if not added and loaded:
+                    return self._copy(start, end)
+
+            elements = []
+            if added:
+                for loaded_start, loaded_end in windows:
+                    elements += self._element_management.query_occurrences(
+                        added, loaded_start, loaded_end)
+            if not loaded:
+                elements += self._element_management.query_occurrences(
+                    schedule_ids, start, end)
+
+            with self._lock:
+                if self._generation != generation:
+                    self._unloaded = [schedule_id for schedule_id
+                                      in dict.fromkeys(added + self._unloaded)
+                                      if schedule_id in self.schedule_ids]
+                    continue
+                for element in elements:
+                    self._place(element)
+                if not loaded:
+                    self._windows = merge_window(self._windows, start, end)
+                return self._copy(start, end)
+
+    def set_schedule_ids(self, schedule_ids: list) -> None:
+        """
+        Changes the selected schedules, removing the events that are no
+        longer in a selected schedule. The events of the new ones are loaded
+        by the next call to window, so this does not query the database and
+        can run on the Tk thread.
+        """
+        with self._lock:
+            self._generation += 1
+            added = [schedule_id for schedule_id in schedule_ids
+                     if schedule_id not in self.schedule_ids]
+            self.schedule_ids = list(schedule_ids)
+            selected = set(self.schedule_ids)
+
+            for element_id, occurrences in list(self._placed.items()):
+                element = next(iter(occurrences.values()))
+                if not selected.intersection(element.schedules):
+                    self._remove(element_id)
+
+            self._unloaded = [schedule_id for schedule_id
+                              in self._unloaded + added
+                              if schedule_id in selected]
+
+    def element_changed(self, change: str, element) -> None:
+        """
+        Patches the tree with a created, changed or deleted element: its
+        events are removed and, if it is still in a selected schedule,
+        placed again in the loaded windows. An element refreshed from the
+        database is looked up again, as it may have been deleted.
+        """
+        with self._lock:
+            self._generation += 1
+            self._remove(element.id)
+            if change == Publisher.REFRESHED:
+                element = self._element_management.find_element(element.id)
+                if element is None:
+                    return
+            if change == Publisher.DELETED or \
+                    not set(self.schedule_ids).intersection(element.schedules):
+                return
+            for start, end in self._windows:
+                for occurrence in element.get_occurrences(start, end):
+                    self._place(occurrence)
+
+    def _place(self, element) -> None:
+        """
+        Adds an event to its bucket, unless it is already there (e.g. an
+        event in two selected schedules or in two loaded windows).
+        """
+        start = element.get_display_interval()[0]
+        occurrences = self._placed.setdefault(element.id, {})
+        if start not in occurrences:
+            add_to_tree(self._tree, element)
+            occurrences[start] = element
+
+    def _remove(self, element_id: str) -> None:
+        """
+        Removes the events of an element, dropping the buckets left empty.
+        """
+        for start, occurrence in self._placed.pop(element_id, {}).items():
+            path = [self._tree]
+            for key in (start.year, start.month, start.day, start.hour):
+                path.append(path[-1][key])
+            bucket = path[-1][start.minute]
+            bucket[:] = [element for element in bucket
+                         if element is not occurrence]
+            keys = [start.year, start.month, start.day, start.hour,
+                    start.minute]
+            # prune the empty levels, from the minute up
+            while keys and not path[-1][keys[-1]]:
+                del path[-1][keys.pop()]
+                path.pop()
+
+    def _copy(self, start: datetime.datetime, end: datetime.datetime) -> dict:
+        """
+        Copies the buckets of the days in [start, end).
+        """
+        copy = {}
+        first_day = start.date()
+        for year, months in self._tree.items():
+            if not start.year <= year <= end.year:
+                continue
+            for month, days in months.items():
+                for day, hours in days.items():
+                    date = datetime.date(year, month, day)
+                    if date < first_day or \
+                            datetime.datetime.combine(date, datetime.time()) >= end:
+                        continue
+                    copy.setdefault(year, {}).setdefault(month, {})[day] = {
+                        hour: {minute: list(bucket)
+                               for minute, bucket in minutes.items()}
+                        for hour, minutes in hours.items()}
+        return copy
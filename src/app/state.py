@@ -51,15 +51,37 @@ class State(ABC):
 
     def clear(self) -> None:
         """
-        Handle clear request.
+        Handle clear request. The loads still running for this state are
+        cancelled, since their results would go to a view that is gone.
         """
+        self.context.cancel_loads(self)
         self.view.clear_view()
 
+    def load_in_background(self, function, on_done, on_error=None) -> None:
+        """
+        Run a slow function (e.g. a database query) on the application's
+        BackgroundLoader and call on_done with its result on the Tk thread.
+        A new load cancels the previous one of the same state.
+        """
+        self.context.loader.submit(self, function, on_done,
+                                   on_error or self.load_failed)
+
+    def load_failed(self, error) -> None:
+        """
+        Handle a background load that raised an exception.
+        """
+        print(f"\033[91mLoad failed: {error!r}\033[0m")
+
     def transition_to(self, state_enum, **kwargs) -> None:
         """
         The State defines a method for transitioning the Application to
         another State.
         """
+        # the states of a logged in user check that its session is still
+        # valid, and go back to the login if it is not
+        if state_enum in (StatesEnum.MAIN, StatesEnum.DAYEVENTS) and \
+                not self.context.check_session():
+            state_enum = StatesEnum.LOGIN
 
         if state_enum == StatesEnum.SPLASH:
             from src.app.state_machine.splash_state import SplashState
@@ -10,6 +10,10 @@ class DayEventsState(State):
     State that shows and manage the user's events for a specific day.
     """
     def __init__(self, context, day_events, selected_day):
+        """
+        day_events is the events tree of the selected day, or None to load
+        it in the background.
+        """
         super().__init__(context)
 
         if not self.logged_in_user():
@@ -38,37 +42,35 @@ class DayEventsState(State):
         self.view.go_back_button.bind("<Button-1>", self.go_back)
         self.view.create_event_button.bind("<Button-1>", self.create_event)
 
-        self.bind_hour_buttons()
-        self.bind_event_buttons()
+        # the rows of the day are recycled as the list scrolls, so the view
+        # calls back with the half hour or the event clicked
+        self.view.on_hour_click = self.hour_button_click
+        self.view.on_event_click = self.event_button_click
         self.bind_create_event_button()
         self.bind_delete_event_button()
         self.bind_update_event_button()
 
-    def bind_hour_buttons(self):
+        if self.day_events is None:
+            self.load_in_background(self.load_day_events, self.day_events_loaded)
+
+    def load_day_events(self):
         """
-        Bind the hour buttons.
+        Load the events of the selected day. Runs on a worker thread.
         """
-        for (hour, minute), hour_frame in self.view.hour_buttons.items():
-            # adding a click event to the hour frame
-            hour_frame.bind("<Button-1>", lambda event, frame=hour_frame, hour=hour, minute=minute: self.hour_button_click(event, hour, minute, frame))
-            
-            # adding a hover effect to the hour frame
-            color = hour_frame._fg_color # pylint: disable=protected-access
-            hover_color = "gray"
-            hour_frame.bind("<Enter>", lambda event, frame=hour_frame, hover_color=hover_color: frame.configure(fg_color=hover_color))
-            hour_frame.bind("<Leave>", lambda event, frame=hour_frame, color=color: frame.configure(fg_color=color))
+        start = datetime.datetime.combine(self.selected_day, datetime.time())
+        end = start + datetime.timedelta(days=1)
+        events_tree = self.context.get_user_events(start, end)
+        day = self.selected_day
+        return events_tree.get(day.year, {}).get(day.month, {}).get(day.day, {})
 
-    def bind_event_buttons(self):
+    def day_events_loaded(self, day_events):
         """
-        Bind the event buttons.
+        Show the events loaded in the background.
         """
-        for event_button in self.view.event_buttons:
-            button = event_button["button"]
-            element = event_button["event"]
-            button.bind("<Button-1>", lambda event,
-                element=element: self.event_button_click(event, element))
+        self.day_events = day_events
+        self.view.set_day_events(day_events)
 
-    def event_button_click(self, _event, element):
+    def event_button_click(self, element):
         """
         Handle event button click.
         """
@@ -80,17 +82,10 @@ class DayEventsState(State):
 
         self.view.update_event_managing_elements()
 
-    def hour_button_click(self, _event, hour, minute, hour_frame):
+    def hour_button_click(self, hour, minute):
         """
         Handle hour button click.
         """
-
-        # changing the color of the hour frame for a second
-        fg_color = hour_frame._fg_color # pylint: disable=protected-access
-        glow_color = "green"
-        hour_frame.configure(fg_color=glow_color)
-        self.view.root.after(300, lambda: hour_frame.configure(fg_color=fg_color))
-
         self.view.currently_selected_hour = int(hour)
         self.view.currently_selected_minute = int(minute)
         self.currently_selected_event = None
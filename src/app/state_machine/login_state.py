@@ -3,10 +3,14 @@ Login State, here the user must input his credentials to login.
 """
 from src.app.state import State, StatesEnum
 from src.app.views.login_view import LoginView
+from src.auth.authentication import UserNotFound
 
 class LoginState(State):
     def __init__(self, context):
         super().__init__(context)
+        # True while a password is checked, so a second click or Enter does
+        # not start another login
+        self.checking = False
 
         # check if the user is already logged in
         if self.context.user:
@@ -33,13 +37,48 @@ class LoginState(State):
         """
         Handle login button click.
         """
+        if self.checking:
+            return
         username = self.view.user_id_entry.get()
         password = self.view.password_entry.get()
 
         print("Logging in...")
-        if self.context.login(username, password):
+        try:
+            user, verified = self.context.check_password(username, password)
+        except UserNotFound as error:
+            print(f"Login failed: {error}")
+            return
+        # only the password check runs in the background; the user is
+        # logged in on the Tk thread once it finishes
+        self.set_checking(True)
+        self.load_in_background(
+            verified.result,
+            lambda matches: self.login_finished(user, password, matches),
+            self.login_failed)
+
+    def login_finished(self, user, password, verified):
+        """
+        Handle the end of the password check.
+        """
+        self.set_checking(False)
+        if self.context.login(user, password, verified):
             # transition to main state
             self.transition_to(StatesEnum.MAIN)
+
+    def login_failed(self, error):
+        """
+        Handle a password check that raised an exception.
+        """
+        self.set_checking(False)
+        self.load_failed(error)
+
+    def set_checking(self, checking):
+        """
+        Disable the login button while the password is checked.
+        """
+        self.checking = checking
+        self.view.login_button.configure(
+            state="disabled" if checking else "normal")
     
     def go_back(self, _event):
         """
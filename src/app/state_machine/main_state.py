@@ -5,6 +5,7 @@ import datetime
 
 from src.app.views.main_view import MainView
 from src.app.state import State, StatesEnum
+from src.calendar_elements.daily_aggregates import month_window
 
 from src.schedule.schedule_management import ScheduleManagement
 from src.user.user_management import UserManagement
@@ -26,13 +27,16 @@ class MainState(State):
             # transition to splash state
             self.transition_to(StatesEnum.SPLASH)
 
-        self.events_tree = self.context.get_user_events()
+        # loaded in the background by render
+        self.events_tree = None
 
         self.selected_month = month
         self.selected_year = year
 
-        # set the view
-        self.view = MainView(self.context.ui.root, self.events_tree)
+        # set the view, created once and then updated in place
+        if self.context.ui.main_view is None:
+            self.context.ui.main_view = MainView(self.context.ui.root, self.events_tree)
+        self.view = self.context.ui.main_view
         # update the view in the ui
         self.context.ui.view = self.view
 
@@ -50,38 +54,83 @@ class MainState(State):
         self.view.selected_date = datetime.date(self.selected_year, self.selected_month, 1)
         self.view.show()
 
-        # bind events
-        self.view.logout_button.bind("<Button-1>", self.logout)
-        self.view.go_back_button.bind("<Button-1>", self.go_back)
+        # bind events; the widgets outlive the state, so their commands are
+        # replaced instead of adding bindings
+        self.view.logout_button.configure(command=self.logout)
+        self.view.go_back_button.configure(command=self.go_back)
 
-        self.view.next_month_button.bind("<Button-1>", self.go_next_month)
-        self.view.prev_month_button.bind("<Button-1>", self.go_prev_month)
+        self.view.next_month_button.configure(command=self.go_next_month)
+        self.view.prev_month_button.configure(command=self.go_prev_month)
 
-        self.view.export_data_button.bind("<Button-1>", self.export_data)
+        self.view.export_data_button.configure(command=self.export_data)
 
-        # bind calendar buttons, each key of the tree is the (year, month, day) tuple
-        for yy_mm_dd, button in self.view.calendar_buttons.items():
-            button.bind("<Button-1>", lambda event, args=yy_mm_dd: self.show_day_events(event, args))
+        # bind calendar buttons, each one shows the day at its cell
+        for cell, button in enumerate(self.view.day_buttons):
+            button.configure(command=lambda cell=cell: self.select_day(cell))
+
+        self.bind_schedule_checkboxes()
 
-        # bind schedule checkboxes
-        for schedule_id, checkbox in self.view.schedules_checkboxes.items():
-            checkbox.bind("<Button-1>", lambda event, args=schedule_id: self.toggle_schedule(event, args))
-        
         # bind add schedule button
-        self.view.add_schedule_button.bind("<Button-1>", self.add_schedule)
+        self.view.add_schedule_button.configure(command=self.add_schedule)
+
+        self.load_events()
+
+    def bind_schedule_checkboxes(self):
+        """
+        Bind the schedule checkboxes, including the ones just created.
+        """
+        for schedule_id, checkbox in self.view.schedules_checkboxes.items():
+            checkbox.configure(command=lambda args=schedule_id: self.toggle_schedule(None, args))
+
+    def show_month(self):
+        """
+        Show the selected month in the view and load its events, updating
+        the calendar in place.
+        """
+        # changes made in this state are written before the month is loaded
+        self.context.flush()
+        self.events_tree = None
+        self.view.selected_date = datetime.date(self.selected_year, self.selected_month, 1)
+        self.view.show_month()
+        self.load_events()
+
+    def load_events(self):
+        """
+        Load the daily counts of the selected month and then its events on a
+        worker thread, so the window does not freeze while the database is
+        queried. The counts need a single small query, so the badges show
+        up before the events are loaded.
+        """
+        year, month = self.selected_year, self.selected_month
+        self.load_in_background(lambda: self.context.get_day_counts(year, month),
+                                self.day_counts_loaded)
+
+    def day_counts_loaded(self, day_counts):
+        """
+        Show the daily counts and load the events of the month.
+        """
+        self.view.set_day_counts(day_counts)
+
+        start, end = month_window(self.selected_year, self.selected_month)
+        self.load_in_background(lambda: self.context.get_user_events(start, end),
+                                self.events_loaded)
+
+    def events_loaded(self, events_tree):
+        """
+        Show the events loaded in the background.
+        """
+        self.events_tree = events_tree
+        self.view.set_elements(events_tree)
     
     def toggle_schedule(self, _event, schedule_id):
         """
         Toggle the schedule checkbox.
         """
-        if schedule_id in self.context.selected_schedules:
-            self.context.selected_schedules.remove(schedule_id)
-        else:
-            self.context.selected_schedules.append(schedule_id)
+        self.context.toggle_schedule(schedule_id)
 
-        self.transition_to(StatesEnum.MAIN, month=self.selected_month, year=self.selected_year)
+        self.show_month()
 
-    def add_schedule(self, _event):
+    def add_schedule(self, _event=None):
         """
         Handle add schedule button click.
         """
@@ -92,20 +141,31 @@ class MainState(State):
         new_schedule = schedule_management.create_schedule(schedule_id=new_id, title=f"just created schedule {new_id}", description="", elements=[], permissions={user.id: "owner"})
         user_management.add_schedule_to_user(user_id=user.id, schedule_id=new_id, permission="owner")
 
-        self.transition_to(StatesEnum.MAIN, month=self.selected_month, year=self.selected_year)
+        # only the checkbox of the new schedule is created
+        self.view.schedules = self.context.user.get_schedules()
+        self.view.show_schedules()
+        self.bind_schedule_checkboxes()
 
-    def logout(self, _event):
+    def logout(self, _event=None):
         """
         Handle logout button click.
         """
         self.transition_to(StatesEnum.LOGGOUT)
 
-    def go_back(self, _event):
+    def go_back(self, _event=None):
         """
         Handle go back button click.
         """
         self.transition_to(StatesEnum.LOGGOUT)
 
+    def select_day(self, cell):
+        """
+        Handle day button click, for the day shown at a cell of the calendar.
+        """
+        day = self.view.day_dates[cell]
+        if day is not None:
+            self.show_day_events(None, (day.year, day.month, day.day))
+
     def show_day_events(self, _event, selected_date):
         """
         Handle day button click.
@@ -115,11 +175,15 @@ class MainState(State):
         day = selected_date[2]
 
         selected_day = datetime.date(year, month, day)
-        day_events = self.events_tree.get(year, {}).get(month, {}).get(day, {})
+        if self.events_tree is None:
+            # still loading, the day events state loads its own events
+            day_events = None
+        else:
+            day_events = self.events_tree.get(year, {}).get(month, {}).get(day, {})
 
         self.transition_to(StatesEnum.DAYEVENTS, day_events=day_events, selected_day=selected_day)
 
-    def go_next_month(self, _event):
+    def go_next_month(self, _event=None):
         """
         Handle next month button click.
         """
@@ -129,9 +193,9 @@ class MainState(State):
         else:
             self.selected_month += 1
 
-        self.transition_to(StatesEnum.MAIN, month=self.selected_month, year=self.selected_year)
+        self.show_month()
 
-    def go_prev_month(self, _event):
+    def go_prev_month(self, _event=None):
         """
         Handle previous month button click.
         """
@@ -141,9 +205,9 @@ class MainState(State):
         else:
             self.selected_month -= 1
 
-        self.transition_to(StatesEnum.MAIN, month=self.selected_month, year=self.selected_year)
+        self.show_month()
 
-    def export_data(self, _event):
+    def export_data(self, _event=None):
         """
         Handle export data button click.
         """
@@ -7,6 +7,9 @@ from src.app.views.sign_up_view import SignUpView
 class SignUpState(State):
     def __init__(self, context):
         super().__init__(context)
+        # True while the password is hashed, so a second click or Enter
+        # does not create the user twice
+        self.hashing = False
 
         # check if the user is already logged in
         if self.context.user:
@@ -33,16 +36,53 @@ class SignUpState(State):
         """
         Handle sign up button click.
         """
+        if self.hashing:
+            return
         user_id = self.view.user_id_entry.get()
         username = self.view.user_id_entry.get()
         email = self.view.email_entry.get()
         password = self.view.password_entry.get()
 
         print("Signing up...")
-        if self.context.sign_up(user_id, username, email, password):
+        # only hashing the password runs in the background; the user is
+        # created on the Tk thread once it finishes
+        self.set_hashing(True)
+        self.load_in_background(
+            self.context.hash_password(password).result,
+            lambda hashed_password: self.sign_up_finished(
+                user_id, username, email, hashed_password),
+            self.sign_up_failed)
+
+    def sign_up_finished(self, user_id, username, email, hashed_password):
+        """
+        Handle the end of the password hash.
+        """
+        self.set_hashing(False)
+        try:
+            signed_up = self.context.sign_up(user_id, username, email,
+                                             hashed_password)
+        except Exception as error: # pylint: disable=broad-except
+            self.load_failed(error)
+            return
+        if signed_up:
             # transition to main state
             self.transition_to(StatesEnum.MAIN)
 
+    def sign_up_failed(self, error):
+        """
+        Handle a password hash that raised an exception.
+        """
+        self.set_hashing(False)
+        self.load_failed(error)
+
+    def set_hashing(self, hashing):
+        """
+        Disable the sign up button while the password is hashed.
+        """
+        self.hashing = hashing
+        self.view.sign_up_button.configure(
+            state="disabled" if hashing else "normal")
+
     def go_back(self, _event):
         """
         Handle go back button click.
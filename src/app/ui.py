@@ -24,6 +24,8 @@ class TkinterUI:
 
         # inicializa a view padrão
         self.view = SplashView(self.root)
+        # a MainView é criada uma vez e reutilizada (ver MainState)
+        self.main_view = None
 
 
     def show_day_events(self, day_events, day):
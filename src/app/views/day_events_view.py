@@ -2,11 +2,51 @@
 DayEventsView class, which is the view of the day events state.
 """
 import datetime
-from typing import Mapping, List
+from typing import Mapping, List, NamedTuple
 import customtkinter
 from src.app.views.view import View
+from src.app.views.virtual_list import VirtualList
 from src.calendar_elements.element_interface import Element
 
+# events shown side by side in a row of the list; a half hour with more
+# events continues in the next rows
+EVENTS_PER_ROW = 3
+
+
+class DayRow(NamedTuple):
+    """
+    A row of the list of the day: a half hour slot, or a continuation of it
+    (first is False), and up to EVENTS_PER_ROW of its events.
+    """
+    hour: int
+    minute: int
+    first: bool
+    events: list
+
+
+def day_rows(day_events: Mapping[int, Mapping[int, List[Element]]],
+             events_per_row: int = EVENTS_PER_ROW) -> List[DayRow]:
+    """
+    The rows of the list of the day: the 48 half hours, each one followed by
+    the rows its events need beyond the first.
+    """
+    slots = {}
+    for hour, hour_events in day_events.items():
+        for minute, events in hour_events.items():
+            # clamping the minute to 0 or 30
+            slots.setdefault((hour, minute // 30 * 30), []).extend(events)
+
+    rows = []
+    for hour in range(24):
+        for minute in (0, 30):
+            events = slots.get((hour, minute), [])
+            rows.append(DayRow(hour, minute, True, events[:events_per_row]))
+            for start in range(events_per_row, len(events), events_per_row):
+                rows.append(DayRow(hour, minute, False,
+                                   events[start:start + events_per_row]))
+    return rows
+
+
 class DayEventsView(View):
     """
     DayEventsView class, which is the view of the day events state.
@@ -51,8 +91,12 @@ class DayEventsView(View):
         self.event_management_frame = None
         self.today_events_frame = None
 
-        self.hour_buttons = {}
-        self.event_buttons = []
+        self.day_events_list = None
+        self.loading_label = None
+        # called with (hour, minute) when a half hour is clicked and with the
+        # element when an event is clicked
+        self.on_hour_click = None
+        self.on_event_click = None
 
         self.currently_selected_event = None
 
@@ -167,52 +211,43 @@ class DayEventsView(View):
         self.show_day_events()
     
     def show_day_events(self):
-        self.day_events_list = customtkinter.CTkScrollableFrame(self.today_events_frame, width=400)
+        self.day_events_list = VirtualList(self.today_events_frame, create_row=self.create_day_row, render_row=self.render_day_row, row_height=30, width=400)
         self.day_events_list.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
-        # day events elements
-        self.show_day_events_elements(self.day_events)
+        # day events elements, or a placeholder while they are loaded
+        if self.day_events is None:
+            self.loading_label = customtkinter.CTkLabel(self.today_events_frame, text="Carregando eventos...")
+            self.loading_label.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
+        self.show_day_events_elements(self.day_events or {})
 
-    def show_day_events_elements(self, day_events: Mapping[int, Mapping[int, List[Element]]]):
+    def set_day_events(self, day_events: Mapping[int, Mapping[int, List[Element]]]):
         """
-        Shows the day events elements
+        Shows the events loaded in the background, replacing the empty
+        hours shown meanwhile.
         """
+        self.day_events = day_events
+        if self.loading_label is not None:
+            self.loading_label.destroy()
+            self.loading_label = None
+        self.show_day_events_elements(day_events)
 
-        for hour in range(24):
-            self.show_hour_events(hour, day_events.get(hour, {}))
+    def show_day_events_elements(self, day_events: Mapping[int, Mapping[int, List[Element]]]):
+        """
+        Shows the day events elements. Only the rows in view have widgets,
+        so a busy day costs as much to show as an empty one.
+        """
+        self.day_events_list.set_rows(day_rows(day_events))
 
-    def show_hour_events(self, hour: int, hour_events: Mapping[int, List[Element]]):
+    def create_day_row(self, parent):
+        """
+        Creates the widgets of a row of the list: a frame with the time label
+        and EVENTS_PER_ROW event buttons, filled by render_day_row.
+        """
         label_config = {
             "height": 20,
             "width": 40
         }
 
-        padding_config = {
-            "padx": 8,
-            "pady": 3
-        }
-
-        events_framming = {}
-        for minute, events in hour_events.items():
-            # clamping the minute to 0 or 30
-            clamp_minute = minute // 30 * 30
-            events_framming[clamp_minute] = events_framming.get(clamp_minute, []) + events
-
-        for markings in [0, 1]:
-            hour_frame = customtkinter.CTkFrame(self.day_events_list)
-            hour_frame.pack(side="top", fill="both", expand=True, **padding_config)
-
-            events = events_framming.get(markings*30, [])
-
-            hour_label = customtkinter.CTkLabel(hour_frame, text=f"{hour:02d}:{markings*30:02d}", **label_config)
-            hour_label.pack(side="left")
-
-            for event in events:
-                self.event_button(hour_frame, event)
-
-            self.hour_buttons[(hour, markings*30)] = hour_frame
-    
-    def event_button(self, hour_frame, event):
         padding_config = {
             "padx": 2,
             "pady": 3,
@@ -220,12 +255,72 @@ class DayEventsView(View):
 
         event_label_height = 10
 
-        event_button = customtkinter.CTkButton(hour_frame, text=f"{event.title}", height=event_label_height, anchor="w")
-        event_button.pack(side="left", fill="both", expand=True, **padding_config)
-        self.event_buttons.append({
-            "event": event,
-            "button": event_button
-        })
+        hour_frame = customtkinter.CTkFrame(parent)
+        hour_frame.grid_columnconfigure(tuple(range(1, EVENTS_PER_ROW + 1)), weight=1)
+        hour_frame.hour_label = customtkinter.CTkLabel(hour_frame, text="", **label_config)
+        hour_frame.hour_label.grid(row=0, column=0, padx=8)
+        hour_frame.day_row = None
+
+        hour_frame.event_buttons = []
+        for column in range(EVENTS_PER_ROW):
+            event_button = customtkinter.CTkButton(hour_frame, text="", height=event_label_height, anchor="w",
+                command=lambda frame=hour_frame, column=column: self.event_clicked(frame, column))
+            event_button.grid(row=0, column=column + 1, sticky="nsew", **padding_config)
+            hour_frame.event_buttons.append(event_button)
+
+        # the row shows different half hours as the list scrolls, so the
+        # handlers look the current one up
+        color = hour_frame.cget("fg_color")
+        hover_color = "gray"
+        for widget in (hour_frame, hour_frame.hour_label):
+            widget.bind("<Button-1>", lambda event, frame=hour_frame: self.hour_clicked(frame))
+            widget.bind("<Enter>", lambda event, frame=hour_frame: frame.configure(fg_color=hover_color))
+            widget.bind("<Leave>", lambda event, frame=hour_frame: frame.configure(fg_color=color))
+        return hour_frame
+
+    def render_day_row(self, hour_frame, day_row: DayRow):
+        """
+        Fills the widgets of a row with a half hour and its events, changing
+        only what differs from the row shown before.
+        """
+        if hour_frame.day_row == day_row:
+            return
+        hour_frame.day_row = day_row
+
+        text = f"{day_row.hour:02d}:{day_row.minute:02d}" if day_row.first else ""
+        if hour_frame.hour_label.cget("text") != text:
+            hour_frame.hour_label.configure(text=text)
+
+        for column, event_button in enumerate(hour_frame.event_buttons):
+            if column < len(day_row.events):
+                title = f"{day_row.events[column].title}"
+                if event_button.cget("text") != title:
+                    event_button.configure(text=title)
+                event_button.grid()
+            else:
+                event_button.grid_remove()
+
+    def hour_clicked(self, hour_frame):
+        """
+        Handles a click on a half hour: glows its row for a moment and calls
+        on_hour_click.
+        """
+        day_row = hour_frame.day_row
+        fg_color = hour_frame.cget("fg_color")
+        hour_frame.configure(fg_color="green")
+        self.root.after(300, lambda: hour_frame.configure(fg_color=fg_color))
+        if self.on_hour_click is not None and day_row is not None:
+            self.on_hour_click(day_row.hour, day_row.minute)
+
+    def event_clicked(self, hour_frame, column):
+        """
+        Handles a click on an event button, calling on_event_click with the
+        event the button shows.
+        """
+        day_row = hour_frame.day_row
+        if self.on_event_click is not None and day_row is not None and \
+                column < len(day_row.events):
+            self.on_event_click(day_row.events[column])
 
     def show_time_picker(self):
         # event time picker
@@ -1,11 +1,49 @@
 """
 Main view is the view that shows the user's calendar.
+
+The widgets of the view are created once and kept while the application
+runs: changing the month, the selected schedules or the user updates the
+widgets that changed (texts, colours, checkboxes) instead of rebuilding the
+view, since creating customtkinter widgets is slow.
 """
 import customtkinter
 from src.app.views.view import View
 import datetime
 import calendar
 
+# the calendar grid always has room for the 6 weeks a month can span
+CALENDAR_WEEKS = 6
+
+
+def month_cells(year: int, month: int) -> list:
+    """
+    The days of the calendar grid of a month, week by week from Sunday.
+
+    Returns:
+        list: CALENDAR_WEEKS * 7 dates, None for the cells out of the month.
+    """
+    weeks = calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month)
+    cells = [datetime.date(year, month, day) if day else None
+             for week in weeks for day in week]
+    return cells + [None] * (CALENDAR_WEEKS * 7 - len(cells))
+
+
+def day_text(day: datetime.date, counts: dict = None) -> str:
+    """
+    The text of a day button: the day, the number of elements of the day and
+    the hours of events, e.g. "12\n3 (2.5h)".
+    """
+    if day is None:
+        return " "
+    if not counts:
+        return str(day.day)
+    total = counts["event"] + counts["task"] + counts["reminder"]
+    text = f"{day.day}\n{total}"
+    if counts["busy_minutes"]:
+        text += f" ({counts['busy_minutes'] / 60:.1f}h)"
+    return text
+
+
 class MainView(View):
     """
     Main view is the view that shows the user's calendar.
@@ -17,11 +55,13 @@ class MainView(View):
         self.go_back_button = None
 
         self.logged_user_name = ""
+        self.logged_user_name_label = None
 
         self.elements = elements
         self.schedules = None
         self.selected_schedules_ids = None
 
+        self.schedules_frame = None
         self.schedules_checkboxes = {}
         self.add_schedule_button = None
 
@@ -31,7 +71,15 @@ class MainView(View):
         self.month_frame = None
 
         self.calendar_frame = None
+        self.calendar_title = None
+        # the pool of day buttons, the day each one shows and its text
+        self.day_buttons = []
+        self.day_dates = []
+        self.day_texts = []
+        self.visible_weeks = CALENDAR_WEEKS
+        # the buttons of the days of the month, by (year, month, day)
         self.calendar_buttons = {}
+        self.loading_label = None
 
         self.selected_date = datetime.date.today()
 
@@ -52,9 +100,30 @@ class MainView(View):
         self.root.grid_rowconfigure((0), weight=1) # navbar
         self.root.grid_rowconfigure((1), weight=9) # main
 
-        self.show_sidebar()
-        self.show_navbar()
-        self.show_main()
+        if self.sidebar is None:
+            self.show_sidebar()
+            self.show_navbar()
+            self.show_main()
+            self.keep(self.sidebar, self.navbar, self.main_frame)
+        else:
+            # grid again where they were before clear_view
+            self.sidebar.grid()
+            self.navbar.grid()
+            self.main_frame.grid()
+
+        self.show_user_name()
+        self.show_schedules()
+        self.show_month()
+
+    def clear_view(self) -> None:
+        """
+        Hides the view, keeping its widgets to be shown again.
+        """
+        if self.sidebar is not None:
+            self.sidebar.grid_remove()
+            self.navbar.grid_remove()
+            self.main_frame.grid_remove()
+        super().clear_view()
 
     def show_sidebar(self):
         self.sidebar = customtkinter.CTkFrame(self.root)
@@ -67,19 +136,39 @@ class MainView(View):
         self.logout_button = customtkinter.CTkButton(self.sidebar, text="Logout")
         self.logout_button.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
-        schedules_frame = customtkinter.CTkFrame(self.sidebar)
-        schedules_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-        for schedule in self.schedules:
-            schedule_checkbox = customtkinter.CTkCheckBox(schedules_frame, text=schedule.title)
-            schedule_checkbox.pack(anchor="w", padx=10, pady=10, expand=True, fill="x")
-            if schedule.id in self.selected_schedules_ids:
-                schedule_checkbox.select()
-            else:
-                schedule_checkbox.deselect()
-        
+        self.schedules_frame = customtkinter.CTkFrame(self.sidebar)
+        self.schedules_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+
         self.add_schedule_button = customtkinter.CTkButton(self.sidebar, text="Adicionar agenda")
         self.add_schedule_button.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
 
+    def show_schedules(self):
+        """
+        Updates the schedule checkboxes: creates the ones of new schedules,
+        destroys the ones of removed schedules and only changes the title or
+        the selection of the others when they differ.
+        """
+        schedules = {schedule.id: schedule for schedule in self.schedules}
+        for schedule_id in list(self.schedules_checkboxes):
+            if schedule_id not in schedules:
+                self.schedules_checkboxes.pop(schedule_id).destroy()
+
+        for schedule_id, schedule in schedules.items():
+            schedule_checkbox = self.schedules_checkboxes.get(schedule_id)
+            if schedule_checkbox is None:
+                schedule_checkbox = customtkinter.CTkCheckBox(self.schedules_frame, text=schedule.title)
+                schedule_checkbox.pack(anchor="w", padx=10, pady=10, expand=True, fill="x")
+                self.schedules_checkboxes[schedule_id] = schedule_checkbox
+            elif schedule_checkbox.cget("text") != schedule.title:
+                schedule_checkbox.configure(text=schedule.title)
+
+            selected = schedule_id in self.selected_schedules_ids
+            if bool(schedule_checkbox.get()) != selected:
+                if selected:
+                    schedule_checkbox.select()
+                else:
+                    schedule_checkbox.deselect()
+
     def show_navbar(self):
         self.navbar = customtkinter.CTkFrame(self.root)
         self.navbar.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
@@ -94,6 +183,14 @@ class MainView(View):
         self.go_back_button = customtkinter.CTkButton(self.navbar, text="Voltar")
         self.go_back_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
 
+    def show_user_name(self):
+        """
+        Updates the welcome message if the user changed.
+        """
+        text = f"Bem vindo {self.logged_user_name}!"
+        if self.logged_user_name_label.cget("text") != text:
+            self.logged_user_name_label.configure(text=text)
+
     def show_main(self):
         self.main_frame = customtkinter.CTkFrame(self.root)
         self.main_frame.grid(row=1, column=1, padx=10, pady=10, sticky="nsew")
@@ -112,7 +209,9 @@ class MainView(View):
         self.show_calendar()
         self.show_next_month()
         self.show_previous_month()
-        
+
+        self.loading_label = customtkinter.CTkLabel(self.main_frame, text="Carregando eventos...")
+
         self.export_data_button = customtkinter.CTkButton(self.sidebar, text="Exportar dados")
         self.export_data_button.grid(row=3, column=0, padx=10, pady=10, sticky="w")
 
@@ -130,29 +229,62 @@ class MainView(View):
         self.show_calendar_elements()
 
     def show_calendar_elements(self):
+        """
+        Creates the month title and the pool of day buttons, which are filled
+        by show_month.
+        """
+        self.calendar_title = customtkinter.CTkLabel(self.calendar_frame, text="")
+        self.calendar_title.grid(row=0, column=0, padx=10, pady=10, sticky="ew", columnspan=7)
+
+        calendar_day_size = {
+            "width": 50,
+            "height": 40
+        }
+
+        for cell in range(CALENDAR_WEEKS * 7):
+            day_button = customtkinter.CTkButton(self.calendar_frame, text=" ", width=calendar_day_size["width"], height=calendar_day_size["height"])
+            day_button.grid(row=cell // 7 + 2, column=cell % 7, padx=1, pady=1, sticky="nsew")
+            self.day_buttons.append(day_button)
+            self.day_dates.append(None)
+            self.day_texts.append(" ")
+
+    def show_month(self):
+        """
+        Shows the month of selected_date in the pool of day buttons, changing
+        only the buttons whose day changed. The weeks the month does not span
+        are hidden.
+        """
         year = self.selected_date.year
         month = self.selected_date.month
 
         title = f"{calendar.month_name[month]} {year}"
+        if self.calendar_title.cget("text") != title:
+            self.calendar_title.configure(text=title)
+
+        cells = month_cells(year, month)
+        weeks = len(calendar.Calendar(calendar.SUNDAY).monthdayscalendar(year, month))
+        for cell in range(7 * min(weeks, self.visible_weeks), 7 * max(weeks, self.visible_weeks)):
+            if cell < 7 * weeks:
+                self.day_buttons[cell].grid()
+            else:
+                self.day_buttons[cell].grid_remove()
+        self.visible_weeks = weeks
 
-        calendar_title = customtkinter.CTkLabel(self.calendar_frame, text=title)
-        calendar_title.grid(row=0, column=0, padx=10, pady=10, sticky="ew", columnspan=7)
+        for cell, day in enumerate(cells):
+            self.day_dates[cell] = day
+            self._set_day_text(cell, day_text(day))
 
-        cal = calendar.TextCalendar(calendar.SUNDAY)
-        calendar_day_size = {
-            "width": 50,
-            "height": 40
-        }
+        self.calendar_buttons = {(day.year, day.month, day.day): self.day_buttons[cell]
+                                 for cell, day in enumerate(cells) if day}
+        self.set_elements(None)
 
-        for w, week in enumerate(cal.monthdayscalendar(year, month), 2):
-            for d, day in enumerate(week):
-                if day != 0:
-                    day_button = customtkinter.CTkButton(self.calendar_frame, text=day, width=calendar_day_size["width"], height=calendar_day_size["height"])
-                    day_button.grid(row=w, column=d, padx=1, pady=1, sticky="nsew")
-                    self.calendar_buttons[(year, month, day)] = day_button
-                else:
-                    day_button = customtkinter.CTkButton(self.calendar_frame, text=" ", width=calendar_day_size["width"], height=calendar_day_size["height"])
-                    day_button.grid(row=w, column=d, padx=1, pady=1, sticky="nsew")
+    def _set_day_text(self, cell, text):
+        """
+        Changes the text of a day button, if it is not already the text.
+        """
+        if self.day_texts[cell] != text:
+            self.day_buttons[cell].configure(text=text)
+            self.day_texts[cell] = text
 
     def show_next_month(self):
         self.next_month_button = customtkinter.CTkButton(self.month_frame, text=">", width=50, height=2)
@@ -161,3 +293,29 @@ class MainView(View):
     def show_previous_month(self):
         self.prev_month_button = customtkinter.CTkButton(self.month_frame, text="<", width=50, height=2)
         self.prev_month_button.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+
+    def show_loading(self):
+        """
+        Shows a placeholder while the events are loaded in the background.
+        """
+        self.loading_label.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
+
+    def set_elements(self, elements):
+        """
+        Sets the loaded events and hides the loading placeholder, or shows it
+        if the events are not loaded (None).
+        """
+        self.elements = elements
+        if elements is None:
+            self.show_loading()
+        else:
+            self.loading_label.grid_remove()
+
+    def set_day_counts(self, day_counts):
+        """
+        Shows on each day button the number of elements of the day and the
+        hours of events, e.g. "12\n3 (2.5h)".
+        """
+        for cell, day in enumerate(self.day_dates):
+            if day is not None:
+                self._set_day_text(cell, day_text(day, day_counts.get(day)))
@@ -1,5 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+import weakref
+
+# widgets that outlive the view that shows them (e.g. the widgets of the
+# MainView, which are hidden and shown again instead of being rebuilt), so
+# they are not destroyed by clear_view
+_kept_widgets = weakref.WeakSet()
 
 
 class View(ABC):
@@ -36,9 +42,17 @@ class View(ABC):
         The View's interface is responsible for rendering the UI.
         """
 
+    def keep(self, *widgets) -> None:
+        """
+        Keeps widgets of the root across views: clear_view does not destroy
+        them, the view that owns them hides them instead.
+        """
+        _kept_widgets.update(widgets)
+
     def clear_view(self) -> None:
         """
-        Clears the view.
+        Clears the view, destroying the widgets of the root that are not kept.
         """
         for child in self.root.winfo_children():
-            child.destroy()
\ No newline at end of file
+            if child not in _kept_widgets:
+                child.destroy()
@@ -0,0 +1,147 @@
+"""
+Virtualized scrolling list for the views.
+
+Only the rows in view have widgets: the list keeps a pool with as many row
+widgets as fit in its height and, when it is scrolled, fills the same
+widgets with the rows that became visible. Showing a list of any length
+creates the same number of widgets.
+"""
+import math
+import tkinter
+
+import customtkinter
+
+
+def first_visible(first: int, capacity: int, total: int) -> int:
+    """
+    Clamps the index of the first visible row, so the list is never scrolled
+    past its last row.
+
+    Returns:
+        int: The index of the first visible row.
+    """
+    return max(0, min(first, total - capacity))
+
+
+class VirtualList(customtkinter.CTkFrame):
+    """
+    Scrolling list of rows of the same height that only materializes the
+    rows in view.
+
+    args:
+        master: the parent widget.
+        create_row: function that creates the widget of a row in a parent;
+            called once per row of the pool.
+        render_row: function that fills the widget of a row with an item.
+        row_height: the height of the rows, in pixels.
+        height: the initial height of the list, in pixels.
+
+    methods:
+        set_rows: changes the items of the list.
+        scroll_to: scrolls to an item.
+    """
+    def __init__(self, master, create_row, render_row, row_height=30,
+                 height=400, **kwargs) -> None:
+        super().__init__(master, height=height, **kwargs)
+        self._create_row = create_row
+        self._render_row = render_row
+        self.row_height = row_height
+
+        self.rows = []
+        self.first = 0
+        # the row widgets, reused for the rows in view
+        self.pool = []
+        self.capacity = math.ceil(height / row_height)
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.body = customtkinter.CTkFrame(self, height=height,
+                                           fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self._scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.body.bind("<Configure>", self._resized)
+        self._bind_wheel(self.body)
+
+    def set_rows(self, rows: list) -> None:
+        """
+        Changes the items of the list, keeping the scroll position if
+        possible.
+        """
+        self.rows = rows
+        self._render()
+
+    def scroll_to(self, index: int) -> None:
+        """
+        Scrolls so the item at index is the first visible one.
+        """
+        self.first = index
+        self._render()
+
+    def _render(self) -> None:
+        """
+        Fills the row widgets with the rows in view, hiding the ones left
+        over, and updates the scrollbar.
+        """
+        self.first = first_visible(self.first, self.capacity, len(self.rows))
+        while len(self.pool) < self.capacity:
+            row = self._create_row(self.body)
+            self._bind_wheel(row)
+            self.pool.append(row)
+
+        for position, row in enumerate(self.pool):
+            index = self.first + position
+            if position < self.capacity and index < len(self.rows):
+                self._render_row(row, self.rows[index])
+                row.place(x=0, y=position * self.row_height, relwidth=1,
+                          height=self.row_height)
+            else:
+                row.place_forget()
+
+        if self.rows:
+            self.scrollbar.set(self.first / len(self.rows),
+                               min(1, (self.first + self.capacity) / len(self.rows)))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _resized(self, event) -> None:
+        """
+        Grows the pool to fill the new height of the list.
+        """
+        capacity = max(1, math.ceil(event.height / self.row_height))
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self._render()
+
+    def _scroll(self, *args) -> None:
+        """
+        Scrollbar command: ("moveto", fraction) or ("scroll", number,
+        "units" or "pages").
+        """
+        if args[0] == "moveto":
+            self.first = round(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = self.capacity if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self._render()
+
+    def _wheel(self, event) -> None:
+        """
+        Scrolls three rows per step of the mouse wheel.
+        """
+        if event.num == 4 or event.delta > 0:
+            self.first -= 3
+        else:
+            self.first += 3
+        self._render()
+
+    def _bind_wheel(self, widget) -> None:
+        """
+        Scrolls the list with the mouse wheel over a widget and the widgets
+        inside it.
+        """
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tkinter.Misc.bind(widget, sequence, self._wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
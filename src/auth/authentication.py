@@ -7,9 +7,8 @@ Classes:
 Exceptions:
     UserNotFound
 """
-import bcrypt
-
 from ..user.user_management import UserManagement
+from .password_hasher import PasswordHasher
 
 class UserManagementNotInitializedError(Exception):
     """Exception raised when user management module is not initialized"""
@@ -26,18 +25,23 @@ class AuthenticationModule:
 
     Methods:
         authenticate_user
+        authenticate
+        authenticate_async
         verify_password
 
     Attributes:
         user_management_module
+        password_hasher
     """
 
-    def __init__(self):
+    def __init__(self, password_hasher: PasswordHasher = None):
         """
         Constructor for AuthenticationModule
 
         Attributes:
             user_management_module (UserManagement): user management module
+            password_hasher (PasswordHasher): hasher of the passwords, the
+                shared one by default
         """
         # get the instance of the user management module
         try:
@@ -45,6 +49,8 @@ class AuthenticationModule:
         except UserManagementNotInitializedError:
             raise UserManagementNotInitializedError(
                 "User management module is not initialized!")
+        self.password_hasher = password_hasher or \
+            PasswordHasher.get_instance()
 
     def authenticate_user(self,
                             username: str,
@@ -59,22 +65,70 @@ class AuthenticationModule:
         Returns:
             bool: True if user is authenticated, False otherwise
         """
-        if not self.user_management_module.user_exists(username):
-            raise UserNotFound(f"Usuário {username} não encontrado!")
-        else:
-            user = self.user_management_module.get_user(username)
-            user_password = user.get_hashed_password()
+        return self.authenticate(username, password) is not None
+
+    def authenticate(self, username: str, password: str):
+        """
+        Function to authenticate user, returning the loaded user so it does
+        not have to be fetched again. If the password is right but its hash
+        was made with another cost factor, it is hashed again with the
+        current one.
+
+        Parameters:
+            username (str): username
+            password (str): password
 
-            if self.verify_password(password, user_password):
-                return True
-            else:
-                return False
+        Returns:
+            User: the user if it is authenticated, None otherwise
+        """
+        user = self._find_user(username)
+        user_password = user.get_hashed_password()
+        if not self.verify_password(password, user_password):
+            return None
+
+        if self.password_hasher.needs_rehash(user_password):
+            hashed_password = self.password_hasher.hash(password)
+            user.set_hashed_password(hashed_password.decode('utf-8'))
+        return user
+
+    def authenticate_async(self, username: str, password: str) -> tuple:
+        """
+        Function to start authenticating a user: the user is read on the
+        calling thread and only the password is checked on the worker pool
+        of the hasher, so a caller that must not block (e.g. the Tk loop)
+        can wait on the future and use the user on its own thread
+
+        Parameters:
+            username (str): username
+            password (str): password
+
+        Returns:
+            tuple: the user and the Future of True if the password is right
+        """
+        user = self._find_user(username)
+        return user, self.password_hasher.verify_async(
+            password, user.get_hashed_password())
+
+    def _find_user(self, username: str):
+        """
+        Function to get the user to authenticate
+
+        Parameters:
+            username (str): username
+
+        Returns:
+            User: the user, UserNotFound is raised if it does not exist
+        """
+        user = self.user_management_module.find_user(username)
+        if user is None:
+            raise UserNotFound(f"Usuário {username} não encontrado!")
+        return user
 
     def verify_password(self,
                         input_password: str,
                         hashed_password: str) -> bool:
         """
-        Function to verify password
+        Function to verify password, on the worker pool of the hasher
 
         Parameters:
             input_password (str): input password
@@ -83,5 +137,4 @@ class AuthenticationModule:
         Returns:
             bool: True if password is correct, False otherwise
         """
-        return bcrypt.checkpw(input_password.encode(),
-                              hashed_password.encode())
+        return self.password_hasher.verify(input_password, hashed_password)
@@ -0,0 +1,156 @@
+"""
+Module to hash and verify passwords
+
+bcrypt releases the GIL while it hashes, so the hashes run on a bounded
+thread pool: concurrent logins use several cores, and a caller that must not
+block (e.g. the Tk loop) can wait on the returned future instead.
+
+Classes:
+    PasswordHasher
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import bcrypt
+
+DEFAULT_ROUNDS = 12
+
+def _to_bytes(value) -> bytes:
+    """
+    Encodes a str as UTF-8; bytes are returned as they are.
+    """
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return value
+
+class PasswordHasher:
+    """
+    Class to hash and verify passwords with bcrypt on a worker pool
+
+    Methods:
+        get_instance
+        hash
+        verify
+        hash_async
+        verify_async
+        needs_rehash
+        shutdown
+
+    Attributes:
+        rounds: bcrypt cost factor of the new hashes
+        max_workers: maximum number of hashes computed at once
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, rounds: int = DEFAULT_ROUNDS,
+                     max_workers: int = None) -> 'PasswordHasher':
+        """
+        Get the shared instance of the PasswordHasher class
+        """
+        if not cls._instance:
+            cls._instance = cls(rounds, max_workers)
+        return cls._instance
+
+    def __init__(self, rounds: int = DEFAULT_ROUNDS, max_workers: int = None):
+        """
+        Constructor for PasswordHasher
+
+        Args:
+            rounds: bcrypt cost factor of the new hashes; each step doubles
+                the time of a hash
+            max_workers: maximum number of hashes computed at once, by
+                default the number of CPUs
+        """
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="bcrypt")
+
+    def hash_async(self, password: str) -> Future:
+        """
+        Hash a password on the worker pool
+
+        Args:
+            password: Password
+
+        Returns:
+            Future of the hashed password, as bytes
+        """
+        return self._executor.submit(self._hash, password)
+
+    def verify_async(self, password: str, hashed_password) -> Future:
+        """
+        Verify a password against a hash on the worker pool
+
+        Args:
+            password: Password
+            hashed_password: bcrypt hash, as str or bytes
+
+        Returns:
+            Future of True if the password matches, False otherwise
+        """
+        return self._executor.submit(self._verify, password, hashed_password)
+
+    def hash(self, password: str) -> bytes:
+        """
+        Hash a password, waiting for the worker pool
+
+        Args:
+            password: Password
+
+        Returns:
+            The hashed password
+        """
+        return self.hash_async(password).result()
+
+    def verify(self, password: str, hashed_password) -> bool:
+        """
+        Verify a password against a hash, waiting for the worker pool
+
+        Args:
+            password: Password
+            hashed_password: bcrypt hash, as str or bytes
+
+        Returns:
+            True if the password matches, False otherwise
+        """
+        return self.verify_async(password, hashed_password).result()
+
+    def needs_rehash(self, hashed_password) -> bool:
+        """
+        Whether a hash was made with a cost factor other than rounds, and
+        should be replaced the next time the password is known
+
+        Args:
+            hashed_password: bcrypt hash, as str or bytes, in the
+                "$2b$<cost>$<salt and hash>" format
+
+        Returns:
+            True if the hash should be replaced
+        """
+        parts = _to_bytes(hashed_password).split(b'$')
+        try:
+            return int(parts[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker threads once the submitted hashes finish
+        """
+        self._executor.shutdown(wait=True)
+
+    def _hash(self, password: str) -> bytes:
+        """
+        Hashes a password with a new salt. Runs on a worker thread.
+        """
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(_to_bytes(password), salt)
+
+    @staticmethod
+    def _verify(password: str, hashed_password) -> bool:
+        """
+        Checks a password against a hash. Runs on a worker thread.
+        """
+        return bcrypt.checkpw(_to_bytes(password), _to_bytes(hashed_password))
@@ -0,0 +1,309 @@
+"""
+Module to keep the sessions of the authenticated users
+
+A session is identified by a token signed with HMAC-SHA256, which carries the
+user ID and the expiry time. Validating a known token is a dictionary lookup;
+a token issued before a restart is checked by its signature, so it can be
+resumed without the password as long as the store uses the same secret (see
+load_secret). The revoked tokens are then kept in a file next to the secret,
+so a session ended by a logout cannot be resumed after a restart.
+
+Classes:
+    Session
+    SessionStore
+
+Functions:
+    load_secret
+    persistent_store
+
+Exceptions:
+    InvalidSessionError
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import NamedTuple
+
+DEFAULT_TTL = 8 * 60 * 60
+
+class InvalidSessionError(Exception):
+    """Exception raised when a session token is malformed, forged, expired
+    or revoked"""
+    pass
+
+class Session(NamedTuple):
+    """
+    An authenticated session
+
+    Attributes:
+        token: the signed token that identifies the session
+        user_id: the ID of the authenticated user
+        expires_at: the expiry time, in seconds since the epoch
+    """
+    token: str
+    user_id: str
+    expires_at: float
+
+def _encode(data: bytes) -> str:
+    """
+    Encodes bytes as URL-safe base64 without padding
+    """
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _decode(data: str) -> bytes:
+    """
+    Decodes URL-safe base64 without padding
+    """
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def load_secret(path: str) -> bytes:
+    """
+    Reads the secret of a SessionStore from a file, creating it with a new
+    random secret if it does not exist, so the tokens stay valid across
+    restarts
+
+    Args:
+        path: path of the secret file
+
+    Returns:
+        The secret
+    """
+    try:
+        with open(path, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        secret = os.urandom(32)
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(secret)
+        return secret
+
+def persistent_store(secret_path: str, ttl: float = DEFAULT_TTL,
+                     clock=time.time) -> 'SessionStore':
+    """
+    Creates a SessionStore whose sessions survive restarts: the secret is
+    read from secret_path (see load_secret) and the revoked tokens are kept
+    in secret_path + ".revoked"
+
+    Args:
+        secret_path: path of the secret file
+        ttl: seconds a new session is valid for
+        clock: function that returns the current time, in seconds since
+            the epoch
+
+    Returns:
+        The SessionStore
+    """
+    return SessionStore(secret=load_secret(secret_path), ttl=ttl, clock=clock,
+                        revocations_path=secret_path + '.revoked')
+
+class SessionStore:
+    """
+    Class to create and validate the sessions of the authenticated users
+
+    Methods:
+        create
+        validate
+        revoke
+        revoke_user
+        purge_expired
+
+    Attributes:
+        ttl: seconds a new session is valid for
+    """
+
+    def __init__(self, secret: bytes = None, ttl: float = DEFAULT_TTL,
+                 clock=time.time, revocations_path: str = None):
+        """
+        Constructor for SessionStore
+
+        Args:
+            secret: key of the token signatures; a random one by default,
+                which makes the tokens invalid after a restart
+            ttl: seconds a new session is valid for
+            clock: function that returns the current time, in seconds since
+                the epoch
+            revocations_path: file that keeps the revoked tokens until they
+                expire, needed to resume sessions after a restart with a
+                persisted secret; the revocations are only kept in memory
+                by default
+        """
+        self._secret = secret or os.urandom(32)
+        self.ttl = ttl
+        self._clock = clock
+        self._sessions = {}
+        # revoked token -> its expiry time, after which it is dropped
+        self._revoked = {}
+        self._revocations_path = revocations_path
+        self._lock = threading.Lock()
+        if revocations_path is not None:
+            self._load_revocations()
+
+    def _sign(self, payload: bytes) -> str:
+        """
+        Signs a token payload
+        """
+        return _encode(hmac.new(self._secret, payload,
+                                hashlib.sha256).digest())
+
+    def create(self, user_id: str) -> Session:
+        """
+        Creates a session for an authenticated user
+
+        Args:
+            user_id: the ID of the user
+
+        Returns:
+            The new session
+        """
+        expires_at = int(self._clock() + self.ttl)
+        payload = f"{expires_at}:{user_id}".encode('utf-8')
+        token = f"{_encode(payload)}.{self._sign(payload)}"
+        session = Session(token, user_id, expires_at)
+        with self._lock:
+            self._sessions[token] = session
+        return session
+
+    def validate(self, token: str) -> Session:
+        """
+        Gets the session of a token
+
+        Args:
+            token: the session token
+
+        Returns:
+            The session
+
+        Raises:
+            InvalidSessionError: if the token is malformed, forged, expired
+                or revoked
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+        if session is None:
+            session = self._resume(token)
+        if session.expires_at <= self._clock():
+            with self._lock:
+                self._sessions.pop(token, None)
+            raise InvalidSessionError("Session expired")
+        return session
+
+    def _resume(self, token: str) -> Session:
+        """
+        Checks a token that is not in the store, e.g. one issued before a
+        restart, and stores its session
+
+        Raises:
+            InvalidSessionError: if the token is malformed, forged or
+                revoked
+        """
+        try:
+            encoded_payload, signature = token.split('.')
+            payload = _decode(encoded_payload)
+        except (ValueError, TypeError) as error:
+            raise InvalidSessionError("Malformed session token") from error
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidSessionError("Invalid session token")
+
+        expires_at, user_id = payload.decode('utf-8').split(':', 1)
+        session = Session(token, user_id, int(expires_at))
+        with self._lock:
+            if token in self._revoked:
+                raise InvalidSessionError("Session revoked")
+            self._sessions[token] = session
+        return session
+
+    def _expiry(self, token: str) -> int:
+        """
+        Gets the expiry time embedded in a token signed by this store
+
+        Returns:
+            The expiry time, or None if the token is malformed or forged
+        """
+        try:
+            encoded_payload, signature = token.split('.')
+            payload = _decode(encoded_payload)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            return int(payload.decode('utf-8').split(':', 1)[0])
+        except (ValueError, TypeError):
+            return None
+
+    def _load_revocations(self) -> None:
+        """
+        Reads the revoked tokens that have not expired from the revocations
+        file
+        """
+        now = self._clock()
+        try:
+            with open(self._revocations_path, 'r', encoding='utf-8') as file:
+                tokens = file.read().split()
+        except FileNotFoundError:
+            return
+        for token in tokens:
+            expires_at = self._expiry(token)
+            if expires_at is not None and expires_at > now:
+                self._revoked[token] = expires_at
+
+    def _add_revoked(self, token: str, expires_at: int) -> None:
+        """
+        Marks a token as revoked until it expires, appending it to the
+        revocations file. Called with the lock held
+        """
+        if expires_at is None or token in self._revoked:
+            return
+        self._revoked[token] = expires_at
+        if self._revocations_path is not None:
+            with open(self._revocations_path, 'a', encoding='utf-8') as file:
+                file.write(token + '\n')
+
+    def revoke(self, token: str) -> None:
+        """
+        Ends a session, e.g. on logout
+
+        Args:
+            token: the session token
+        """
+        expires_at = self._expiry(token)
+        with self._lock:
+            self._sessions.pop(token, None)
+            self._add_revoked(token, expires_at)
+
+    def revoke_user(self, user_id: str) -> None:
+        """
+        Ends the sessions of a user known to the store
+
+        Args:
+            user_id: the ID of the user
+        """
+        with self._lock:
+            tokens = [token for token, session in self._sessions.items()
+                      if session.user_id == user_id]
+            for token in tokens:
+                session = self._sessions.pop(token)
+                self._add_revoked(token, session.expires_at)
+
+    def purge_expired(self) -> None:
+        """
+        Drops the expired sessions from the store, and the revoked tokens
+        that expired, which can no longer be validated anyway
+        """
+        now = self._clock()
+        with self._lock:
+            self._sessions = {token: session
+                              for token, session in self._sessions.items()
+                              if session.expires_at > now}
+            revoked = {token: expires_at
+                       for token, expires_at in self._revoked.items()
+                       if expires_at > now}
+            if len(revoked) == len(self._revoked):
+                return
+            self._revoked = revoked
+            if self._revocations_path is not None:
+                temporary_path = self._revocations_path + '.tmp'
+                with open(temporary_path, 'w', encoding='utf-8') as file:
+                    file.writelines(token + '\n' for token in revoked)
+                os.replace(temporary_path, self._revocations_path)
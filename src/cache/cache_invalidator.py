@@ -0,0 +1,227 @@
+""" cache_invalidator.py
+
+This module keeps the caches of the managers consistent with the writes made
+by other clients sharing the database.
+
+The managers serve reads from their identity maps, which never see the
+writes of the other running instances of the program. The CacheInvalidator
+reads those writes from a ChangeFeed (a MongoDB change stream, or polls of
+the updated_at stamps) and hands each changed id to the manager of its
+collection, which drops or replaces only that object.
+
+fetch reads the feed and the stored documents of the changed objects, with
+one query per collection, and apply only swaps the cached objects, so a UI
+fetches on a worker thread and applies the changes on its own thread without
+waiting for the database (see Application.start_cache_invalidator). The
+managers publish the changes they apply, so the subscribers (e.g. the views'
+EventsTree) run on the thread that applies them. start is meant for programs
+without a UI thread.
+
+Classes:
+    - CacheInvalidator: Applies the changes of a feed to the managers.
+        Methods:
+            - fetch(): Reads the changes made since the last fetch, and the
+            changed documents.
+            - apply(changes): Applies changes to the managers.
+            - poll(): Fetches and applies the changes.
+            - start(interval): Polls periodically in a background thread.
+            - stop(): Stops the background polls and closes the feed.
+"""
+import contextvars
+import threading
+
+
+class CacheInvalidator:
+    """
+    Applies the writes of other clients to the caches of the managers.
+
+    A change that fails (e.g. the read of the documents times out), or that
+    a manager defers because the object has writes waiting in the unit of
+    work, is fetched and applied again on the next poll, so a stale object
+    is never kept.
+
+    Attributes:
+        change_feed (ChangeFeed): The feed of the writes of other clients.
+        managers (dict): The manager of each collection, with a db_module
+            and an apply_remote_change(object_id, deleted, document) method
+            that returns False if it defers the change.
+        applied (int): Number of changes applied.
+
+    Usage:
+        invalidator = CacheInvalidator(feed, {
+            "users": UserManagement.get_instance(),
+            "schedules": ScheduleManagement.get_instance(),
+            "elements": ElementManagement.get_instance()})
+        invalidator.start(1.0)
+    """
+
+    def __init__(self, change_feed, managers: dict):
+        """
+        Constructor method.
+
+        Args:
+            change_feed (ChangeFeed): The feed of the writes of other
+                clients.
+            managers (dict): The manager of each collection.
+        """
+        self.change_feed = change_feed
+        self.managers = managers
+        self.applied = 0
+        self._failed = []
+        self._lock = threading.Lock()
+        self._feed_lock = threading.Lock()
+        self._timer = None
+        self._stop_event = None
+
+    def fetch(self) -> list:
+        """
+        Read the changes made since the last fetch from the feed, with the
+        ones that failed or were deferred before, and the stored document of
+        each changed object, without applying them, e.g. on a worker thread.
+        Only the last change of each object is kept.
+
+        Returns:
+            list: The Change of each object, with its document, oldest
+                first.
+
+        Raises:
+            Exception: The error of the database; the changes are fetched
+                again on the next call.
+        """
+        with self._feed_lock:
+            changes = self.change_feed.poll()
+        with self._lock:
+            changes, self._failed = self._failed + list(changes), []
+        latest = {}
+        for change in changes:
+            key = (change.collection, change.document_id)
+            latest.pop(key, None)
+            latest[key] = change
+        changes = list(latest.values())
+        try:
+            documents = self._fetch_documents(changes)
+        except Exception:
+            with self._lock:
+                self._failed = changes + self._failed
+            raise
+        return [change if change.deleted else change._replace(
+            deleted=key not in documents, document=documents.get(key))
+                for key, change in latest.items()]
+
+    def _fetch_documents(self, changes: list) -> dict:
+        """
+        Read the stored documents of the changed objects, with one query per
+        collection.
+
+        Args:
+            changes (list): The changes.
+
+        Returns:
+            dict: The document of each (collection, id) that exists.
+        """
+        ids = {}
+        for change in changes:
+            if not change.deleted and change.collection in self.managers:
+                ids.setdefault(change.collection, []).append(
+                    change.document_id)
+        documents = {}
+        for collection, document_ids in ids.items():
+            database_module = self.managers[collection].db_module
+            for document in database_module.select_many_by_ids(
+                    collection, document_ids):
+                documents[(collection, document["_id"])] = document
+        return documents
+
+    def apply(self, changes: list) -> int:
+        """
+        Apply changes read by fetch. The managers only swap their cached
+        objects, without reading the database, and publish the changes on
+        the calling thread.
+
+        Args:
+            changes (list): The changes returned by fetch.
+
+        Returns:
+            int: The number of changes applied.
+
+        Raises:
+            Exception: The first error of a change, after trying the others.
+        """
+        with self._lock:
+            error = None
+            applied = 0
+            for change in changes:
+                manager = self.managers.get(change.collection)
+                if manager is None:
+                    continue
+                try:
+                    done = manager.apply_remote_change(
+                        change.document_id, change.deleted, change.document)
+                except Exception as change_error: # pylint: disable=broad-except
+                    done = False
+                    error = error or change_error
+                if done is False:
+                    # read the document again on the next fetch, e.g. after
+                    # the unit of work wrote the local changes of the object
+                    self._failed.append(change._replace(document=None))
+                    continue
+                applied += 1
+            self.applied += applied
+        if error is not None:
+            raise error
+        return applied
+
+    def poll(self) -> int:
+        """
+        Fetch and apply the changes made since the last poll, and the ones
+        that failed or were deferred before.
+
+        Returns:
+            int: The number of changes applied.
+
+        Raises:
+            Exception: The first error of a change, after trying the others.
+        """
+        return self.apply(self.fetch())
+
+    def start(self, interval: float) -> None:
+        """
+        Poll periodically in a daemon thread, which also runs the
+        subscribers of the managers. Only for programs whose subscribers do
+        not need to run on a given thread; a UI should fetch and apply the
+        changes itself.
+
+        Args:
+            interval (float): Seconds between polls.
+        """
+        if self._timer is not None:
+            raise RuntimeError("Cache invalidator already started.")
+
+        self._stop_event = threading.Event()
+
+        def worker(stop_event):
+            while not stop_event.wait(interval):
+                try:
+                    self.poll()
+                except Exception as error: # pylint: disable=broad-except
+                    print(f"\033[91mCache invalidation failed: {error}\033[0m")
+
+        # run in a copy of the caller's context, so the worker uses the
+        # managers of the active CalendarContext
+        context = contextvars.copy_context()
+        self._timer = threading.Thread(target=context.run,
+                                       args=(worker, self._stop_event),
+                                       daemon=True)
+        self._timer.start()
+
+    def stop(self) -> None:
+        """
+        Stop the periodic polls and close the feed.
+        """
+        if self._timer is not None:
+            self._stop_event.set()
+            self._timer.join()
+            self._timer = None
+            self._stop_event = None
+        with self._feed_lock:
+            self.change_feed.close()
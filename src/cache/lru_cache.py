@@ -0,0 +1,334 @@
+""" lru_cache.py
+
+This module defines the bounded cache used by the managers as identity map:
+while an object is cached, every lookup of its id returns the same instance.
+
+Classes:
+    - LRUCache(MutableMapping): Dictionary that drops its least recently
+    used entries when it grows past max_entries or max_size, and its
+    entries older than ttl.
+        Methods:
+            - get(key, default): Gets a value, counting hits and misses.
+            - invalidate(key): Drops one entry, or every entry, except the
+            pinned ones.
+            - resize(key): Measures again an entry whose value changed.
+            - stats(): Returns the counters of the cache.
+
+Functions:
+    - approximate_size(value): Estimates the memory used by a value.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+def approximate_size(value) -> int:
+    """
+    Estimate the memory used by a value, following dicts, lists, tuples and
+    sets. Objects with a to_dict method are measured by their dictionary.
+
+    Args:
+        value: The value.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item)
+                    for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class LRUCache(MutableMapping):
+    """
+    Thread-safe dictionary with least recently used eviction.
+
+    Entries are evicted when there are more than max_entries, when their
+    total size (given by sizeof) is above max_size, and when they are older
+    than ttl seconds. Evicted and invalidated values are passed to on_evict,
+    so the owner can release them (e.g. detach its observer). Values for
+    which pinned returns True are never evicted nor invalidated, e.g.
+    objects with unsaved changes. Deleting a key with "del" does not call on_evict.
+
+    Values are only measured with sizeof when max_size is set, and when
+    they are stored: a cached value that changes in place keeps its old
+    size until it is stored again or passed to resize.
+
+    Attributes:
+        max_entries (int): Maximum number of entries, None for unbounded.
+        max_size (int): Maximum total size of the entries, None for
+            unbounded.
+        ttl (float): Seconds an entry is kept after it is stored, None to
+            keep it until evicted.
+        hits (int): Number of get calls that found the key.
+        misses (int): Number of get calls that did not find the key.
+        evictions (int): Number of entries evicted or expired.
+        hit_ratio (float): hits / (hits + misses).
+        resident_size (int): Total size of the entries, as measured when
+            they were stored or resized; the number of entries if max_size
+            is None.
+
+    Usage:
+        users = LRUCache(max_entries=1000,
+                         on_evict=lambda user_id, user: user.detach(self))
+    """
+
+    def __init__(self, max_entries: int = None, on_evict=None, pinned=None,
+                 items: dict = None, ttl: float = None, max_size: int = None,
+                 sizeof=None):
+        """
+        Constructor method.
+
+        Args:
+            max_entries (int): Maximum number of entries, None for unbounded.
+            on_evict (callable): Called with (key, value) for each evicted
+                or invalidated entry.
+            pinned (callable): Called with (key, value), returns True if the
+                entry must not be evicted.
+            items (dict): Initial entries.
+            ttl (float): Seconds an entry is kept after it is stored.
+            max_size (int): Maximum total size of the entries.
+            sizeof (callable): Called with a value, returns its size. Every
+                entry has size 1 if None, or if max_size is None.
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.pinned = pinned
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._resident_size = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+        if items:
+            self.update(items)
+
+    @property
+    def hit_ratio(self) -> float:
+        """ hits / (hits + misses), 0 before the first lookup. """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups else 0.0
+
+    @property
+    def resident_size(self) -> int:
+        """ Total size of the entries. """
+        with self._lock:
+            return self._resident_size
+
+    def stats(self) -> dict:
+        """
+        Return the counters of the cache, e.g. to tune its limits.
+
+        Returns:
+            dict: entries, resident_size, hits, misses, hit_ratio and
+                evictions.
+        """
+        with self._lock:
+            return {"entries": len(self._data),
+                    "resident_size": self._resident_size,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_ratio": self.hit_ratio,
+                    "evictions": self.evictions}
+
+    def get(self, key, default=None):
+        """
+        Get a value and mark it as recently used, counting hits and misses.
+        An expired entry counts as a miss.
+
+        Args:
+            key: The key.
+            default: Returned if the key is not cached.
+
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            evicted = self._expire(key)
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                value = self._data[key]
+            else:
+                self.misses += 1
+                value = default
+        self._notify_evicted(evicted)
+        return value
+
+    def invalidate(self, key=None) -> None:
+        """
+        Drop an entry, or every entry if no key is given, calling on_evict.
+        Pinned entries are kept.
+
+        Args:
+            key: The key to drop.
+        """
+        with self._lock:
+            keys = list(self._data) if key is None else \
+                [key] if key in self._data else []
+            evicted = [(key, self._remove(key)) for key in keys
+                       if not self._is_pinned(key)]
+        self._notify_evicted(evicted)
+
+    def resize(self, key) -> None:
+        """
+        Measure again an entry whose value changed in place, evicting other
+        entries if the cache no longer fits max_size. Does nothing if
+        max_size is None or the key is not cached.
+
+        Args:
+            key: The key.
+        """
+        if self.max_size is None:
+            return
+        with self._lock:
+            if key not in self._data:
+                return
+            size = self._measure(self._data[key])
+            self._resident_size += size - self._sizes[key]
+            self._sizes[key] = size
+            evicted = self._evict()
+        self._notify_evicted(evicted)
+
+    def __getitem__(self, key):
+        with self._lock:
+            evicted = self._expire(key)
+            found = key in self._data
+            if found:
+                self._data.move_to_end(key)
+                value = self._data[key]
+        self._notify_evicted(evicted)
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = self._measure(value)
+            self._resident_size += self._sizes[key]
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            evicted = self._evict()
+        self._notify_evicted(evicted)
+
+    def __delitem__(self, key) -> None:
+        with self._lock:
+            if key not in self._data:
+                raise KeyError(key)
+            self._remove(key)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            evicted = self._expire(key)
+            found = key in self._data
+        self._notify_evicted(evicted)
+        return found
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"LRUCache({dict(self._data)!r})"
+
+    def _remove(self, key):
+        """
+        Remove an entry and its bookkeeping. Must be called with the lock
+        held.
+
+        Args:
+            key: The key.
+
+        Returns:
+            The removed value.
+        """
+        self._resident_size -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+        return self._data.pop(key)
+
+    def _measure(self, value) -> int:
+        """ The size of a value, 1 unless sizeof and max_size are set. """
+        if self.sizeof is None or self.max_size is None:
+            return 1
+        return self.sizeof(value)
+
+    def _is_pinned(self, key) -> bool:
+        """ Check if an entry must not be evicted. """
+        return self.pinned is not None and self.pinned(key, self._data[key])
+
+    def _expire(self, key) -> list:
+        """
+        Drop an entry if it is older than ttl and not pinned. Must be called
+        with the lock held.
+
+        Args:
+            key: The key.
+
+        Returns:
+            list: The expired (key, value) pair, if any.
+        """
+        expires = self._expires.get(key)
+        if expires is None or expires > time.monotonic() \
+                or self._is_pinned(key):
+            return []
+        self.evictions += 1
+        return [(key, self._remove(key))]
+
+    def _is_full(self) -> bool:
+        """ Check if the cache is above max_entries or max_size. """
+        return (self.max_entries is not None
+                and len(self._data) > self.max_entries) \
+            or (self.max_size is not None
+                and self._resident_size > self.max_size)
+
+    def _evict(self) -> list:
+        """
+        Drop the least recently used entries that are not pinned until the
+        cache fits max_entries and max_size. The most recently used entry is
+        always kept, so the cache may stay above its limits while entries
+        are pinned. Must be called with the lock held.
+
+        Returns:
+            list: The evicted (key, value) pairs.
+        """
+        evicted = []
+        for key in list(self._data)[:-1]:
+            if not self._is_full():
+                break
+            if self._is_pinned(key):
+                continue
+            self.evictions += 1
+            evicted.append((key, self._remove(key)))
+        return evicted
+
+    def _notify_evicted(self, evicted: list) -> None:
+        """
+        Call on_evict for each evicted entry, outside of the lock.
+
+        Args:
+            evicted (list): The evicted (key, value) pairs.
+        """
+        if self.on_evict is None:
+            return
+        for key, value in evicted:
+            self.on_evict(key, value)
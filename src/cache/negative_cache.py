@@ -0,0 +1,100 @@
+""" negative_cache.py
+
+This module defines a cache of ids known not to exist in the database.
+
+Looking up an id that does not exist always costs a database round-trip, so
+the managers remember the misses for a short time. An entry expires after
+its time to live, so ids created by another client are eventually seen, and
+the managers forget an id as soon as they create it themselves.
+
+Classes:
+    - NegativeCache: Remembers missing ids for a limited time.
+        Methods:
+            - add(key): Remembers that a key does not exist.
+            - discard(key): Forgets a key, e.g. because it was created.
+            - clear(): Forgets every key.
+"""
+import threading
+import time
+
+
+class NegativeCache:
+    """
+    Cache of keys known not to exist, each one kept for ttl seconds.
+
+    Attributes:
+        ttl (float): Seconds a miss is remembered. 0 disables the cache.
+        max_entries (int): Maximum number of remembered keys. The oldest
+            ones are dropped first.
+
+    Usage:
+        if element_id in negative_cache:
+            return None
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024):
+        """
+        Constructor method.
+
+        Args:
+            ttl (float): Seconds a miss is remembered.
+            max_entries (int): Maximum number of remembered keys.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def add(self, key) -> None:
+        """
+        Remember that a key does not exist.
+
+        Args:
+            key: The missing key.
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._expires.pop(key, None)
+            self._expires[key] = time.monotonic() + self.ttl
+            while len(self._expires) > self.max_entries:
+                del self._expires[next(iter(self._expires))]
+
+    def discard(self, key) -> None:
+        """
+        Forget a key, e.g. because it was created.
+
+        Args:
+            key: The key.
+        """
+        with self._lock:
+            self._expires.pop(key, None)
+
+    def clear(self) -> None:
+        """ Forget every key. """
+        with self._lock:
+            self._expires.clear()
+
+    def __contains__(self, key) -> bool:
+        """
+        Check if a key is known not to exist. Expired keys are dropped.
+
+        Args:
+            key: The key.
+
+        Returns:
+            bool: True if the key was missing less than ttl seconds ago.
+        """
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._expires[key]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        """ Number of remembered keys, including expired ones. """
+        with self._lock:
+            return len(self._expires)
@@ -0,0 +1,189 @@
+"""
+Daily counts of the elements of a set of schedules.
+
+The month grid only needs, for each day, how many events, tasks and
+reminders start on it and how many minutes of events it has (see
+utils.day_counts). The counts of a month are computed by the database
+(count_elements_by_day) without fetching the elements, plus the occurrences
+of the few recurring elements, and are then kept up to date with the
+changes published by the ElementManagement and the ScheduleManagement.
+"""
+import datetime
+import threading
+
+from src.database.utils import day_counts, day_in_window, \
+    elements_in_range_condition, DAY_COUNT_FIELDS
+from src.observer.observer import Publisher
+
+
+def month_window(year: int, month: int) -> tuple:
+    """
+    The window of a month.
+
+    Returns:
+        tuple: (start, end) datetimes of the month.
+    """
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        return start, datetime.datetime(year + 1, 1, 1)
+    return start, datetime.datetime(year, month + 1, 1)
+
+
+class DailyAggregates:
+    """
+    Daily counts of the elements of the schedules, by month.
+
+    The counts are kept for each set of schedules asked for, e.g. the
+    schedules selected by a user or a single schedule, so an element in two
+    of the schedules is counted once.
+
+    attributes:
+        db_module: the database module.
+
+    methods:
+        month: returns the daily counts of a month.
+        element_changed: patches the counts with a created, changed or
+            deleted element; subscribed to the ElementManagement.
+        schedule_changed: drops the counts of a deleted schedule; subscribed
+            to the ScheduleManagement.
+    """
+
+    def __init__(self, database_module, element_management):
+        self.db_module = database_module
+        self._element_management = element_management
+        # (schedule ids, year, month) -> {date: counts}
+        self._months = {}
+        # element id -> (schedules, day, counts) of the elements that do not
+        # repeat, as last counted
+        self._contributions = {}
+        # (schedule ids, year, month) -> token of the loads in flight; a
+        # change of the month drops its token, so the load is not installed
+        self._loading = {}
+        self._lock = threading.RLock()
+
+    def month(self, schedule_ids: list, year: int, month: int) -> dict:
+        """
+        Returns the daily counts of the elements of the schedules in a
+        month, computing them the first time they are asked for.
+
+        The counts are computed without the lock, so the changes published
+        on the Tk thread are not held up by the queries; if one of them
+        touches the month meanwhile, the counts are computed again.
+
+        Returns:
+            dict: The counts of each day with elements, by date.
+        """
+        key = (frozenset(schedule_ids), year, month)
+        while True:
+            with self._lock:
+                if key in self._months:
+                    return {day: dict(counts)
+                            for day, counts in self._months[key].items()}
+                token = self._loading[key] = object()
+            counts = self._load(*key)
+            with self._lock:
+                if self._loading.get(key) is token:
+                    del self._loading[key]
+                    self._months[key] = counts
+
+    def element_changed(self, change: str, element) -> None:
+        """
+        Patches the counts with a created, changed or deleted element.
+
+        The counts of an element that does not repeat are moved from its old
+        day to the new one. If the old day is not known (the element was
+        counted by the database), the element repeats or it was changed by
+        another client (REFRESHED, which may race with the counts loaded
+        meanwhile), the counts of its schedules are computed again on the
+        next call to month.
+        """
+        with self._lock:
+            old = self._contributions.pop(element.id, None)
+            if element.recurrence is not None or \
+                    change == Publisher.REFRESHED:
+                self._invalidate(set(element.schedules) |
+                                 (old[0] if old else set()))
+                return
+            current = (frozenset(element.schedules),
+                       *day_counts(element.element_type,
+                                   *element.get_display_interval()))
+            if change == Publisher.DELETED:
+                self._apply(old or current, -1)
+                return
+            if change == Publisher.CHANGED and old is None:
+                self._invalidate(element.schedules)
+            else:
+                if old is not None:
+                    self._apply(old, -1)
+                self._apply(current, 1)
+            self._contributions[element.id] = current
+
+    def schedule_changed(self, change: str, schedule) -> None:
+        """
+        Drops the counts of a deleted schedule.
+        """
+        if change == Publisher.DELETED:
+            with self._lock:
+                self._invalidate({schedule.id})
+
+    def _load(self, schedule_ids: frozenset, year: int, month: int) -> dict:
+        """
+        Computes the daily counts of a month: the elements that do not
+        repeat are counted by the database and the recurring ones are
+        expanded here.
+        """
+        start, end = month_window(year, month)
+        schedule_ids = list(schedule_ids)
+        # the stored elements must be up to date to be counted
+        if self._element_management.unit_of_work is not None:
+            self._element_management.unit_of_work.flush()
+
+        counts = self.db_module.count_elements_by_day(schedule_ids, start,
+                                                      end)
+        condition = elements_in_range_condition(schedule_ids, start, end)
+        condition["recurrence"] = {"$ne": None}
+        recurring = self.db_module.select_data("elements", condition)
+        for element in self._element_management.get_elements(
+                [document["_id"] for document in recurring]):
+            for occurrence in element.get_occurrences(start, end):
+                day, delta = day_counts(occurrence.element_type,
+                                        *occurrence.get_display_interval())
+                if day_in_window(day, start, end):
+                    _add(counts, day, delta, 1)
+        return counts
+
+    def _apply(self, contribution: tuple, sign: int) -> None:
+        """
+        Adds (sign 1) or removes (sign -1) the counts of an element from the
+        months loaded that include it.
+        """
+        schedules, day, delta = contribution
+        for (schedule_ids, year, month), counts in self._months.items():
+            if (day.year, day.month) == (year, month) and \
+                    schedule_ids.intersection(schedules):
+                _add(counts, day, delta, sign)
+        self._loading = {key: token for key, token in self._loading.items()
+                         if (key[1], key[2]) != (day.year, day.month)
+                         or not key[0].intersection(schedules)}
+
+    def _invalidate(self, schedules) -> None:
+        """
+        Drops the counts of the sets of schedules that include any of the
+        schedules.
+        """
+        self._months = {key: counts for key, counts in self._months.items()
+                        if not key[0].intersection(schedules)}
+        self._loading = {key: token for key, token in self._loading.items()
+                         if not key[0].intersection(schedules)}
+
+
+def _add(counts: dict, day: datetime.date, delta: dict, sign: int) -> None:
+    """
+    Adds the counts of an element to a day, dropping the day when it has no
+    elements left.
+    """
+    totals = counts.setdefault(day, dict.fromkeys(DAY_COUNT_FIELDS, 0))
+    for field, value in delta.items():
+        totals[field] += sign * value
+    if not (totals["event"] or totals["task"] or totals["reminder"]):
+        del counts[day]
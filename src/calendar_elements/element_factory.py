@@ -39,18 +39,21 @@ class ElementFactory:
                                 kwargs['start'],
                                 kwargs['end'],
                                 schedules,
-                                kwargs['description'])
+                                kwargs['description'],
+                                recurrence=kwargs.get('recurrence'))
         elif element_type == "task":
             return TaskElement(element_id,
                                 title,
                                 kwargs['due_date'],
                                 schedules,
-                                kwargs['description'])
+                                kwargs['description'],
+                                recurrence=kwargs.get('recurrence'))
         elif element_type == "reminder":
             return ReminderElement(element_id,
                                     title,
                                     kwargs['reminder_date'],
                                     schedules,
-                                    kwargs['description'])
+                                    kwargs['description'],
+                                    recurrence=kwargs.get('recurrence'))
         else:
             raise ValueError(f"Unsupported element type: {element_type}")
@@ -6,9 +6,12 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 
 from src.observer.observer import Observer
+from src.observer.change_tracker import ChangeTracker
+from src.calendar_elements.recurrence import RecurrenceRule, \
+    ElementOccurrence
 
 
-class Element(ABC):
+class Element(ChangeTracker, ABC):
     """
         Interface for all calendar elements.
 
@@ -20,11 +23,23 @@ class Element(ABC):
             should ocupate in the calendar.
             get_type: Returns the type of the event.
             get_schedules: Returns the schedules of the event.
-            to_dict: Returns a dictionary representation of the event.
+            to_dict: Returns a dictionary representation of the event,
+            including its display interval as display_start/display_end.
+            get_changes: Returns the fields changed since the last persist.
+            set_recurrence: Makes the element repeat, or stop repeating.
+            get_series_interval: Returns the interval from the start of the
+            first occurrence to the end of the last one.
+            get_occurrences: Returns the occurrences displayed in a window.
     """
 
+    membership_fields = ("schedules",)
+    # dates of each type that move with the occurrences of a recurrence
+    date_fields = ()
+
     def __init__(self):
+        ChangeTracker.__init__(self)
         self.__observers = []
+        self.recurrence = None
 
     @abstractmethod
     def get_display_interval(self) -> (datetime, datetime):
@@ -41,6 +56,89 @@ class Element(ABC):
             list -- The schedules of the event.
         """
 
+    def set_recurrence(self, recurrence) -> None:
+        """Sets the recurrence rule of the element. The element is then the
+        first occurrence of the series.
+
+        Arguments:
+            recurrence -- a RecurrenceRule, its dictionary, or None to stop
+            repeating.
+        """
+        if isinstance(recurrence, dict):
+            recurrence = RecurrenceRule.from_dict(recurrence)
+        elif recurrence is not None and \
+                not isinstance(recurrence, RecurrenceRule):
+            raise TypeError("Recurrence must be a RecurrenceRule")
+        self.recurrence = recurrence
+        self._mark_changed("recurrence")
+        self._mark_display_changed()
+        self.notify()
+
+    def get_series_interval(self) -> (datetime, datetime):
+        """Returns the interval from the start of the first occurrence to
+        the end of the last one (datetime.max if the series never ends).
+        It is the display interval if the element does not repeat.
+
+        Returns:
+            (datetime, datetime) -- The interval of the series.
+        """
+        start, end = self.get_display_interval()
+        if self.recurrence is None:
+            return (start, end)
+        return (start, self.recurrence.series_end(start, end))
+
+    def get_occurrences(self, start: datetime, end: datetime) -> list:
+        """Returns the occurrences displayed in [start, end). Only the
+        occurrences in the window are computed.
+
+        Arguments:
+            start -- The start of the window.
+            end -- The end of the window.
+
+        Returns:
+            list -- The element itself if it does not repeat, or an
+            ElementOccurrence for each occurrence.
+        """
+        first_start, first_end = self.get_display_interval()
+        if self.recurrence is None:
+            overlaps = first_start < end and \
+                (first_end > start or first_start >= start)
+            return [self] if overlaps else []
+        return [ElementOccurrence(self, *interval) for interval in
+                self.recurrence.occurrences(first_start, first_end,
+                                            start, end)]
+
+    def _display_fields(self) -> dict:
+        """Returns the display interval as the normalised fields stored
+        with every element type, used by the range queries. For a recurring
+        element it covers the whole series.
+
+        Returns:
+            dict -- The "display_start" and "display_end" fields.
+        """
+        start, end = self.get_series_interval()
+        return {"display_start": start, "display_end": end}
+
+    def _recurrence_fields(self) -> dict:
+        """Returns the recurrence rule as stored with the element. Elements
+        that never repeated do not store the field.
+
+        Returns:
+            dict -- The "recurrence" field, if any.
+        """
+        if self.recurrence is not None:
+            return {"recurrence": self.recurrence.to_dict()}
+        if "recurrence" in self._changed_fields:
+            return {"recurrence": None}
+        return {}
+
+    def _mark_display_changed(self) -> None:
+        """Marks the display interval fields as changed, after a change of
+        the dates they are computed from.
+        """
+        self._mark_changed("display_start")
+        self._mark_changed("display_end")
+
     @abstractmethod
     def get_users(self, filter_schedules = []) -> list:
         """Returns the users of the event.
@@ -1,10 +1,39 @@
 """
     Tests for the schedule manager class.
 """
-from src.observer.observer import Observer, Subject, DatabaseNotProvidedError
+import threading
+
+from src.observer.observer import Observer, Subject, Publisher, \
+    DatabaseNotProvidedError
 from src.database.mongo_module import MongoModule, NonExistentIDError
+from src.cache.negative_cache import NegativeCache
+from src.cache.lru_cache import LRUCache, approximate_size
 from src.calendar_elements.element_factory import ElementFactory
 from src.calendar_elements.element_interface import Element
+from src.calendar_elements.interval_index import IntervalIndex
+from src.context.calendar_context import current_context
+
+
+def merge_window(windows: list, start, end) -> list:
+    """
+    Add a window to a list of disjoint windows, merging the ones that
+    overlap or touch it.
+
+    Arguments:
+        windows: Disjoint (start, end) windows.
+        start: Start of the new window.
+        end: End of the new window.
+
+    Returns:
+        list: The disjoint windows, sorted by start.
+    """
+    merged = []
+    for window_start, window_end in sorted(windows + [(start, end)]):
+        if merged and window_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], window_end))
+        else:
+            merged.append((window_start, window_end))
+    return merged
 
 
 class ElementDoesNotExistError(Exception):
@@ -19,14 +48,28 @@ class ElementAlreadyExistsError(Exception):
     """
 
 
-class ElementManagement(Observer):
+class ElementManagement(Observer, Publisher):
     """
         Class responsible for managing the elements in the database.
 
     Attributes:
         db: Database module.
-        elements: Dictionary of elements, where the key is the element ID
-            and the value is the element instance
+        elements: Identity map of the loaded elements, where the key is the
+            element ID and the value is the element instance. Bounded
+            LRUCache: the least recently used elements are dropped past
+            cache_size entries or cache_max_bytes, and after cache_ttl
+            seconds. Dropped elements stay observed, and are cached again
+            when they change. elements.stats() reports its hit ratio.
+        schedule_indexes: Time-range index of the elements of each schedule
+            queried with query_range, filled with the windows loaded from the
+            database and kept up to date as elements are created, changed
+            and deleted.
+        unit_of_work: Optional write-behind UnitOfWork. When set, element
+            updates are registered there instead of written immediately.
+        negative_cache: Ids recently found not to exist, so repeated
+            lookups of a missing element do not reach the database.
+        subscribers: Functions called when an element is created, changed
+            or deleted (see Publisher).
     """
 
     _instance = None
@@ -36,19 +79,30 @@ class ElementManagement(Observer):
                      database_module: MongoModule = None,
                      elements: dict = None) -> 'ElementManagement':
         """
-        Get the instance of the ElementManagement class.
+        Get the instance of the ElementManagement class: the one of the
+        active CalendarContext or, without one, the process-wide instance.
         """
+        context = current_context()
+        if context is not None:
+            return context.element_management
         if cls._instance is None:
             cls._instance = cls(database_module, elements)
         return cls._instance
 
-    def __init__(self, database_module: MongoModule, elements: dict = None):
+    def __init__(self, database_module: MongoModule, elements: dict = None,
+                 cache_size: int = 10000, cache_ttl: float = None,
+                 cache_max_bytes: int = None):
         """
         Constructor for the ElementManagement class.
 
         Args:
             database_module: Database module.
             elements: Dictionary of elements, where the key is the element ID
+            cache_size: Maximum number of elements kept in memory.
+            cache_ttl: Seconds an element is kept in memory, None for no
+                limit.
+            cache_max_bytes: Maximum approximate size of the elements kept
+                in memory, None for no limit.
         """
 
         if not database_module:
@@ -56,11 +110,24 @@ class ElementManagement(Observer):
                 "Database module not provided on object creation.")
 
         self.db_module = database_module
-        self.elements = elements if elements is not None else {}
+        self.elements = LRUCache(max_entries=cache_size,
+                                 ttl=cache_ttl,
+                                 max_size=cache_max_bytes,
+                                 sizeof=approximate_size,
+                                 pinned=self._has_pending_writes,
+                                 items=elements)
+        self.schedule_indexes = {}
+        self._loaded_windows = {}
+        # guards schedule_indexes and _loaded_windows, which the background
+        # loads fill while the Tk thread patches them
+        self._index_lock = threading.RLock()
+        self.unit_of_work = None
+        self.negative_cache = NegativeCache()
+        self.subscribers = []
 
     def element_exists(self, element_id: str) -> bool:
         """
-        Check if an element exists.
+        Check if an element exists, counting it instead of fetching it.
 
         Arguments:
             element_id: Element id.
@@ -68,8 +135,318 @@ class ElementManagement(Observer):
         Returns:
             bool: True if the element exists, False otherwise.
         """
-        element = self.db_module.select_data("elements", {"_id": element_id})
-        return bool(element)
+        if element_id in self.negative_cache:
+            return False
+        if self.db_module.count_data("elements", {"_id": element_id},
+                                     limit=1):
+            return True
+        self.negative_cache.add(element_id)
+        return False
+
+    def find_missing_elements(self, element_ids: list) -> list:
+        """
+        Check which of the given elements do not exist, with a single query
+        for the ones that are not loaded.
+
+        Arguments:
+            element_ids: Element ids.
+
+        Returns:
+            list: The ids that do not exist, in the given order.
+        """
+        unknown_ids = [element_id for element_id in dict.fromkeys(element_ids)
+                       if element_id not in self.elements]
+        if not unknown_ids:
+            return []
+        found = {document["_id"] for document in
+                 self.db_module.select_many_by_ids("elements", unknown_ids)}
+        return [element_id for element_id in unknown_ids
+                if element_id not in found]
+
+    def find_element(self, element_id: str) -> Element:
+        """
+        Get an element by its id, with a single query if it is not loaded.
+
+        Arguments:
+            element_id: Element id.
+
+        Returns:
+            Element: Element instance, or None if it does not exist.
+        """
+        element = self.elements.get(element_id)
+        if element is not None:
+            return element
+        if element_id in self.negative_cache:
+            return None
+        element_data = self.db_module.select_one("elements",
+                                                 {"_id": element_id})
+        if element_data is None:
+            self.negative_cache.add(element_id)
+            return None
+        return self._load_element(element_data)
+
+    def get_elements(self, element_ids: list) -> list:
+        """
+        Get many elements, with a single query for the ones that are not
+        loaded. Ids that do not exist are skipped.
+
+        Arguments:
+            element_ids: Element ids.
+
+        Returns:
+            list: Element instances, in the given order.
+        """
+        element_ids = list(dict.fromkeys(element_ids))
+        found = {element_id: self.elements.get(element_id)
+                 for element_id in element_ids}
+        unknown_ids = [element_id for element_id, element in found.items()
+                       if element is None]
+        if unknown_ids:
+            for element in self._load_elements(
+                    self.db_module.select_many_by_ids("elements",
+                                                      unknown_ids)):
+                found[element.id] = element
+        return [found[element_id] for element_id in element_ids
+                if found[element_id] is not None]
+
+    def _load_element(self, element_data: dict) -> Element:
+        """
+        Build an element from its document and add it to the identity map.
+
+        Arguments:
+            element_data: The document of the element.
+
+        Returns:
+            Element: Element instance.
+        """
+        element_data["element_id"] = element_data.pop("_id")
+        element = ElementFactory.create_element(**element_data)
+        self.elements[element.id] = element
+        element.attach(self)
+        return element
+
+    def _load_elements(self, documents: list) -> list:
+        """
+        Get the elements of many documents, keeping the loaded instances
+        (which may have changes not written yet) over the documents.
+
+        Arguments:
+            documents: Element documents.
+
+        Returns:
+            list: Element instances, in the order of the documents.
+        """
+        elements = []
+        for element_data in documents:
+            element = self.elements.get(element_data["_id"])
+            if element is None:
+                element = self._load_element(element_data)
+            elements.append(element)
+        return elements
+
+    def query_range(self, schedule_ids: list, start, end) -> list:
+        """
+        Get the elements of the schedules whose display interval overlaps
+        [start, end). A recurring element is returned once if any of its
+        occurrences may overlap the window; see query_occurrences.
+
+        The first query of a window runs a single indexed range query on
+        the database (select_elements_in_range) and stores the result in the
+        time-range index of each schedule. Later queries inside the windows
+        already loaded are answered by the index, in expected O((k + 1) log n).
+
+        Arguments:
+            schedule_ids: Schedule ids.
+            start: Start of the window.
+            end: End of the window.
+
+        Returns:
+            list: Element instances, sorted by the start of their display
+                interval.
+        """
+        schedule_ids = list(dict.fromkeys(schedule_ids))
+        self._load_range([schedule_id for schedule_id in schedule_ids
+                          if not self._is_loaded(schedule_id, start, end)],
+                         start, end)
+        with self._index_lock:
+            indexes = [self.schedule_indexes.get(schedule_id)
+                       for schedule_id in schedule_ids]
+        element_ids = []
+        for index in indexes:
+            # None if the index was invalidated meanwhile
+            if index is not None:
+                element_ids += index.query(start, end)
+        elements = self.get_elements(element_ids)
+        return sorted(elements,
+                      key=lambda element: element.get_display_interval()[0])
+
+    def query_occurrences(self, schedule_ids: list, start, end) -> list:
+        """
+        Get the occurrences of the elements of the schedules displayed in
+        [start, end). A recurring element is stored once and only its
+        occurrences inside the window are computed.
+
+        Arguments:
+            schedule_ids: Schedule ids.
+            start: Start of the window.
+            end: End of the window.
+
+        Returns:
+            list: Elements that do not repeat and ElementOccurrence
+                instances, sorted by the start of their display interval.
+        """
+        occurrences = []
+        for element in self.query_range(schedule_ids, start, end):
+            occurrences += element.get_occurrences(start, end)
+        return sorted(occurrences,
+                      key=lambda element: element.get_display_interval()[0])
+
+    def invalidate_index(self, schedule_id: str = None) -> None:
+        """
+        Drop the time-range index of a schedule, or of every schedule, so it
+        is loaded from the database again on the next query_range.
+
+        Arguments:
+            schedule_id: Schedule id.
+        """
+        with self._index_lock:
+            if schedule_id is None:
+                self.schedule_indexes.clear()
+                self._loaded_windows.clear()
+            else:
+                self.schedule_indexes.pop(schedule_id, None)
+                self._loaded_windows.pop(schedule_id, None)
+
+    def _is_loaded(self, schedule_id: str, start, end) -> bool:
+        """
+        Check if the elements of a schedule in a window are in its index.
+
+        Arguments:
+            schedule_id: Schedule id.
+            start: Start of the window.
+            end: End of the window.
+
+        Returns:
+            bool: True if a loaded window contains [start, end).
+        """
+        with self._index_lock:
+            windows = self._loaded_windows.get(schedule_id, [])
+        return any(loaded_start <= start and end <= loaded_end
+                   for loaded_start, loaded_end in windows)
+
+    def _load_range(self, schedule_ids: list, start, end) -> None:
+        """
+        Load the elements of the schedules displayed in a window into their
+        time-range indexes, with one range query.
+
+        Arguments:
+            schedule_ids: Schedule ids.
+            start: Start of the window.
+            end: End of the window.
+        """
+        if not schedule_ids:
+            return
+        # the stored intervals must be up to date to be queried
+        if self.unit_of_work is not None:
+            self.unit_of_work.flush()
+        with self._index_lock:
+            indexes = {schedule_id: self.schedule_indexes.setdefault(
+                schedule_id, IntervalIndex()) for schedule_id in schedule_ids}
+        # the query runs without the lock, so the Tk thread can patch the
+        # indexes meanwhile; the elements changed since are kept by
+        # _load_elements
+        documents = self.db_module.select_elements_in_range(schedule_ids,
+                                                            start, end)
+        elements = self._load_elements(documents)
+        with self._index_lock:
+            for element in elements:
+                self._index_element(element)
+            for schedule_id in schedule_ids:
+                # an index invalidated during the query is loaded again
+                if self.schedule_indexes.get(schedule_id) is \
+                        indexes[schedule_id]:
+                    self._loaded_windows[schedule_id] = merge_window(
+                        self._loaded_windows.get(schedule_id, []), start,
+                        end)
+
+    def _index_element(self, element: Element) -> None:
+        """
+        Update the time-range indexes with the interval and schedules of an
+        element.
+
+        Arguments:
+            element: The created or changed element.
+        """
+        with self._index_lock:
+            if not self.schedule_indexes:
+                return
+            interval = element.get_series_interval()
+            for schedule_id, index in self.schedule_indexes.items():
+                if schedule_id in element.schedules:
+                    index.add(element.id, *interval)
+                else:
+                    index.remove(element.id)
+
+    def _unindex_element(self, element_id: str) -> None:
+        """
+        Remove an element from the time-range indexes.
+
+        Arguments:
+            element_id: Element id.
+        """
+        with self._index_lock:
+            for index in self.schedule_indexes.values():
+                index.remove(element_id)
+
+    def apply_remote_change(self, element_id: str, deleted: bool = False,
+                            element_data: dict = None) -> bool:
+        """
+        Bring the cached state of an element up to date with a write made by
+        another client (see CacheInvalidator). A loaded element is replaced
+        by the stored one, and the time-range indexes and the negative cache
+        are updated; REFRESHED is published if the element was loaded or is
+        in an indexed schedule. An element with writes waiting in the unit
+        of work is kept, and the change is deferred until they are written.
+
+        The stored document is read only if it is not given, so the
+        CacheInvalidator reads it beforehand, off the UI thread.
+
+        Arguments:
+            element_id: Element id.
+            deleted: Whether the element was deleted.
+            element_data: The stored document of the element.
+
+        Returns:
+            bool: False if the change was deferred.
+        """
+        if self._has_pending_writes(element_id, None):
+            return False
+        old = self.elements[element_id] if element_id in self.elements \
+            else None
+        if not deleted and element_data is None and \
+                (old is not None or self.schedule_indexes):
+            element_data = self.db_module.select_one("elements",
+                                                     {"_id": element_id})
+            deleted = element_data is None
+
+        if old is not None:
+            self.elements.invalidate(element_id)
+        if deleted:
+            self.negative_cache.add(element_id)
+            self._unindex_element(element_id)
+            if old is not None:
+                self.publish(self.REFRESHED, old)
+            return True
+
+        self.negative_cache.discard(element_id)
+        if element_data is None or old is None and not any(
+                schedule_id in self.schedule_indexes
+                for schedule_id in element_data.get("schedules", [])):
+            return True
+        element = self._load_element(dict(element_data))
+        self._index_element(element)
+        self.publish(self.REFRESHED, element)
+        return True
 
     def get_element(self, element_id: str) -> Element:
         """
@@ -81,24 +458,31 @@ class ElementManagement(Observer):
         Returns:
             Element: Element instance.
         """
-
-        if element_id in self.elements:
-            return self.elements[element_id]
-        elif self.element_exists(element_id):
-            element_data = self.db_module.select_data("elements",
-                                                      {"_id": element_id})[0]
-            element_data["element_id"] = element_data.pop("_id")
-            element = ElementFactory.create_element(**element_data)
-            self.elements[element_id] = element
-            element.attach(self)
-            return element
-        else:
+        element = self.find_element(element_id)
+        if element is None:
             raise ElementDoesNotExistError(
                 f"Element with id {element_id} does not exist")
+        return element
+
+    def _has_pending_writes(self, element_id: str, element: Element) -> bool:
+        """
+        Check if an element has writes waiting in the unit of work, so it is
+        not dropped from the identity map before they are flushed.
+
+        Arguments:
+            element_id: Element id.
+            element: The element.
+
+        Returns:
+            bool: True if the element must be kept.
+        """
+        return self.unit_of_work is not None and \
+            self.unit_of_work.is_pending('elements', element_id)
 
     def update_element(self, element_id: str) -> None:
         """
-        Update an element.
+        Update an element, sending only the fields changed since the last
+        update.
 
         Arguments:
             element_id: element id.
@@ -110,8 +494,11 @@ class ElementManagement(Observer):
                 f"Element with id {element_id} does not exist")
 
         element = self.elements[element_id]
-        new_data = element.to_dict()
-        self.db_module.update_data("elements", {"_id": element_id}, new_data)
+        changes = element.get_changes()
+        if changes:
+            self.db_module.update_data("elements", {"_id": element_id},
+                                       changes)
+            element.clear_changes()
 
     def delete_element(self, element_id: str) -> None:
         """
@@ -134,9 +521,14 @@ class ElementManagement(Observer):
                                           schedule_instance.elements if element != element_id]
 
         self.db_module.delete_data('elements', {'_id': element_id})
+        self.negative_cache.add(element_id)
+        self._unindex_element(element_id)
+        if self.unit_of_work is not None:
+            self.unit_of_work.discard('elements', element_id)
         if element_id in self.elements:
             remove = self.elements.pop(element_id)
             del remove
+        self.publish(self.DELETED, element)
 
     def create_element(self,
                        element_type: str,
@@ -194,13 +586,16 @@ class ElementManagement(Observer):
                                                 **kwargs)
         element.attach(self)
         self.db_module.insert_data("elements", element.to_dict())
+        self.negative_cache.discard(element_id)
         self.elements[element_id] = element
+        self._index_element(element)
         # Update each schedule
         for schedule in element.schedules:
             schedule_instance = schedule_manager.get_schedule(schedule)
             schedule_instance.elements = (
                 schedule_instance.elements + [element_id])
 
+        self.publish(self.CREATED, element)
         return element
 
     def update(self,
@@ -211,4 +606,16 @@ class ElementManagement(Observer):
         Args:
             element: The element that was updated.
         """
-        self.update_element(element.id)
+        # a view may still hold an element that was evicted or replaced by
+        # a remote change, so cache it again before saving it by id
+        if element.id not in self.negative_cache \
+                and self.elements.get(element.id) is not element:
+            self.elements[element.id] = element
+        self._index_element(element)
+        if self.unit_of_work is not None:
+            self.unit_of_work.register('elements', element)
+        else:
+            self.update_element(element.id)
+        # the element changed in place, so its cached size is stale
+        self.elements.resize(element.id)
+        self.publish(self.CHANGED, element)
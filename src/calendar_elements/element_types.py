@@ -17,6 +17,7 @@ class EventElement(Element):
     scheduled for a specific time, and which can be
     assigned to one or more schedules.'
     """
+    date_fields = ("start", "end")
 
     def __init__(self,
                  element_id: str,
@@ -24,7 +25,8 @@ class EventElement(Element):
                  start: datetime,
                  end: datetime,
                  schedules: [str],
-                 description: str = None):
+                 description: str = None,
+                 recurrence=None):
         """
         EventElement constructor.
 
@@ -36,6 +38,8 @@ class EventElement(Element):
             end -- The end date of the event.
             schedules -- The schedules that the event is assigned to.
             element_type -- The type of the event.
+            recurrence -- The RecurrenceRule (or its dictionary) of the
+            event, if it repeats.
         """
         super().__init__()
         self.__schedules = schedules if schedules else []
@@ -45,6 +49,9 @@ class EventElement(Element):
         self.set_title(title)
         self.set_description(description)
         self.set_interval(start, end)
+        if recurrence is not None:
+            self.set_recurrence(recurrence)
+        self.clear_changes()
 
     @property
     def id(self):
@@ -69,6 +76,7 @@ class EventElement(Element):
     @schedules.setter
     def schedules(self, schedules: [str]):
         """Sets the schedules of the event."""
+        self._track_membership("schedules", self.__schedules, schedules)
         self.__schedules = schedules
         self.notify()
 
@@ -135,6 +143,9 @@ class EventElement(Element):
         else:
             self.start = start
             self.end = end
+            self._mark_changed("start")
+            self._mark_changed("end")
+            self._mark_display_changed()
             self.notify()
 
     def set_title(self, title: str) -> None:
@@ -155,6 +166,7 @@ class EventElement(Element):
             raise ValueError("Title cannot have more than 50 characters")
         else:
             self.title = title
+            self._mark_changed("title")
             self.notify()
 
     def set_description(self, description: str) -> None:
@@ -171,6 +183,7 @@ class EventElement(Element):
                 raise ValueError(
                     "Description cannot have more than 500 characters")
         self.description = description
+        self._mark_changed("description")
         self.notify()
 
     def to_dict(self) -> dict:
@@ -185,6 +198,8 @@ class EventElement(Element):
             "title": self.title,
             "start": self.start,
             "end": self.end,
+            **self._display_fields(),
+            **self._recurrence_fields(),
             "element_type": self.__element_type,
             "description": self.description,
             "schedules": self.__schedules
@@ -198,6 +213,7 @@ class TaskElement(Element):
     'Task with a deadline, which can be scheduled for a specific
     time, and which can be assigned to one or more schedules.'
     """
+    date_fields = ("due_date",)
 
     def __init__(self,
                  element_id: str,
@@ -205,7 +221,8 @@ class TaskElement(Element):
                  due_date: datetime,
                  schedules: [str],
                  description: str = None,
-                 state: str = None):
+                 state: str = None,
+                 recurrence=None):
         """
         TaskElement constructor.
 
@@ -217,6 +234,8 @@ class TaskElement(Element):
             description -- The description of the task.
             state -- The state of the task.
             element_type -- The type of the task.
+            recurrence -- The RecurrenceRule (or its dictionary) of the
+            task, if it repeats.
         """
         super().__init__()
         self.__schedules = schedules if schedules else []
@@ -227,6 +246,9 @@ class TaskElement(Element):
         self.set_title(title)
         self.set_description(description)
         self.set_due_date(due_date)
+        if recurrence is not None:
+            self.set_recurrence(recurrence)
+        self.clear_changes()
 
     @property
     def id(self):
@@ -251,6 +273,7 @@ class TaskElement(Element):
     @schedules.setter
     def schedules(self, schedules: [str]):
         """Sets the schedules of the task."""
+        self._track_membership("schedules", self.__schedules, schedules)
         self.__schedules = schedules
         self.notify()
 
@@ -316,6 +339,8 @@ class TaskElement(Element):
                 f"Due date must be a datetime object, not {type(due_date)}")
         else:
             self.due_date = due_date
+            self._mark_changed("due_date")
+            self._mark_display_changed()
             self.notify()
 
     def set_state(self, state: str):
@@ -329,6 +354,7 @@ class TaskElement(Element):
 
         if state is None:
             self.state = 'incomplete'
+            self._mark_changed("state")
         elif not isinstance(state, str):
             raise TypeError("State must be a string")
         elif state not in valid_states:
@@ -336,6 +362,7 @@ class TaskElement(Element):
                 "State must be either 'incomplete','complete', or 'cancelled'")
         else:
             self.state = state
+            self._mark_changed("state")
             self.notify()
 
     def set_title(self, title: str) -> None:
@@ -356,6 +383,7 @@ class TaskElement(Element):
             raise ValueError("Title cannot have more than 50 characters")
         else:
             self.title = title
+            self._mark_changed("title")
             self.notify()
 
     def set_description(self, description: str) -> None:
@@ -372,6 +400,7 @@ class TaskElement(Element):
                 raise ValueError(
                     "Description cannot have more than 500 characters")
         self.description = description
+        self._mark_changed("description")
         self.notify()
 
     def to_dict(self) -> dict:
@@ -387,6 +416,8 @@ class TaskElement(Element):
             "description": self.description,
             "state": self.state,
             "due_date": self.due_date,
+            **self._display_fields(),
+            **self._recurrence_fields(),
             "element_type": self.__element_type,
             "schedules": self.__schedules
         }
@@ -399,13 +430,15 @@ class ReminderElement(Element):
     'Reminder with a date and time, which can be scheduled for a specific
     time, and which can be assigned to one or more schedules.'
     """
+    date_fields = ("reminder_date",)
 
     def __init__(self,
                  element_id: str,
                  title: str,
                  reminder_date: datetime,
                  schedules: [str],
-                 description: str = None):
+                 description: str = None,
+                 recurrence=None):
         """
         ReminderElement constructor.
 
@@ -416,6 +449,8 @@ class ReminderElement(Element):
             schedules -- The schedules that the reminder is assigned to.
             description -- The description of the reminder.
             element_type -- The type of the reminder.
+            recurrence -- The RecurrenceRule (or its dictionary) of the
+            reminder, if it repeats.
         """
         super().__init__()
         self.__schedules = schedules if schedules else []
@@ -425,6 +460,9 @@ class ReminderElement(Element):
         self.set_title(title)
         self.set_description(description)
         self.set_reminder_date(reminder_date)
+        if recurrence is not None:
+            self.set_recurrence(recurrence)
+        self.clear_changes()
 
     @property
     def id(self):
@@ -450,6 +488,7 @@ class ReminderElement(Element):
     def schedules(self, value):
         """Sets the schedules of the reminder."""
         if isinstance(value, list) and all(isinstance(i, str) for i in value):
+            self._track_membership("schedules", self.__schedules, value)
             self.__schedules = value
             self.notify()
         else:
@@ -513,6 +552,8 @@ class ReminderElement(Element):
             raise TypeError("Reminder date must be a datetime object")
         else:
             self.reminder_date = reminder_date
+            self._mark_changed("reminder_date")
+            self._mark_display_changed()
             self.notify()
 
     def set_title(self, title: str) -> None:
@@ -533,6 +574,7 @@ class ReminderElement(Element):
             raise ValueError("Title cannot have more than 50 characters")
         else:
             self.title = title
+            self._mark_changed("title")
             self.notify()
 
     def set_description(self, description: str) -> None:
@@ -549,6 +591,7 @@ class ReminderElement(Element):
                 raise ValueError(
                     "Description cannot have more than 500 characters")
         self.description = description
+        self._mark_changed("description")
         self.notify()
 
     def to_dict(self) -> dict:
@@ -563,6 +606,8 @@ class ReminderElement(Element):
             "title": self.title,
             "description": self.description,
             "reminder_date": self.reminder_date,
+            **self._display_fields(),
+            **self._recurrence_fields(),
             "element_type": self.__element_type,
             "schedules": self.__schedules
         }
@@ -0,0 +1,179 @@
+"""
+Module that contains the time-range index of the calendar elements.
+
+The index keeps the display interval of each element in a treap (a binary
+search tree balanced by random priorities) ordered by start, where each node
+also keeps the greatest end of its subtree, so the elements that overlap a
+window are found without looking at the others.
+"""
+import itertools
+import random
+import threading
+from datetime import datetime
+
+
+class _Node:
+    """
+    A node of the treap: an interval and the greatest end of its subtree.
+    """
+    __slots__ = ("key", "start", "end", "order", "priority", "max_end",
+                 "left", "right")
+
+    def __init__(self, key, start: datetime, end: datetime, order: tuple):
+        self.key = key
+        self.start = start
+        self.end = end
+        # the start, then the sequence number of the insertion for the ties
+        self.order = order
+        self.priority = random.random()
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self) -> None:
+        """
+        Recomputes the greatest end from the node and its children.
+        """
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalIndex:
+    """
+    Index of intervals kept in an augmented treap.
+
+    Adding, moving or removing an interval updates the treap in place, in
+    expected O(log n). A query visits the paths to the k intervals found, in
+    expected O((k + 1) log n), and never more than the n nodes.
+
+    Methods:
+        add: Adds or moves an interval.
+        remove: Removes an interval.
+        query: Returns the keys of the intervals that overlap a window.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._root = None
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+
+    def add(self, key, start: datetime, end: datetime) -> None:
+        """
+        Adds an interval, replacing the previous one with the same key.
+
+        Arguments:
+            key -- the key of the interval, e.g. the element id.
+            start -- the start of the interval.
+            end -- the end of the interval.
+        """
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is not None:
+                if (node.start, node.end) == (start, end):
+                    return
+                self._root = self._delete(self._root, node.order)
+            node = _Node(key, start, end, (start, next(self._sequence)))
+            self._nodes[key] = node
+            left, right = self._split(self._root, node.order)
+            self._root = self._merge(self._merge(left, node), right)
+
+    def remove(self, key) -> None:
+        """
+        Removes an interval, if it exists.
+
+        Arguments:
+            key -- the key of the interval.
+        """
+        with self._lock:
+            node = self._nodes.pop(key, None)
+            if node is not None:
+                self._root = self._delete(self._root, node.order)
+
+    def query(self, start: datetime, end: datetime) -> list:
+        """
+        Returns the keys of the intervals that overlap [start, end), sorted
+        by the start of the interval. An empty interval overlaps the window
+        if it starts inside it.
+
+        Arguments:
+            start -- the start of the window.
+            end -- the end of the window.
+
+        Returns:
+            list -- the keys of the overlapping intervals.
+        """
+        with self._lock:
+            found = []
+            self._collect(self._root, start, end, found)
+            return found
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._nodes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._nodes)
+
+    def _collect(self, node: _Node, start: datetime, end: datetime,
+                 found: list) -> None:
+        """
+        Collects, in order, the keys of the subtree whose interval overlaps
+        the window, skipping the subtrees that end before it and the
+        intervals that start after it.
+        """
+        if node is None or node.max_end < start:
+            return
+        self._collect(node.left, start, end, found)
+        if node.start < end:
+            if node.end > start or node.start == node.end == start:
+                found.append(node.key)
+            self._collect(node.right, start, end, found)
+
+    def _split(self, node: _Node, order: tuple) -> tuple:
+        """
+        Splits a subtree into the nodes before order and the others.
+        """
+        if node is None:
+            return None, None
+        if node.order < order:
+            node.right, right = self._split(node.right, order)
+            node.update()
+            return node, right
+        left, node.left = self._split(node.left, order)
+        node.update()
+        return left, node
+
+    def _merge(self, left: _Node, right: _Node) -> _Node:
+        """
+        Merges two subtrees, every node of left being before those of right.
+        """
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
+
+    def _delete(self, node: _Node, order: tuple) -> _Node:
+        """
+        Removes the node with the given order from a subtree.
+        """
+        if node.order == order:
+            return self._merge(node.left, node.right)
+        if order < node.order:
+            node.left = self._delete(node.left, order)
+        else:
+            node.right = self._delete(node.right, order)
+        node.update()
+        return node
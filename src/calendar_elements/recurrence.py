@@ -0,0 +1,275 @@
+"""
+    Module that contains the recurrence rules of the calendar elements.
+
+    A recurring element is stored as a single document with its first
+    occurrence and its rule; the occurrences are only computed for the
+    window being displayed or queried.
+"""
+import calendar
+from datetime import datetime, timedelta
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+
+def add_months(date: datetime, months: int) -> datetime:
+    """Adds a number of months to a date, moving the day to the last day of
+    the month when the month is shorter (e.g. 31 January + 1 month is 29 or
+    28 February).
+
+    Arguments:
+        date -- the date.
+        months -- the number of months to add.
+
+    Returns:
+        datetime -- the new date.
+    """
+    month_index = date.month - 1 + months
+    year = date.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(date.day, calendar.monthrange(year, month)[1])
+    return date.replace(year=year, month=month, day=day)
+
+
+class RecurrenceRule:
+    """
+    A rule that repeats an element daily, weekly or monthly.
+
+    The series ends after count occurrences, after the last occurrence that
+    starts until the until date, or never if both are None. The occurrences
+    that start at one of the exceptions are skipped; they still count for
+    count.
+
+    Attributes:
+        frequency: "daily", "weekly" or "monthly".
+        interval: Number of days, weeks or months between occurrences.
+        count: Number of occurrences, or None.
+        until: Last date an occurrence can start, or None.
+        exceptions: Starts of the occurrences that were removed.
+
+    Methods:
+        occurrences: Returns the occurrences that overlap a window.
+        series_end: Returns the end of the last occurrence.
+        to_dict: Returns the dictionary stored with the element.
+        from_dict: Creates a rule from its dictionary.
+    """
+
+    def __init__(self,
+                 frequency: str,
+                 interval: int = 1,
+                 count: int = None,
+                 until: datetime = None,
+                 exceptions: list = None):
+        """
+        RecurrenceRule constructor.
+
+        Arguments:
+            frequency -- "daily", "weekly" or "monthly".
+            interval -- number of days, weeks or months between occurrences.
+            count -- number of occurrences.
+            until -- last date an occurrence can start.
+            exceptions -- starts of the occurrences that were removed.
+        """
+        if frequency not in FREQUENCIES:
+            raise ValueError(
+                f"Frequency must be one of {', '.join(FREQUENCIES)}")
+        if not isinstance(interval, int) or interval < 1:
+            raise ValueError("Interval must be a positive integer")
+        if count is not None and (not isinstance(count, int) or count < 1):
+            raise ValueError("Count must be a positive integer")
+        if until is not None and not isinstance(until, datetime):
+            raise TypeError("Until must be a datetime object")
+        exceptions = list(exceptions) if exceptions else []
+        if not all(isinstance(date, datetime) for date in exceptions):
+            raise TypeError("Exceptions must be datetime objects")
+
+        self.frequency = frequency
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.exceptions = exceptions
+        self._excluded = set(exceptions)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RecurrenceRule) and \
+            self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"RecurrenceRule({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        """Returns the dictionary stored with the element.
+
+        Returns:
+            dict -- the rule.
+        """
+        return {"frequency": self.frequency,
+                "interval": self.interval,
+                "count": self.count,
+                "until": self.until,
+                "exceptions": list(self.exceptions)}
+
+    @classmethod
+    def from_dict(cls, rule: dict) -> 'RecurrenceRule':
+        """Creates a rule from its dictionary.
+
+        Arguments:
+            rule -- the dictionary returned by to_dict.
+
+        Returns:
+            RecurrenceRule -- the rule.
+        """
+        return cls(**rule)
+
+    def with_exception(self, start: datetime) -> 'RecurrenceRule':
+        """Returns a copy of the rule without the occurrence that starts at
+        a date.
+
+        Arguments:
+            start -- the start of the occurrence.
+
+        Returns:
+            RecurrenceRule -- the new rule.
+        """
+        return RecurrenceRule(self.frequency, self.interval, self.count,
+                              self.until, self.exceptions + [start])
+
+    def _nth_start(self, first_start: datetime, number: int) -> datetime:
+        """Returns the start of an occurrence, counting from 0."""
+        if self.frequency == "monthly":
+            return add_months(first_start, number * self.interval)
+        return first_start + number * self._step()
+
+    def _step(self) -> timedelta:
+        """Returns the time between occurrences of a daily or weekly rule."""
+        days = self.interval * (7 if self.frequency == "weekly" else 1)
+        return timedelta(days=days)
+
+    def _first_candidate(self, first_start: datetime, duration: timedelta,
+                         start: datetime) -> int:
+        """Returns the number of an occurrence that ends at or before the
+        first one that can overlap a window starting at start, so the
+        expansion does not walk the occurrences before the window."""
+        if start - duration <= first_start:
+            return 0
+        if self.frequency == "monthly":
+            target = start - duration
+            months = (target.year - first_start.year) * 12 + \
+                target.month - first_start.month
+            return max(0, months // self.interval - 1)
+        return (start - duration - first_start) // self._step()
+
+    def _in_series(self, number: int, occurrence_start: datetime) -> bool:
+        """Checks if an occurrence is before the end of the series."""
+        return (self.count is None or number < self.count) and \
+            (self.until is None or occurrence_start <= self.until)
+
+    def occurrences(self, first_start: datetime, first_end: datetime,
+                    start: datetime, end: datetime):
+        """Yields the occurrences that overlap [start, end), lazily and in
+        order, without computing the ones before the window.
+
+        Arguments:
+            first_start -- the start of the first occurrence.
+            first_end -- the end of the first occurrence.
+            start -- the start of the window.
+            end -- the end of the window.
+
+        Yields:
+            (datetime, datetime) -- the interval of each occurrence.
+        """
+        duration = first_end - first_start
+        number = self._first_candidate(first_start, duration, start)
+        while True:
+            occurrence_start = self._nth_start(first_start, number)
+            if occurrence_start >= end or \
+                    not self._in_series(number, occurrence_start):
+                return
+            occurrence_end = occurrence_start + duration
+            if (occurrence_end > start or occurrence_start >= start) and \
+                    occurrence_start not in self._excluded:
+                yield occurrence_start, occurrence_end
+            number += 1
+
+    def series_end(self, first_start: datetime,
+                   first_end: datetime) -> datetime:
+        """Returns the end of the last occurrence, or datetime.max if the
+        series never ends.
+
+        Arguments:
+            first_start -- the start of the first occurrence.
+            first_end -- the end of the first occurrence.
+
+        Returns:
+            datetime -- the end of the series.
+        """
+        if self.count is None and self.until is None:
+            return datetime.max
+        candidates = []
+        if self.count is not None:
+            candidates.append(self.count - 1)
+        if self.until is not None:
+            candidates.append(self._first_candidate(first_start, timedelta(0),
+                                                    self.until))
+        last = min(candidates)
+        while last > 0 and not self._in_series(
+                last, self._nth_start(first_start, last)):
+            last -= 1
+        while self._in_series(last + 1, self._nth_start(first_start,
+                                                        last + 1)):
+            last += 1
+        return self._nth_start(first_start, last) + (first_end - first_start)
+
+
+class ElementOccurrence:
+    """
+    One occurrence of a recurring element.
+
+    The occurrence behaves as its element, with the dates moved to the
+    occurrence: get_display_interval and the date attributes (start/end,
+    due_date or reminder_date) return the occurrence ones. Changes must be
+    made on the element, which is the whole series.
+
+    Attributes:
+        element: The recurring element.
+        occurrence_id: Id of the occurrence, "<element id>@<start>".
+    """
+
+    def __init__(self, element, start: datetime, end: datetime):
+        """
+        ElementOccurrence constructor.
+
+        Arguments:
+            element -- the recurring element.
+            start -- the start of the occurrence display interval.
+            end -- the end of the occurrence display interval.
+        """
+        self.element = element
+        self._interval = (start, end)
+        shift = start - element.get_display_interval()[0]
+        self._dates = {field: getattr(element, field) + shift
+                       for field in element.date_fields}
+
+    @property
+    def occurrence_id(self) -> str:
+        """Returns the id of the occurrence."""
+        return f"{self.element.id}@{self._interval[0].isoformat()}"
+
+    def get_display_interval(self) -> (datetime, datetime):
+        """Returns the display interval of the occurrence."""
+        return self._interval
+
+    def __getattr__(self, name):
+        dates = self.__dict__.get("_dates", {})
+        if name in dates:
+            return dates[name]
+        return getattr(self.__dict__["element"], name)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ElementOccurrence) and \
+            self.occurrence_id == other.occurrence_id
+
+    def __hash__(self) -> int:
+        return hash(self.occurrence_id)
+
+    def __repr__(self) -> str:
+        return f"ElementOccurrence({self.occurrence_id})"
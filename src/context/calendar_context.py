@@ -0,0 +1,164 @@
+""" calendar_context.py
+
+This module defines the container of a calendar: a database module and the
+managers (and their caches) that serve it.
+
+The managers used to be process-wide singletons, so a process could only
+serve one database. A CalendarContext owns its own ScheduleManagement,
+ElementManagement, UserManagement and UnitOfWork, and the get_instance
+method of each manager returns the manager of the context active in the
+current thread (or asyncio task). The class-level singletons are only used
+when no context is active, so the code written for them keeps working.
+
+Several contexts can be used concurrently from one process, each in its own
+threads:
+
+    first = CalendarContext(MemoryModule("first"))
+    second = CalendarContext(MemoryModule("second"))
+    with first:
+        UserManagement.get_instance().get_user("alice")   # from first
+
+Threads do not inherit the active context: a worker that uses the managers
+must run inside it, e.g. with context.run(function) or copied with
+contextvars.copy_context() (see BackgroundLoader, UnitOfWork.start).
+
+Classes:
+    - CalendarContext: A database module with its managers.
+        Methods:
+            - activate(): Makes the context the active one.
+            - deactivate(token): Restores the context active before.
+            - run(function, *args, **kwargs): Calls a function in the
+            context.
+            - flush(): Writes the pending changes of the managers.
+            - close(): Stops the unit of work timer and flushes.
+
+Functions:
+    - current_context(): The context active in the current thread.
+"""
+import contextvars
+import threading
+
+from src.database.unit_of_work import UnitOfWork
+
+_current = contextvars.ContextVar("calendar_context", default=None)
+
+
+def current_context():
+    """
+    The context active in the current thread or asyncio task.
+
+    Returns:
+        CalendarContext: The active context, None if there is none.
+    """
+    return _current.get()
+
+
+class CalendarContext:
+    """
+    A database module with its own managers, isolated from the managers of
+    the other contexts.
+
+    Attributes:
+        db_module (DatabaseModule): The database module.
+        schedule_management (ScheduleManagement): The schedules manager.
+        element_management (ElementManagement): The elements manager.
+        user_management (UserManagement): The users manager.
+        unit_of_work (UnitOfWork): The write-behind unit of work of the
+            managers, None if they write immediately.
+        managers (dict): The manager of each collection, e.g. for a
+            CacheInvalidator.
+
+    Usage:
+        context = CalendarContext(db_module)
+        with context:
+            user = UserManagement.get_instance().get_user("alice")
+        context.close()
+    """
+
+    def __init__(self, database_module, write_behind: bool = True):
+        """
+        Constructor method.
+
+        Args:
+            database_module (DatabaseModule): The database module.
+            write_behind (bool): Whether the managers register their
+                changes in a UnitOfWork instead of writing them immediately.
+        """
+        from src.schedule.schedule_management import ScheduleManagement
+        from src.calendar_elements.element_management import ElementManagement
+        from src.user.user_management import UserManagement
+
+        self.db_module = database_module
+        self.schedule_management = ScheduleManagement(database_module)
+        self.element_management = ElementManagement(database_module)
+        self.user_management = UserManagement(database_module)
+        self.managers = {"schedules": self.schedule_management,
+                         "elements": self.element_management,
+                         "users": self.user_management}
+        self.unit_of_work = UnitOfWork(database_module) \
+            if write_behind else None
+        for manager in self.managers.values():
+            manager.unit_of_work = self.unit_of_work
+        # tokens of the "with" blocks of each thread, innermost last
+        self._tokens = threading.local()
+
+    def activate(self) -> contextvars.Token:
+        """
+        Make this the active context of the current thread or asyncio task.
+
+        Returns:
+            Token: Restores the previous context with deactivate.
+        """
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        """
+        Restore the context active before a call to activate.
+
+        Args:
+            token (Token): The token returned by activate.
+        """
+        _current.reset(token)
+
+    def __enter__(self) -> 'CalendarContext':
+        tokens = getattr(self._tokens, "stack", None)
+        if tokens is None:
+            tokens = self._tokens.stack = []
+        tokens.append(self.activate())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.deactivate(self._tokens.stack.pop())
+
+    def run(self, function, *args, **kwargs):
+        """
+        Call a function with this context active, without changing the
+        context of the caller.
+
+        Returns:
+            The result of the function.
+        """
+        def call():
+            self.activate()
+            return function(*args, **kwargs)
+        return contextvars.copy_context().run(call)
+
+    def flush(self) -> int:
+        """
+        Write the pending changes of the managers to the database.
+
+        Returns:
+            int: The number of written objects.
+        """
+        if self.unit_of_work is None:
+            return 0
+        return self.unit_of_work.flush()
+
+    def close(self) -> None:
+        """
+        Stop the periodic flushes of the unit of work, if started, and
+        write the pending changes.
+        """
+        if self.unit_of_work is not None:
+            self.unit_of_work.stop()
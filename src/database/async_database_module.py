@@ -0,0 +1,131 @@
+""" Asynchronous interface for database modules.
+
+The same operations as DatabaseModule, as coroutines, so independent queries
+can run concurrently (e.g. with asyncio.gather) instead of one after the
+other.
+
+Classes:
+    AsyncDatabaseModule
+
+Abstract Methods:
+    connect
+    disconnect
+    insert_data
+    delete_data
+    update_data
+    select_data
+    bulk_update
+    insert_many_data
+    select_many_by_ids
+    delete_many_data
+    select_one
+    count_data
+    select_elements_in_range
+    iter_data
+
+Methods:
+    find_missing_ids
+"""
+
+from abc import ABC, abstractmethod
+
+class AsyncDatabaseModule(ABC):
+    """
+    Asynchronous interface for database modules. Every method has the same
+    arguments and results as in DatabaseModule.
+
+    Methods:
+        connect
+        disconnect
+        insert_data
+        delete_data
+        update_data
+        select_data
+        bulk_update
+        insert_many_data
+        select_many_by_ids
+        delete_many_data
+        select_one
+        count_data
+        select_elements_in_range
+        iter_data
+        find_missing_ids
+    """
+    @abstractmethod
+    async def connect(self):
+        """Connect to the database."""
+
+    @abstractmethod
+    async def disconnect(self):
+        """Disconnect from the database."""
+
+    @abstractmethod
+    async def insert_data(self, collection_name, data):
+        """Insert a document into the database."""
+
+    @abstractmethod
+    async def delete_data(self, collection_name, condition):
+        """Delete data from the database."""
+
+    @abstractmethod
+    async def update_data(self, collection_name, condition, new_data):
+        """Update data in the database."""
+
+    @abstractmethod
+    async def select_data(self, collection_name, condition):
+        """Fetch data from the database."""
+
+    @abstractmethod
+    async def bulk_update(self, collection_name, updates):
+        """Update many documents in a single round-trip."""
+
+    @abstractmethod
+    async def insert_many_data(self, collection_name, data):
+        """Insert many documents in a single round-trip."""
+
+    @abstractmethod
+    async def select_many_by_ids(self, collection_name, ids):
+        """Fetch the documents with the given ids in a single round-trip."""
+
+    @abstractmethod
+    async def delete_many_data(self, collection_name, condition):
+        """Delete every document that matches the condition."""
+
+    @abstractmethod
+    async def select_one(self, collection_name, condition, projection=None):
+        """Fetch the first document that matches the condition, or None."""
+
+    @abstractmethod
+    async def count_data(self, collection_name, condition, limit=None):
+        """Count the documents that match the condition."""
+
+    @abstractmethod
+    async def select_elements_in_range(self, schedule_ids, start, end):
+        """Fetch the elements of the schedules displayed in [start, end),
+        sorted by display_start."""
+
+    @abstractmethod
+    def iter_data(self, collection_name, condition, projection=None,
+                  batch_size=1000):
+        """Iterate over the documents that match the condition.
+
+        Returns:
+            async iterator: The documents, to be used with "async for".
+        """
+
+    async def find_missing_ids(self, collection_name, ids):
+        """Check which of the given ids have no document, with one query.
+
+        Args:
+            collection_name (str): The name of the collection.
+            ids (list): The ids to check.
+
+        Returns:
+            list: The ids without a document, in the given order.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        found = {document["_id"] for document in
+                 await self.select_many_by_ids(collection_name, ids)}
+        return [document_id for document_id in ids if document_id not in found]
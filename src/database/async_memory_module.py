@@ -0,0 +1,134 @@
+""" async_memory_module.py
+
+This module defines an in-process implementation of the AsyncDatabaseModule
+interface, for tests and local runs without a MongoDB server.
+
+Classes:
+    - AsyncMemoryModule(AsyncDatabaseModule): Runs every operation on a
+    MemoryModule. It can share the MemoryModule of the synchronous code, so
+    both see the same documents.
+
+Usage:
+    memory = MemoryModule()
+    database = AsyncMemoryModule(memory)
+    await database.connect()
+"""
+import asyncio
+
+from src.database.async_database_module import AsyncDatabaseModule
+from src.database.memory_module import MemoryModule
+
+
+class AsyncMemoryModule(AsyncDatabaseModule):
+    """
+    Asynchronous MemoryModule. The operations do not block (the data is in
+    memory), but each one lets the event loop run other tasks first, like a
+    round-trip to a server would.
+
+    Attributes:
+        memory (MemoryModule): The module that stores the documents.
+    """
+
+    def __init__(self, memory: MemoryModule = None,
+                 database_name: str = "calendar_app"):
+        """
+        Constructor method.
+
+        Args:
+            memory (MemoryModule): The module that stores the documents. A
+                new one is created if None.
+            database_name (str): The name of the database of the new module.
+        """
+        self.memory = memory if memory is not None \
+            else MemoryModule(database_name)
+
+    async def _run(self, method, *args):
+        """
+        Yield to the event loop, then run a MemoryModule method.
+
+        Args:
+            method (function): The method.
+            args: Its arguments.
+
+        Returns:
+            The result of the method.
+        """
+        await asyncio.sleep(0)
+        return method(*args)
+
+    async def connect(self):
+        """ Connect to the database. """
+        return await self._run(self.memory.connect)
+
+    async def disconnect(self):
+        """ Disconnect from the database. """
+        return await self._run(self.memory.disconnect)
+
+    async def insert_data(self, collection_name, data):
+        """ Insert a document into the database. """
+        return await self._run(self.memory.insert_data, collection_name, data)
+
+    async def delete_data(self, collection_name, condition):
+        """ Delete data from the database. """
+        return await self._run(self.memory.delete_data, collection_name,
+                               condition)
+
+    async def update_data(self, collection_name, condition, new_data):
+        """ Update data in the database. """
+        return await self._run(self.memory.update_data, collection_name,
+                               condition, new_data)
+
+    async def select_data(self, collection_name, condition):
+        """ Fetch data from the database. """
+        return await self._run(self.memory.select_data, collection_name,
+                               condition)
+
+    async def bulk_update(self, collection_name, updates):
+        """ Update many documents. """
+        return await self._run(self.memory.bulk_update, collection_name,
+                               updates)
+
+    async def insert_many_data(self, collection_name, data):
+        """ Insert many documents. """
+        return await self._run(self.memory.insert_many_data, collection_name,
+                               data)
+
+    async def select_many_by_ids(self, collection_name, ids):
+        """ Fetch the documents with the given ids. """
+        return await self._run(self.memory.select_many_by_ids,
+                               collection_name, ids)
+
+    async def delete_many_data(self, collection_name, condition):
+        """ Delete every document that matches the condition. """
+        return await self._run(self.memory.delete_many_data, collection_name,
+                               condition)
+
+    async def select_one(self, collection_name, condition, projection=None):
+        """ Fetch the first document that matches the condition. """
+        return await self._run(self.memory.select_one, collection_name,
+                               condition, projection)
+
+    async def count_data(self, collection_name, condition, limit=None):
+        """ Count the documents that match the condition. """
+        return await self._run(self.memory.count_data, collection_name,
+                               condition, limit)
+
+    async def select_elements_in_range(self, schedule_ids, start, end):
+        """ Fetch the elements of the schedules displayed in a window. """
+        return await self._run(self.memory.select_elements_in_range,
+                               schedule_ids, start, end)
+
+    async def iter_data(self, collection_name, condition, projection=None,
+                        batch_size=1000):
+        """ Iterate over the documents that match the condition, yielding to
+        the event loop after each batch. """
+        documents = self.memory.iter_data(collection_name, condition,
+                                          projection, batch_size)
+        for number, document in enumerate(documents, start=1):
+            yield document
+            if number % batch_size == 0:
+                await asyncio.sleep(0)
+
+    def __str__(self):
+        """ String representation of the class. """
+        return f"AsyncMemoryModule({self.memory})"
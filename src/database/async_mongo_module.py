@@ -0,0 +1,201 @@
+""" async_mongo_module.py
+
+This module defines a MongoDB implementation of the AsyncDatabaseModule
+interface, on the asyncio client of pymongo (pymongo.AsyncMongoClient).
+
+Classes:
+    - AsyncMongoModule(AsyncDatabaseModule): Implements the
+    AsyncDatabaseModule interface for MongoDB. It stores the same documents
+    as MongoModule and creates the same indexes.
+
+Usage:
+    database = AsyncMongoModule(host="localhost", port=27017,
+                                database_name="calendar_app")
+    await database.connect()
+    elements, users = await asyncio.gather(
+        database.select_many_by_ids("elements", element_ids),
+        database.select_many_by_ids("users", user_ids))
+"""
+import pymongo
+
+from src.database.async_database_module import AsyncDatabaseModule
+from src.database.mongo_module import ConnectionDBError, INDEXES
+from src.database.utils import update_document, elements_in_range_condition, \
+    display_fields_update, LEGACY_ELEMENTS_CONDITION
+
+
+class AsyncMongoModule(AsyncDatabaseModule):
+    """
+    This class implements the AsyncDatabaseModule interface for MongoDB.
+    Unlike MongoModule it is not a singleton: each instance has its own
+    client, bound to the event loop it connects in.
+
+    Attributes:
+        host (str): The host address of the database.
+        port (int): The port of the database.
+        user (str): The user of the database.
+        password (str): The password of the database.
+        database_name (str): The name of the database.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database_name: str,
+        user: str = None,
+        password: str = None,
+    ):
+        """
+        Constructor method.
+
+        Args:
+            host (str): The host address of the database.
+            port (int): The port of the database.
+            database_name (str): The name of the database.
+            user (str): The user of the database.
+            password (str): The password of the database.
+        """
+        self._host = host
+        self._port = port
+        self._user = user
+        self._password = password
+        self._database_name = database_name
+        self._client = None
+        self._db = None
+
+    async def connect(self):
+        """
+        Connect to the database and create the indexes.
+
+        Raises:
+            ConnectionDBError: If already connected to the database.
+        """
+        if self._client:
+            raise ConnectionDBError("Already connected to the database.")
+
+        self._client = pymongo.AsyncMongoClient(
+            host=self._host,
+            port=self._port,
+            username=self._user,
+            password=self._password,
+        )
+        self._db = self._client[self._database_name]
+        await self.ensure_indexes()
+
+    async def ensure_indexes(self):
+        """
+        Create the indexes in INDEXES and store the display interval of the
+        elements written before it was stored, like
+        MongoModule.ensure_indexes.
+        """
+        for collection_name, indexes in INDEXES.items():
+            for keys, options in indexes:
+                await self._db[collection_name].create_index(keys, **options)
+        documents = await self._db["elements"].find(
+            LEGACY_ELEMENTS_CONDITION).to_list()
+        await self.bulk_update("elements", [
+            update for update in map(display_fields_update, documents)
+            if update is not None])
+
+    async def disconnect(self):
+        """
+        Disconnect from the database.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        if not self._client:
+            raise ConnectionDBError("Not connected to the database.")
+        await self._client.close()
+        self._client = None
+        self._db = None
+
+    def _check_connection(self):
+        """
+        Raises:
+            ConnectionError: If not connected to the database.
+        """
+        if not self._client:
+            raise ConnectionError("Not connected to the database.")
+
+    async def insert_data(self, collection_name: str, data: dict):
+        """ Insert a document with insert_one. """
+        self._check_connection()
+        await self._db[collection_name].insert_one(data)
+
+    async def delete_data(self, collection_name: str, condition: dict):
+        """ Delete the first document that matches the condition. """
+        await self._db[collection_name].delete_one(condition)
+
+    async def update_data(self, collection_name: str, condition: dict,
+                          new_data: dict):
+        """ Update the first document that matches the condition, with the
+        fields to set or an update document. """
+        await self._db[collection_name].update_one(condition,
+                                                   update_document(new_data))
+
+    async def select_data(self, collection_name: str, condition: dict):
+        """ Fetch the documents that match the condition. """
+        return await self._db[collection_name].find(condition).to_list()
+
+    async def bulk_update(self, collection_name: str, updates: list):
+        """ Update many documents with a single unordered bulk_write. """
+        if not updates:
+            return
+        operations = [pymongo.UpdateOne(condition, update_document(new_data))
+                      for condition, new_data in updates]
+        await self._db[collection_name].bulk_write(operations, ordered=False)
+
+    async def insert_many_data(self, collection_name: str, data: list):
+        """ Insert many documents with a single insert_many. """
+        self._check_connection()
+        if data:
+            await self._db[collection_name].insert_many(data)
+
+    async def select_many_by_ids(self, collection_name: str, ids: list):
+        """ Fetch the documents with the given ids with a single "$in"
+        query. """
+        if not ids:
+            return []
+        return await self._db[collection_name].find(
+            {"_id": {"$in": list(ids)}}).to_list()
+
+    async def delete_many_data(self, collection_name: str, condition: dict):
+        """ Delete every document that matches the condition. """
+        await self._db[collection_name].delete_many(condition)
+
+    async def select_one(self, collection_name: str, condition: dict,
+                         projection: dict = None):
+        """ Fetch the first document that matches the condition with
+        find_one. """
+        return await self._db[collection_name].find_one(condition, projection)
+
+    async def count_data(self, collection_name: str, condition: dict,
+                         limit: int = None):
+        """ Count the documents that match the condition with
+        count_documents. """
+        options = {"limit": limit} if limit else {}
+        return await self._db[collection_name].count_documents(condition,
+                                                               **options)
+
+    async def select_elements_in_range(self, schedule_ids: list, start, end):
+        """ Fetch the elements of the schedules displayed in [start, end)
+        with a single query on the schedules_display_interval index. """
+        if not schedule_ids:
+            return []
+        condition = elements_in_range_condition(schedule_ids, start, end)
+        return await self._db["elements"].find(condition) \
+            .sort("display_start", pymongo.ASCENDING).to_list()
+
+    def iter_data(self, collection_name: str, condition: dict,
+                  projection: dict = None, batch_size: int = 1000):
+        """ Iterate over the documents that match the condition through a
+        cursor that fetches batch_size documents per round-trip. """
+        return self._db[collection_name].find(condition, projection,
+                                              batch_size=batch_size)
+
+    def __str__(self):
+        """ String representation of the class. """
+        return (f"AsyncMongoModule(host={self._host}, port={self._port}, "
+                f"database_name={self._database_name})")
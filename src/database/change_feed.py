@@ -0,0 +1,255 @@
+""" Module: Change Feed
+
+Description: This module contains the feeds of the writes made to the
+database by other clients, which tell the managers which of their cached
+objects are stale (see cache.cache_invalidator).
+
+On MongoDB the feed tails a change stream. Other databases, and MongoDB
+servers that are not part of a replica set, are polled for the documents
+whose updated_at stamp changed, which needs every client to write through an
+UpdatedAtDecorator.
+
+Classes:
+    Change: A write to a document.
+    ChangeFeed: The interface of the feeds.
+    PollingChangeFeed: Polls the updated_at stamps of the documents.
+    ChangeStreamFeed: Tails a MongoDB change stream.
+
+Functions:
+    open_change_feed: Opens the best feed for a database.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+import pymongo.errors
+
+from src.database.updated_at_decorator import WATCHED_COLLECTIONS, \
+    DELETIONS_COLLECTION
+
+class Change(NamedTuple):
+    """ A write to a document.
+
+    Attributes:
+        collection (str): The collection of the document.
+        document_id (str): The id of the document.
+        deleted (bool): Whether the document was deleted.
+        document (dict): The stored document, once read by
+            CacheInvalidator.fetch; None before.
+    """
+    collection: str
+    document_id: str
+    deleted: bool = False
+    document: dict = None
+
+class ChangeFeed(ABC):
+    """ Feed of the writes made to the database by other clients."""
+
+    @abstractmethod
+    def poll(self):
+        """ Get the writes made since the last poll, without waiting for
+        new ones.
+
+        Returns:
+            list: The Change of each write, oldest first. A document may
+                appear more than once.
+        """
+
+    def close(self):
+        """ Release the resources of the feed."""
+
+class PollingChangeFeed(ChangeFeed):
+    """ Feed that polls the documents whose updated_at stamp is newer than
+    the last poll (see UpdatedAtDecorator).
+
+    The stamps are written with the clock of each client, so every poll
+    looks lag seconds further back than the last one to cover clocks a bit
+    behind; a write seen by the previous poll is not reported again.
+
+    Args:
+        database_module (DatabaseModule): The database, without the
+            UpdatedAtDecorator, so the stamps can be read.
+        collections (tuple): The watched collections.
+        instance_id (str): The id of this client, whose writes are skipped.
+        lag (float): The seconds each poll looks back.
+        clock (function): Returns the current time in seconds since the
+            epoch.
+    """
+    def __init__(self, database_module, collections=WATCHED_COLLECTIONS,
+                 instance_id=None, lag=2.0, clock=time.time):
+        """
+        Constructor method
+
+        Args:
+            database_module (DatabaseModule): The database.
+            collections (tuple): The watched collections.
+            instance_id (str): The id of this client.
+            lag (float): The seconds each poll looks back.
+            clock (function): Returns the current time in seconds since the
+                epoch.
+        """
+        self._db_module = database_module
+        self.collections = tuple(collections)
+        self.instance_id = instance_id
+        self.lag = lag
+        self._clock = clock
+        self._since = clock()
+        # (collection, document id, deleted) -> stamp of the writes already
+        # reported that the next poll sees again
+        self._seen = {}
+
+    def poll(self):
+        """ Get the writes stamped since the last poll.
+
+        Returns:
+            list: The Change of each write, oldest first.
+        """
+        now = self._clock()
+        condition = {"updated_at": {"$gte": self._since - self.lag}}
+        projection = {"_id": 1, "updated_at": 1, "updated_by": 1}
+        stamped = []
+        for collection_name in self.collections:
+            for document in self._db_module.iter_data(
+                    collection_name, condition, projection):
+                stamped.append((document, collection_name,
+                                document["_id"], False))
+        for document in self._db_module.iter_data(DELETIONS_COLLECTION,
+                                                  condition):
+            if document["collection"] in self.collections:
+                stamped.append((document, document["collection"],
+                                document["document_id"], True))
+
+        changes = []
+        seen = {}
+        for document, collection_name, document_id, deleted in sorted(
+                stamped, key=lambda item: item[0]["updated_at"]):
+            key = (collection_name, document_id, deleted)
+            seen[key] = document["updated_at"]
+            if self._seen.get(key) == document["updated_at"] or \
+                    document.get("updated_by") == self.instance_id:
+                continue
+            changes.append(Change(collection_name, document_id, deleted))
+        self._seen = seen
+        self._since = now
+        return changes
+
+class ChangeStreamFeed(ChangeFeed):
+    """ Feed that tails a MongoDB change stream of the watched collections.
+
+    The stream is resumed from the last change seen if it is interrupted,
+    so no write is missed while the server is briefly unreachable.
+
+    Args:
+        mongo_module (MongoModule): The connected MongoModule.
+        collections (tuple): The watched collections.
+        instance_id (str): The id of this client, whose writes stamped by an
+            UpdatedAtDecorator are skipped.
+    """
+    def __init__(self, mongo_module, collections=WATCHED_COLLECTIONS,
+                 instance_id=None):
+        """
+        Constructor method
+
+        Args:
+            mongo_module (MongoModule): The connected MongoModule.
+            collections (tuple): The watched collections.
+            instance_id (str): The id of this client.
+
+        Raises:
+            pymongo.errors.OperationFailure: If the server does not support
+                change streams.
+        """
+        self._mongo_module = mongo_module
+        self.collections = tuple(collections)
+        self.instance_id = instance_id
+        self._resume_token = None
+        self._stream = mongo_module.watch(self.collections)
+
+    def poll(self):
+        """ Get the changes of the stream that arrived since the last poll.
+
+        Returns:
+            list: The Change of each write, oldest first.
+        """
+        changes = []
+        try:
+            if self._stream is None:
+                self._reopen()
+            while True:
+                event = self._stream.try_next()
+                self._resume_token = self._stream.resume_token
+                if event is None:
+                    break
+                change = self._change(event)
+                if change is not None:
+                    changes.append(change)
+        except pymongo.errors.PyMongoError:
+            # reopened from the resume token on the next poll
+            self.close()
+            if not changes:
+                raise
+        return changes
+
+    def _reopen(self):
+        """ Reopen the stream after the last change seen. If the server no
+        longer has that change (the stream was down for longer than its
+        oplog covers), the next poll opens a new stream, and the writes made
+        meanwhile are not reported.
+        """
+        try:
+            self._stream = self._mongo_module.watch(
+                self.collections, resume_after=self._resume_token)
+        except pymongo.errors.OperationFailure:
+            self._resume_token = None
+            raise
+
+    def _change(self, event):
+        """ The Change of a change stream event, or None if the event is not
+        a write to a document of another client.
+        """
+        operation = event["operationType"]
+        if operation == "delete":
+            return Change(event["ns"]["coll"], event["documentKey"]["_id"],
+                          True)
+        if operation not in ("insert", "update", "replace"):
+            return None
+        if operation == "update":
+            fields = event["updateDescription"]["updatedFields"]
+        else:
+            fields = event.get("fullDocument") or {}
+        if self.instance_id is not None and \
+                fields.get("updated_by") == self.instance_id:
+            return None
+        return Change(event["ns"]["coll"], event["documentKey"]["_id"])
+
+    def close(self):
+        """ Close the stream."""
+        if self._stream is not None:
+            stream, self._stream = self._stream, None
+            stream.close()
+
+def open_change_feed(database_module, collections=WATCHED_COLLECTIONS,
+                     instance_id=None, mongo_module=None):
+    """ Open the feed of the writes of the other clients: a change stream if
+    mongo_module is given and the server supports them, otherwise a
+    PollingChangeFeed.
+
+    Args:
+        database_module (DatabaseModule): The database, without the
+            UpdatedAtDecorator.
+        collections (tuple): The watched collections.
+        instance_id (str): The id of this client, whose writes are skipped.
+        mongo_module (MongoModule): The connected MongoModule, if the
+            database is MongoDB.
+
+    Returns:
+        ChangeFeed: The feed.
+    """
+    if mongo_module is not None:
+        try:
+            return ChangeStreamFeed(mongo_module, collections, instance_id)
+        except pymongo.errors.OperationFailure:
+            # a standalone server, polled instead
+            mongo_module.ensure_updated_at_indexes(
+                list(collections) + [DELETIONS_COLLECTION])
+    return PollingChangeFeed(database_module, collections, instance_id)
@@ -10,6 +10,14 @@ Abstract Methods:
     delete_data
     update_data
     select_data
+    bulk_update
+    insert_many_data
+    select_many_by_ids
+    delete_many_data
+    select_one
+    count_data
+    select_elements_in_range
+    count_elements_by_day
 """
 
 from abc import ABC, abstractmethod
@@ -25,6 +33,14 @@ class DatabaseModule(ABC):
         delete_data
         update_data
         select_data
+        bulk_update
+        insert_many_data
+        select_many_by_ids
+        delete_many_data
+        select_one
+        count_data
+        select_elements_in_range
+        count_elements_by_day
 
     Attributes:
         host (str): database host
@@ -56,3 +72,119 @@ class DatabaseModule(ABC):
     @abstractmethod
     def select_data(self, collection_name, condition):
         """Fetch data from the database."""
+
+    @abstractmethod
+    def bulk_update(self, collection_name, updates):
+        """Update many documents in a single round-trip.
+
+        Args:
+            collection_name (str): The name of the collection.
+            updates (list): (condition, new_data) pairs, with the same
+                semantics as update_data.
+        """
+
+    @abstractmethod
+    def insert_many_data(self, collection_name, data):
+        """Insert many documents in a single round-trip.
+
+        Args:
+            collection_name (str): The name of the collection.
+            data (list): The documents to insert.
+        """
+
+    @abstractmethod
+    def select_many_by_ids(self, collection_name, ids):
+        """Fetch the documents with the given ids in a single round-trip.
+
+        Args:
+            collection_name (str): The name of the collection.
+            ids (list): The ids of the documents.
+
+        Returns:
+            list: The documents found, in no particular order. Missing ids
+                are not reported.
+        """
+
+    @abstractmethod
+    def delete_many_data(self, collection_name, condition):
+        """Delete every document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+        """
+
+    @abstractmethod
+    def select_one(self, collection_name, condition, projection=None):
+        """Fetch the first document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include ({"field": 1}) or to
+                exclude ({"field": 0}). All fields if None.
+
+        Returns:
+            dict: The document, or None if nothing matches.
+        """
+
+    @abstractmethod
+    def count_data(self, collection_name, condition, limit=None):
+        """Count the documents that match the condition, without fetching
+        them.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            limit (int): Stop counting after this many documents. Use 1 to
+                check if a document exists.
+
+        Returns:
+            int: The number of matching documents.
+        """
+
+    @abstractmethod
+    def select_elements_in_range(self, schedule_ids, start, end):
+        """Fetch, in a single query, the elements of the schedules whose
+        display interval (display_start, display_end) overlaps [start, end).
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            list: The element documents, sorted by display_start.
+        """
+
+    @abstractmethod
+    def count_elements_by_day(self, schedule_ids, start, end):
+        """Count, without fetching them, the elements of the schedules that
+        do not repeat and start on each day of [start, end) (see
+        utils.day_counts).
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            dict: The counts of each day with elements, by date.
+        """
+
+    @abstractmethod
+    def iter_data(self, collection_name, condition, projection=None,
+                  batch_size=1000):
+        """Iterate over the documents that match the condition, fetching
+        them in batches, so they never need to be in memory at once.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include or to exclude. All
+                fields if None.
+            batch_size (int): The number of documents fetched per round-trip.
+
+        Returns:
+            iterator: The documents.
+        """
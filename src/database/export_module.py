@@ -1,16 +1,69 @@
-""" Export module for database """
-import pandas as pd
+""" Export module for database
+
+The export reads the element documents of a user straight from a database
+cursor and writes each batch as soon as it arrives, so the memory used does
+not grow with the number of elements.
+"""
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+# columns of the exported elements, in order; fields of other element types
+# are left empty
+COLUMNS = ["_id", "element_type", "title", "description", "start", "end",
+           "due_date", "reminder_date", "state", "schedules",
+           "display_start", "display_end", "recurrence"]
+DATE_COLUMNS = {"start", "end", "due_date", "reminder_date",
+                "display_start", "display_end"}
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+class ExportFormatError(Exception):
+    """ Raised when the export format is not supported """
+
+
+def _json_default(value):
+    """ Serialize the values json does not know, e.g. datetimes """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _flatten(document: dict) -> dict:
+    """ Convert a document to a row of scalar values: dates as ISO strings,
+    lists and dictionaries as JSON """
+    row = {}
+    for column in COLUMNS:
+        value = document.get(column)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, (list, dict)):
+            value = json.dumps(value, default=_json_default)
+        row[column] = value
+    return row
+
+
+def _batches(documents, batch_size: int):
+    """ Split an iterator of documents into lists of batch_size """
+    documents = iter(documents)
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            return
+        yield batch
 
-from src.user.user_management import UserManagement
 
 class ExportModule():
     """ Export module for database
 
     Attributes:
         db (DatabaseModule): The DatabaseModule object.
-    
+
     Methods:
-        export_data: Export data from database to csv file.
+        export_data: Export the elements of a user to a csv, jsonl or
+            parquet file.
+        iter_user_elements: Iterate over the element documents of a user.
     """
     def __init__(self, db):
         """ Export module for database
@@ -23,20 +76,90 @@ class ExportModule():
         """
         self.db = db
 
-    def export_data(self, user_id):
-        """ Export data from database to csv file """
-        user_management = UserManagement.get_instance()
+    def iter_user_elements(self, user_id, batch_size=1000):
+        """ Iterate over the element documents of the schedules of a user,
+        without building Element objects
+
+        Args:
+            user_id (str): The id of the user.
+            batch_size (int): The number of documents fetched per round-trip.
 
-        user = user_management.get_user(user_id)
+        Returns:
+            iterator: The element documents.
+        """
+        user = self.db.select_one("users", {"_id": user_id},
+                                  {"schedules": 1})
+        schedules = user.get("schedules") if user else None
+        if not schedules:
+            return iter([])
+        return self.db.iter_data("elements",
+                                 {"schedules": {"$in": schedules}},
+                                 batch_size=batch_size)
+
+    def export_data(self, user_id, file_format="csv", path=None,
+                    batch_size=1000):
+        """ Export the elements of a user, writing them in batches
 
-        elements = user.get_elements()
+        Args:
+            user_id (str): The id of the user.
+            file_format (str): "csv", "jsonl" or "parquet". Parquet needs
+                pyarrow.
+            path (str): The file to write. Defaults to
+                exported_data_<user_id>.<file_format>.
+            batch_size (int): The number of elements read and written at
+                once.
+
+        Returns:
+            str: The path of the written file.
+        """
+        if file_format not in FORMATS:
+            raise ExportFormatError(
+                f"Format must be one of {', '.join(FORMATS)}")
+        if path is None:
+            path = f'exported_data_{user_id}.{file_format}'
 
-        elements_dict = []
+        batches = _batches(self.iter_user_elements(user_id, batch_size),
+                           batch_size)
+        writer = getattr(self, f"_write_{file_format}")
+        writer(batches, path)
+        return path
 
-        for element in elements:
-            elements_dict.append(element.to_dict())
+    @staticmethod
+    def _write_csv(batches, path):
+        """ Write the batches as CSV rows """
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            for batch in batches:
+                writer.writerows(_flatten(document) for document in batch)
 
-        df = pd.DataFrame(elements_dict)
+    @staticmethod
+    def _write_jsonl(batches, path):
+        """ Write the batches as one JSON document per line """
+        with open(path, "w", encoding="utf-8") as file:
+            for batch in batches:
+                file.writelines(json.dumps(document, default=_json_default)
+                                + "\n" for document in batch)
 
-        df.to_csv(f'exported_data_{user_id}.csv', index=False)
+    @staticmethod
+    def _write_parquet(batches, path):
+        """ Write the batches as row groups of a Parquet file """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ExportFormatError(
+                "The parquet export needs pyarrow installed") from error
 
+        schema = pa.schema([(column, pa.timestamp("us")
+                             if column in DATE_COLUMNS else pa.string())
+                            for column in COLUMNS])
+        with pq.ParquetWriter(path, schema) as writer:
+            for batch in batches:
+                rows = []
+                for document in batch:
+                    row = _flatten(document)
+                    for column in DATE_COLUMNS:
+                        row[column] = document.get(column)
+                    rows.append(row)
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
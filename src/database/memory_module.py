@@ -0,0 +1,842 @@
+""" memory_module.py
+
+This module defines in-process implementations of the DatabaseModule
+interface, useful for local runs, benchmarks and tests that should not depend
+on a running MongoDB server.
+
+Classes:
+    - MemoryModule(DatabaseModule): Keeps every collection in a dictionary
+    indexed by the document "_id".
+        Methods:
+            - connect(): Connects to the in-memory database.
+            - disconnect(): Disconnects from the in-memory database.
+            - insert_data(collection_name, data): Inserts data into the
+            database.
+            - delete_data(collection_name, condition): Deletes data from the
+            database.
+            - update_data(collection_name, condition, new_data): Updates data
+            in the database.
+            - select_data(collection_name, condition): Selects data from the
+            database.
+            - bulk_update(collection_name, updates): Updates many documents.
+            - insert_many_data(collection_name, data): Inserts many documents.
+            - select_many_by_ids(collection_name, ids): Selects the documents
+            with the given ids.
+            - delete_many_data(collection_name, condition): Deletes every
+            document that matches the condition.
+            - select_one(collection_name, condition, projection): Selects
+            the first document that matches the condition.
+            - count_data(collection_name, condition, limit): Counts the
+            documents that match the condition.
+            - select_elements_in_range(schedule_ids, start, end): Selects the
+            elements displayed in a window.
+
+    - FileModule(MemoryModule): Same as MemoryModule, but every write is
+    appended to a log file that is replayed on the next connection.
+
+Usage:
+    Both classes follow the same semantics as MongoModule (update_data
+    applies "$set", delete_data and update_data only touch the first match),
+    so they can be used anywhere a MongoModule is expected.
+"""
+import copy
+import os
+
+from bson import ObjectId, json_util
+
+from src.database.database_module import DatabaseModule
+from src.database.mongo_module import ConnectionDBError, DuplicatedIDError
+from src.database.utils import update_document, \
+    elements_in_range_condition, day_counts, day_in_window, \
+    backfill_display_fields
+
+
+def _get_field(document: dict, field: str):
+    """
+    Get a (possibly dotted) field from a document.
+
+    Args:
+        document (dict): The document.
+        field (str): The field name, e.g. "permissions.user1".
+
+    Returns:
+        tuple: (True, value) if the field exists, (False, None) otherwise.
+    """
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def _compare(value, operator: str, operand) -> bool:
+    """
+    Evaluate a single query operator against a stored value.
+
+    Args:
+        value: The stored value.
+        operator (str): The query operator, e.g. "$gte".
+        operand: The operand of the query operator.
+
+    Returns:
+        bool: True if the value satisfies the operator.
+    """
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported query operator: {operator}")
+
+
+def _match_field(document: dict, field: str, expected) -> bool:
+    """
+    Check if a field of a document matches the expected value or operators.
+    Like MongoDB, a list field matches if any of its items matches.
+
+    Args:
+        document (dict): The document.
+        field (str): The field name.
+        expected: The value or the operators dictionary to match.
+
+    Returns:
+        bool: True if the field matches.
+    """
+    exists, value = _get_field(document, field)
+    is_operator = isinstance(expected, dict) and expected \
+        and all(key.startswith("$") for key in expected)
+
+    if not is_operator:
+        if isinstance(value, list) and not isinstance(expected, list):
+            return expected in value
+        if expected is None:
+            # like MongoDB, None matches missing fields too
+            return value is None
+        return exists and value == expected
+
+    for operator, operand in expected.items():
+        if operator == "$exists":
+            if exists != bool(operand):
+                return False
+            continue
+        if not exists:
+            # a missing field compares like None
+            if operator == "$ne" and operand is not None or \
+                    operator == "$nin" and None not in operand or \
+                    operator == "$eq" and operand is None or \
+                    operator == "$in" and None in operand:
+                continue
+            return False
+        candidates = value if isinstance(value, list) else [value]
+        if operator in ("$ne", "$nin"):
+            if not all(_compare(item, operator, operand)
+                       for item in candidates):
+                return False
+        elif not any(_compare(item, operator, operand)
+                     for item in candidates):
+            return False
+    return True
+
+
+def match_condition(document: dict, condition: dict) -> bool:
+    """
+    Check if a document matches a MongoDB-like condition.
+
+    Supports field equality, dotted fields, "$and", "$or" and the
+    comparison operators "$eq", "$ne", "$in", "$nin", "$gt", "$gte", "$lt",
+    "$lte" and "$exists".
+
+    Args:
+        document (dict): The document.
+        condition (dict): The condition to match.
+
+    Returns:
+        bool: True if the document matches the condition.
+    """
+    for field, expected in (condition or {}).items():
+        if field == "$and":
+            if not all(match_condition(document, sub) for sub in expected):
+                return False
+        elif field == "$or":
+            if not any(match_condition(document, sub) for sub in expected):
+                return False
+        elif not _match_field(document, field, expected):
+            return False
+    return True
+
+
+def _field_parent(document: dict, field: str):
+    """
+    Get the dictionary that holds a (possibly dotted) field, creating the
+    intermediate dictionaries.
+
+    Args:
+        document (dict): The document.
+        field (str): The field name.
+
+    Returns:
+        tuple: (parent dictionary, last part of the field name).
+    """
+    target = document
+    parts = field.split(".")
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    return target, parts[-1]
+
+
+def apply_update(document: dict, new_data: dict) -> None:
+    """
+    Apply an update to a document, in place.
+
+    Like MongoModule.update_data, new_data is either the fields to set or an
+    update document with the operators "$set", "$unset", "$addToSet" (with
+    or without "$each") and "$pull" (a value or {"$in": [...]}).
+
+    Args:
+        document (dict): The document to update.
+        new_data (dict): The fields to set or the update document.
+    """
+    new_data = update_document(new_data)
+    for operator, fields in new_data.items():
+        for field, value in fields.items():
+            parent, key = _field_parent(document, field)
+            if operator == "$set":
+                parent[key] = copy.deepcopy(value)
+            elif operator == "$unset":
+                parent.pop(key, None)
+            elif operator == "$addToSet":
+                items = value["$each"] if isinstance(value, dict) \
+                    and "$each" in value else [value]
+                current = parent.setdefault(key, [])
+                for item in items:
+                    if item not in current:
+                        current.append(copy.deepcopy(item))
+            elif operator == "$pull":
+                items = value["$in"] if isinstance(value, dict) \
+                    and "$in" in value else [value]
+                parent[key] = [item for item in parent.get(key, [])
+                               if item not in items]
+            else:
+                raise ValueError(f"Unsupported update operator: {operator}")
+
+
+def project(document: dict, projection: dict) -> dict:
+    """
+    Copy the top level fields of a document selected by a projection.
+
+    Like in MongoDB, a projection either includes ({"field": 1}) or excludes
+    ({"field": 0}) fields, and "_id" is included unless excluded explicitly.
+
+    Args:
+        document (dict): The document.
+        projection (dict): The projection, or None for every field.
+
+    Returns:
+        dict: A copy of the projected document.
+    """
+    if not projection:
+        return copy.deepcopy(document)
+    including = any(value for field, value in projection.items()
+                    if field != "_id")
+    if including:
+        fields = [field for field, value in projection.items() if value]
+        if projection.get("_id", 1):
+            fields.append("_id")
+        result = {field: document[field] for field in document
+                  if field in fields}
+    else:
+        result = {field: value for field, value in document.items()
+                  if projection.get(field, 1)}
+    return copy.deepcopy(result)
+
+
+class MemoryModule(DatabaseModule):
+    """
+    This class implements the DatabaseModule interface in memory.
+
+    Each collection is a dictionary where the key is the document "_id", so
+    lookups by "_id" do not scan the collection.
+
+    Attributes:
+        host (str): Always "memory".
+        port (int): Always None.
+        user (str): Always None.
+        password (str): Always None.
+        database_name (str): The name of the database.
+
+    Methods:
+        connect: Connects to the database.
+        disconnect: Disconnects from the database.
+        insert_data: Inserts data into the database.
+        delete_data: Deletes data from the database.
+        update_data: Updates data in the database.
+        select_data: Selects data from the database.
+        bulk_update: Updates many documents.
+        insert_many_data: Inserts many documents.
+        select_many_by_ids: Selects the documents with the given ids.
+        delete_many_data: Deletes every document that matches the condition.
+        select_one: Selects the first document that matches the condition.
+        count_data: Counts the documents that match the condition.
+        select_elements_in_range: Selects the elements displayed in a window.
+    """
+
+    def __init__(self, database_name: str = "calendar_app"):
+        """
+        Constructor method.
+
+        Args:
+            database_name (str): The name of the database.
+        """
+        self._database_name = database_name
+        self._collections = {}
+        self._connected = False
+
+    def connect(self):
+        """
+        Connect to the database. The elements written before the display
+        interval was stored get it, so the range queries find them (see
+        utils.backfill_display_fields).
+
+        Raises:
+            ConnectionDBError: If already connected to the database.
+        """
+        if self._connected:
+            raise ConnectionDBError("Already connected to the database.")
+        self._connected = True
+        self._load()
+        backfill_display_fields(self)
+
+    def _load(self):
+        """
+        Load the stored documents on connect. The documents of a
+        MemoryModule are only kept in memory, so they are already loaded.
+        """
+
+    def disconnect(self):
+        """
+        Disconnect from the database. The data is kept in memory, so a new
+        connection sees the same documents.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        if not self._connected:
+            raise ConnectionDBError("Not connected to the database.")
+        self._connected = False
+
+    def insert_data(self,
+                    collection_name: str,
+                    data: dict):
+        """
+        Insert a document into a collection.
+
+        Args:
+            collection_name (str): The name of the collection.
+            data (dict): The data to insert.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+            DuplicatedIDError: If the "_id" already exists.
+        """
+        self._check_connection()
+        document = copy.deepcopy(data)
+        document.setdefault("_id", ObjectId())
+        collection = self._collection(collection_name)
+        if document["_id"] in collection:
+            raise DuplicatedIDError(
+                f"ID {document['_id']} already exists in {collection_name}")
+        collection[document["_id"]] = document
+        self._log("insert", collection_name, document["_id"], document)
+
+    def delete_data(self,
+                    collection_name: str,
+                    condition: dict):
+        """
+        Delete the first document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        for document in self._find(collection_name, condition):
+            del self._collection(collection_name)[document["_id"]]
+            self._log("delete", collection_name, document["_id"])
+            return
+
+    def update_data(self,
+                    collection_name: str,
+                    condition: dict,
+                    new_data: dict):
+        """
+        Update the first document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            new_data (dict): The fields to set, or an update document.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        for document in self._find(collection_name, condition):
+            apply_update(document, new_data)
+            self._log("update", collection_name, document["_id"], new_data)
+            return
+
+    def select_data(self,
+                    collection_name: str,
+                    condition: dict):
+        """
+        Fetch the documents that match the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+
+        Returns:
+            list: Copies of the matching documents.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        return [copy.deepcopy(document)
+                for document in self._find(collection_name, condition)]
+
+    def bulk_update(self,
+                    collection_name: str,
+                    updates: list):
+        """
+        Update many documents, each one like update_data.
+
+        Args:
+            collection_name (str): The name of the collection.
+            updates (list): (condition, new_data) pairs.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        for condition, new_data in updates:
+            self.update_data(collection_name, condition, new_data)
+
+    def insert_many_data(self,
+                         collection_name: str,
+                         data: list):
+        """
+        Insert many documents, in order. Like an ordered insert_many, the
+        documents before a duplicated "_id" are kept.
+
+        Args:
+            collection_name (str): The name of the collection.
+            data (list): The documents to insert.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+            DuplicatedIDError: If an "_id" already exists.
+        """
+        for document in data:
+            self.insert_data(collection_name, document)
+
+    def select_many_by_ids(self,
+                           collection_name: str,
+                           ids: list):
+        """
+        Fetch the documents with the given ids, using the "_id" index.
+
+        Args:
+            collection_name (str): The name of the collection.
+            ids (list): The ids of the documents.
+
+        Returns:
+            list: Copies of the documents found.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        return self.select_data(collection_name, {"_id": {"$in": list(ids)}})
+
+    def delete_many_data(self,
+                         collection_name: str,
+                         condition: dict):
+        """
+        Delete every document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        for document in list(self._find(collection_name, condition)):
+            del self._collection(collection_name)[document["_id"]]
+            self._log("delete", collection_name, document["_id"])
+
+    def select_one(self,
+                   collection_name: str,
+                   condition: dict,
+                   projection: dict = None):
+        """
+        Fetch the first document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include or exclude.
+
+        Returns:
+            dict: A copy of the document, or None if nothing matches.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        for document in self._find(collection_name, condition):
+            return project(document, projection)
+        return None
+
+    def iter_data(self,
+                  collection_name: str,
+                  condition: dict,
+                  projection: dict = None,
+                  batch_size: int = 1000):
+        """
+        Iterate over the documents that match the condition, copying each
+        one only when it is reached.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include or exclude.
+            batch_size (int): Ignored, the documents are already in memory.
+
+        Returns:
+            iterator: Copies of the matching documents.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        return (project(document, projection)
+                for document in self._find(collection_name, condition))
+
+    def count_data(self,
+                   collection_name: str,
+                   condition: dict,
+                   limit: int = None):
+        """
+        Count the documents that match the condition, without copying them.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            limit (int): Stop counting after this many documents.
+
+        Returns:
+            int: The number of matching documents.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        count = 0
+        for _ in self._find(collection_name, condition):
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    def select_elements_in_range(self,
+                                 schedule_ids: list,
+                                 start,
+                                 end):
+        """
+        Fetch the elements of the schedules displayed in [start, end).
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            list: Copies of the element documents, sorted by display_start.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        documents = self.select_data(
+            "elements", elements_in_range_condition(schedule_ids, start, end))
+        return sorted(documents, key=lambda document: document["display_start"])
+
+    def count_elements_by_day(self,
+                              schedule_ids: list,
+                              start,
+                              end):
+        """
+        Count the elements of the schedules that do not repeat and start on
+        each day of [start, end).
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            dict: The counts of each day with elements, by date.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        condition = elements_in_range_condition(schedule_ids, start, end)
+        condition["recurrence"] = None
+        counts = {}
+        for document in self.select_data("elements", condition):
+            day, delta = day_counts(document["element_type"],
+                                    document["display_start"],
+                                    document["display_end"])
+            if not day_in_window(day, start, end):
+                continue
+            totals = counts.setdefault(day, dict.fromkeys(delta, 0))
+            for field, value in delta.items():
+                totals[field] += value
+        return counts
+
+    def _check_connection(self):
+        """
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        if not self._connected:
+            raise ConnectionDBError("Not connected to the database.")
+
+    def _collection(self, collection_name: str) -> dict:
+        """
+        Get a collection, creating it if it does not exist.
+
+        Args:
+            collection_name (str): The name of the collection.
+
+        Returns:
+            dict: The collection, indexed by "_id".
+        """
+        return self._collections.setdefault(collection_name, {})
+
+    def _find(self, collection_name: str, condition: dict):
+        """
+        Iterate over the stored documents that match the condition. An
+        equality or an "$in" on "_id" is answered by the index, without a
+        scan.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+
+        Yields:
+            dict: The stored documents (not copies).
+        """
+        collection = self._collection(collection_name)
+        condition = condition or {}
+        document_id = condition.get("_id")
+        if "_id" in condition and not isinstance(document_id, dict):
+            document = collection.get(document_id)
+            if document is not None and match_condition(document, condition):
+                yield document
+            return
+        if isinstance(document_id, dict) and list(document_id) == ["$in"]:
+            for candidate_id in dict.fromkeys(document_id["$in"]):
+                document = collection.get(candidate_id)
+                if document is not None \
+                        and match_condition(document, condition):
+                    yield document
+            return
+        for document in list(collection.values()):
+            if match_condition(document, condition):
+                yield document
+
+    def _log(self, operation: str, collection_name: str, document_id,
+             data: dict = None):
+        """
+        Hook called after every write. MemoryModule keeps nothing.
+
+        Args:
+            operation (str): "insert", "update" or "delete".
+            collection_name (str): The name of the collection.
+            document_id: The "_id" of the written document.
+            data (dict): The inserted document or the fields set.
+        """
+
+    def __str__(self):
+        """
+        String representation of the class.
+
+        Returns:
+            str: The string representation of the class.
+        """
+        return f"MemoryModule(database_name={self._database_name})"
+
+    @property
+    def host(self):
+        """ Getter for the host attribute. """
+        return "memory"
+
+    @property
+    def port(self):
+        """ Getter for the port attribute. """
+        return None
+
+    @property
+    def user(self):
+        """ Getter for the user attribute. """
+        return None
+
+    @property
+    def password(self):
+        """ Getter for the password attribute. """
+        return None
+
+
+class FileModule(MemoryModule):
+    """
+    MemoryModule that persists every write to an append-only log file.
+
+    The log has one JSON (MongoDB extended JSON) line per write, and it is
+    replayed on connect, so the data survives restarts. Use compact to
+    rewrite the log with only the current documents.
+
+    Attributes:
+        path (str): Path of the log file.
+    """
+
+    def __init__(self, path: str, database_name: str = "calendar_app"):
+        """
+        Constructor method.
+
+        Args:
+            path (str): Path of the log file.
+            database_name (str): The name of the database.
+        """
+        super().__init__(database_name)
+        self._path = path
+        self._file = None
+
+    def _load(self):
+        """
+        Replay the log file, if it exists, and open it for the new writes.
+        """
+        self._collections = {}
+        if os.path.exists(self._path):
+            with open(self._path, "r", encoding="utf-8") as log_file:
+                for line in log_file:
+                    if line.strip():
+                        self._replay(json_util.loads(line))
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def disconnect(self):
+        """
+        Disconnect from the database and close the log file.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        super().disconnect()
+        self._file.close()
+        self._file = None
+
+    def compact(self):
+        """
+        Rewrite the log file with one insert per current document.
+
+        Raises:
+            ConnectionDBError: If not connected to the database.
+        """
+        self._check_connection()
+        self._file.close()
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as log_file:
+            for collection_name, collection in self._collections.items():
+                for document_id, document in collection.items():
+                    log_file.write(self._entry("insert", collection_name,
+                                               document_id, document))
+        os.replace(temporary_path, self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def _replay(self, entry: dict):
+        """
+        Apply a log entry to the in-memory collections.
+
+        Args:
+            entry (dict): The log entry.
+        """
+        collection = self._collection(entry["collection"])
+        document_id = entry["_id"]
+        if entry["op"] == "insert":
+            collection[document_id] = entry["data"]
+        elif entry["op"] == "update" and document_id in collection:
+            apply_update(collection[document_id], entry["data"])
+        elif entry["op"] == "delete":
+            collection.pop(document_id, None)
+
+    @staticmethod
+    def _entry(operation: str, collection_name: str, document_id,
+               data: dict = None) -> str:
+        """
+        Serialize a log entry.
+
+        Returns:
+            str: The log line.
+        """
+        entry = {"op": operation, "collection": collection_name,
+                 "_id": document_id}
+        if data is not None:
+            entry["data"] = data
+        return json_util.dumps(entry) + "\n"
+
+    def _log(self, operation: str, collection_name: str, document_id,
+             data: dict = None):
+        """
+        Append a write to the log file.
+        """
+        self._file.write(self._entry(operation, collection_name,
+                                     document_id, data))
+        self._file.flush()
+
+    def __str__(self):
+        """
+        String representation of the class.
+
+        Returns:
+            str: The string representation of the class.
+        """
+        return f"FileModule(path={self._path}, " \
+            f"database_name={self._database_name})"
+
+    @property
+    def host(self):
+        """ Getter for the host attribute. """
+        return f"file:{self._path}"
+
+    @property
+    def path(self):
+        """ Getter for the path attribute. """
+        return self._path
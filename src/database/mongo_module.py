@@ -26,6 +26,26 @@ Classes:
             in the database.
             - select_data(collection_name, condition): Selects data from the 
             database.
+            - bulk_update(collection_name, updates): Updates many documents
+            with a single bulk_write.
+            - insert_many_data(collection_name, data): Inserts many documents.
+            - select_many_by_ids(collection_name, ids): Selects the documents
+            with the given ids.
+            - delete_many_data(collection_name, condition): Deletes every
+            document that matches the condition.
+            - select_one(collection_name, condition, projection): Selects
+            the first document that matches the condition.
+            - count_data(collection_name, condition, limit): Counts the
+            documents that match the condition.
+            - select_elements_in_range(schedule_ids, start, end): Selects the
+            elements displayed in a window.
+            - count_elements_by_day(schedule_ids, start, end): Counts the
+            elements of each day of a window on the server.
+            - ensure_indexes(): Creates the indexes used by the queries.
+            - ensure_updated_at_indexes(collection_names): Creates the
+            indexes of the polls of the changed documents.
+            - watch(collection_names, resume_after): Opens a change stream
+            of the collections.
 
     Note: The MongoModule class follows the Singleton pattern to ensure a 
     single instance throughout the program.
@@ -35,10 +55,17 @@ Usage:
     instance of the MongoModule class. The Singleton pattern ensures that 
     multiple instances of the class refer to the same database connection.
 """
+import datetime
+import functools
+
 import pymongo
+import pymongo.errors
 
 from src.database.database_module import DatabaseModule
-from src.database.utils import TimeoutDecorator
+from src.database.utils import TimeoutDecorator, TimeExceedError, \
+    update_document, elements_in_range_condition, remaining_time, \
+    count_by_day_pipeline, day_in_window, DAY_COUNT_FIELDS, \
+    backfill_display_fields
 
 class DuplicatedIDError(Exception):
     """Raised when the ID already exists"""
@@ -49,6 +76,41 @@ class NonExistentIDError(Exception):
 class ConnectionDBError(Exception):
     """Raised when the connection to the database fails"""
 
+# Indexes created on connect, by collection: (keys, options) pairs
+INDEXES = {
+    "elements": [
+        # range queries of select_elements_in_range; "schedules" is an
+        # array, so this is a multikey index with one entry per schedule
+        ([("schedules", pymongo.ASCENDING),
+          ("display_start", pymongo.ASCENDING),
+          ("display_end", pymongo.ASCENDING)],
+         {"name": "schedules_display_interval"}),
+    ],
+}
+
+def bounded_by_deadline(method):
+    """
+    Run a method inside a pymongo operation timeout equal to the time left
+    until the current deadline (see utils.deadline), so every server call
+    it makes is bounded with millisecond resolution. Timeouts are raised as
+    TimeExceedError.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        remaining = remaining_time()
+        if remaining is None:
+            return method(*args, **kwargs)
+        if remaining <= 0:
+            raise TimeExceedError("Timeout")
+        try:
+            with pymongo.timeout(remaining):
+                return method(*args, **kwargs)
+        except pymongo.errors.PyMongoError as error:
+            if error.timeout:
+                raise TimeExceedError("Timeout") from error
+            raise
+    return wrapper
+
 class MongoModule(DatabaseModule):
     """
     This class implements the DatabaseModule interface for MongoDB.
@@ -59,9 +121,18 @@ class MongoModule(DatabaseModule):
         user (str): The user of the database.
         password (str): The password of the database.
         database_name (str): The name of the database.
+        server_selection_timeout_ms (int): How long to wait for a server
+            before failing, in milliseconds.
+        socket_timeout_ms (int): How long to wait for a reply, in
+            milliseconds; None waits forever.
+        shared (bool): Whether to return the process-wide instance. Pass
+            False to get a module of its own, e.g. for a CalendarContext.
         client (MongoClient): The MongoClient object.
         db (Database): The Database object.
 
+    The calls made inside a deadline (see utils.deadline) are bounded by
+    the time left until it.
+
     Methods:
         connect: Connects to the database.
         disconnect: Disconnects from the database.
@@ -69,6 +140,15 @@ class MongoModule(DatabaseModule):
         delete_data: Deletes data from the database.
         update_data: Updates data in the database.
         select_data: Selects data from the database.
+        bulk_update: Updates many documents with a single bulk_write.
+        insert_many_data: Inserts many documents.
+        select_many_by_ids: Selects the documents with the given ids.
+        delete_many_data: Deletes every document that matches the condition.
+        select_one: Selects the first document that matches the condition.
+        count_data: Counts the documents that match the condition.
+        select_elements_in_range: Selects the elements displayed in a window.
+        count_elements_by_day: Counts the elements of each day of a window.
+        ensure_indexes: Creates the indexes used by the queries.
     """
 
     _instance = None
@@ -80,6 +160,9 @@ class MongoModule(DatabaseModule):
         database_name: str,
         user: str = None,
         password: str = None,
+        server_selection_timeout_ms: int = 5000,
+        socket_timeout_ms: int = None,
+        shared: bool = True,
     ):
         """
         Constructor method.
@@ -90,6 +173,10 @@ class MongoModule(DatabaseModule):
             _database_name (str): The name of the database.
             _user (str): The user of the database.
             _password (str): The password of the database.
+            _server_selection_timeout_ms (int): The server selection
+                timeout, in milliseconds.
+            _socket_timeout_ms (int): The socket timeout, in milliseconds.
+            shared (bool): Whether this is the process-wide instance.
             _client (MongoClient): The MongoClient object.
             _db (Database): The Database object.
             _collection (Collection): The Collection object.
@@ -100,21 +187,27 @@ class MongoModule(DatabaseModule):
         self._user = user
         self._password = password
         self._database_name = database_name
+        self._server_selection_timeout_ms = server_selection_timeout_ms
+        self._socket_timeout_ms = socket_timeout_ms
         self._client = None
         self._db = None
         self.collection = None
 
-    def __new__(cls, *args, **kwargs):
+    def __new__(cls, *args, shared: bool = True, **kwargs):
         """
-        Singleton constructor method.
+        Singleton constructor method. With shared=False a new instance is
+        returned instead of the process-wide one.
 
         Returns:
             MongoModule: The MongoModule instance.
         """
+        if not shared:
+            return super(MongoModule, cls).__new__(cls)
         if not cls._instance:
             cls._instance = super(MongoModule, cls).__new__(cls)
         return cls._instance
 
+    @bounded_by_deadline
     def connect(self):
         """
         Connect to the database.
@@ -131,8 +224,54 @@ class MongoModule(DatabaseModule):
             port=self._port,
             username=self._user,
             password=self._password,
+            serverSelectionTimeoutMS=self._server_selection_timeout_ms,
+            socketTimeoutMS=self._socket_timeout_ms,
         )
         self._db = self._client[self._database_name]
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        """
+        Create the indexes in INDEXES. Indexes that already exist with the
+        same keys and options are left as they are. The elements written
+        before the display interval was stored get it, so the range queries
+        find them (see utils.backfill_display_fields).
+        """
+        for collection_name, indexes in INDEXES.items():
+            for keys, options in indexes:
+                self._db[collection_name].create_index(keys, **options)
+        backfill_display_fields(self)
+
+    def ensure_updated_at_indexes(self, collection_names):
+        """
+        Create an index on the updated_at stamp of the collections, used by
+        the polls of the documents changed by other clients (see
+        change_feed.PollingChangeFeed).
+
+        Args:
+            collection_names (list): The names of the collections.
+        """
+        for collection_name in collection_names:
+            self._db[collection_name].create_index(
+                [("updated_at", pymongo.ASCENDING)], name="updated_at")
+
+    def watch(self, collection_names, resume_after=None):
+        """
+        Open a change stream of the writes to the collections. Change
+        streams need a replica set; on a standalone server opening one
+        raises OperationFailure.
+
+        Args:
+            collection_names (list): The names of the collections.
+            resume_after (dict): The resume token of the last change seen,
+                to resume a stream that was interrupted.
+
+        Returns:
+            ChangeStream: The stream, read with try_next.
+        """
+        return self._db.watch(
+            [{"$match": {"ns.coll": {"$in": list(collection_names)}}}],
+            resume_after=resume_after, max_await_time_ms=100)
 
     def disconnect(self):
         """
@@ -148,6 +287,7 @@ class MongoModule(DatabaseModule):
         self._client = None
         self._db = None
 
+    @bounded_by_deadline
     def insert_data(self,
                     collection_name: str,
                     data: dict):
@@ -165,6 +305,7 @@ class MongoModule(DatabaseModule):
             raise ConnectionError("Not connected to the database.")
         self._db[collection_name].insert_one(data)
 
+    @bounded_by_deadline
     def delete_data(self,
                     collection_name: str,
                     condition: dict):
@@ -180,6 +321,7 @@ class MongoModule(DatabaseModule):
         """
         self._db[collection_name].delete_one(condition)
 
+    @bounded_by_deadline
     def update_data(self,
                     collection_name: str,
                     condition: dict,
@@ -190,14 +332,16 @@ class MongoModule(DatabaseModule):
         Args:
             collection_name (str): The name of the collection.
             condition (dict): The condition to match.
-            new_data (dict): The new data to insert.
+            new_data (dict): The fields to set, or an update document with
+                operators only (e.g. {"$set": ..., "$addToSet": ...}).
 
         Raises:
             Exception: If not connected to the database.
         """
-        new_data = {"$set": new_data}
+        new_data = update_document(new_data)
         self._db[collection_name].update_one(condition, new_data)
 
+    @bounded_by_deadline
     def select_data(self,
                     collection_name,
                     condition):
@@ -215,6 +359,194 @@ class MongoModule(DatabaseModule):
 
         return result
 
+    @bounded_by_deadline
+    def bulk_update(self,
+                    collection_name: str,
+                    updates: list):
+        """
+        Update many documents with a single unordered bulk_write.
+
+        Args:
+            collection_name (str): The name of the collection.
+            updates (list): (condition, new_data) pairs, like update_data.
+        """
+        if not updates:
+            return
+        operations = [pymongo.UpdateOne(condition, update_document(new_data))
+                      for condition, new_data in updates]
+        self._db[collection_name].bulk_write(operations, ordered=False)
+
+    @bounded_by_deadline
+    def insert_many_data(self,
+                         collection_name: str,
+                         data: list):
+        """
+        Insert many documents with a single insert_many.
+
+        Args:
+            collection_name (str): The name of the collection.
+            data (list): The documents to insert.
+
+        Raises:
+            Exception: If not connected to the database.
+        """
+        if not self._client:
+            raise ConnectionError("Not connected to the database.")
+        if data:
+            self._db[collection_name].insert_many(data)
+
+    @bounded_by_deadline
+    def select_many_by_ids(self,
+                           collection_name: str,
+                           ids: list):
+        """
+        Fetch the documents with the given ids with a single "$in" query.
+
+        Args:
+            collection_name (str): The name of the collection.
+            ids (list): The ids of the documents.
+
+        Returns:
+            list: The documents found.
+        """
+        if not ids:
+            return []
+        return list(self._db[collection_name].find(
+            {"_id": {"$in": list(ids)}}))
+
+    @bounded_by_deadline
+    def delete_many_data(self,
+                         collection_name: str,
+                         condition: dict):
+        """
+        Delete every document that matches the condition.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+        """
+        self._db[collection_name].delete_many(condition)
+
+    @bounded_by_deadline
+    def select_elements_in_range(self,
+                                 schedule_ids: list,
+                                 start,
+                                 end):
+        """
+        Fetch the elements of the schedules displayed in [start, end) with
+        a single query on the schedules_display_interval index.
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            list: The element documents, sorted by display_start.
+        """
+        if not schedule_ids:
+            return []
+        condition = elements_in_range_condition(schedule_ids, start, end)
+        return list(self._db["elements"].find(condition)
+                    .sort("display_start", pymongo.ASCENDING))
+
+    @bounded_by_deadline
+    def count_elements_by_day(self,
+                              schedule_ids: list,
+                              start,
+                              end):
+        """
+        Count the elements of the schedules that do not repeat and start on
+        each day of [start, end) with an aggregation pipeline, so only one
+        small document per day is sent by the server.
+
+        Args:
+            schedule_ids (list): The ids of the schedules.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window.
+
+        Returns:
+            dict: The counts of each day with elements, by date.
+        """
+        if not schedule_ids:
+            return {}
+        pipeline = count_by_day_pipeline(schedule_ids, start, end)
+        counts = {}
+        for result in self._db["elements"].aggregate(pipeline):
+            day = datetime.date.fromisoformat(result["_id"])
+            if day_in_window(day, start, end):
+                counts[day] = {field: result[field]
+                               for field in DAY_COUNT_FIELDS}
+        return counts
+
+    @bounded_by_deadline
+    def select_one(self,
+                   collection_name: str,
+                   condition: dict,
+                   projection: dict = None):
+        """
+        Fetch the first document that matches the condition with find_one.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include or exclude.
+
+        Returns:
+            dict: The document, or None if nothing matches.
+        """
+        return self._db[collection_name].find_one(condition, projection)
+
+    @bounded_by_deadline
+    def count_data(self,
+                   collection_name: str,
+                   condition: dict,
+                   limit: int = None):
+        """
+        Count the documents that match the condition with count_documents,
+        so no document is sent by the server.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            limit (int): Stop counting after this many documents.
+
+        Returns:
+            int: The number of matching documents.
+        """
+        options = {"limit": limit} if limit else {}
+        return self._db[collection_name].count_documents(condition, **options)
+
+    def iter_data(self,
+                  collection_name: str,
+                  condition: dict,
+                  projection: dict = None,
+                  batch_size: int = 1000):
+        """
+        Iterate over the documents that match the condition through a
+        cursor, which fetches them from the server batch_size at a time.
+
+        Args:
+            collection_name (str): The name of the collection.
+            condition (dict): The condition to match.
+            projection (dict): The fields to include or exclude.
+            batch_size (int): The number of documents per batch.
+
+        The cursor is read after this method returns, so the time left until
+        the current deadline, if any, is sent to the server as maxTimeMS.
+
+        Returns:
+            Cursor: The cursor over the documents.
+        """
+        cursor = self._db[collection_name].find(condition, projection,
+                                                batch_size=batch_size)
+        remaining = remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise TimeExceedError("Timeout")
+            cursor = cursor.max_time_ms(max(int(remaining * 1000), 1))
+        return cursor
+
     def __str__(self):
         """
         String representation of the class.
@@ -0,0 +1,361 @@
+""" Module: Retry Decorator
+
+Description: This module contains a DatabaseModule decorator that retries
+the idempotent operations that fail with a transient error, and stops
+calling a database that keeps failing.
+
+Classes:
+    CircuitOpenError: Exception raised when the circuit breaker is open.
+    CircuitBreaker: Counts the consecutive failures and fails fast after
+        too many of them.
+    RetryDecorator: Decorator that retries the idempotent operations of a
+        DatabaseModule with a jittered exponential backoff.
+"""
+import random
+import threading
+import time
+
+import pymongo.errors
+
+from src.database.database_module import DatabaseModule
+from src.database.utils import TimeExceedError, remaining_time, \
+    update_document
+
+# errors worth retrying: the server could not be reached or did not answer
+# in time, so the operation may succeed a moment later
+TRANSIENT_ERRORS = (ConnectionError, TimeExceedError,
+                    pymongo.errors.ConnectionFailure)
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and the call is not made"""
+
+class CircuitBreaker:
+    """ Circuit breaker of a database.
+
+    The breaker is closed while the calls succeed. After failure_threshold
+    consecutive failures it opens and every call fails at once with
+    CircuitOpenError. After reset_timeout seconds it is half open: a single
+    trial call is let through, which closes the breaker if it succeeds and
+    opens it again if it fails.
+
+    Args:
+        failure_threshold (int): The consecutive failures that open the
+            breaker.
+        reset_timeout (float): The seconds the breaker stays open.
+        clock (function): Returns the current time in seconds.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30,
+                 clock=time.monotonic):
+        """
+        Constructor method
+
+        Args:
+            failure_threshold (int): The consecutive failures that open the
+                breaker.
+            reset_timeout (float): The seconds the breaker stays open.
+            clock (function): Returns the current time in seconds.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        """ The state of the breaker: closed, open or half_open."""
+        with self._lock:
+            return self._current_state()
+
+    @property
+    def failures(self):
+        """ The number of consecutive failures."""
+        return self._failures
+
+    def _current_state(self):
+        """ The state of the breaker, moving from open to half open once
+        reset_timeout passed. Must be called with the lock held."""
+        if self._state == self.OPEN and \
+                self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_running = False
+        return self._state
+
+    def before_call(self):
+        """ Check that a call can be made.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half open with the
+                trial call already running.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError("The database is unavailable")
+
+    def record_success(self):
+        """ Record a successful call, closing the breaker."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        """ Record a failed call, opening the breaker after
+        failure_threshold consecutive failures or a failed trial call."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or \
+                    self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_running = False
+
+class RetryDecorator(DatabaseModule):
+    """ Decorator that retries the idempotent operations of a DatabaseModule.
+
+    The reads, the deletes and the updates that only set fields are retried
+    when they fail with a transient error (see TRANSIENT_ERRORS), waiting a
+    random time between the attempts, up to a limit that starts at
+    base_delay and doubles on each retry, capped at max_delay. No retry waits past the current deadline (see
+    utils.deadline). Inserts and updates with other operators are not
+    retried, as running them twice is not the same as running them once.
+
+    Every call goes through a CircuitBreaker, so once the database keeps
+    failing the callers get CircuitOpenError at once instead of waiting for
+    their timeouts.
+
+    Args:
+        decorated (DatabaseModule): The DatabaseModule to be decorated.
+        max_attempts (int): The attempts of a retried operation.
+        base_delay (float): The backoff of the first retry, in seconds.
+        max_delay (float): The longest backoff, in seconds.
+        breaker (CircuitBreaker): The circuit breaker; a new one by default.
+        sleep (function): Waits a number of seconds.
+    """
+    def __init__(self, decorated, max_attempts=3, base_delay=0.05,
+                 max_delay=1, breaker=None, sleep=time.sleep):
+        """
+        Constructor method
+
+        Args:
+            decorated (DatabaseModule): The DatabaseModule to be decorated.
+            max_attempts (int): The attempts of a retried operation.
+            base_delay (float): The backoff of the first retry, in seconds.
+            max_delay (float): The longest backoff, in seconds.
+            breaker (CircuitBreaker): The circuit breaker.
+            sleep (function): Waits a number of seconds.
+        """
+        self._decorated = decorated
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._retries = {}
+        self._failures = {}
+
+    def _backoff(self, attempt):
+        """ The jittered wait before a retry.
+
+        Args:
+            attempt (int): The number of attempts already made.
+
+        Returns:
+            float: The seconds to wait.
+        """
+        return random.uniform(0, min(self._max_delay,
+                                     self._base_delay * 2 ** (attempt - 1)))
+
+    def _count(self, counters, operation):
+        """ Increment the counter of an operation."""
+        with self._lock:
+            counters[operation] = counters.get(operation, 0) + 1
+
+    def _call(self, operation, retry, *args):
+        """ Call an operation of the decorated module through the breaker.
+
+        Args:
+            operation (str): The name of the operation.
+            retry (bool): Whether the operation can be retried.
+            *args: The arguments of the operation.
+
+        Returns:
+            The result of the operation.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+        """
+        method = getattr(self._decorated, operation)
+        attempts = self._max_attempts if retry else 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            attempt += 1
+            try:
+                result = method(*args)
+            except TRANSIENT_ERRORS:
+                self.breaker.record_failure()
+                self._count(self._failures, operation)
+                if attempt >= attempts:
+                    raise
+                delay = self._backoff(attempt)
+                remaining = remaining_time()
+                if remaining is not None and remaining <= delay:
+                    raise
+                self._count(self._retries, operation)
+                self._sleep(delay)
+                continue
+            except Exception:
+                # the database answered, e.g. with a duplicated id
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def metrics(self):
+        """ The state of the breaker and the counters of the decorator.
+
+        Returns:
+            dict: state, consecutive_failures, trips and rejected of the
+                breaker, and the retries and transient failures, in total
+                and by operation.
+        """
+        with self._lock:
+            retries = dict(self._retries)
+            failures = dict(self._failures)
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "trips": self.breaker.trips,
+            "rejected": self.breaker.rejected,
+            "retries": sum(retries.values()),
+            "retries_by_operation": retries,
+            "failures": sum(failures.values()),
+            "failures_by_operation": failures,
+        }
+
+    def connect(self):
+        """ Connect to the database."""
+        return self._call("connect", False)
+
+    def disconnect(self):
+        """ Disconnect from the database."""
+        return self._decorated.disconnect()
+
+    def insert_data(self, collection_name, data):
+        """ Insert data into the database. Not retried."""
+        return self._call("insert_data", False, collection_name, data)
+
+    def delete_data(self, collection_name, condition):
+        """ Delete data from the database."""
+        return self._call("delete_data", True, collection_name, condition)
+
+    def update_data(self, collection_name, condition, new_data):
+        """ Update data in the database. Retried if it only sets fields."""
+        return self._call("update_data", _only_sets(new_data),
+                          collection_name, condition, new_data)
+
+    def select_data(self, collection_name, condition):
+        """ Select data from the database."""
+        return self._call("select_data", True, collection_name, condition)
+
+    def bulk_update(self, collection_name, updates):
+        """ Update many documents in the database. Retried if every update
+        only sets fields."""
+        retry = all(_only_sets(new_data) for _, new_data in updates)
+        return self._call("bulk_update", retry, collection_name, updates)
+
+    def insert_many_data(self, collection_name, data):
+        """ Insert many documents into the database. Not retried."""
+        return self._call("insert_many_data", False, collection_name, data)
+
+    def select_many_by_ids(self, collection_name, ids):
+        """ Select the documents with the given ids from the database."""
+        return self._call("select_many_by_ids", True, collection_name, ids)
+
+    def delete_many_data(self, collection_name, condition):
+        """ Delete many documents from the database."""
+        return self._call("delete_many_data", True, collection_name,
+                          condition)
+
+    def select_elements_in_range(self, schedule_ids, start, end):
+        """ Select the elements displayed in a window from the database."""
+        return self._call("select_elements_in_range", True, schedule_ids,
+                          start, end)
+
+    def select_one(self, collection_name, condition, projection=None):
+        """ Select one document from the database."""
+        return self._call("select_one", True, collection_name, condition,
+                          projection)
+
+    def count_data(self, collection_name, condition, limit=None):
+        """ Count documents in the database."""
+        return self._call("count_data", True, collection_name, condition,
+                          limit)
+
+    def count_elements_by_day(self, schedule_ids, start, end):
+        """ Count the elements displayed in a window by day."""
+        return self._call("count_elements_by_day", True, schedule_ids, start,
+                          end)
+
+    def iter_data(self, collection_name, condition, projection=None,
+                  batch_size=1000):
+        """ Iterate over documents of the database. Opening the iteration is
+        retried, consuming it is not."""
+        return self._call("iter_data", True, collection_name, condition,
+                          projection, batch_size)
+
+    def __str__(self):
+        """ String representation of the object."""
+        return "@retry("+str(self._decorated)+")"
+
+    # setting the getters for the attributes of the decorated object
+    @property
+    def host(self):
+        """ Getter for the host attribute."""
+        return self._decorated.host
+
+    @property
+    def port(self):
+        """ Getter for the port attribute."""
+        return self._decorated.port
+
+    @property
+    def user(self):
+        """ Getter for the user attribute."""
+        return self._decorated.user
+
+    @property
+    def password(self):
+        """ Getter for the password attribute."""
+        return self._decorated.password
+
+def _only_sets(new_data):
+    """ Whether an update_data document only sets fields, which makes it
+    idempotent.
+
+    Args:
+        new_data (dict): The fields to set or the update document.
+
+    Returns:
+        bool: True if the update can be retried.
+    """
+    return set(update_document(new_data)) == {"$set"}
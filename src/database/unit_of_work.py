@@ -0,0 +1,208 @@
+""" unit_of_work.py
+
+This module defines a write-behind unit of work that sits between the
+managers (observers) and a DatabaseModule.
+
+Instead of writing a document every time a setter notifies its manager, the
+managers register the changed object as dirty. Repeated notifications of the
+same object are coalesced, and the pending objects are written with one
+bulk_update per collection when the unit of work is flushed: explicitly, at
+the end of a "with" block (transaction boundary) or periodically by a timer.
+
+Classes:
+    - UnitOfWork: Coalesces dirty objects and flushes them in bulk.
+        Methods:
+            - register(collection_name, subject): Marks an object as dirty.
+            - discard(collection_name, subject_id): Forgets a dirty object.
+            - is_pending(collection_name, subject_id): Checks if an object
+            has pending writes.
+            - flush(): Writes every dirty object to the database.
+            - start(interval): Flushes periodically in a background thread.
+            - stop(): Stops the background flushes and flushes once more.
+"""
+import contextvars
+import threading
+
+from src.database.database_module import DatabaseModule
+
+
+class UnitOfWork:
+    """
+    Write-behind unit of work.
+
+    Attributes:
+        db_module (DatabaseModule): The database module used on flush.
+        pending (int): Number of dirty objects waiting to be written.
+
+    Usage:
+        unit_of_work = UnitOfWork(db_module)
+        with unit_of_work:
+            element.set_title("new title")
+            element.set_description("new description")
+        # one bulk_update is sent here
+    """
+
+    def __init__(self, database_module: DatabaseModule):
+        """
+        Constructor method.
+
+        Args:
+            database_module (DatabaseModule): The database module.
+        """
+        self.db_module = database_module
+        self._dirty = {}
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._timer = None
+        self._stop_event = None
+
+    def register(self, collection_name: str, subject) -> None:
+        """
+        Mark an object as dirty. Its changes are only collected when
+        flushed, so several changes become a single write.
+
+        Args:
+            collection_name (str): The collection of the object.
+            subject: The changed object, with an id and the ChangeTracker
+                methods.
+        """
+        with self._lock:
+            self._dirty.setdefault(collection_name, {})[subject.id] = subject
+
+    def discard(self, collection_name: str, subject_id: str) -> None:
+        """
+        Forget a dirty object, e.g. because it was deleted.
+
+        Args:
+            collection_name (str): The collection of the object.
+            subject_id (str): The id of the object.
+        """
+        with self._lock:
+            self._dirty.get(collection_name, {}).pop(subject_id, None)
+
+    def is_pending(self, collection_name: str, subject_id: str) -> bool:
+        """
+        Check if an object has writes waiting to be flushed.
+
+        Args:
+            collection_name (str): The collection of the object.
+            subject_id (str): The id of the object.
+
+        Returns:
+            bool: True if the object is dirty.
+        """
+        with self._lock:
+            return subject_id in self._dirty.get(collection_name, {})
+
+    @property
+    def pending(self) -> int:
+        """ Number of dirty objects waiting to be written. """
+        with self._lock:
+            return sum(len(dirty) for dirty in self._dirty.values())
+
+    def flush(self) -> int:
+        """
+        Write the changed fields of every dirty object with one bulk_update
+        per collection. If a collection fails, its objects (and the ones not written yet) stay
+        dirty for the next flush and the error is raised.
+
+        Returns:
+            int: The number of written objects.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        written = 0
+        collections = list(dirty.items())
+        for index, (collection_name, subjects) in enumerate(collections):
+            if not subjects:
+                continue
+            updates = []
+            for subject_id, subject in subjects.items():
+                changes = subject.pop_changes()
+                if changes:
+                    updates.append(({"_id": subject_id}, changes))
+            if not updates:
+                continue
+            try:
+                self.db_module.bulk_update(collection_name, updates)
+            except Exception:
+                # the popped changes are lost, rewrite the whole documents
+                for subject in subjects.values():
+                    subject.mark_all_changed()
+                self._restore(collections[index:])
+                raise
+            written += len(updates)
+        return written
+
+    def _restore(self, collections: list) -> None:
+        """
+        Put back objects that could not be written, without overriding the
+        ones registered again in the meantime.
+
+        Args:
+            collections (list): (collection_name, {id: subject}) pairs.
+        """
+        with self._lock:
+            for collection_name, subjects in collections:
+                pending = self._dirty.setdefault(collection_name, {})
+                for subject_id, subject in subjects.items():
+                    pending.setdefault(subject_id, subject)
+
+    def start(self, interval: float) -> None:
+        """
+        Flush periodically in a daemon thread. The database module must be
+        usable from other threads.
+
+        Args:
+            interval (float): Seconds between flushes.
+        """
+        if self._timer is not None:
+            raise RuntimeError("Unit of work timer already started.")
+
+        self._stop_event = threading.Event()
+
+        def worker(stop_event):
+            while not stop_event.wait(interval):
+                try:
+                    self.flush()
+                except Exception as error: # pylint: disable=broad-except
+                    print(f"\033[91mWrite-behind flush failed: {error}\033[0m")
+
+        # run in a copy of the caller's context, so the worker uses the
+        # managers of the active CalendarContext
+        context = contextvars.copy_context()
+        self._timer = threading.Thread(target=context.run,
+                                       args=(worker, self._stop_event),
+                                       daemon=True)
+        self._timer.start()
+
+    def stop(self) -> None:
+        """
+        Stop the periodic flushes and flush the remaining dirty objects.
+        """
+        if self._timer is not None:
+            self._stop_event.set()
+            self._timer.join()
+            self._timer = None
+            self._stop_event = None
+        self.flush()
+
+    def __enter__(self) -> 'UnitOfWork':
+        """
+        Start a transaction. Nested blocks only flush at the outermost one.
+        """
+        with self._lock:
+            self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """
+        End a transaction, flushing if it is the outermost one and no
+        exception was raised. On error the dirty objects are kept.
+        """
+        with self._lock:
+            self._depth -= 1
+            outermost = self._depth == 0
+        if outermost and exc_type is None:
+            self.flush()
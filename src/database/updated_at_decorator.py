@@ -0,0 +1,232 @@
+""" Module: UpdatedAt Decorator
+
+Description: This module contains a DatabaseModule decorator that stamps
+every write with the time it was made and the client that made it, so the
+other clients sharing the database can find the documents changed since
+they last looked (see change_feed.PollingChangeFeed).
+
+Classes:
+    UpdatedAtDecorator: Decorator that stamps the writes of a DatabaseModule
+        and records the deleted documents.
+"""
+import time
+import uuid
+
+from src.database.database_module import DatabaseModule
+from src.database.utils import update_document
+
+# collections whose documents are cached by the managers
+WATCHED_COLLECTIONS = ("users", "schedules", "elements")
+# collection of the ids of the deleted documents, which a poll cannot find
+# by their stamps
+DELETIONS_COLLECTION = "deletions"
+STAMP_FIELDS = ("updated_at", "updated_by")
+
+class UpdatedAtDecorator(DatabaseModule):
+    """ Decorator that stamps the writes of a DatabaseModule.
+
+    The documents of the watched collections get the fields updated_at, the
+    time of the last write in seconds since the epoch, and updated_by, the
+    instance_id of the client that wrote it. A document deleted from a
+    watched collection is recorded in the deletions collection with the same
+    fields. The stamps are removed from the documents read, so the models
+    never see them.
+
+    Args:
+        decorated (DatabaseModule): The DatabaseModule to be decorated.
+        collections (tuple): The watched collections.
+        instance_id (str): The id of this client; a new one by default.
+        clock (function): Returns the current time in seconds since the
+            epoch.
+    """
+    def __init__(self, decorated, collections=WATCHED_COLLECTIONS,
+                 instance_id=None, clock=time.time):
+        """
+        Constructor method
+
+        Args:
+            decorated (DatabaseModule): The DatabaseModule to be decorated.
+            collections (tuple): The watched collections.
+            instance_id (str): The id of this client.
+            clock (function): Returns the current time in seconds since the
+                epoch.
+        """
+        self._decorated = decorated
+        self.collections = tuple(collections)
+        self.instance_id = instance_id or uuid.uuid4().hex
+        self._clock = clock
+
+    @property
+    def decorated(self):
+        """ The decorated DatabaseModule, which returns the stamps."""
+        return self._decorated
+
+    def _stamp(self):
+        """ The stamp of a write made now."""
+        return {"updated_at": self._clock(), "updated_by": self.instance_id}
+
+    def _stamp_update(self, new_data):
+        """ Add the stamp to the fields set by an update.
+
+        Args:
+            new_data (dict): The fields to set or the update document.
+
+        Returns:
+            dict: The update document.
+        """
+        document = dict(update_document(new_data))
+        document["$set"] = {**document.get("$set", {}), **self._stamp()}
+        return document
+
+    def _record_deletions(self, collection_name, ids):
+        """ Record deleted documents in the deletions collection."""
+        if ids:
+            stamp = self._stamp()
+            self._decorated.insert_many_data(DELETIONS_COLLECTION, [
+                {"_id": uuid.uuid4().hex, "collection": collection_name,
+                 "document_id": document_id, **stamp}
+                for document_id in ids])
+
+    def purge_deletions(self, max_age):
+        """ Delete the deletion records older than max_age seconds, which
+        every client has polled by now.
+
+        Args:
+            max_age (float): The age of the records to keep, in seconds.
+        """
+        self._decorated.delete_many_data(
+            DELETIONS_COLLECTION,
+            {"updated_at": {"$lt": self._clock() - max_age}})
+
+    def connect(self):
+        """ Connect to the database."""
+        return self._decorated.connect()
+
+    def disconnect(self):
+        """ Disconnect from the database."""
+        return self._decorated.disconnect()
+
+    def insert_data(self, collection_name, data):
+        """ Insert a stamped document into the database."""
+        if collection_name in self.collections:
+            data = {**data, **self._stamp()}
+        return self._decorated.insert_data(collection_name, data)
+
+    def delete_data(self, collection_name, condition):
+        """ Delete data from the database, recording the deleted document."""
+        if collection_name not in self.collections:
+            return self._decorated.delete_data(collection_name, condition)
+        document = self._decorated.select_one(collection_name, condition,
+                                              {"_id": 1})
+        result = self._decorated.delete_data(collection_name, condition)
+        if document is not None:
+            self._record_deletions(collection_name, [document["_id"]])
+        return result
+
+    def update_data(self, collection_name, condition, new_data):
+        """ Update data in the database, stamping the document."""
+        if collection_name in self.collections:
+            new_data = self._stamp_update(new_data)
+        return self._decorated.update_data(collection_name, condition,
+                                           new_data)
+
+    def select_data(self, collection_name, condition):
+        """ Select data from the database."""
+        return [_unstamped(document) for document in
+                self._decorated.select_data(collection_name, condition)]
+
+    def bulk_update(self, collection_name, updates):
+        """ Update many documents in the database, stamping them."""
+        if collection_name in self.collections:
+            updates = [(condition, self._stamp_update(new_data))
+                       for condition, new_data in updates]
+        return self._decorated.bulk_update(collection_name, updates)
+
+    def insert_many_data(self, collection_name, data):
+        """ Insert many stamped documents into the database."""
+        if collection_name in self.collections:
+            stamp = self._stamp()
+            data = [{**document, **stamp} for document in data]
+        return self._decorated.insert_many_data(collection_name, data)
+
+    def select_many_by_ids(self, collection_name, ids):
+        """ Select the documents with the given ids from the database."""
+        return [_unstamped(document) for document in
+                self._decorated.select_many_by_ids(collection_name, ids)]
+
+    def delete_many_data(self, collection_name, condition):
+        """ Delete many documents from the database, recording them."""
+        if collection_name not in self.collections:
+            return self._decorated.delete_many_data(collection_name,
+                                                    condition)
+        ids = [document["_id"] for document in
+               self._decorated.iter_data(collection_name, condition,
+                                         {"_id": 1})]
+        result = self._decorated.delete_many_data(collection_name, condition)
+        self._record_deletions(collection_name, ids)
+        return result
+
+    def select_elements_in_range(self, schedule_ids, start, end):
+        """ Select the elements displayed in a window from the database."""
+        return [_unstamped(document) for document in
+                self._decorated.select_elements_in_range(schedule_ids, start,
+                                                         end)]
+
+    def select_one(self, collection_name, condition, projection=None):
+        """ Select one document from the database."""
+        document = self._decorated.select_one(collection_name, condition,
+                                              projection)
+        return None if document is None else _unstamped(document)
+
+    def count_data(self, collection_name, condition, limit=None):
+        """ Count documents in the database."""
+        return self._decorated.count_data(collection_name, condition, limit)
+
+    def count_elements_by_day(self, schedule_ids, start, end):
+        """ Count the elements displayed in a window by day."""
+        return self._decorated.count_elements_by_day(schedule_ids, start, end)
+
+    def iter_data(self, collection_name, condition, projection=None,
+                  batch_size=1000):
+        """ Iterate over documents of the database."""
+        return (_unstamped(document) for document in
+                self._decorated.iter_data(collection_name, condition,
+                                          projection, batch_size))
+
+    def __str__(self):
+        """ String representation of the object."""
+        return "@updated_at("+str(self._decorated)+")"
+
+    # setting the getters for the attributes of the decorated object
+    @property
+    def host(self):
+        """ Getter for the host attribute."""
+        return self._decorated.host
+
+    @property
+    def port(self):
+        """ Getter for the port attribute."""
+        return self._decorated.port
+
+    @property
+    def user(self):
+        """ Getter for the user attribute."""
+        return self._decorated.user
+
+    @property
+    def password(self):
+        """ Getter for the password attribute."""
+        return self._decorated.password
+
+def _unstamped(document):
+    """ Remove the stamps from a document read from the database.
+
+    Args:
+        document (dict): The document, which is changed.
+
+    Returns:
+        dict: The document.
+    """
+    for field in STAMP_FIELDS:
+        document.pop(field, None)
+    return document
@@ -3,24 +3,259 @@
 Description: This module contains the database utils.
 
 Functions:
+    update_document: Build the update document of an update_data call.
+    elements_in_range_condition: Build the condition of a range query on
+        the elements.
+    display_fields_update: Build the update that stores the display
+        interval of an element written before it was stored.
+    backfill_display_fields: Store the display interval of the elements
+        written before it was stored.
+    day_counts: The contribution of an element to the counts of its day.
+    day_in_window: Check if a day is inside a window.
+    count_by_day_pipeline: Build the aggregation pipeline of the daily
+        counts of the elements.
+    deadline: Context manager that sets the deadline of the calls inside it.
+    remaining_time: Seconds left until the current deadline.
+    check_deadline: Raise TimeExceedError if the current deadline passed.
     timeout: Decorator to set a timeout for a function.
     TimeExceedError: Exception raised when the timeout is exceeded.
     TimeoutDecorator: Decorator to set a timeout for a DatabaseModule.
+    AsyncTimeoutDecorator: Decorator to set a timeout for an
+        AsyncDatabaseModule.
 """
+import asyncio
+import contextlib
+import contextvars
+import datetime
 import functools
-import platform
+import time
 
 from src.database.database_module import DatabaseModule
+from src.database.async_database_module import AsyncDatabaseModule
+
+def update_document(new_data):
+    """ Build the update document of an update_data call.
+
+    new_data is either the fields to set, which are wrapped in "$set", or
+    an update document whose keys are all update operators (e.g. "$set",
+    "$addToSet", "$pull"), which is used as is.
+
+    Args:
+        new_data (dict): The fields to set or the update document.
+
+    Returns:
+        dict: The update document.
+    """
+    if new_data and all(key.startswith("$") for key in new_data):
+        return new_data
+    return {"$set": new_data}
+
+def elements_in_range_condition(schedule_ids, start, end):
+    """ Build the condition that matches the elements of the schedules whose
+    display interval overlaps [start, end).
+
+    An empty interval overlaps the window if it starts inside it. The
+    condition is answered by the (schedules, display_start, display_end)
+    index of the elements collection.
+
+    Args:
+        schedule_ids (list): The ids of the schedules.
+        start (datetime): The start of the window.
+        end (datetime): The end of the window.
+
+    Returns:
+        dict: The condition.
+    """
+    return {"schedules": {"$in": list(schedule_ids)},
+            "display_start": {"$lt": end},
+            "$or": [{"display_end": {"$gt": start}},
+                    {"display_start": {"$gte": start}}]}
+
+# condition of the element documents written before the display interval
+# was stored with them, which the range queries never match
+LEGACY_ELEMENTS_CONDITION = {"display_start": {"$exists": False}}
+
+def display_fields_update(document):
+    """ Build the update that stores the display interval of an element
+    document written before the display_start and display_end fields
+    existed.
+
+    Args:
+        document (dict): The element document.
+
+    Returns:
+        tuple: The (condition, new_data) pair of a bulk_update, or None if
+            the document is not a valid element.
+    """
+    from src.calendar_elements.element_factory import ElementFactory
+
+    fields = dict(document)
+    fields["element_id"] = fields.pop("_id")
+    try:
+        element = ElementFactory.create_element(**fields)
+    except (KeyError, TypeError, ValueError):
+        return None
+    start, end = element.get_series_interval()
+    return ({"_id": document["_id"]},
+            {"display_start": start, "display_end": end})
+
+def backfill_display_fields(database_module):
+    """ Store the display interval of the element documents written before
+    the display_start and display_end fields existed, so the range queries
+    find them. The documents that have the fields are not read, so running
+    it again costs one indexed query.
+
+    Args:
+        database_module (DatabaseModule): The connected database.
+
+    Returns:
+        int: The number of documents updated.
+    """
+    # read every document before writing, so the updates do not change
+    # the documents being iterated
+    documents = list(database_module.iter_data("elements",
+                                               LEGACY_ELEMENTS_CONDITION))
+    updates = [update for update in map(display_fields_update, documents)
+               if update is not None]
+    if updates:
+        database_module.bulk_update("elements", updates)
+    return len(updates)
+
+# fields of the daily counts: the elements of each type that start on the
+# day, and the minutes of the events that start on it
+DAY_COUNT_FIELDS = ("event", "task", "reminder", "busy_minutes")
+
+def day_counts(element_type, display_start, display_end):
+    """ The contribution of an element to the daily counts. An element is
+    counted on the day its display interval starts.
+
+    Args:
+        element_type (str): "event", "task" or "reminder".
+        display_start (datetime): The start of the display interval.
+        display_end (datetime): The end of the display interval.
+
+    Returns:
+        tuple: (day, counts), where counts has the DAY_COUNT_FIELDS.
+    """
+    counts = dict.fromkeys(DAY_COUNT_FIELDS, 0)
+    counts[element_type] = 1
+    if element_type == "event":
+        counts["busy_minutes"] = \
+            (display_end - display_start).total_seconds() / 60
+    return display_start.date(), counts
+
+def day_in_window(day, start, end):
+    """ Check if a day is inside [start, end).
+
+    Args:
+        day (date): The day.
+        start (datetime): The start of the window.
+        end (datetime): The end of the window.
+
+    Returns:
+        bool: True if the day starts before end and ends after start.
+    """
+    midnight = datetime.datetime.combine(day, datetime.time())
+    return midnight < end and midnight + datetime.timedelta(days=1) > start
+
+def count_by_day_pipeline(schedule_ids, start, end):
+    """ Build the aggregation pipeline that computes, on the server, the
+    daily counts (see day_counts) of the elements of the schedules in
+    [start, end) that do not repeat.
+
+    Each result has the day as "_id", formatted as YYYY-MM-DD, and the
+    DAY_COUNT_FIELDS. The days of the elements that start before the window
+    are returned too, and must be filtered out with day_in_window.
+
+    Args:
+        schedule_ids (list): The ids of the schedules.
+        start (datetime): The start of the window.
+        end (datetime): The end of the window.
+
+    Returns:
+        list: The pipeline.
+    """
+    def count_type(element_type, value=1):
+        return {"$sum": {"$cond": [{"$eq": ["$element_type", element_type]},
+                                   value, 0]}}
+
+    condition = elements_in_range_condition(schedule_ids, start, end)
+    condition["recurrence"] = None
+    return [
+        {"$match": condition},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d",
+                                      "date": "$display_start"}},
+            "event": count_type("event"),
+            "task": count_type("task"),
+            "reminder": count_type("reminder"),
+            "busy_minutes": count_type("event", {"$divide": [
+                {"$subtract": ["$display_end", "$display_start"]}, 60000]}),
+        }},
+    ]
 
 class TimeExceedError(Exception):
     """Raised when the timeout is exceeded"""
     pass
 
+# absolute time.monotonic() by which the current request must finish, or
+# None; a context variable, so each thread and asyncio task has its own
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """ Give the calls inside the block at most seconds to finish.
+
+    Deadlines nest: an inner block can only shorten the deadline of the
+    block around it, so a deadline set for a whole request also bounds the
+    manager and database calls it makes.
+
+    Args:
+        seconds (float): The time available, in seconds.
+    """
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires = min(expires, current)
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_time():
+    """ Seconds left until the current deadline.
+
+    Returns:
+        float: The seconds left, negative if the deadline passed, or None if
+            there is no deadline.
+    """
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return expires - time.monotonic()
+
+def check_deadline(error_message="Timeout"):
+    """ Raise TimeExceedError if the current deadline passed.
+
+    Args:
+        error_message (str): The error message to be raised.
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise TimeExceedError(error_message)
+
 def timeout(seconds, error_message="Timeout"):
     """ Timeout for the decorator.
 
+    The function runs inside a deadline of seconds. Database modules bound
+    their own calls by the deadline (MongoModule through the pymongo
+    operation timeout), and TimeExceedError is raised if the deadline
+    passed when the function returns. No signals are used, so it works on
+    any thread.
+
     Args:
-        seconds (int): The timeout in seconds.
+        seconds (float): The timeout in seconds.
         error_message (str): The error message to be raised.
 
     Returns:
@@ -38,56 +273,11 @@ def timeout(seconds, error_message="Timeout"):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             """ wrapper function """
-            result = None
-            exception = None
-
-            # Check the operating system and import the appropriate module
-            if platform.system() == "Windows":
-                import threading
-
-                def worker():
-                    nonlocal result, exception
-                    try:
-                        result = func(*args, **kwargs)
-                    except Exception as e:
-                        exception = e
-
-                thread = threading.Thread(target=worker)
-                thread.start()
-                thread.join(seconds)
-
-                if thread.is_alive():
-                    raise TimeExceedError(error_message)
-                elif exception is not None:
-                    raise exception
-
-                return result
-
-            else:
-                import signal
-
-                def handler(signum, frame):
-                    raise TimeExceedError(error_message)
-
-                def worker():
-                    nonlocal result, exception
-                    try:
-                        result = func(*args, **kwargs)
-                    except Exception as e:
-                        exception = e
-
-                signal.signal(signal.SIGALRM, handler)
-                signal.alarm(seconds)
-
-                try:
-                    worker()
-                finally:
-                    signal.alarm(0)
-
-                if exception is not None:
-                    raise exception
-
-                return result
+            with deadline(seconds):
+                check_deadline(error_message)
+                result = func(*args, **kwargs)
+                check_deadline(error_message)
+            return result
 
         return wrapper
 
@@ -98,7 +288,7 @@ class TimeoutDecorator(DatabaseModule):
 
     Args:
         decorated (DatabaseModule): The DatabaseModule to be decorated.
-        timeout_seconds (int): The timeout in seconds.
+        timeout_seconds (float): The timeout in seconds.
     """
     def __init__(self, decorated, timeout_seconds=10):
         """ 
@@ -106,7 +296,7 @@ class TimeoutDecorator(DatabaseModule):
 
         Args:
             decorated (DatabaseModule): The DatabaseModule to be decorated.
-            timeout_seconds (int): The timeout in seconds.
+            timeout_seconds (float): The timeout in seconds.
         """
         self._decorated = decorated
         self._timeout_seconds = timeout_seconds
@@ -125,8 +315,7 @@ class TimeoutDecorator(DatabaseModule):
 
     def connect(self):
         """ Connect to the database."""
-        # return self._timeout_wrapper(self._decorated.connect)()
-        return self._decorated.connect()
+        return self._timeout_wrapper(self._decorated.connect)()
 
     def disconnect(self):
         """ Disconnect from the database."""
@@ -153,6 +342,57 @@ class TimeoutDecorator(DatabaseModule):
         return self._timeout_wrapper(self._decorated.select_data)(collection_name,
                                                                   condition)
 
+    def bulk_update(self, collection_name, updates):
+        """ Update many documents in the database."""
+        return self._timeout_wrapper(self._decorated.bulk_update)(collection_name,
+                                                                  updates)
+
+    def insert_many_data(self, collection_name, data):
+        """ Insert many documents into the database."""
+        return self._timeout_wrapper(self._decorated.insert_many_data)(collection_name,
+                                                                       data)
+
+    def select_many_by_ids(self, collection_name, ids):
+        """ Select the documents with the given ids from the database."""
+        return self._timeout_wrapper(self._decorated.select_many_by_ids)(collection_name,
+                                                                         ids)
+
+    def delete_many_data(self, collection_name, condition):
+        """ Delete many documents from the database."""
+        return self._timeout_wrapper(self._decorated.delete_many_data)(collection_name,
+                                                                       condition)
+
+    def select_elements_in_range(self, schedule_ids, start, end):
+        """ Select the elements displayed in a window from the database."""
+        return self._timeout_wrapper(self._decorated.select_elements_in_range)(
+            schedule_ids, start, end)
+
+    def select_one(self, collection_name, condition, projection=None):
+        """ Select one document from the database."""
+        return self._timeout_wrapper(self._decorated.select_one)(collection_name,
+                                                                 condition,
+                                                                 projection)
+
+    def count_data(self, collection_name, condition, limit=None):
+        """ Count documents in the database."""
+        return self._timeout_wrapper(self._decorated.count_data)(collection_name,
+                                                                 condition,
+                                                                 limit)
+
+    def count_elements_by_day(self, schedule_ids, start, end):
+        """ Count the elements displayed in a window by day."""
+        return self._timeout_wrapper(self._decorated.count_elements_by_day)(
+            schedule_ids, start, end)
+
+    def iter_data(self, collection_name, condition, projection=None,
+                  batch_size=1000):
+        """ Iterate over documents of the database. The timeout applies to
+        opening the iteration, not to consuming it."""
+        return self._timeout_wrapper(self._decorated.iter_data)(collection_name,
+                                                                condition,
+                                                                projection,
+                                                                batch_size)
+
     def __str__(self):
         """ String representation of the object."""
         return "@timeout("+str(self._decorated)+")"
@@ -176,4 +416,132 @@ class TimeoutDecorator(DatabaseModule):
     @property
     def password(self):
         """ Getter for the password attribute."""
-        return self._decorated.password
\ No newline at end of file
+        return self._decorated.password
+
+
+class AsyncTimeoutDecorator(AsyncDatabaseModule):
+    """ Decorator to set a timeout for an AsyncDatabaseModule.
+
+    The timeout uses asyncio.wait_for instead of signals, so it works in any
+    thread that runs an event loop, and is shortened by the current
+    deadline, if any. An operation that takes too long is
+    cancelled and TimeExceedError is raised; cancelling the caller cancels
+    the operation too.
+
+    Args:
+        decorated (AsyncDatabaseModule): The module to be decorated.
+        timeout_seconds (float): The timeout in seconds.
+    """
+    def __init__(self, decorated, timeout_seconds=10):
+        """
+        Constructor method
+
+        Args:
+            decorated (AsyncDatabaseModule): The module to be decorated.
+            timeout_seconds (float): The timeout in seconds.
+        """
+        self._decorated = decorated
+        self._timeout_seconds = timeout_seconds
+
+    async def _with_timeout(self, awaitable):
+        """
+        Await an operation, cancelling it after the timeout.
+
+        Args:
+            awaitable: The operation.
+
+        Returns:
+            The result of the operation.
+
+        Raises:
+            TimeExceedError: If the timeout is exceeded.
+        """
+        seconds = self._timeout_seconds
+        remaining = remaining_time()
+        if remaining is not None:
+            seconds = max(min(seconds, remaining), 0)
+        try:
+            return await asyncio.wait_for(awaitable, seconds)
+        except asyncio.TimeoutError as error:
+            raise TimeExceedError("Timeout") from error
+
+    async def connect(self):
+        """ Connect to the database."""
+        return await self._with_timeout(self._decorated.connect())
+
+    async def disconnect(self):
+        """ Disconnect from the database."""
+        return await self._with_timeout(self._decorated.disconnect())
+
+    async def insert_data(self, collection_name, data):
+        """ Insert data into the database."""
+        return await self._with_timeout(
+            self._decorated.insert_data(collection_name, data))
+
+    async def delete_data(self, collection_name, condition):
+        """ Delete data from the database."""
+        return await self._with_timeout(
+            self._decorated.delete_data(collection_name, condition))
+
+    async def update_data(self, collection_name, condition, new_data):
+        """ Update data in the database."""
+        return await self._with_timeout(
+            self._decorated.update_data(collection_name, condition, new_data))
+
+    async def select_data(self, collection_name, condition):
+        """ Select data from the database."""
+        return await self._with_timeout(
+            self._decorated.select_data(collection_name, condition))
+
+    async def bulk_update(self, collection_name, updates):
+        """ Update many documents in the database."""
+        return await self._with_timeout(
+            self._decorated.bulk_update(collection_name, updates))
+
+    async def insert_many_data(self, collection_name, data):
+        """ Insert many documents into the database."""
+        return await self._with_timeout(
+            self._decorated.insert_many_data(collection_name, data))
+
+    async def select_many_by_ids(self, collection_name, ids):
+        """ Select the documents with the given ids from the database."""
+        return await self._with_timeout(
+            self._decorated.select_many_by_ids(collection_name, ids))
+
+    async def delete_many_data(self, collection_name, condition):
+        """ Delete many documents from the database."""
+        return await self._with_timeout(
+            self._decorated.delete_many_data(collection_name, condition))
+
+    async def select_one(self, collection_name, condition, projection=None):
+        """ Select one document from the database."""
+        return await self._with_timeout(
+            self._decorated.select_one(collection_name, condition, projection))
+
+    async def count_data(self, collection_name, condition, limit=None):
+        """ Count documents in the database."""
+        return await self._with_timeout(
+            self._decorated.count_data(collection_name, condition, limit))
+
+    async def select_elements_in_range(self, schedule_ids, start, end):
+        """ Select the elements displayed in a window from the database."""
+        return await self._with_timeout(
+            self._decorated.select_elements_in_range(schedule_ids, start, end))
+
+    async def iter_data(self, collection_name, condition, projection=None,
+                        batch_size=1000):
+        """ Iterate over documents of the database. The timeout applies to
+        each step of the iteration, not to the whole of it."""
+        documents = self._decorated.iter_data(collection_name, condition,
+                                              projection, batch_size)
+        documents = documents.__aiter__()
+        while True:
+            try:
+                document = await self._with_timeout(documents.__anext__())
+            except StopAsyncIteration:
+                return
+            yield document
+
+    def __str__(self):
+        """ String representation of the object."""
+        return "@async_timeout("+str(self._decorated)+")"
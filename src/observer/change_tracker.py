@@ -0,0 +1,137 @@
+"""
+Module that contains the change tracking mixin of the models.
+
+The models record which fields changed since they were last persisted, so
+their managers can send only those fields to the database instead of the
+whole document.
+"""
+
+
+class ChangeTracker:
+    """
+    Mixin that tracks the fields changed since the last persist.
+
+    Plain fields are sent with "$set". Fields listed in membership_fields
+    are lists used as sets of ids (e.g. Schedule.elements), whose added and
+    removed items are sent with "$addToSet" and "$pull" instead of
+    rewriting the whole list.
+
+    Methods:
+        get_changes: Returns the update document with the pending changes.
+        has_changes: Checks if there are pending changes.
+        clear_changes: Forgets the pending changes, after persisting them.
+        pop_changes: Returns the pending changes and forgets them.
+        mark_all_changed: Marks every field as changed.
+    """
+
+    membership_fields = ()
+
+    def __init__(self):
+        self._changed_fields = set()
+        self._added_members = {}
+        self._removed_members = {}
+
+    def _mark_changed(self, field: str) -> None:
+        """
+        Marks a field to be sent entirely with "$set".
+
+        Arguments:
+            field -- the name of the field in to_dict.
+        """
+        self._changed_fields.add(field)
+        self._added_members.pop(field, None)
+        self._removed_members.pop(field, None)
+
+    def _track_membership(self, field: str, old: list, new: list) -> None:
+        """
+        Records the items added to and removed from a membership field.
+
+        Arguments:
+            field -- the name of the field in to_dict.
+            old -- the previous items.
+            new -- the new items.
+        """
+        if field in self._changed_fields:
+            return
+        added = self._added_members.setdefault(field, [])
+        removed = self._removed_members.setdefault(field, [])
+        for item in new:
+            if item not in old:
+                if item in removed:
+                    removed.remove(item)
+                elif item not in added:
+                    added.append(item)
+        for item in old:
+            if item not in new:
+                if item in added:
+                    added.remove(item)
+                elif item not in removed:
+                    removed.append(item)
+
+    def get_changes(self) -> dict:
+        """
+        Returns the update document with the pending changes.
+
+        A membership field with both additions and removals is sent with
+        "$set", since MongoDB does not allow "$addToSet" and "$pull" on the
+        same field in one update.
+
+        Returns:
+            dict -- update document, empty if there are no changes.
+        """
+        values = self.to_dict()
+        changes = {}
+        fields_to_set = {field: values[field] for field in self._changed_fields}
+        for field in self.membership_fields:
+            added = self._added_members.get(field)
+            removed = self._removed_members.get(field)
+            if added and removed:
+                fields_to_set[field] = values[field]
+            elif added:
+                changes.setdefault("$addToSet", {})[field] = \
+                    {"$each": list(added)}
+            elif removed:
+                changes.setdefault("$pull", {})[field] = \
+                    {"$in": list(removed)}
+        if fields_to_set:
+            changes["$set"] = fields_to_set
+        return changes
+
+    def has_changes(self) -> bool:
+        """
+        Checks if there are pending changes.
+
+        Returns:
+            bool -- True if there is something to persist.
+        """
+        return bool(self._changed_fields) \
+            or any(self._added_members.values()) \
+            or any(self._removed_members.values())
+
+    def clear_changes(self) -> None:
+        """
+        Forgets the pending changes. Called after they are persisted.
+        """
+        self._changed_fields = set()
+        self._added_members = {}
+        self._removed_members = {}
+
+    def pop_changes(self) -> dict:
+        """
+        Returns the pending changes and forgets them.
+
+        Returns:
+            dict -- update document, empty if there are no changes.
+        """
+        changes = self.get_changes()
+        self.clear_changes()
+        return changes
+
+    def mark_all_changed(self) -> None:
+        """
+        Marks every field as changed, so the next update rewrites the whole
+        document. Used when changes taken with pop_changes were not saved.
+        """
+        for field in self.to_dict():
+            if field != "_id":
+                self._mark_changed(field)
@@ -59,4 +59,51 @@ class Subject(ABC):
         """
         Notify all the observers that the subject has changed.
         """
-        
\ No newline at end of file
+        
+class Publisher:
+    """
+    Mixin of the managers, used to tell other parts of the program (e.g. the
+    events tree of the views) that an instance was created, changed or
+    deleted, so they can update only what the change affects.
+
+    REFRESHED is published when another client changed or deleted the
+    instance (see CacheInvalidator): its old state is not known, so the
+    subscribers must drop what they derived from it and read it again.
+
+    The class must set self.subscribers to a list on construction.
+    """
+    CREATED = "created"
+    CHANGED = "changed"
+    DELETED = "deleted"
+    REFRESHED = "refreshed"
+
+    def subscribe(self, subscriber) -> None:
+        """
+        Subscribe to the changes of the instances.
+
+        Arguments:
+            subscriber -- function called with the change (CREATED, CHANGED,
+                DELETED or REFRESHED) and the instance.
+        """
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber) -> None:
+        """
+        Stop calling a subscriber.
+
+        Arguments:
+            subscriber -- the subscribed function.
+        """
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def publish(self, change: str, subject: Subject) -> None:
+        """
+        Call the subscribers with a change.
+
+        Arguments:
+            change -- CREATED, CHANGED, DELETED or REFRESHED.
+            subject -- the instance that changed.
+        """
+        for subscriber in list(self.subscribers):
+            subscriber(change, subject)
@@ -0,0 +1,134 @@
+""" Module for the group free/busy solver.
+
+This module finds the periods of a window in which the members of a schedule
+are free, sweeping once over the boundaries of everyone's busy intervals.
+
+Classes:
+
+    FreeSlot: A free period and the members that are busy during it
+
+Functions:
+
+    common_free_slots: Find the ranked free slots of a group
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+
+class FreeSlot(NamedTuple):
+    """
+    A free period of a group
+
+    Attributes:
+        start: Start of the slot
+        end: End of the slot
+        busy_members: IDs of the members busy at some point of the slot,
+            empty if everyone is free
+    """
+    start: datetime
+    end: datetime
+    busy_members: frozenset
+
+    @property
+    def duration(self) -> timedelta:
+        """ Length of the slot """
+        return self.end - self.start
+
+
+def common_free_slots(busy: list,
+                      window: tuple,
+                      duration: timedelta,
+                      max_busy: int = 0) -> list:
+    """
+    Find the slots of a window in which at most max_busy members are busy
+
+    The boundaries of the busy intervals are sorted once and swept keeping
+    how many intervals of each group of members (e.g. the members of a
+    schedule) are open, not of each member: a group with more than
+    max_busy members makes the period busy by itself, so its members are
+    only counted one by one for the groups of at most max_busy members,
+    when the group opens or closes, and the busy members of a slot are
+    listed once, when the slot ends. The cost is O(n log n + n * max_busy)
+    in the number n of intervals, whatever the size of the groups.
+    Intervals that only touch do not conflict.
+
+    Args:
+        busy: List of (start, end, members) tuples, where members are the
+            IDs of the members busy in that interval. Intervals of the same
+            group should share one frozenset, which is hashed once
+        window: (start, end) of the period to search
+        duration: Minimum length of a slot
+        max_busy: Maximum number of busy members in a slot
+
+    Returns:
+        The slots at least duration long, ranked by fewest busy members,
+        then longest, then earliest
+    """
+    window_start, window_end = window
+    boundaries = []
+    for start, end, members in busy:
+        start, end = max(start, window_start), min(end, window_end)
+        if start < end and members:
+            if not isinstance(members, frozenset):
+                members = frozenset(members)
+            boundaries.append((start, 1, members))
+            boundaries.append((end, -1, members))
+    boundaries.sort(key=lambda boundary: boundary[0])
+
+    slots = []
+    # open intervals of each group, and of the small groups of each member
+    open_groups = Counter()
+    open_members = Counter()
+    # open groups with more than max_busy members
+    large_groups = 0
+    opened = []
+    slot_start, slot_groups = None, set()
+    previous = window_start
+    position = 0
+    while previous < window_end:
+        time = boundaries[position][0] if position < len(boundaries) \
+            else window_end
+        # the members of the open groups are busy in [previous, time)
+        if time > previous:
+            if not large_groups and len(open_members) <= max_busy:
+                if slot_start is None:
+                    slot_start, slot_groups = previous, set(open_groups)
+                else:
+                    slot_groups.update(opened)
+            elif slot_start is not None:
+                slots.append(FreeSlot(slot_start, previous,
+                                      frozenset().union(*slot_groups)))
+                slot_start = None
+            opened = []
+        # every boundary at the same time is applied before the next
+        # segment, so intervals that only touch do not overlap
+        while position < len(boundaries) and \
+                boundaries[position][0] == time:
+            _, change, members = boundaries[position]
+            open_groups[members] += change
+            if open_groups[members] == 0:
+                del open_groups[members]
+            elif change < 0 or open_groups[members] > 1:
+                members = None
+            else:
+                opened.append(members)
+            if members is not None:
+                # the group opened or closed
+                if len(members) > max_busy:
+                    large_groups += change
+                else:
+                    for member in members:
+                        open_members[member] += change
+                        if not open_members[member]:
+                            del open_members[member]
+            position += 1
+        previous = time
+    if slot_start is not None:
+        slots.append(FreeSlot(slot_start, window_end,
+                              frozenset().union(*slot_groups)))
+
+    slots = [slot for slot in slots if slot.duration >= duration]
+    slots.sort(key=lambda slot: (len(slot.busy_members), -slot.duration,
+                                 slot.start))
+    return slots
@@ -17,17 +17,30 @@ Functions:
 
     schedule_exists: Check if a schedule exists
     create_schedule: Create a new schedule
+    find_schedule: Get a schedule by its ID, or None if it does not exist
     get_schedule: Get a schedule by its ID
     update_schedule: Updates a schedule in the database
     delete_schedule: Deletes a schedule from the database and the schedules 
         dictionary
     add_element_to_schedule: Add an element to a schedule
+    validate_references_async: Check concurrently that the elements and
+        users of a schedule exist
+    find_common_free_slots: Find the slots in which the members of a
+        schedule are free
     update: Called when the schedule is updated.
+    subscribe: Subscribe to the created, changed and deleted schedules
 """
 
+import asyncio
+
 from src.database.mongo_module import MongoModule,DuplicatedIDError,NonExistentIDError
-from src.observer.observer import Observer, Subject, DatabaseNotProvidedError
+from src.observer.observer import Observer, Subject, Publisher, \
+    DatabaseNotProvidedError
+from src.cache.negative_cache import NegativeCache
+from src.cache.lru_cache import LRUCache, approximate_size
 from src.schedule.schedule_model import Schedule
+from src.schedule.free_busy import common_free_slots
+from src.context.calendar_context import current_context
 
 
 class EmptyPermissionsError(Exception):
@@ -35,15 +48,25 @@ class EmptyPermissionsError(Exception):
     pass
 
 
-class ScheduleManagement(Observer):
+class ScheduleManagement(Observer, Publisher):
     """
     ScheduleManagement class
     Responsible for managing the schedules in the database
 
     Attributes:
         db: Database module
-        schedules: Dictionary of schedules, where the key is the schedule ID
-            and the value is the schedule instance
+        schedules: Identity map of the loaded schedules, where the key is the
+            schedule ID and the value is the schedule instance. Bounded
+            LRUCache: the least recently used schedules are dropped past
+            cache_size entries or cache_max_bytes, and after cache_ttl
+            seconds. Dropped schedules stay observed, and are cached again
+            when they change. schedules.stats() reports its hit ratio
+        unit_of_work: Optional write-behind UnitOfWork. When set, schedule
+            updates are registered there instead of written immediately.
+        negative_cache: IDs recently found not to exist, so repeated
+            lookups of a missing schedule do not reach the database
+        subscribers: Functions called when a schedule is created, changed
+            or deleted (see Publisher)
     """
     _instance = None
 
@@ -52,21 +75,33 @@ class ScheduleManagement(Observer):
                     database_module: MongoModule = None,
                     schedules: dict = None) -> 'ScheduleManagement':
         """
-        Get the instance of the ScheduleManagement class
+        Get the instance of the ScheduleManagement class: the one of the
+        active CalendarContext or, without one, the process-wide instance
         """
+        context = current_context()
+        if context is not None:
+            return context.schedule_management
         if cls._instance is None:
             cls._instance = cls(database_module, schedules)
         return cls._instance
 
     def __init__(self,
                 database_module: MongoModule,
-                schedules: dict = None):
+                schedules: dict = None,
+                cache_size: int = 10000,
+                cache_ttl: float = None,
+                cache_max_bytes: int = None):
         """
         Constructor for the ScheduleManagement class
 
         Args:
             database_module: Database module
-
+            schedules: Initial schedules, where the key is the schedule ID
+            cache_size: Maximum number of schedules kept in memory
+            cache_ttl: Seconds a schedule is kept in memory, None for no
+                limit
+            cache_max_bytes: Maximum approximate size of the schedules kept
+                in memory, None for no limit
         """
 
         if not database_module:
@@ -74,12 +109,20 @@ class ScheduleManagement(Observer):
                 "Database module not provided on object creation.")
 
         self.db_module = database_module
-        self.schedules = schedules if schedules else {}
+        self.schedules = LRUCache(max_entries=cache_size,
+                                  ttl=cache_ttl,
+                                  max_size=cache_max_bytes,
+                                  sizeof=approximate_size,
+                                  pinned=self._has_pending_writes,
+                                  items=schedules)
+        self.unit_of_work = None
+        self.negative_cache = NegativeCache()
+        self.subscribers = []
 
     def schedule_exists(self,
                         schedule_id: str) -> bool:
         """
-        Check if a schedule exists
+        Check if a schedule exists, counting it instead of fetching it
 
         Args:
             schedule_id: Schedule ID
@@ -87,12 +130,13 @@ class ScheduleManagement(Observer):
         Returns:
             True if the schedule exists, False otherwise
         """
-
-        # Get the schedules from the database that match the given ID
-        schedule = self.db_module.select_data(
-            'schedules', {'_id': schedule_id})
-        # If the list is not empty, the schedule exists
-        return bool(schedule)
+        if schedule_id in self.negative_cache:
+            return False
+        if self.db_module.count_data('schedules', {'_id': schedule_id},
+                                     limit=1):
+            return True
+        self.negative_cache.add(schedule_id)
+        return False
 
     def create_schedule(self,
                         schedule_id: str,
@@ -125,18 +169,18 @@ class ScheduleManagement(Observer):
         if not permissions:
             raise EmptyPermissionsError("Permissions cannot be empty")
 
-        # Check if each element exists
+        # Check if the elements exist, with one query for all of them
         element_manager = ElementManagement.get_instance()
-        for element_id in elements:
-            if not element_manager.element_exists(element_id):
-                raise NonExistentIDError(f"No element found \
-                                         with ID {element_id}")
+        missing_elements = element_manager.find_missing_elements(elements)
+        if missing_elements:
+            raise NonExistentIDError(f"No element found \
+                                     with ID {missing_elements[0]}")
 
-        # Check if each user exists
+        # Check if the users exist, with one query for all of them
         user_manager = UserManagement.get_instance()
-        for user_id in permissions.keys():
-            if not user_manager.user_exists(user_id):
-                raise NonExistentIDError(f"No user found with ID {user_id}")
+        missing_users = user_manager.find_missing_users(list(permissions))
+        if missing_users:
+            raise NonExistentIDError(f"No user found with ID {missing_users[0]}")
 
         # Create the schedule instance and insert it into the database
         schedule = Schedule(schedule_id,
@@ -145,6 +189,7 @@ class ScheduleManagement(Observer):
                             permissions,
                             elements)
 
+        self.negative_cache.discard(schedule_id)
         self.db_module.insert_data('schedules', {'_id': schedule_id,
                                                  'title': title,
                                                  'description': description,
@@ -162,6 +207,75 @@ class ScheduleManagement(Observer):
             user = user_manager.get_user(user_id)
             user.schedules = user.schedules + [schedule_id]
         schedule.attach(self)
+        self.publish(self.CREATED, schedule)
+        return schedule
+
+    async def validate_references_async(self,
+                                        database,
+                                        elements: list,
+                                        user_ids: list) -> None:
+        """
+        Check that the elements and users of a schedule exist, running the
+        two lookups concurrently on an AsyncDatabaseModule
+
+        Args:
+            database: AsyncDatabaseModule
+            elements: List of elements IDs
+            user_ids: List of users IDs
+
+        Raises:
+            NonExistentIDError: If an element or a user does not exist
+        """
+        missing_elements, missing_users = await asyncio.gather(
+            database.find_missing_ids('elements', elements),
+            database.find_missing_ids('users', user_ids))
+        if missing_elements:
+            raise NonExistentIDError(f"No element found \
+                                     with ID {missing_elements[0]}")
+        if missing_users:
+            raise NonExistentIDError(f"No user found with ID {missing_users[0]}")
+
+    def find_schedule(self,
+                      schedule_id: str) -> Schedule:
+        """
+        Get a schedule by its ID, with a single query if it is not loaded
+
+        Args:
+            schedule_id: Schedule ID
+
+        Returns:
+            The schedule instance, or None if it does not exist
+        """
+        schedule = self.schedules.get(schedule_id)
+        if schedule is not None:
+            return schedule
+        if schedule_id in self.negative_cache:
+            return None
+        schedule_data = self.db_module.select_one('schedules',
+                                                  {'_id': schedule_id})
+        if schedule_data is None:
+            self.negative_cache.add(schedule_id)
+            return None
+        return self._load_schedule(schedule_data)
+
+    def _load_schedule(self,
+                       schedule_data: dict) -> Schedule:
+        """
+        Build a schedule from its document and add it to the identity map
+
+        Args:
+            schedule_data: The document of the schedule
+
+        Returns:
+            The schedule instance
+        """
+        schedule = Schedule(schedule_data['_id'],
+                            schedule_data['title'],
+                            schedule_data['description'],
+                            schedule_data['permissions'],
+                            schedule_data['elements'])
+        self.schedules[schedule.id] = schedule
+        schedule.attach(self)
         return schedule
 
     def get_schedule(self,
@@ -175,27 +289,77 @@ class ScheduleManagement(Observer):
         Returns:
             The schedule instance
         """
-        if schedule_id in self.schedules:
-            return self.schedules[schedule_id]
-        elif self.schedule_exists(schedule_id):
-            schedule_data = self.db_module.select_data('schedules',
-                                                       {'_id': schedule_id})[0]
-            schedule = Schedule(schedule_id,
-                                schedule_data['title'],
-                                schedule_data['description'],
-                                schedule_data['permissions'],
-                                schedule_data['elements'])
-            self.schedules[schedule_id] = schedule
-            schedule.attach(self)
-            return schedule
-        else:
+        schedule = self.find_schedule(schedule_id)
+        if schedule is None:
             raise NonExistentIDError(
                 f"No schedule found with ID {schedule_id}")
+        return schedule
+
+    def apply_remote_change(self,
+                            schedule_id: str,
+                            deleted: bool = False,
+                            schedule_data: dict = None) -> bool:
+        """
+        Bring the cached state of a schedule up to date with a write made by
+        another client (see CacheInvalidator): a loaded schedule is replaced
+        by the given document, or dropped to be read again on the next
+        get_schedule. A schedule with writes waiting in the unit of work is
+        kept, and the change is deferred until they are written. A deleted
+        schedule is also dropped from the time-range indexes of the
+        elements, and DELETED is published if it was loaded
+
+        Args:
+            schedule_id: Schedule ID
+            deleted: Whether the schedule was deleted
+            schedule_data: The stored document of the schedule
+
+        Returns:
+            False if the change was deferred
+        """
+        from src.calendar_elements.element_management import ElementManagement
+
+        if self._has_pending_writes(schedule_id, None):
+            return False
+        schedule = self.schedules[schedule_id] \
+            if schedule_id in self.schedules else None
+        self.schedules.invalidate(schedule_id)
+        if not deleted:
+            self.negative_cache.discard(schedule_id)
+            if schedule is not None and schedule_data is not None:
+                self._load_schedule(schedule_data)
+            return True
+        self.negative_cache.add(schedule_id)
+        context = current_context()
+        element_management = context.element_management \
+            if context is not None else ElementManagement._instance
+        if element_management is not None:
+            element_management.invalidate_index(schedule_id)
+        if schedule is not None:
+            self.publish(self.DELETED, schedule)
+        return True
+
+    def _has_pending_writes(self,
+                            schedule_id: str,
+                            schedule: Schedule) -> bool:
+        """
+        Check if a schedule has writes waiting in the unit of work, so it is
+        not dropped from the identity map before they are flushed
+
+        Args:
+            schedule_id: Schedule ID
+            schedule: The schedule
+
+        Returns:
+            True if the schedule must be kept
+        """
+        return self.unit_of_work is not None and \
+            self.unit_of_work.is_pending('schedules', schedule_id)
 
     def update_schedule(self,
                         schedule_id: str) -> None:
         """
-        Updates a schedule in the database
+        Updates a schedule in the database, sending only the fields changed
+        since the last update
 
         Args:
             schedule_id: Schedule ID
@@ -205,8 +369,11 @@ class ScheduleManagement(Observer):
                 f"No schedule found with ID {schedule_id}")
 
         schedule = self.schedules[schedule_id]
-        new_data = schedule.to_dict()
-        self.db_module.update_data('schedules', {'_id': schedule_id}, new_data)
+        changes = schedule.get_changes()
+        if changes:
+            self.db_module.update_data('schedules', {'_id': schedule_id},
+                                       changes)
+            schedule.clear_changes()
 
     def delete_schedule(self, schedule_id: str) -> None:
         """
@@ -239,9 +406,13 @@ class ScheduleManagement(Observer):
                               user.schedules if schedule != schedule_id]
 
         self.db_module.delete_data('schedules', {'_id': schedule_id})
+        self.negative_cache.add(schedule_id)
+        if self.unit_of_work is not None:
+            self.unit_of_work.discard('schedules', schedule_id)
         if schedule_id in self.schedules:
             remove = self.schedules.pop(schedule_id)
             del remove
+        self.publish(self.DELETED, schedule)
 
     def add_element_to_schedule(self,
                                 schedule_id: str,
@@ -272,6 +443,63 @@ class ScheduleManagement(Observer):
             raise DuplicatedIDError(f"Element with ID {element_id} already \
                                     exists in schedule {schedule_id}")
 
+    def find_common_free_slots(self,
+                               schedule_id: str,
+                               window: tuple,
+                               duration,
+                               max_busy: int = 0) -> list:
+        """
+        Find the slots of a window in which the members of a schedule (the
+        users in its permissions) are free
+
+        The members and their events in the window are loaded with one
+        query each, and the busy intervals of everyone are merged in a
+        single sweep, where the events of the same schedules are one group
+        of members. Only events make a member busy.
+
+        Args:
+            schedule_id: Schedule ID
+            window: (start, end) of the period to search
+            duration: Minimum length of a slot (timedelta)
+            max_busy: Maximum number of busy members in a slot
+
+        Returns:
+            List of FreeSlot, ranked by fewest busy members, then longest,
+            then earliest
+        """
+        from src.calendar_elements.element_management import ElementManagement
+        from src.user.user_management import UserManagement
+
+        schedule = self.get_schedule(schedule_id)
+        members = UserManagement.get_instance().get_users(
+            list(schedule.permissions))
+
+        # members of each schedule, to know who an event makes busy
+        schedule_members = {}
+        for member in members:
+            for member_schedule in member.schedules:
+                schedule_members.setdefault(member_schedule,
+                                            set()).add(member.id)
+
+        start, end = window
+        elements = ElementManagement.get_instance().query_occurrences(
+            list(schedule_members), start, end)
+        # the events of the same schedules share the set of their members,
+        # so the sweep counts them as one group
+        groups = {}
+        busy = []
+        for element in elements:
+            if element.element_type != 'event':
+                continue
+            element_schedules = frozenset(element.schedules)
+            busy_members = groups.get(element_schedules)
+            if busy_members is None:
+                busy_members = groups[element_schedules] = frozenset().union(
+                    *(schedule_members.get(element_schedule, ())
+                      for element_schedule in element_schedules))
+            busy.append((*element.get_display_interval(), busy_members))
+        return common_free_slots(busy, window, duration, max_busy)
+
     def update(self,
                subject: Subject) -> None:
         """
@@ -281,4 +509,15 @@ class ScheduleManagement(Observer):
             schedule: The schedule that was updated.
         """
         print(f"Schedule {subject.id} was updated.")
-        self.update_schedule(subject.id)
+        # a view may still hold a schedule that was evicted or replaced by
+        # a remote change, so cache it again before saving it by id
+        if subject.id not in self.negative_cache \
+                and self.schedules.get(subject.id) is not subject:
+            self.schedules[subject.id] = subject
+        if self.unit_of_work is not None:
+            self.unit_of_work.register('schedules', subject)
+        else:
+            self.update_schedule(subject.id)
+        # the schedule changed in place, so its cached size is stale
+        self.schedules.resize(subject.id)
+        self.publish(self.CHANGED, subject)
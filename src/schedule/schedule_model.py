@@ -7,8 +7,9 @@ Classes:
 """
 
 from src.observer.observer import Observer, Subject
+from src.observer.change_tracker import ChangeTracker
 
-class Schedule(Subject):
+class Schedule(ChangeTracker, Subject):
     """
         Class that represents a schedule:
 
@@ -20,6 +21,8 @@ class Schedule(Subject):
         Each user can have a different permission in a schedule.
     """
 
+    membership_fields = ("elements",)
+
     def __init__(self,
                  schedule_id: str,
                  title: str,
@@ -37,12 +40,14 @@ class Schedule(Subject):
                 elements -- list of elements ids that are displayed in the 
                             schedule.
         """
+        ChangeTracker.__init__(self)
         self.__observers = []
         self.__id = schedule_id
         self.set_title(title)
         self.set_description(description)
         self.__permissions = permissions
         self.__elements = elements if elements else []
+        self.clear_changes()
 
     @property
     def id(self):
@@ -70,6 +75,7 @@ class Schedule(Subject):
                 and all(isinstance(i, str) for i in value.keys()) \
                 and all(isinstance(i, str) for i in value.values()):
             self.__permissions = value
+            self._mark_changed("permissions")
             self.notify()
         else:
             raise TypeError("Permissions must be a dictionary of strings")
@@ -77,6 +83,7 @@ class Schedule(Subject):
     @elements.setter
     def elements(self, value):
         if isinstance(value, list) and all(isinstance(i, str) for i in value):
+            self._track_membership("elements", self.__elements, value)
             self.__elements = value
             self.notify()
         else:
@@ -142,6 +149,7 @@ class Schedule(Subject):
         if len(title) > 50:
             raise ValueError("Title must have at most 50 characters")
         self.title = title
+        self._mark_changed("title")
         self.notify()
 
     def set_description(self, description: str) -> None:
@@ -158,6 +166,7 @@ class Schedule(Subject):
                 raise ValueError("Description cannot have more than  \
                                  500 characters")
         self.description = description
+        self._mark_changed("description")
         self.notify()
 
     def to_dict(self) -> dict:
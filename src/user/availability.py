@@ -0,0 +1,168 @@
+"""
+Availability engine of the users
+
+The busy intervals of a user are kept as NumPy arrays of timestamps, merged
+into disjoint intervals sorted by start, so checking a candidate interval is
+a binary search and checking many candidates is a single vectorised call.
+
+Classes:
+    Availability
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# resolution of the stored timestamps
+_UNIT = "datetime64[us]"
+
+
+def _to_array(values) -> np.ndarray:
+    """
+    Convert datetimes to a NumPy array of timestamps
+
+    Args:
+        values: datetimes
+
+    Returns:
+        The array of timestamps
+    """
+    return np.array(list(values), dtype=_UNIT)
+
+
+class Availability:
+    """
+    Free/busy information of a user
+
+    Two intervals conflict if they overlap; intervals that only touch (one
+    ends when the other starts) do not conflict.
+
+    Methods:
+        from_elements
+        is_free
+        is_free_many
+        free_slots
+
+    Attributes:
+        busy_starts: starts of the merged busy intervals
+        busy_ends: ends of the merged busy intervals
+    """
+
+    def __init__(self, intervals: list):
+        """
+        Constructor for Availability
+
+        Args:
+            intervals: list of (start, end) busy intervals, in any order and
+                possibly overlapping
+        """
+        starts = _to_array(start for start, _ in intervals)
+        ends = _to_array(end for _, end in intervals)
+        order = np.argsort(starts, kind="stable")
+        self.busy_starts, self.busy_ends = self._merge(starts[order],
+                                                       ends[order])
+
+    @classmethod
+    def from_elements(cls, elements: list) -> 'Availability':
+        """
+        Build the availability from calendar elements. Only events make
+        the user busy; tasks and reminders do not
+
+        Args:
+            elements: list of elements
+
+        Returns:
+            The availability
+        """
+        return cls([element.get_display_interval() for element in elements
+                    if element.element_type == 'event'])
+
+    @staticmethod
+    def _merge(starts: np.ndarray, ends: np.ndarray) -> tuple:
+        """
+        Merge overlapping intervals sorted by start
+
+        Args:
+            starts: sorted starts
+            ends: ends, in the same order
+
+        Returns:
+            (starts, ends) of the disjoint intervals
+        """
+        if not len(starts):
+            return starts, ends
+        # an interval starts a new group if it starts after every previous
+        # interval ended
+        reach = np.maximum.accumulate(ends)
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = starts[1:] >= reach[:-1]
+        group_starts = np.flatnonzero(new_group)
+        group_ends = np.append(group_starts[1:], len(starts)) - 1
+        return starts[group_starts], reach[group_ends]
+
+    def is_free(self, interval: tuple) -> bool:
+        """
+        Check if the user is free during an interval
+
+        Args:
+            interval: (start, end) tuple of datetimes
+
+        Returns:
+            True if no busy interval overlaps it
+        """
+        return bool(self.is_free_many([interval])[0])
+
+    def is_free_many(self, intervals: list) -> np.ndarray:
+        """
+        Check many candidate intervals at once
+
+        Args:
+            intervals: list of (start, end) tuples of datetimes
+
+        Returns:
+            Array of booleans, True where the candidate is free
+        """
+        starts = _to_array(start for start, _ in intervals)
+        ends = _to_array(end for _, end in intervals)
+        # first busy interval that ends after each candidate starts; as the
+        # busy intervals are disjoint, it is the only one that can overlap
+        position = np.searchsorted(self.busy_ends, starts, side="right")
+        inside = position < len(self.busy_ends)
+        conflict = np.zeros(len(starts), dtype=bool)
+        conflict[inside] = self.busy_starts[position[inside]] < ends[inside]
+        return ~conflict
+
+    def free_slots(self, day, duration: timedelta,
+                   window: tuple = None) -> list:
+        """
+        Find the free periods of a day that are at least duration long
+
+        Args:
+            day: the date (or datetime) of the day
+            duration: minimum length of a slot
+            window: optional (start, end) to search instead of the whole day
+
+        Returns:
+            List of (start, end) tuples of datetimes, sorted by start
+        """
+        if window is None:
+            start = datetime(day.year, day.month, day.day)
+            window = (start, start + timedelta(days=1))
+        window_start, window_end = (np.datetime64(value, "us")
+                                    for value in window)
+        inside = (self.busy_ends > window_start) & \
+            (self.busy_starts < window_end)
+        busy_starts = np.clip(self.busy_starts[inside], window_start,
+                              window_end)
+        busy_ends = np.clip(self.busy_ends[inside], window_start, window_end)
+
+        # the gaps are before the first busy interval, between consecutive
+        # ones and after the last one
+        gap_starts = np.concatenate(([window_start], busy_ends))
+        gap_ends = np.concatenate((busy_starts, [window_end]))
+        long_enough = gap_ends - gap_starts >= np.timedelta64(duration)
+        return [(start.item(), end.item()) for start, end
+                in zip(gap_starts[long_enough], gap_ends[long_enough])]
+
+    def __len__(self) -> int:
+        return len(self.busy_starts)
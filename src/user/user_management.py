@@ -4,12 +4,15 @@ Responsible for managing the users in the database
 
 Attributes:
     db: Database module
-    users: Dict of users, where the key is the id
+    users: Identity map of the loaded users, where the key is the id
 """
-import bcrypt
+from src.auth.password_hasher import PasswordHasher
 from src.database.mongo_module import MongoModule, DuplicatedIDError
 from src.database.mongo_module import NonExistentIDError
 from src.observer.observer import Observer, Subject, DatabaseNotProvidedError
+from src.cache.negative_cache import NegativeCache
+from src.cache.lru_cache import LRUCache, approximate_size
+from src.context.calendar_context import current_context
 from .user_model import User, UsernameCantBeBlank
 
 class UserAlreadyExistsError(Exception):
@@ -24,7 +27,14 @@ class UserManagement(Observer):
 
     Attributes:
         db: Database module
-        users: Dict of users, where the key is the id
+        users: Identity map of the loaded users, where the key is the id.
+            Bounded LRU cache: the least recently used users are dropped
+            when it grows past cache_size. Dropped users stay observed, and
+            are cached again when they change
+        unit_of_work: Optional write-behind UnitOfWork. When set, user
+            updates are registered there instead of written immediately.
+        negative_cache: IDs recently found not to exist, so repeated
+            lookups of a missing user do not reach the database
     """
     _instance = None
 
@@ -33,20 +43,27 @@ class UserManagement(Observer):
                     database_module: MongoModule = None,
                     users: dict = None) -> 'UserManagement':
         """
-        Get the instance of the UserManagement class
+        Get the instance of the UserManagement class: the one of the
+        active CalendarContext or, without one, the process-wide instance
         """
+        context = current_context()
+        if context is not None:
+            return context.user_management
         if not cls._instance:
             cls._instance = cls(database_module, users)
         return cls._instance
 
     def __init__(self,
                 database_module: MongoModule,
-                users: dict = None):
+                users: dict = None,
+                cache_size: int = 1000):
         """
         Constructor for the UserManagement class
 
         Args:
             database_module: Database module
+            users: Initial users, where the key is the id
+            cache_size: Maximum number of users kept in memory
         """
 
         if not database_module:
@@ -54,10 +71,16 @@ class UserManagement(Observer):
                 "Database module not provided on object creation.")
         
         self.db_module = database_module
-        self.users = users if users is not None else {}
+        self.users = LRUCache(max_entries=cache_size,
+                              sizeof=approximate_size,
+                              pinned=self._has_pending_writes,
+                              items=users)
+        self.unit_of_work = None
+        self.negative_cache = NegativeCache()
 
     def create_user(self, username: str, email: str, password: str,
-                    user_preferences: dict = None, user_id: str = None) -> User:
+                    user_preferences: dict = None, user_id: str = None,
+                    hashed_password: str = None) -> User:
         """
         Create a new user
 
@@ -67,6 +90,9 @@ class UserManagement(Observer):
             password: Password
             user_preferences: User preferences
             id: User ID
+            hashed_password: The password already hashed (e.g. with
+                PasswordHasher.hash_async, off the UI thread); password is
+                not hashed again if given
 
         Returns:
             The created user
@@ -80,8 +106,9 @@ class UserManagement(Observer):
         if self.user_exists(user_id):
             raise DuplicatedIDError(f'User {user_id} already exists')
 
-        hashed_password = self.hash_password(password)
-        hashed_password = hashed_password.decode('utf-8')
+        if hashed_password is None:
+            hashed_password = self.hash_password(password)
+            hashed_password = hashed_password.decode('utf-8')
 
         user_info = {"_id": user_id,
                     "username": username,
@@ -90,6 +117,7 @@ class UserManagement(Observer):
                      "user_preferences": user_preferences}
 
         self.db_module.insert_data('users', {**user_info})
+        self.negative_cache.discard(user_id)
 
         user = User(**user_info)
         self.users[user_id] = user
@@ -121,13 +149,16 @@ class UserManagement(Observer):
             schedule_instance.permissions = new_permissions
 
         self.db_module.delete_data('users', {"_id": user_id})
+        self.negative_cache.add(user_id)
+        if self.unit_of_work is not None:
+            self.unit_of_work.discard('users', user_id)
         if user_id in self.users:
             remove = self.users.pop(user_id)
             del remove
 
     def user_exists(self, user_id: str) -> bool:
         """
-        Check if a user exists
+        Check if a user exists, counting it instead of fetching it
 
         Args:
             user_id: User ID
@@ -135,12 +166,35 @@ class UserManagement(Observer):
         Returns:
             True if the user exists, False otherwise
         """
-        data = self.db_module.select_data('users', {"_id": user_id})
-        return len(data) > 0
+        if user_id in self.negative_cache:
+            return False
+        if self.db_module.count_data('users', {"_id": user_id}, limit=1):
+            return True
+        self.negative_cache.add(user_id)
+        return False
+
+    def find_missing_users(self, user_ids: list) -> list:
+        """
+        Check which of the given users do not exist, with a single query
+        for the ones that are not loaded
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            The IDs that do not exist, in the given order
+        """
+        unknown_ids = [user_id for user_id in dict.fromkeys(user_ids)
+                       if user_id not in self.users]
+        if not unknown_ids:
+            return []
+        found = {document["_id"] for document in
+                 self.db_module.select_many_by_ids('users', unknown_ids)}
+        return [user_id for user_id in unknown_ids if user_id not in found]
 
     def hash_password(self, password: str) -> str:
         """
-        Hash a password
+        Hash a password on the worker pool of the shared PasswordHasher
 
         Args:
             password: Password
@@ -148,13 +202,12 @@ class UserManagement(Observer):
         Returns:
             The hashed password
         """
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed_password
+        return PasswordHasher.get_instance().hash(password)
 
-    def get_user(self, user_id: str) -> User:
+    def find_user(self, user_id: str) -> User:
         """
-        Get a user
+        Get a user, from the identity map if it is loaded or with a single
+        query otherwise
 
         Args:
             user_id: User ID
@@ -162,17 +215,132 @@ class UserManagement(Observer):
         Returns:
             The user if it exists, None otherwise
         """
-        data = self.db_module.select_data('users', {"_id": user_id})
-        print(data[0])
-        user = User(**data[0])
+        user = self.users.get(user_id)
+        if user is not None:
+            return user
+        if user_id in self.negative_cache:
+            return None
+
+        data = self.db_module.select_one('users', {"_id": user_id})
+        if data is None:
+            self.negative_cache.add(user_id)
+            return None
+        return self._load_user(data)
+
+    def _load_user(self, data: dict) -> User:
+        """
+        Build a user from its document and add it to the identity map
+
+        Args:
+            data: The document of the user
+
+        Returns:
+            The user instance
+        """
+        user = User(**data)
         user.attach(self)
-        print(user)
-        self.users[user_id] = user
+        self.users[user.id] = user
+        return user
+
+    def get_users(self, user_ids: list) -> list:
+        """
+        Get many users, with a single query for the ones that are not
+        loaded. IDs that do not exist are skipped
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            The users, in the given order
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        found = {user_id: self.users.get(user_id) for user_id in user_ids}
+        unknown_ids = [user_id for user_id, user in found.items()
+                       if user is None]
+        if unknown_ids:
+            for data in self.db_module.select_many_by_ids('users',
+                                                          unknown_ids):
+                user = User(**data)
+                user.attach(self)
+                self.users[user.id] = user
+                found[user.id] = user
+        return [found[user_id] for user_id in user_ids
+                if found[user_id] is not None]
+
+    def get_user(self, user_id: str) -> User:
+        """
+        Get a user
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            The user
+        """
+        user = self.find_user(user_id)
+        if user is None:
+            raise NonExistentIDError(f'User {user_id} does not exist')
         return user
 
+    def invalidate_user(self, user_id: str = None) -> None:
+        """
+        Drop a user from the identity map, or every user if no ID is given,
+        so the next get_user reads it from the database again. Users with
+        writes waiting in the unit of work are kept
+
+        Args:
+            user_id: User ID
+        """
+        self.users.invalidate(user_id)
+
+    def apply_remote_change(self, user_id: str, deleted: bool = False,
+                            data: dict = None) -> bool:
+        """
+        Bring the cached state of a user up to date with a write made by
+        another client (see CacheInvalidator): a loaded user is replaced by
+        the given document, or dropped to be read again on the next
+        get_user. A user with writes waiting in the unit of work is kept,
+        and the change is deferred until they are written
+
+        Args:
+            user_id: User ID
+            deleted: Whether the user was deleted
+            data: The stored document of the user
+
+        Returns:
+            False if the change was deferred
+        """
+        if self._has_pending_writes(user_id, None):
+            return False
+        loaded = user_id in self.users
+        self.users.invalidate(user_id)
+        if deleted:
+            self.negative_cache.add(user_id)
+            return True
+        self.negative_cache.discard(user_id)
+        if loaded and data is not None:
+            self._load_user(dict(data))
+        return True
+
+    def _has_pending_writes(self, user_id: str, user: User) -> bool:
+        """
+        Check if a user has writes waiting in the unit of work, so it is
+        not dropped from the identity map before they are flushed
+
+        Args:
+            user_id: User ID
+            user: The user
+
+        Returns:
+            True if the user must be kept
+        """
+        return self.unit_of_work is not None and \
+            self.unit_of_work.is_pending('users', user_id)
+
     def update_user(self, user_id: str) -> None:
         """
-        Updates a user in the db based on its current local state
+        Updates a user in the db based on its current local state, sending
+        only the fields changed since the last update
 
         Args:
             user_id: User ID
@@ -184,8 +352,10 @@ class UserManagement(Observer):
             raise NonExistentIDError(f'User {user_id} does not exist')
 
         user = self.users[user_id]
-        user_info = user.to_dict()
-        self.db_module.update_data('users', {"_id": user_id}, user_info)
+        changes = user.get_changes()
+        if changes:
+            self.db_module.update_data('users', {"_id": user_id}, changes)
+            user.clear_changes()
         return
 
 
@@ -226,4 +396,12 @@ class UserManagement(Observer):
             user: The user that was updated.
         """
         print(f"User {user.id} was updated.")
-        self.update_user(user.id)
+        # a view may still hold a user that was evicted or replaced by a
+        # remote change, so cache it again before saving it by id
+        if user.id not in self.negative_cache \
+                and self.users.get(user.id) is not user:
+            self.users[user.id] = user
+        if self.unit_of_work is not None:
+            self.unit_of_work.register('users', user)
+        else:
+            self.update_user(user.id)
@@ -18,6 +18,8 @@ from datetime import datetime
 from src.schedule.schedule_management import ScheduleManagement
 from src.calendar_elements.element_management import ElementManagement
 from src.observer.observer import Observer, Subject
+from src.observer.change_tracker import ChangeTracker
+from src.user.availability import Availability
 
 
 class UserNotInSchedule(Exception):
@@ -33,7 +35,7 @@ class EmailCantBeBlank(Exception):
     Custom exception class for when a email is blank.
     """
 
-class User(Subject):
+class User(ChangeTracker, Subject):
     """
     User class
 
@@ -45,6 +47,8 @@ class User(Subject):
         hashed_password: user hashed password
         user_preferences: user preferences
     """
+    membership_fields = ("schedules",)
+
     def __init__(self, _id: str, username: str, email: str, schedules: list=None,
                  hashed_password: str=None, user_preferences: dict=None):
         """
@@ -58,6 +62,7 @@ class User(Subject):
             hashed_password: user hashed password
             user_preferences: user preferences
         """
+        ChangeTracker.__init__(self)
         self.__observers = []
         self.__id = _id
         self.username = username
@@ -88,6 +93,7 @@ class User(Subject):
     @schedules.setter
     def schedules(self, schedules: [str]):
         """Sets the schedules of the event."""
+        self._track_membership("schedules", self.__schedules, schedules)
         self.__schedules = schedules
         self.notify()
         print(f"User schedules: {self.schedules}")
@@ -153,6 +159,33 @@ class User(Subject):
         elements = list(set(elements))
         return elements
 
+    def get_elements_in_range(self, start: datetime, end: datetime,
+                              schedules: list=None) -> list:
+        '''
+        Get the elements from the user schedules, or from a list of filtered
+        schedules, whose display interval overlaps [start, end). Recurring
+        elements are expanded into their occurrences in the window
+
+        Args:
+            start: start of the window
+            end: end of the window
+            schedules: list of schedules ids
+
+        Returns:
+            A list of elements and occurrences, sorted by the start of their
+            display interval
+        '''
+        if not schedules:
+            schedules = self.schedules
+        else:
+            for schedule in schedules:
+                if schedule not in self.schedules:
+                    raise UserNotInSchedule(
+                        f"User isn't in: {schedule}")
+
+        element_management = ElementManagement.get_instance()
+        return element_management.query_occurrences(schedules, start, end)
+
     def get_hashed_password(self) -> str:
         """
         Get the user hashed password
@@ -166,6 +199,23 @@ class User(Subject):
         """
         return self.__hashed_password
 
+    def set_hashed_password(self, hashed_password: str):
+        """
+        Set the user hashed password, e.g. after a rehash with a new cost
+        factor
+
+        Args:
+            hashed_password: user hashed password
+
+        >>> user = User("id", "username", "email", ["id1", "id2"], "old_hash")
+        >>> user.set_hashed_password("new_hash")
+        >>> user.get_hashed_password()
+        'new_hash'
+        """
+        self.__hashed_password = hashed_password
+        self._mark_changed("hashed_password")
+        self.notify()
+
     def set_username(self, username: str):
         """
         Set the user name
@@ -184,6 +234,7 @@ class User(Subject):
             raise UsernameCantBeBlank("Username cannot be blank")
         else:
             self.username = username.strip()
+            self._mark_changed("username")
             self.notify()
 
     def set_email(self, email: str):
@@ -204,6 +255,7 @@ class User(Subject):
             raise EmailCantBeBlank("Email cannot be blank")
         else:
             self.email = email.strip()
+            self._mark_changed("email")
             self.notify()
 
     def set_preferences(self, preferences: dict):
@@ -219,6 +271,7 @@ class User(Subject):
                 raise TypeError("The preference must be a string")
             else:
                 self.user_preferences[preference_type] = preference
+                self._mark_changed("user_preferences")
                 self.notify()
 
 
@@ -226,7 +279,8 @@ class User(Subject):
         """
         Checks if the user is available at a given time, based on the user's
         schedules and elements. It should not raise a conflict if the type
-        of the element is not 'event'.
+        of the element is not 'event'. Only the events that overlap the
+        period are loaded.
 
         Args:
             time: tuple with the start and end time to be checked
@@ -243,31 +297,41 @@ class User(Subject):
                 (isinstance(time[1], datetime) is False):
             raise TypeError("The tuple must have datetime objects")
 
-        element_ids = self.get_elements()
-        element_management = ElementManagement.get_instance()
+        return self.get_availability(time[0], time[1]).is_free(time)
 
-        for element_id in element_ids:
-            element = element_management.get_element(element_id)
-            if element.type != 'event':
-                continue
+    def check_disponibility_many(self, times: list) -> list:
+        """
+        Checks many periods at once, loading the user's events of the
+        window that covers all of them a single time
 
-            # Check if the start time of the element is within the given
-            # time period
-            if time[0] <= element.start_time < time[1]:
-                return False
+        Args:
+            times: list of tuples with the start and end time to be checked
 
-            # Check if the end time of the element is within the given time
-            # period
-            if time[0] < element.end_time <= time[1]:
-                return False
+        Returns:
+            A list with True where the user is available, False otherwise
+        """
+        if not times:
+            return []
+        start = min(time[0] for time in times)
+        end = max(time[1] for time in times)
+        return self.get_availability(start, end).is_free_many(times).tolist()
+
+    def get_availability(self, start: datetime, end: datetime,
+                         schedules: list=None) -> Availability:
+        """
+        Get the free/busy information of the user in a window, built from
+        the events of the user schedules that overlap it
 
-            # Check if the given time period is within the start
-            # and end time of the element
-            if element.start_time <= time[0] < element.end_time or \
-                element.start_time < time[1] <= element.end_time:
-                return False
+        Args:
+            start: start of the window
+            end: end of the window
+            schedules: list of schedules ids
 
-        return True
+        Returns:
+            The availability of the user
+        """
+        return Availability.from_elements(
+            self.get_elements_in_range(start, end, schedules))
 
     def __repr__(self):
         return " <User>:"+str(self.to_dict())
@@ -0,0 +1,367 @@
+"""
+module: test_application
+
+Test cases for the cache invalidation, the export, the login and the
+sessions of the Application, with a fake Tk root and another client sharing
+a MemoryModule
+"""
+import contextvars
+import os
+import stat
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import bcrypt
+
+from src.app.application import Application
+from src.app.state import StatesEnum
+from src.app.state_machine.login_state import LoginState
+from src.app.state_machine.sign_up_state import SignUpState
+from src.auth.password_hasher import PasswordHasher
+from src.auth.session import InvalidSessionError, SessionStore
+from src.calendar_elements.element_management import ElementManagement
+from src.database.memory_module import MemoryModule
+from src.database.updated_at_decorator import UpdatedAtDecorator
+
+
+class FakeRoot:
+    """ Tk root that keeps the after callbacks to run them by hand """
+
+    def __init__(self):
+        self.callbacks = {}
+        self.next_id = 0
+
+    def after(self, milliseconds, callback):
+        self.next_id += 1
+        self.callbacks[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.callbacks.pop(job, None)
+
+    def run_pending(self):
+        """ Run the callbacks scheduled so far """
+        callbacks, self.callbacks = self.callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+
+class FakeUI:
+    """ UI with only the root and the view used by the Application """
+
+    def __init__(self):
+        self.root = FakeRoot()
+        self.view = None
+
+
+class FakeWidget:
+    """ Entry or button of a view, with a value and a state """
+
+    def __init__(self, value=""):
+        self.value = value
+        self.state = "normal"
+
+    def get(self):
+        return self.value
+
+    def configure(self, state):
+        self.state = state
+
+
+def run_callbacks(context, app):
+    """ Run the after callbacks until the loads of the loader finish """
+    for _ in range(100):
+        context.run(app.ui.root.run_pending)
+        if not app.loader._loads:
+            break
+        for handle in list(app.loader._loads):
+            handle.future.result(timeout=5)
+
+
+class TestApplicationCacheInvalidation(unittest.TestCase):
+    """ Class to test the cache invalidation of the Application """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.memory.insert_data("schedules", {
+            "_id": "s1", "title": "s1", "description": None,
+            "permissions": {}, "elements": []})
+        self.ui = FakeUI()
+        self.app = Application(ui=self.ui)
+        # the Application activates its context on the calling thread, so
+        # it is created in a copy of the context of the test
+        self.context = contextvars.copy_context()
+        self.context.run(setattr, self.app, "db",
+                         UpdatedAtDecorator(self.memory, instance_id="mine"))
+        self.other_elements = ElementManagement(
+            UpdatedAtDecorator(self.memory, instance_id="other"))
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.context.run(self.app.close)
+
+    def test_remote_changes_applied_on_tk_thread(self):
+        """ Test that the changes are read on the loader and applied, and
+        published, on the thread that runs the after callbacks """
+        element_management = self.app.context.element_management
+        meeting = self.context.run(
+            element_management.create_element, "event", "meeting", "meeting",
+            ["s1"], start=datetime(2024, 1, 5, 10),
+            end=datetime(2024, 1, 5, 11), description=None)
+        self.app.flush()
+        threads = []
+        element_management.subscribe(
+            lambda change, element: threads.append(threading.current_thread()))
+
+        self.context.run(self.app.start_cache_invalidator)
+        self.other_elements.get_element("meeting").set_title("renamed")
+        run_callbacks(self.context, self.app)
+
+        self.assertEqual(self.app.cache_invalidator.applied, 1)
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertIsNot(element_management.get_element("meeting"), meeting)
+        self.assertEqual(element_management.get_element("meeting").title,
+                         "renamed")
+        # the next poll is scheduled
+        self.assertEqual(len(self.ui.root.callbacks), 1)
+
+    def test_stop_cancels_the_next_poll(self):
+        """ Test that stopping the invalidator cancels its after callback """
+        self.context.run(self.app.start_cache_invalidator)
+        self.assertEqual(len(self.ui.root.callbacks), 1)
+        self.context.run(self.app.stop_cache_invalidator)
+        self.assertEqual(self.ui.root.callbacks, {})
+        self.assertIsNone(self.app.cache_invalidator)
+
+
+class TestApplicationExport(unittest.TestCase):
+    """ Class to test the export of the Application """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.memory.insert_data("schedules", {
+            "_id": "s1", "title": "s1", "description": None,
+            "permissions": {}, "elements": []})
+        self.app = Application(ui=FakeUI())
+        self.context = contextvars.copy_context()
+        self.context.run(setattr, self.app, "db", self.memory)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.context.run(self.app.close)
+
+    def test_export_writes_pending_changes_first(self):
+        """ Test that the elements still in the unit of work are exported """
+        meeting = self.context.run(
+            self.app.context.element_management.create_element, "event",
+            "meeting", "meeting", ["s1"], start=datetime(2024, 1, 5, 10),
+            end=datetime(2024, 1, 5, 11), description=None)
+        self.app.flush()
+        self.context.run(meeting.set_title, "renamed")
+        self.assertEqual(self.memory.select_one(
+            "elements", {"_id": "meeting"})["title"], "meeting")
+        self.app.user = MagicMock(id="alice")
+        exported = []
+
+        def export_data(user_id):
+            exported.extend(self.memory.select_data("elements", {}))
+
+        with patch("src.app.application.ExportModule") as export_module:
+            export_module.return_value.export_data.side_effect = export_data
+            self.context.run(self.app.export_data)
+
+        export_module.return_value.export_data.assert_called_once_with(
+            "alice")
+        self.assertEqual([element["title"] for element in exported],
+                         ["renamed"])
+
+
+class TestApplicationLogin(unittest.TestCase):
+    """ Class to test the login and the sign up states of the Application """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        PasswordHasher._instance = PasswordHasher(rounds=4)
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.memory.insert_data("users", {
+            "_id": "alice", "username": "alice", "email": "alice@mail",
+            "schedules": [], "user_preferences": None,
+            "hashed_password": bcrypt.hashpw(
+                b"secret", bcrypt.gensalt(4)).decode("utf-8")})
+        self.app = Application(ui=FakeUI())
+        self.context = contextvars.copy_context()
+        self.context.run(setattr, self.app, "db", self.memory)
+        self.threads = []
+        user_setter = Application.user.fset
+
+        def record_user(app, user):
+            self.threads.append(threading.current_thread())
+            user_setter(app, user)
+
+        patcher = patch.object(Application, "user",
+                               Application.user.setter(record_user))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.context.run(self.app.close)
+        PasswordHasher._instance.shutdown()
+        PasswordHasher._instance = None
+
+    def test_login_checks_only_the_password_in_background(self):
+        """ Test that the user is logged in on the thread of the callbacks,
+        and a second click does not start another login """
+        state = self.context.run(LoginState, self.app)
+        state.view = MagicMock(user_id_entry=FakeWidget("alice"),
+                               password_entry=FakeWidget("secret"),
+                               login_button=FakeWidget())
+        state.transition_to = MagicMock()
+        with patch.object(self.app, "check_password",
+                          wraps=self.app.check_password) as check_password:
+            self.context.run(state.login, None)
+            self.context.run(state.login, None)
+        check_password.assert_called_once_with("alice", "secret")
+        self.assertEqual(state.view.login_button.state, "disabled")
+        self.assertIsNone(self.app.user)
+
+        run_callbacks(self.context, self.app)
+
+        self.assertEqual(self.app.user.id, "alice")
+        self.assertEqual(self.app.session.user_id, "alice")
+        self.assertEqual(self.threads, [threading.current_thread()])
+        self.assertEqual(state.view.login_button.state, "normal")
+        state.transition_to.assert_called_once_with(StatesEnum.MAIN)
+
+    def test_login_with_wrong_password(self):
+        """ Test that a wrong password does not log in """
+        state = self.context.run(LoginState, self.app)
+        state.view = MagicMock(user_id_entry=FakeWidget("alice"),
+                               password_entry=FakeWidget("wrong"),
+                               login_button=FakeWidget())
+        state.transition_to = MagicMock()
+        self.context.run(state.login, None)
+        run_callbacks(self.context, self.app)
+        self.assertIsNone(self.app.user)
+        self.assertEqual(state.view.login_button.state, "normal")
+        state.transition_to.assert_not_called()
+
+    def test_sign_up_hashes_only_the_password_in_background(self):
+        """ Test that the user is created and logged in on the thread of the
+        callbacks """
+        state = self.context.run(SignUpState, self.app)
+        state.view = MagicMock(user_id_entry=FakeWidget("bob"),
+                               email_entry=FakeWidget("bob@mail"),
+                               password_entry=FakeWidget("secret"),
+                               sign_up_button=FakeWidget())
+        state.transition_to = MagicMock()
+        self.context.run(state.sign_up, None)
+        self.context.run(state.sign_up, None)
+        self.assertEqual(state.view.sign_up_button.state, "disabled")
+        self.assertIsNone(self.memory.select_one("users", {"_id": "bob"}))
+
+        run_callbacks(self.context, self.app)
+
+        self.assertEqual(self.app.user.id, "bob")
+        self.assertEqual(self.threads, [threading.current_thread()])
+        hashed_password = self.memory.select_one(
+            "users", {"_id": "bob"})["hashed_password"]
+        self.assertTrue(bcrypt.checkpw(b"secret",
+                                       hashed_password.encode("utf-8")))
+        state.transition_to.assert_called_once_with(StatesEnum.MAIN)
+
+
+class TestApplicationSessions(unittest.TestCase):
+    """ Class to test the sessions kept by the Application across restarts """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        PasswordHasher._instance = PasswordHasher(rounds=4)
+        self.directory = tempfile.TemporaryDirectory()
+        self.session_directory = os.path.join(self.directory.name, "app")
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.memory.insert_data("users", {
+            "_id": "alice", "username": "alice", "email": "alice@mail",
+            "schedules": [], "user_preferences": None,
+            "hashed_password": bcrypt.hashpw(
+                b"secret", bcrypt.gensalt(4)).decode("utf-8")})
+        self.apps = []
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        for app, context in self.apps:
+            context.run(app.close)
+        PasswordHasher._instance.shutdown()
+        PasswordHasher._instance = None
+        self.directory.cleanup()
+
+    def _start(self, **kwargs):
+        """ Start an Application on the database, as after a restart """
+        app = Application(ui=FakeUI(),
+                          session_directory=self.session_directory, **kwargs)
+        context = contextvars.copy_context()
+        context.run(setattr, app, "db", self.memory)
+        self.apps.append((app, context))
+        return app, context
+
+    def _login(self, app, context):
+        user = context.run(app.context.user_management.get_user, "alice")
+        self.assertTrue(context.run(app.login, user, "secret", True))
+
+    def test_session_resumed_after_restart(self):
+        """ Test that the session of the last login is resumed by the next
+        start, until the user logs out """
+        app, context = self._start()
+        self._login(app, context)
+        token_path = os.path.join(self.session_directory, "session_token")
+        self.assertEqual(stat.S_IMODE(os.stat(token_path).st_mode), 0o600)
+
+        restarted, restarted_context = self._start()
+        self.assertTrue(restarted_context.run(restarted.restore_session))
+        self.assertEqual(restarted.user.id, "alice")
+        self.assertEqual(restarted.session.token, app.session.token)
+
+        restarted_context.run(restarted.logout)
+        self.assertFalse(os.path.exists(token_path))
+        other, other_context = self._start()
+        self.assertFalse(other_context.run(other.restore_session))
+        self.assertIsNone(other.user)
+        # the revocation is kept next to the secret
+        with self.assertRaises(InvalidSessionError):
+            other.sessions.validate(app.session.token)
+
+    def test_restore_purges_expired_sessions(self):
+        """ Test that the start drops the expired sessions and
+        revocations """
+        app, context = self._start()
+        with patch.object(app.sessions, "purge_expired") as purge_expired:
+            context.run(app.restore_session)
+        purge_expired.assert_called_once_with()
+
+    def test_expired_session_is_logged_out(self):
+        """ Test that check_session logs out a user whose session expired """
+        now = [1000.0]
+        app, context = self._start(
+            sessions=SessionStore(ttl=60, clock=lambda: now[0]))
+        self._login(app, context)
+        self.assertTrue(context.run(app.check_session))
+
+        now[0] += 61
+        self.assertFalse(context.run(app.check_session))
+        self.assertIsNone(app.user)
+        self.assertIsNone(app.session)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.session_directory, "session_token")))
+
+
+if __name__ == "__main__":
+    unittest.main()
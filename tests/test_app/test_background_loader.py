@@ -0,0 +1,161 @@
+"""
+module: test_background_loader
+
+Test cases for the BackgroundLoader class
+"""
+import threading
+import time
+import unittest
+
+from src.app.background_loader import BackgroundLoader
+from src.database.utils import timeout, TimeExceedError, deadline, \
+    remaining_time
+
+
+class FakeRoot:
+    """ Tk root that keeps the after callbacks to run them by hand """
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, milliseconds, callback):
+        self.callbacks.append(callback)
+
+    def run_pending(self):
+        """ Run the scheduled callbacks, including the ones they schedule """
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class TestBackgroundLoader(unittest.TestCase):
+    """
+    Class to test the BackgroundLoader class
+    """
+
+    def setUp(self):
+        self.root = FakeRoot()
+        self.loader = BackgroundLoader(self.root)
+
+    def tearDown(self):
+        self.loader.shutdown()
+
+    def _wait(self, handle):
+        """ Wait for the load to run and deliver its results """
+        handle.future.result(timeout=5)
+        self.root.run_pending()
+
+    def test_result_is_delivered_with_after(self):
+        """ The result is handed to on_done by the after callback """
+        results = []
+        handle = self.loader.submit("state", lambda: 42, results.append)
+        self.assertEqual(len(self.root.callbacks), 1)
+        self._wait(handle)
+        self.assertEqual(results, [42])
+
+    def test_callbacks_run_on_the_calling_thread(self):
+        """ on_done does not run on the worker thread """
+        threads = []
+        handle = self.loader.submit(
+            "state", threading.current_thread,
+            lambda worker: threads.append((worker, threading.current_thread())))
+        self._wait(handle)
+        worker, caller = threads[0]
+        self.assertIsNot(worker, caller)
+        self.assertIs(caller, threading.current_thread())
+
+    def test_error_is_delivered(self):
+        """ An exception raised by the function is handed to on_error """
+        def fail():
+            raise ValueError("no database")
+
+        results, errors = [], []
+        handle = self.loader.submit("state", fail, results.append,
+                                    errors.append)
+        self._wait(handle)
+        self.assertEqual(results, [])
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_new_submit_cancels_the_same_key(self):
+        """ A new load of a key drops the result of the previous one """
+        release = threading.Event()
+        results = []
+        first = self.loader.submit("state",
+                                   lambda: release.wait(5) and "old",
+                                   results.append)
+        second = self.loader.submit("state", lambda: "new", results.append)
+        self.assertTrue(first.cancelled)
+        release.set()
+        first.future.result(timeout=5)
+        self._wait(second)
+        self.assertEqual(results, ["new"])
+
+    def test_other_keys_are_not_cancelled(self):
+        """ Loads of other keys keep running """
+        results = []
+        first = self.loader.submit("main", lambda: "main", results.append)
+        second = self.loader.submit("day", lambda: "day", results.append)
+        first.future.result(timeout=5)
+        self._wait(second)
+        self.assertEqual(sorted(results), ["day", "main"])
+
+    def test_cancel_drops_results(self):
+        """ Cancelling a key drops the result of its load """
+        release = threading.Event()
+        results = []
+        handle = self.loader.submit("state", lambda: release.wait(5),
+                                    results.append)
+        self.loader.cancel("state")
+        release.set()
+        if not handle.future.cancelled():
+            handle.future.result(timeout=5)
+        self.root.run_pending()
+        self.assertEqual(results, [])
+
+    def test_deadline_is_propagated(self):
+        """ The load runs inside the deadline of the caller """
+        results = []
+        with deadline(1):
+            handle = self.loader.submit("state", remaining_time,
+                                        results.append)
+        self._wait(handle)
+        self.assertTrue(0 < results[0] <= 1)
+
+    def test_polling_stops_when_idle(self):
+        """ Nothing is scheduled once every load was delivered """
+        handle = self.loader.submit("state", lambda: 1, lambda result: None)
+        self._wait(handle)
+        self.assertEqual(self.root.callbacks, [])
+
+
+class TestTimeoutOffMainThread(unittest.TestCase):
+    """
+    Class to test the timeout decorator on the worker threads of the loader
+    """
+
+    def _run_in_thread(self, function):
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = function()
+            except Exception as error: # pylint: disable=broad-except
+                outcome["error"] = error
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join(5)
+        return outcome
+
+    def test_result(self):
+        """ The result is returned on a worker thread """
+        outcome = self._run_in_thread(timeout(1)(lambda: "ok"))
+        self.assertEqual(outcome, {"result": "ok"})
+
+    def test_timeout(self):
+        """ TimeExceedError is raised on a worker thread """
+        outcome = self._run_in_thread(timeout(0.05)(lambda: time.sleep(0.2)))
+        self.assertIsInstance(outcome["error"], TimeExceedError)
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
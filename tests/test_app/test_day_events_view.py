@@ -0,0 +1,66 @@
+"""
+module: test_day_events_view
+
+Test cases for the rows of the virtualized list of the DayEventsView
+"""
+import unittest
+from types import SimpleNamespace
+
+from src.app.views.day_events_view import DayRow, day_rows
+from src.app.views.virtual_list import first_visible
+
+
+def make_events(count):
+    """
+    Events with a title, the only attribute the rows use.
+    """
+    return [SimpleNamespace(title=f"event {index}") for index in range(count)]
+
+
+class TestDayRows(unittest.TestCase):
+    """
+    Tests of day_rows.
+    """
+
+    def test_empty_day_has_every_half_hour(self):
+        rows = day_rows({})
+        self.assertEqual(len(rows), 48)
+        self.assertEqual(rows[0], DayRow(0, 0, True, []))
+        self.assertEqual(rows[47], DayRow(23, 30, True, []))
+
+    def test_minutes_are_clamped_to_the_half_hour(self):
+        first, second = make_events(2)
+        rows = day_rows({9: {10: [first], 45: [second]}})
+        self.assertEqual(rows[18], DayRow(9, 0, True, [first]))
+        self.assertEqual(rows[19], DayRow(9, 30, True, [second]))
+
+    def test_busy_half_hour_continues_in_the_next_rows(self):
+        events = make_events(7)
+        rows = day_rows({10: {0: events[:4], 15: events[4:]}}, events_per_row=3)
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(rows[20], DayRow(10, 0, True, events[:3]))
+        self.assertEqual(rows[21], DayRow(10, 0, False, events[3:6]))
+        self.assertEqual(rows[22], DayRow(10, 0, False, events[6:]))
+        self.assertEqual(rows[23], DayRow(10, 30, True, []))
+
+
+class TestFirstVisible(unittest.TestCase):
+    """
+    Tests of first_visible.
+    """
+
+    def test_inside_the_list(self):
+        self.assertEqual(first_visible(10, 5, 48), 10)
+
+    def test_not_past_the_last_row(self):
+        self.assertEqual(first_visible(46, 5, 48), 43)
+
+    def test_not_before_the_first_row(self):
+        self.assertEqual(first_visible(-3, 5, 48), 0)
+
+    def test_list_shorter_than_the_view(self):
+        self.assertEqual(first_visible(4, 20, 10), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
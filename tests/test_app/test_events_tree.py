@@ -0,0 +1,210 @@
+"""
+module: test_events_tree
+
+Test cases for the EventsTree class
+"""
+import threading
+import unittest
+import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.app.events_tree import EventsTree
+from src.calendar_elements.element_management import ElementManagement
+from src.calendar_elements.recurrence import RecurrenceRule
+from src.database.memory_module import MemoryModule
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+JANUARY = (datetime(2024, 1, 1), datetime(2024, 2, 1))
+FEBRUARY = (datetime(2024, 2, 1), datetime(2024, 3, 1))
+
+
+def titles(tree, year, month, day):
+    """ The titles of the events of a day, in order """
+    return [element.title
+            for minutes in tree.get(year, {}).get(month, {}).get(day, {})
+            .values()
+            for bucket in minutes.values()
+            for element in bucket]
+
+
+class TestEventsTree(unittest.TestCase):
+    """
+    Class to test the EventsTree class
+    """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        ScheduleManagement.get_instance(self.db_module)
+        UserManagement.get_instance(self.db_module)
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        for schedule_id in ("s1", "s2"):
+            self.db_module.insert_data("schedules", {
+                "_id": schedule_id, "title": schedule_id,
+                "description": None, "permissions": {}, "elements": []})
+        self._event("meeting", ["s1"], datetime(2024, 1, 5, 10),
+                    datetime(2024, 1, 5, 11))
+        self._event("lunch", ["s2"], datetime(2024, 1, 6, 12),
+                    datetime(2024, 1, 6, 13))
+        self._event("weekly", ["s1"], datetime(2024, 1, 1, 8),
+                    datetime(2024, 1, 1, 9), recurrence=RecurrenceRule(
+                        "weekly"))
+
+        self.tree = EventsTree(self.element_management, ["s1"])
+        self.element_management.subscribe(self.tree.element_changed)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def _event(self, title, schedules, start, end, **kwargs):
+        return self.element_management.create_element(
+            "event", title, title, schedules, start=start, end=end,
+            description=None, **kwargs)
+
+    def test_window(self):
+        """ Test that the window has the events of the selected schedules """
+        tree = self.tree.window(*JANUARY)
+        self.assertEqual(titles(tree, 2024, 1, 5), ["meeting"])
+        self.assertEqual(titles(tree, 2024, 1, 6), [])
+        for day in (1, 8, 15, 22, 29):
+            self.assertEqual(titles(tree, 2024, 1, day), ["weekly"])
+        self.assertEqual(list(tree), [2024])
+        self.assertEqual(list(tree[2024]), [1])
+
+    def test_window_is_loaded_once(self):
+        """ Test that a window already loaded is not queried again """
+        with unittest.mock.patch.object(
+                self.element_management, "query_occurrences",
+                wraps=self.element_management.query_occurrences) as query:
+            self.tree.window(*JANUARY)
+            self.tree.window(*JANUARY)
+            tree = self.tree.window(datetime(2024, 1, 8),
+                                    datetime(2024, 1, 9))
+            self.assertEqual(query.call_count, 1)
+        self.assertEqual(list(tree[2024][1]), [8])
+
+    def test_windows_are_not_duplicated(self):
+        """ Test that an event in two loaded windows is placed once """
+        self._event("overnight", ["s1"], datetime(2024, 1, 31, 22),
+                    datetime(2024, 2, 1, 2))
+        self.tree.window(*JANUARY)
+        self.tree.window(*FEBRUARY)
+        tree = self.tree.window(JANUARY[0], FEBRUARY[1])
+        self.assertEqual(titles(tree, 2024, 1, 31), ["overnight"])
+
+    def test_window_is_a_copy(self):
+        """ Test that the returned tree does not change with the tree """
+        tree = self.tree.window(*JANUARY)
+        self._event("new", ["s1"], datetime(2024, 1, 5, 10),
+                    datetime(2024, 1, 5, 11))
+        self.assertEqual(titles(tree, 2024, 1, 5), ["meeting"])
+        self.assertEqual(titles(self.tree.window(*JANUARY), 2024, 1, 5),
+                         ["meeting", "new"])
+
+    def test_created_element(self):
+        """ Test that created elements are placed without a query """
+        self.tree.window(*JANUARY)
+        with unittest.mock.patch.object(
+                self.element_management, "query_occurrences") as query:
+            self._event("new", ["s1"], datetime(2024, 1, 10, 9),
+                        datetime(2024, 1, 10, 10))
+            self._event("other", ["s2"], datetime(2024, 1, 10, 9),
+                        datetime(2024, 1, 10, 10))
+            tree = self.tree.window(*JANUARY)
+            query.assert_not_called()
+        self.assertEqual(titles(tree, 2024, 1, 10), ["new"])
+
+    def test_moved_element(self):
+        """ Test that a moved element leaves its old bucket """
+        self.tree.window(*JANUARY)
+        meeting = self.element_management.get_element("meeting")
+        meeting.set_interval(datetime(2024, 1, 12, 14),
+                             datetime(2024, 1, 12, 15))
+        tree = self.tree.window(*JANUARY)
+        self.assertEqual(titles(tree, 2024, 1, 5), [])
+        self.assertNotIn(5, tree[2024][1])
+        self.assertEqual(titles(tree, 2024, 1, 12), ["meeting"])
+
+    def test_deleted_element(self):
+        """ Test that a deleted element is removed """
+        self.tree.window(*JANUARY)
+        self.element_management.delete_element("weekly")
+        tree = self.tree.window(*JANUARY)
+        self.assertEqual(sorted(tree[2024][1]), [5])
+
+    def test_set_schedule_ids(self):
+        """ Test that selecting and unselecting schedules patches the tree """
+        self.tree.window(*JANUARY)
+        self.tree.set_schedule_ids(["s1", "s2"])
+        self.assertEqual(titles(self.tree.window(*JANUARY), 2024, 1, 6),
+                         ["lunch"])
+        self.tree.set_schedule_ids(["s2"])
+        tree = self.tree.window(*JANUARY)
+        self.assertEqual(sorted(tree[2024][1]), [6])
+
+    def test_set_schedule_ids_does_not_query(self):
+        """ Test that the events of a selected schedule are loaded by the
+        next window, not when it is selected """
+        self.tree.window(*JANUARY)
+        self.tree.window(*FEBRUARY)
+        with unittest.mock.patch.object(
+                self.element_management, "query_occurrences",
+                wraps=self.element_management.query_occurrences) as query:
+            self.tree.set_schedule_ids(["s1", "s2"])
+            query.assert_not_called()
+            self.assertEqual(titles(self.tree.window(*JANUARY), 2024, 1, 6),
+                             ["lunch"])
+            # one query for the loaded months, merged into one window
+            self.assertEqual(query.call_count, 1)
+            self.tree.window(*FEBRUARY)
+            self.assertEqual(query.call_count, 1)
+
+            # a schedule selected and unselected again is not loaded
+            self.tree.set_schedule_ids(["s1"])
+            self.tree.set_schedule_ids(["s1", "s2"])
+            self.tree.set_schedule_ids(["s1"])
+            self.tree.window(*JANUARY)
+            self.assertEqual(query.call_count, 1)
+
+    def test_tree_changed_while_window_is_queried(self):
+        """ Test that the selection and the changes are applied while a
+        window is queried, and the window is queried again after them """
+        started = threading.Event()
+        release = threading.Event()
+        query_occurrences = self.element_management.query_occurrences
+
+        def slow_query(*args):
+            started.set()
+            release.wait(5)
+            return query_occurrences(*args)
+
+        with unittest.mock.patch.object(
+                self.element_management, "query_occurrences",
+                side_effect=slow_query) as query, \
+                ThreadPoolExecutor(max_workers=1) as loader:
+            window = loader.submit(self.tree.window, *JANUARY)
+            self.assertTrue(started.wait(5))
+            self.tree.set_schedule_ids(["s1", "s2"])
+            self.element_management.get_element("meeting") \
+                .set_title("renamed")
+            self.assertFalse(window.done())
+            release.set()
+            tree = window.result(timeout=5)
+
+        self.assertEqual(query.call_count, 2)
+        self.assertEqual(titles(tree, 2024, 1, 5), ["renamed"])
+        self.assertEqual(titles(tree, 2024, 1, 6), ["lunch"])
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
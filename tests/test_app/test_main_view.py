@@ -0,0 +1,60 @@
+"""
+module: test_main_view
+
+Test cases for the helpers of the MainView that compute the calendar grid
+"""
+import datetime
+import unittest
+
+from src.app.views.main_view import CALENDAR_WEEKS, day_text, month_cells
+
+
+class TestMonthCells(unittest.TestCase):
+    """
+    Tests of month_cells.
+    """
+
+    def test_fills_the_whole_grid(self):
+        for month in range(1, 13):
+            self.assertEqual(len(month_cells(2024, month)), CALENDAR_WEEKS * 7)
+
+    def test_days_start_on_their_weekday(self):
+        # 1 May 2024 is a Wednesday, the fourth column from Sunday
+        cells = month_cells(2024, 5)
+        self.assertEqual(cells[:3], [None, None, None])
+        self.assertEqual(cells[3], datetime.date(2024, 5, 1))
+        self.assertEqual(cells[33], datetime.date(2024, 5, 31))
+        self.assertEqual(cells[34:], [None] * 8)
+
+    def test_month_spanning_six_weeks(self):
+        # 1 March 2025 is a Saturday
+        cells = month_cells(2025, 3)
+        self.assertEqual(cells[6], datetime.date(2025, 3, 1))
+        self.assertEqual(cells[36], datetime.date(2025, 3, 31))
+
+
+class TestDayText(unittest.TestCase):
+    """
+    Tests of day_text.
+    """
+
+    def test_blank_cell(self):
+        self.assertEqual(day_text(None), " ")
+
+    def test_day_without_elements(self):
+        self.assertEqual(day_text(datetime.date(2024, 5, 12)), "12")
+        self.assertEqual(day_text(datetime.date(2024, 5, 12), {}), "12")
+
+    def test_day_with_elements(self):
+        counts = {"event": 2, "task": 1, "reminder": 0, "busy_minutes": 150}
+        self.assertEqual(day_text(datetime.date(2024, 5, 12), counts),
+                         "12\n3 (2.5h)")
+
+    def test_day_without_events(self):
+        counts = {"event": 0, "task": 1, "reminder": 1, "busy_minutes": 0}
+        self.assertEqual(day_text(datetime.date(2024, 5, 12), counts),
+                         "12\n2")
+
+
+if __name__ == "__main__":
+    unittest.main()
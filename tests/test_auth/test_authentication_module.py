@@ -2,8 +2,7 @@
 Test the authentication module
 """
 import unittest
-from unittest.mock import MagicMock
-import bcrypt
+from unittest.mock import MagicMock, patch
 from src.auth.authentication import AuthenticationModule, UserNotFound
 
 class TestAuthenticationModule(unittest.TestCase):
@@ -15,6 +14,9 @@ class TestAuthenticationModule(unittest.TestCase):
         test_authenticate_user_success
         test_authenticate_user_wrong_password
         test_authenticate_user_user_not_found
+        test_authenticate_returns_user
+        test_authenticate_user_rehash
+        test_authenticate_user_no_rehash
         test_password_verification_success
         test_password_verification_failure
         create_mock_user
@@ -22,15 +24,14 @@ class TestAuthenticationModule(unittest.TestCase):
     def setUp(self):
         """ Function that runs before each test case """
         from src.user.user_management import UserManagement
+        UserManagement._instance = None
         self.database_module_mock = MagicMock()
         UserManagement.get_instance(self.database_module_mock)
         self.auth_module = AuthenticationModule()
 
     def test_authenticate_user_success(self):
         """ Test the authenticate_user method success case """
-        self.auth_module.user_management_module.user_exists = MagicMock(
-            return_value=True)
-        self.auth_module.user_management_module.get_user = MagicMock(
+        self.auth_module.user_management_module.find_user = MagicMock(
             return_value=self.create_mock_user())
 
         # Mocking verify_password method
@@ -42,9 +43,7 @@ class TestAuthenticationModule(unittest.TestCase):
 
     def test_authenticate_user_wrong_password(self):
         """ Test the authenticate_user method wrong password case """
-        self.auth_module.user_management_module.user_exists = MagicMock(
-            return_value=True)
-        self.auth_module.user_management_module.get_user = MagicMock(
+        self.auth_module.user_management_module.find_user = MagicMock(
             return_value=self.create_mock_user())
 
         # Mocking verify_password method
@@ -54,26 +53,63 @@ class TestAuthenticationModule(unittest.TestCase):
                                                     "wrong_password")
         self.assertFalse(result)
 
+    def test_authenticate_returns_user(self):
+        """ Test that authenticate returns the authenticated user """
+        user = self.create_mock_user()
+        self.auth_module.user_management_module.find_user = MagicMock(
+            return_value=user)
+        self.auth_module.verify_password = MagicMock(return_value=True)
+        self.assertIs(self.auth_module.authenticate("test_user",
+                                                    "test_password"), user)
+        self.auth_module.verify_password = MagicMock(return_value=False)
+        self.assertIsNone(self.auth_module.authenticate("test_user",
+                                                        "wrong_password"))
+
+    def test_authenticate_user_rehash(self):
+        """ Test that a hash with another cost factor is replaced on login """
+        user = self.create_mock_user()
+        self.auth_module.user_management_module.find_user = MagicMock(
+            return_value=user)
+        self.auth_module.verify_password = MagicMock(return_value=True)
+        self.auth_module.password_hasher = MagicMock()
+        self.auth_module.password_hasher.needs_rehash.return_value = True
+        self.auth_module.password_hasher.hash.return_value = b'new_hash'
+
+        self.assertTrue(self.auth_module.authenticate_user("test_user",
+                                                           "test_password"))
+        self.auth_module.password_hasher.hash.assert_called_once_with(
+            "test_password")
+        user.set_hashed_password.assert_called_once_with('new_hash')
+
+    def test_authenticate_user_no_rehash(self):
+        """ Test that a hash with the current cost factor is kept """
+        user = self.create_mock_user()
+        self.auth_module.user_management_module.find_user = MagicMock(
+            return_value=user)
+        self.auth_module.verify_password = MagicMock(return_value=True)
+
+        self.assertTrue(self.auth_module.authenticate_user("test_user",
+                                                           "test_password"))
+        user.set_hashed_password.assert_not_called()
+
     def test_password_verification_success(self):
         """ Test the verify_password method success case """
-        bcrypt.checkpw = MagicMock(return_value=True)
-
-        result = self.auth_module.verify_password("test_password",
-                                                  "test_hashed_password")
+        with patch("bcrypt.checkpw", return_value=True):
+            result = self.auth_module.verify_password("test_password",
+                                                      "test_hashed_password")
         self.assertTrue(result)
 
     def test_password_verification_failure(self):
         """ Test the verify_password method failure case """
-        bcrypt.checkpw = MagicMock(return_value=False)
-
-        result = self.auth_module.verify_password("test_password",
-                                                  "test_hashed_password")
+        with patch("bcrypt.checkpw", return_value=False):
+            result = self.auth_module.verify_password("test_password",
+                                                      "test_hashed_password")
         self.assertFalse(result)
 
     def test_authenticate_user_user_not_found(self):
         """ Test the authenticate_user method user not found case """
-        self.auth_module.user_management_module.user_exists = MagicMock(
-            return_value=False)
+        self.auth_module.user_management_module.find_user = MagicMock(
+            return_value=None)
 
         with self.assertRaises(UserNotFound):
             self.auth_module.authenticate_user("nonexistent_user", "password")
@@ -0,0 +1,85 @@
+"""
+Test the password hasher
+"""
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.auth.password_hasher import PasswordHasher
+
+
+class TestPasswordHasher(unittest.TestCase):
+    """
+    Class to test the password hasher
+
+    Methods:
+        setUp
+        tearDown
+        test_hash_and_verify
+        test_rounds
+        test_needs_rehash
+        test_runs_on_worker_pool
+        test_concurrent_verifications
+    """
+    def setUp(self):
+        """ Function that runs before each test case """
+        # the lowest cost bcrypt accepts, to keep the tests fast
+        self.hasher = PasswordHasher(rounds=4, max_workers=2)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.hasher.shutdown()
+
+    def test_hash_and_verify(self):
+        """ Test that a hash verifies its password only """
+        hashed_password = self.hasher.hash("test_password")
+        self.assertTrue(self.hasher.verify("test_password", hashed_password))
+        self.assertTrue(self.hasher.verify("test_password",
+                                           hashed_password.decode()))
+        self.assertFalse(self.hasher.verify("wrong_password",
+                                            hashed_password))
+
+    def test_rounds(self):
+        """ Test that the hashes use the configured cost factor """
+        hashed_password = self.hasher.hash("test_password")
+        self.assertTrue(hashed_password.startswith(b"$2b$04$"))
+
+    def test_needs_rehash(self):
+        """ Test that hashes with another cost factor need a rehash """
+        self.assertFalse(self.hasher.needs_rehash(
+            self.hasher.hash("test_password")))
+        self.assertTrue(self.hasher.needs_rehash(
+            "$2b$12$4PVzqGrnWdUzWd9s/VoI2u6cfTS58zvVqEzUzTijp8usZbRAnkE/W"))
+        self.assertTrue(self.hasher.needs_rehash("not a hash"))
+
+    def test_runs_on_worker_pool(self):
+        """ Test that the hashes do not run on the caller's thread """
+        threads = []
+
+        def checkpw(password, hashed_password):
+            threads.append(threading.current_thread())
+            return True
+
+        with patch("bcrypt.checkpw", checkpw):
+            self.assertTrue(self.hasher.verify_async(
+                "test_password", "hash").result())
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_concurrent_verifications(self):
+        """ Test that up to max_workers verifications run at once """
+        running = threading.Barrier(2, timeout=5)
+
+        def checkpw(password, hashed_password):
+            # both calls must be running to pass the barrier
+            running.wait()
+            return True
+
+        with patch("bcrypt.checkpw", checkpw):
+            futures = [self.hasher.verify_async("test_password", "hash")
+                       for _ in range(2)]
+            self.assertEqual([future.result(timeout=5) for future in futures],
+                             [True, True])
+
+
+if __name__ == '__main__': # pragma: no cover
+    unittest.main() # pragma: no cover
@@ -0,0 +1,193 @@
+"""
+Test the session store
+"""
+import os
+import tempfile
+import unittest
+
+from src.auth.session import SessionStore, InvalidSessionError, \
+    load_secret, persistent_store
+
+
+class FakeClock:
+    """ Clock moved by hand """
+
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStore(unittest.TestCase):
+    """
+    Class to test the session store
+
+    Methods:
+        setUp
+        test_create_and_validate
+        test_expired
+        test_forged_token
+        test_malformed_token
+        test_resume_after_restart
+        test_other_secret
+        test_revoke
+        test_revoke_user
+        test_purge_expired
+        test_purge_expired_revocations
+    """
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.clock = FakeClock()
+        self.store = SessionStore(secret=b"secret", ttl=60, clock=self.clock)
+
+    def test_create_and_validate(self):
+        """ Test that a new session is valid """
+        session = self.store.create("user:1")
+        self.assertEqual(session.user_id, "user:1")
+        self.assertEqual(session.expires_at, 1060)
+        self.assertEqual(self.store.validate(session.token), session)
+
+    def test_expired(self):
+        """ Test that a session is not valid after its ttl """
+        session = self.store.create("user")
+        self.clock.now = 1060
+        with self.assertRaises(InvalidSessionError):
+            self.store.validate(session.token)
+
+    def test_forged_token(self):
+        """ Test that a token with another user is not valid """
+        token = self.store.create("user").token
+        other = SessionStore(secret=b"secret", ttl=60,
+                             clock=self.clock).create("admin").token
+        forged = other.split(".")[0] + "." + token.split(".")[1]
+        with self.assertRaises(InvalidSessionError):
+            self.store.validate(forged)
+
+    def test_malformed_token(self):
+        """ Test that a malformed token is not valid """
+        for token in ["", "abc", "a.b.c", "!!.??"]:
+            with self.assertRaises(InvalidSessionError):
+                self.store.validate(token)
+
+    def test_resume_after_restart(self):
+        """ Test that a store with the same secret accepts the token """
+        session = self.store.create("user")
+        restarted = SessionStore(secret=b"secret", clock=self.clock)
+        self.assertEqual(restarted.validate(session.token), session)
+
+    def test_other_secret(self):
+        """ Test that a store with another secret rejects the token """
+        session = self.store.create("user")
+        with self.assertRaises(InvalidSessionError):
+            SessionStore(secret=b"other").validate(session.token)
+
+    def test_revoke(self):
+        """ Test that a revoked session is not valid """
+        session = self.store.create("user")
+        self.store.revoke(session.token)
+        with self.assertRaises(InvalidSessionError):
+            self.store.validate(session.token)
+
+    def test_revoke_user(self):
+        """ Test that the sessions of a user can be revoked at once """
+        first = self.store.create("user")
+        self.clock.now += 1
+        second = self.store.create("user")
+        other = self.store.create("other")
+        self.store.revoke_user("user")
+        for session in (first, second):
+            with self.assertRaises(InvalidSessionError):
+                self.store.validate(session.token)
+        self.assertEqual(self.store.validate(other.token), other)
+
+    def test_purge_expired(self):
+        """ Test that expired sessions are dropped """
+        self.store.create("user")
+        self.clock.now = 1030
+        session = self.store.create("other")
+        self.clock.now = 1070
+        self.store.purge_expired()
+        self.assertEqual(list(self.store._sessions), [session.token])
+
+    def test_purge_expired_revocations(self):
+        """ Test that the revoked tokens are dropped once they expire """
+        first = self.store.create("user")
+        self.clock.now = 1030
+        second = self.store.create("user")
+        self.store.revoke(first.token)
+        self.store.revoke(second.token)
+        self.store.revoke("forged.token")
+        self.clock.now = 1070
+        self.store.purge_expired()
+        self.assertEqual(list(self.store._revoked), [second.token])
+
+
+class TestPersistentStore(unittest.TestCase):
+    """ Class to test the revocations kept across restarts """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "secret")
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.directory.cleanup()
+
+    def _restart(self):
+        """ A new store with the secret and revocations of the last one """
+        return persistent_store(self.path, ttl=60, clock=self.clock)
+
+    def test_revoked_token_not_resumed_after_restart(self):
+        """ Test that a token revoked by a logout stays revoked """
+        store = self._restart()
+        revoked = store.create("user")
+        kept = store.create("other")
+        store.revoke(revoked.token)
+
+        restarted = self._restart()
+        with self.assertRaises(InvalidSessionError):
+            restarted.validate(revoked.token)
+        self.assertEqual(restarted.validate(kept.token), kept)
+
+    def test_revoke_user_persisted(self):
+        """ Test that the sessions ended by revoke_user stay revoked """
+        store = self._restart()
+        session = store.create("user")
+        store.revoke_user("user")
+        with self.assertRaises(InvalidSessionError):
+            self._restart().validate(session.token)
+
+    def test_expired_revocations_purged_from_file(self):
+        """ Test that purge_expired rewrites the file without the expired
+        revocations, and that they are not loaded again """
+        store = self._restart()
+        first = store.create("user")
+        self.clock.now = 1030
+        second = store.create("user")
+        store.revoke(first.token)
+        store.revoke(second.token)
+
+        self.clock.now = 1070
+        self.assertEqual(list(self._restart()._revoked), [second.token])
+        store.purge_expired()
+        with open(self.path + ".revoked", encoding="utf-8") as file:
+            self.assertEqual(file.read().split(), [second.token])
+
+
+class TestLoadSecret(unittest.TestCase):
+    """ Class to test the load_secret function """
+
+    def test_load_secret(self):
+        """ Test that the secret is created once and read back """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "secret")
+            secret = load_secret(path)
+            self.assertEqual(len(secret), 32)
+            self.assertEqual(load_secret(path), secret)
+
+
+if __name__ == '__main__': # pragma: no cover
+    unittest.main() # pragma: no cover
@@ -0,0 +1,266 @@
+"""
+module: test_cache_invalidator
+
+Test cases for the CacheInvalidator class, with two clients sharing a
+MemoryModule: the managers under test write through one UpdatedAtDecorator
+and the other client through another
+"""
+import threading
+import time
+import unittest
+import unittest.mock
+from datetime import datetime
+
+from src.app.events_tree import EventsTree
+from src.cache.cache_invalidator import CacheInvalidator
+from src.calendar_elements.element_management import ElementManagement
+from src.database.change_feed import PollingChangeFeed
+from src.database.memory_module import MemoryModule
+from src.database.unit_of_work import UnitOfWork
+from src.database.updated_at_decorator import UpdatedAtDecorator
+from src.observer.observer import Publisher
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+JANUARY = (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+
+class TestCacheInvalidator(unittest.TestCase):
+    """ Class to test the CacheInvalidator class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.db_module = UpdatedAtDecorator(self.memory, instance_id="mine")
+        self.other_db_module = UpdatedAtDecorator(self.memory,
+                                                  instance_id="other")
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        self.schedule_management = ScheduleManagement.get_instance(
+            self.db_module)
+        self.user_management = UserManagement.get_instance(self.db_module)
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        for schedule_id in ("s1", "s2"):
+            self.db_module.insert_data("schedules", {
+                "_id": schedule_id, "title": schedule_id,
+                "description": None, "permissions": {}, "elements": []})
+        self.meeting = self._event(self.element_management, "meeting", "s1",
+                                   datetime(2024, 1, 5, 10))
+
+        # the managers of the other client
+        self.other_elements = ElementManagement(self.other_db_module)
+        self.other_users = UserManagement(self.other_db_module)
+
+        self.invalidator = CacheInvalidator(
+            PollingChangeFeed(self.memory, instance_id="mine"), {
+                "users": self.user_management,
+                "schedules": self.schedule_management,
+                "elements": self.element_management})
+        self.published = []
+        self.element_management.subscribe(
+            lambda change, element: self.published.append((change,
+                                                           element.id)))
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    @staticmethod
+    def _event(element_management, title, schedule_id, start):
+        return element_management.create_element(
+            "event", title, title, [schedule_id], start=start,
+            end=start.replace(hour=start.hour + 1), description=None)
+
+    def test_changed_element_is_reloaded(self):
+        """ Test that an element changed by another client is reloaded """
+        self.other_elements.get_element("meeting").set_title("renamed")
+        self.assertEqual(self.invalidator.poll(), 1)
+        element = self.element_management.get_element("meeting")
+        self.assertIsNot(element, self.meeting)
+        self.assertEqual(element.title, "renamed")
+        self.assertEqual(self.published,
+                         [(Publisher.REFRESHED, "meeting")])
+
+    def test_replaced_element_edits_are_saved(self):
+        """ Test that an element still held after it was replaced by a
+        change of another client is saved when it is edited """
+        self.other_elements.get_element("meeting").set_title("renamed")
+        self.invalidator.poll()
+        self.meeting.set_description("edited")
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+        stored = self.memory.select_one("elements", {"_id": "meeting"})
+        self.assertEqual((stored["title"], stored["description"]),
+                         ("renamed", "edited"))
+
+    def test_evicted_element_edits_are_saved(self):
+        """ Test that an element evicted while a view holds it is saved
+        through the unit of work when it is edited """
+        unit_of_work = UnitOfWork(self.db_module)
+        self.element_management.unit_of_work = unit_of_work
+        self.element_management.elements.invalidate()
+        self.meeting.set_title("edited")
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+        unit_of_work.flush()
+        self.assertEqual(self.memory.select_one(
+            "elements", {"_id": "meeting"})["title"], "edited")
+
+    def test_own_writes_are_skipped(self):
+        """ Test that the writes of the managers do not evict them """
+        self.meeting.set_title("mine")
+        self.assertEqual(self.invalidator.poll(), 0)
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+
+    def test_deleted_element(self):
+        """ Test that an element deleted by another client is dropped """
+        self.element_management.query_range(["s1"], *JANUARY)
+        self.other_db_module.delete_data("elements", {"_id": "meeting"})
+        self.invalidator.poll()
+        with unittest.mock.patch.object(self.memory, "select_one") as select:
+            self.assertIsNone(self.element_management.find_element("meeting"))
+            select.assert_not_called()
+        self.assertEqual(self.element_management.query_range(["s1"],
+                                                             *JANUARY), [])
+
+    def test_created_element_is_indexed(self):
+        """ Test that an element created by another client in a loaded
+        window is found by query_range """
+        self.element_management.query_range(["s1"], *JANUARY)
+        self._event(self.other_elements, "lunch", "s1",
+                    datetime(2024, 1, 6, 12))
+        self.invalidator.poll()
+        self.assertEqual([element.id for element in
+                          self.element_management.query_range(["s1"],
+                                                              *JANUARY)],
+                         ["meeting", "lunch"])
+
+    def test_events_tree_is_patched(self):
+        """ Test that the events tree follows the changes of other clients """
+        tree = EventsTree(self.element_management, ["s1"])
+        self.element_management.subscribe(tree.element_changed)
+        tree.window(*JANUARY)
+        other_meeting = self.other_elements.get_element("meeting")
+        other_meeting.set_interval(datetime(2024, 1, 7, 9),
+                                   datetime(2024, 1, 7, 10))
+        self.invalidator.poll()
+        window = tree.window(*JANUARY)
+        self.assertNotIn(5, window[2024][1])
+        self.assertEqual(window[2024][1][7][9][0][0].title, "meeting")
+
+        self.other_db_module.delete_data("elements", {"_id": "meeting"})
+        self.invalidator.poll()
+        self.assertEqual(tree.window(*JANUARY), {})
+
+    def test_pending_writes_are_kept(self):
+        """ Test that an element with writes not flushed is not replaced,
+        and the change is applied once they are written """
+        unit_of_work = UnitOfWork(self.db_module)
+        self.element_management.unit_of_work = unit_of_work
+        self.meeting.set_title("local")
+        other_meeting = self.other_elements.get_element("meeting")
+        other_meeting.set_description("remote")
+        self.assertEqual(self.invalidator.poll(), 0)
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+        unit_of_work.flush()
+        self.assertEqual(self.memory.select_one(
+            "elements", {"_id": "meeting"})["title"], "local")
+
+        self.assertEqual(self.invalidator.poll(), 1)
+        element = self.element_management.get_element("meeting")
+        self.assertEqual((element.title, element.description),
+                         ("local", "remote"))
+
+    def test_users_and_schedules_are_evicted(self):
+        """ Test that users and schedules changed by other clients are read
+        again """
+        user = self.user_management.create_user("name", "a@b.c", "password",
+                                                user_id="u1")
+        schedule = self.schedule_management.get_schedule("s2")
+        self.other_users.get_user("u1").set_username("other")
+        self.other_db_module.update_data("schedules", {"_id": "s2"},
+                                         {"title": "renamed"})
+        self.invalidator.poll()
+        self.assertIsNot(self.user_management.get_user("u1"), user)
+        self.assertEqual(self.user_management.get_user("u1").username,
+                         "other")
+        self.assertEqual(self.schedule_management.get_schedule("s2").title,
+                         "renamed")
+        self.assertIsNot(self.schedule_management.get_schedule("s2"),
+                         schedule)
+
+    def test_deleted_schedule_is_published(self):
+        """ Test that a schedule deleted by another client is published """
+        deleted = []
+        self.schedule_management.subscribe(
+            lambda change, schedule: deleted.append((change, schedule.id)))
+        self.schedule_management.get_schedule("s2")
+        self.other_db_module.delete_data("schedules", {"_id": "s2"})
+        self.invalidator.poll()
+        self.assertEqual(deleted, [(Publisher.DELETED, "s2")])
+        self.assertFalse(self.schedule_management.schedule_exists("s2"))
+
+    def test_failed_changes_are_retried(self):
+        """ Test that a change that fails is applied on the next poll """
+        self.other_elements.get_element("meeting").set_title("renamed")
+        with unittest.mock.patch.object(
+                self.memory, "select_many_by_ids",
+                side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                self.invalidator.poll()
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+        self.assertEqual(self.invalidator.poll(), 1)
+        self.assertEqual(self.element_management.get_element("meeting").title,
+                         "renamed")
+
+    def test_fetch_then_apply(self):
+        """ Test that fetch reads the feed and the documents, and the changes
+        are applied, without reading the database, and published on the
+        thread that applies them """
+        threads = []
+        self.element_management.subscribe(
+            lambda change, element: threads.append(threading.current_thread()))
+        self.other_elements.get_element("meeting").set_title("renamed")
+
+        fetched = []
+        worker = threading.Thread(
+            target=lambda: fetched.extend(self.invalidator.fetch()))
+        worker.start()
+        worker.join()
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(self.published, [])
+        self.assertIs(self.element_management.get_element("meeting"),
+                      self.meeting)
+
+        with unittest.mock.patch.object(self.memory, "select_one") as select:
+            self.assertEqual(self.invalidator.apply(fetched), 1)
+            select.assert_not_called()
+        self.assertEqual(self.published, [(Publisher.REFRESHED, "meeting")])
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertEqual(self.element_management.get_element("meeting").title,
+                         "renamed")
+
+    def test_start_and_stop(self):
+        """ Test that the background polls apply the changes """
+        self.invalidator.start(0.01)
+        with self.assertRaises(RuntimeError):
+            self.invalidator.start(0.01)
+        self.other_elements.get_element("meeting").set_title("renamed")
+        for _ in range(200):
+            if self.invalidator.applied:
+                break
+            time.sleep(0.01)
+        self.invalidator.stop()
+        self.assertEqual(self.invalidator.applied, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
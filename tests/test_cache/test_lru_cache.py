@@ -0,0 +1,142 @@
+"""
+module: test_lru_cache
+
+Test cases for the LRUCache class
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.cache.lru_cache import LRUCache, approximate_size
+
+
+class TestLRUCache(unittest.TestCase):
+    """ Class to test the LRUCache class """
+
+    def test_get_counts_hits_and_misses(self):
+        """ Test that get counts hits and misses """
+        cache = LRUCache(items={"a": 1})
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        """ Test that the least recently used entry is evicted """
+        on_evict = MagicMock()
+        cache = LRUCache(max_entries=2, on_evict=on_evict)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("a")
+        cache["c"] = 3
+        self.assertEqual(sorted(cache), ["a", "c"])
+        on_evict.assert_called_once_with("b", 2)
+
+    def test_pinned_entries_are_not_evicted(self):
+        """ Test that pinned entries are skipped by the eviction """
+        cache = LRUCache(max_entries=1, pinned=lambda key, value: key == "a")
+        cache["a"] = 1
+        cache["b"] = 2
+        cache["c"] = 3
+        self.assertEqual(sorted(cache), ["a", "c"])
+
+    def test_invalidate(self):
+        """ Test that invalidate drops entries and calls on_evict """
+        on_evict = MagicMock()
+        cache = LRUCache(on_evict=on_evict, items={"a": 1, "b": 2})
+        cache.invalidate("a")
+        on_evict.assert_called_once_with("a", 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(on_evict.call_count, 2)
+
+    def test_invalidate_keeps_pinned_entries(self):
+        """ Test that invalidate skips the pinned entries """
+        on_evict = MagicMock()
+        cache = LRUCache(on_evict=on_evict, items={"a": 1, "b": 2},
+                         pinned=lambda key, value: key == "a")
+        cache.invalidate("a")
+        self.assertIn("a", cache)
+        cache.invalidate()
+        self.assertEqual(sorted(cache), ["a"])
+        on_evict.assert_called_once_with("b", 2)
+
+    def test_del_does_not_call_on_evict(self):
+        """ Test that deleting an entry does not call on_evict """
+        on_evict = MagicMock()
+        cache = LRUCache(on_evict=on_evict, items={"a": 1})
+        del cache["a"]
+        self.assertNotIn("a", cache)
+        on_evict.assert_not_called()
+
+    def test_ttl(self):
+        """ Test that entries expire after the ttl and count as misses """
+        on_evict = MagicMock()
+        cache = LRUCache(ttl=10, on_evict=on_evict)
+        with patch("src.cache.lru_cache.time.monotonic", return_value=100):
+            cache["a"] = 1
+        with patch("src.cache.lru_cache.time.monotonic", return_value=109):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("src.cache.lru_cache.time.monotonic", return_value=110):
+            self.assertIsNone(cache.get("a"))
+            self.assertNotIn("a", cache)
+        on_evict.assert_called_once_with("a", 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.hit_ratio, 0.5)
+
+    def test_max_size(self):
+        """ Test that entries are evicted when the total size is too big """
+        cache = LRUCache(max_size=10, sizeof=len)
+        cache["a"] = "aaaa"
+        cache["b"] = "bbbb"
+        self.assertEqual(cache.resident_size, 8)
+        cache["c"] = "cccc"
+        self.assertEqual(sorted(cache), ["b", "c"])
+        self.assertEqual(cache.resident_size, 8)
+        cache["b"] = "b"
+        self.assertEqual(cache.resident_size, 5)
+
+    def test_size_measured_only_with_max_size(self):
+        """ Test that sizeof is not called when there is no byte limit """
+        sizeof = MagicMock(return_value=4)
+        cache = LRUCache(sizeof=sizeof)
+        cache["a"] = "aaaa"
+        cache.resize("a")
+        sizeof.assert_not_called()
+        self.assertEqual(cache.resident_size, 1)
+
+    def test_resize(self):
+        """ Test that resize measures a changed value again and evicts """
+        cache = LRUCache(max_size=10, sizeof=len)
+        cache["a"] = ["a"]
+        cache["b"] = ["b"]
+        cache["b"].extend("bbbbbbbb")
+        self.assertEqual(cache.resident_size, 2)
+        cache.resize("b")
+        self.assertEqual(cache.resident_size, 10)
+        cache["a"].extend("aa")
+        cache.resize("a")
+        self.assertEqual(sorted(cache), ["a"])
+        self.assertEqual(cache.resident_size, 3)
+        cache.resize("missing")
+
+    def test_stats(self):
+        """ Test the counters returned by stats """
+        cache = LRUCache(max_entries=1)
+        cache["a"] = 1
+        cache["b"] = 2
+        cache.get("b")
+        cache.get("a")
+        self.assertEqual(cache.stats(), {"entries": 1, "resident_size": 1,
+                                         "hits": 1, "misses": 1,
+                                         "hit_ratio": 0.5, "evictions": 1})
+
+    def test_approximate_size(self):
+        """ Test that approximate_size follows containers and to_dict """
+        value = MagicMock()
+        value.to_dict.return_value = {"title": "a" * 100}
+        self.assertGreater(approximate_size(value), 100)
+        self.assertGreater(approximate_size(["a" * 100]),
+                           approximate_size([]) + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+module: test_negative_cache
+
+Test cases for the NegativeCache class
+"""
+import unittest
+from unittest.mock import patch
+
+from src.cache.negative_cache import NegativeCache
+
+
+class TestNegativeCache(unittest.TestCase):
+    """ Class to test the NegativeCache class """
+
+    def test_add_and_discard(self):
+        """ Test that added keys are remembered until discarded """
+        cache = NegativeCache()
+        cache.add("id")
+        self.assertIn("id", cache)
+        cache.discard("id")
+        self.assertNotIn("id", cache)
+
+    def test_expiration(self):
+        """ Test that keys expire after the ttl """
+        cache = NegativeCache(ttl=5)
+        with patch("src.cache.negative_cache.time.monotonic",
+                   return_value=100):
+            cache.add("id")
+        with patch("src.cache.negative_cache.time.monotonic",
+                   return_value=104):
+            self.assertIn("id", cache)
+        with patch("src.cache.negative_cache.time.monotonic",
+                   return_value=105):
+            self.assertNotIn("id", cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_max_entries(self):
+        """ Test that the oldest keys are dropped first """
+        cache = NegativeCache(max_entries=2)
+        cache.add("a")
+        cache.add("b")
+        cache.add("c")
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_disabled(self):
+        """ Test that a ttl of 0 disables the cache """
+        cache = NegativeCache(ttl=0)
+        cache.add("id")
+        self.assertNotIn("id", cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+module: test_calendar_context
+
+Test cases for the CalendarContext class, with two calendars served from
+separate MemoryModules
+"""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.calendar_elements.element_management import ElementManagement
+from src.context.calendar_context import CalendarContext, current_context
+from src.database.memory_module import MemoryModule
+from src.database.mongo_module import MongoModule
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+def new_database(user_ids):
+    """ A connected MemoryModule with the given users """
+    database = MemoryModule()
+    database.connect()
+    database.insert_many_data("users", [
+        {"_id": user_id, "username": user_id, "email": f"{user_id}@mail",
+         "schedules": [], "hashed_password": "", "user_preferences": None}
+        for user_id in user_ids])
+    return database
+
+
+class TestCalendarContext(unittest.TestCase):
+    """ Class to test the CalendarContext class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        self.first = CalendarContext(new_database(["alice"]))
+        self.second = CalendarContext(new_database(["bob"]))
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def test_get_instance_returns_managers_of_active_context(self):
+        """ Test that get_instance returns the managers of the context """
+        with self.first:
+            self.assertIs(current_context(), self.first)
+            self.assertIs(ScheduleManagement.get_instance(),
+                          self.first.schedule_management)
+            self.assertIs(ElementManagement.get_instance(),
+                          self.first.element_management)
+            self.assertIs(UserManagement.get_instance(),
+                          self.first.user_management)
+            with self.second:
+                self.assertIs(UserManagement.get_instance(),
+                              self.second.user_management)
+            self.assertIs(UserManagement.get_instance(),
+                          self.first.user_management)
+        self.assertIsNone(current_context())
+
+    def test_singleton_used_without_context(self):
+        """ Test that the process-wide instances are kept as a fallback """
+        database = new_database([])
+        manager = UserManagement.get_instance(database_module=database)
+        self.assertIs(UserManagement.get_instance(), manager)
+        self.assertIsNot(manager, self.first.user_management)
+        with self.first:
+            self.assertIs(UserManagement.get_instance(),
+                          self.first.user_management)
+        self.assertIs(UserManagement.get_instance(), manager)
+        self.assertIsNone(UserManagement._instance.unit_of_work)
+
+    def test_managers_share_the_unit_of_work(self):
+        """ Test that the managers of a context write behind together """
+        unit_of_work = self.first.unit_of_work
+        self.assertIsNotNone(unit_of_work)
+        for manager in self.first.managers.values():
+            self.assertIs(manager.unit_of_work, unit_of_work)
+        self.assertIsNot(self.second.unit_of_work, unit_of_work)
+
+        direct = CalendarContext(new_database([]), write_behind=False)
+        self.assertIsNone(direct.unit_of_work)
+        self.assertEqual(direct.flush(), 0)
+
+    def test_contexts_are_isolated(self):
+        """ Test that the cross-manager lookups stay in their context """
+        with self.first:
+            self.first.schedule_management.create_schedule(
+                "work", "Work", "", {"alice": "owner"}, [])
+            self.first.flush()
+        with self.second:
+            self.assertFalse(
+                self.second.schedule_management.schedule_exists("work"))
+            self.second.schedule_management.create_schedule(
+                "work", "Other work", "", {"bob": "owner"}, [])
+            self.second.flush()
+
+        self.assertEqual(
+            self.first.user_management.get_user("alice").schedules, ["work"])
+        self.assertEqual(
+            self.second.user_management.get_user("bob").schedules, ["work"])
+        self.assertEqual(
+            self.first.schedule_management.get_schedule("work").title, "Work")
+        self.assertEqual(
+            self.second.schedule_management.get_schedule("work").title,
+            "Other work")
+        self.assertFalse(self.second.user_management.user_exists("alice"))
+
+    def test_contexts_used_concurrently(self):
+        """ Test that threads serving different contexts do not interfere """
+        barrier = threading.Barrier(2)
+
+        def serve(context, user_id):
+            with context:
+                barrier.wait()
+                for index in range(20):
+                    ScheduleManagement.get_instance().create_schedule(
+                        f"schedule_{index}", user_id, "", {user_id: "owner"},
+                        [])
+                    time.sleep(0)
+                context.flush()
+                return UserManagement.get_instance() \
+                    .get_user(user_id).schedules
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(serve, self.first, "alice")
+            second = executor.submit(serve, self.second, "bob")
+            expected = [f"schedule_{index}" for index in range(20)]
+            self.assertEqual(first.result(), expected)
+            self.assertEqual(second.result(), expected)
+
+        for context, user_id in ((self.first, "alice"), (self.second, "bob")):
+            schedules = context.db_module.select_data("schedules", {})
+            self.assertEqual({schedule["title"] for schedule in schedules},
+                             {user_id})
+
+    def test_run_activates_only_inside_call(self):
+        """ Test that run does not change the context of the caller """
+        result = self.first.run(UserManagement.get_instance)
+        self.assertIs(result, self.first.user_management)
+        self.assertIsNone(current_context())
+
+    def test_unit_of_work_timer_runs_in_context(self):
+        """ Test that the flush thread inherits the active context """
+        seen = []
+        flush = self.first.unit_of_work.flush
+
+        def recording_flush():
+            seen.append(current_context())
+            return flush()
+
+        self.first.unit_of_work.flush = recording_flush
+        with self.first:
+            self.first.unit_of_work.start(0.01)
+        while not seen:
+            time.sleep(0.01)
+        self.first.close()
+        self.assertIs(seen[0], self.first)
+
+    def test_remote_schedule_deletion_uses_context_index(self):
+        """ Test that a remote deletion reaches the elements of its context """
+        with self.first:
+            self.first.schedule_management.create_schedule(
+                "work", "Work", "", {"alice": "owner"}, [])
+            self.first.flush()
+            self.first.element_management.schedule_indexes["work"] = None
+            self.first.schedule_management.apply_remote_change("work", True)
+        self.assertNotIn("work", self.first.element_management.schedule_indexes)
+
+
+class TestMongoModuleShared(unittest.TestCase):
+    """ Class to test the shared option of the MongoModule """
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        MongoModule._instance = None
+
+    def test_unshared_instances_are_separate(self):
+        """ Test that shared=False creates a module of its own """
+        MongoModule._instance = None
+        shared = MongoModule("localhost", 27017, "calendar_app")
+        self.assertIs(MongoModule("localhost", 27017, "calendar_app"), shared)
+        first = MongoModule("localhost", 27017, "first", shared=False)
+        second = MongoModule("localhost", 27017, "second", shared=False)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first, shared)
+        self.assertIs(MongoModule._instance, shared)
+        self.assertEqual(first._database_name, "first")
+        self.assertEqual(shared._database_name, "calendar_app")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+module: test_async_memory_module
+
+Test cases for the AsyncMemoryModule and AsyncTimeoutDecorator classes
+"""
+import asyncio
+import unittest
+from datetime import datetime
+
+from src.database.async_memory_module import AsyncMemoryModule
+from src.database.memory_module import MemoryModule
+from src.database.mongo_module import ConnectionDBError, NonExistentIDError
+from src.database.utils import AsyncTimeoutDecorator, TimeExceedError
+from src.schedule.schedule_management import ScheduleManagement
+
+
+class TestAsyncMemoryModule(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the AsyncMemoryModule class """
+
+    async def asyncSetUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.db_module = AsyncMemoryModule(self.memory)
+        await self.db_module.connect()
+
+    async def test_connect_twice(self):
+        """ Test that connecting twice raises an error """
+        with self.assertRaises(ConnectionDBError):
+            await self.db_module.connect()
+
+    async def test_crud(self):
+        """ Test the insert, select, update and delete methods """
+        await self.db_module.insert_data("teste", {"_id": "1", "test": "a"})
+        await self.db_module.insert_many_data("teste", [
+            {"_id": "2", "test": "b"}, {"_id": "3", "test": "b"}])
+        await self.db_module.update_data("teste", {"_id": "1"},
+                                         {"test": "b"})
+        self.assertEqual(await self.db_module.count_data(
+            "teste", {"test": "b"}), 3)
+        await self.db_module.delete_data("teste", {"_id": "2"})
+        self.assertEqual(await self.db_module.select_data("teste", {}),
+                         [{"_id": "1", "test": "b"},
+                          {"_id": "3", "test": "b"}])
+        self.assertEqual(await self.db_module.select_one(
+            "teste", {"_id": "3"}, {"test": 0}), {"_id": "3"})
+        await self.db_module.delete_many_data("teste", {})
+        self.assertEqual(await self.db_module.select_data("teste", {}), [])
+
+    async def test_shares_the_memory_module(self):
+        """ Test that the synchronous module sees the same documents """
+        await self.db_module.insert_data("teste", {"_id": "1"})
+        self.assertEqual(self.memory.select_data("teste", {}), [{"_id": "1"}])
+
+    async def test_iter_data(self):
+        """ Test that iter_data is an async iterator """
+        await self.db_module.insert_many_data(
+            "teste", [{"_id": str(number)} for number in range(5)])
+        documents = [document async for document in
+                     self.db_module.iter_data("teste", {}, batch_size=2)]
+        self.assertEqual(len(documents), 5)
+
+    async def test_select_elements_in_range(self):
+        """ Test the range query on the elements """
+        await self.db_module.insert_data("elements", {
+            "_id": "1", "schedules": ["schedule1"],
+            "display_start": datetime(2024, 1, 1, 9),
+            "display_end": datetime(2024, 1, 1, 10)})
+        result = await self.db_module.select_elements_in_range(
+            ["schedule1"], datetime(2024, 1, 1), datetime(2024, 1, 2))
+        self.assertEqual([document["_id"] for document in result], ["1"])
+
+    async def test_find_missing_ids_concurrently(self):
+        """ Test that independent lookups run concurrently """
+        await self.db_module.insert_data("users", {"_id": "user1"})
+        await self.db_module.insert_data("elements", {"_id": "element1"})
+        missing = await asyncio.gather(
+            self.db_module.find_missing_ids("users", ["user1", "user2"]),
+            self.db_module.find_missing_ids("elements", ["element1"]))
+        self.assertEqual(missing, [["user2"], []])
+
+    async def test_validate_references_async(self):
+        """ Test that ScheduleManagement checks the references of a
+        schedule on an asynchronous module """
+        await self.db_module.insert_data("users", {"_id": "user1"})
+        await self.db_module.insert_data("elements", {"_id": "element1"})
+        schedule_management = ScheduleManagement(self.memory)
+        await schedule_management.validate_references_async(
+            self.db_module, ["element1"], ["user1"])
+        with self.assertRaises(NonExistentIDError):
+            await schedule_management.validate_references_async(
+                self.db_module, ["element1", "element2"], ["user1"])
+        with self.assertRaises(NonExistentIDError):
+            await schedule_management.validate_references_async(
+                self.db_module, ["element1"], ["user2"])
+
+
+class SlowModule(AsyncMemoryModule):
+    """ AsyncMemoryModule whose queries take one second """
+
+    async def select_data(self, collection_name, condition):
+        await asyncio.sleep(1)
+        return await super().select_data(collection_name, condition)
+
+    async def iter_data(self, collection_name, condition, projection=None,
+                        batch_size=1000):
+        yield {"_id": "1"}
+        await asyncio.sleep(1)
+        yield {"_id": "2"}
+
+
+class TestAsyncTimeoutDecorator(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the AsyncTimeoutDecorator class """
+
+    async def asyncSetUp(self):
+        """ Function that runs before each test case """
+        self.decorated = SlowModule()
+        self.db_module = AsyncTimeoutDecorator(self.decorated,
+                                               timeout_seconds=0.01)
+        await self.db_module.connect()
+
+    async def test_fast_operation(self):
+        """ Test that an operation within the timeout returns its result """
+        await self.db_module.insert_data("teste", {"_id": "1"})
+        self.assertEqual(await self.db_module.count_data("teste", {}), 1)
+
+    async def test_timeout(self):
+        """ Test that a slow operation is cancelled """
+        with self.assertRaises(TimeExceedError):
+            await self.db_module.select_data("teste", {})
+
+    async def test_iter_data_timeout(self):
+        """ Test that the timeout applies to each step of an iteration """
+        documents = []
+        with self.assertRaises(TimeExceedError):
+            async for document in self.db_module.iter_data("teste", {}):
+                documents.append(document)
+        self.assertEqual(documents, [{"_id": "1"}])
+
+    async def test_cancellation(self):
+        """ Test that cancelling the caller cancels the operation """
+        db_module = AsyncTimeoutDecorator(self.decorated, timeout_seconds=10)
+        task = asyncio.create_task(db_module.select_data("teste", {}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    def test_works_outside_the_main_thread(self):
+        """ Test that the timeout does not need signals """
+        import threading
+        errors = []
+
+        def worker():
+            try:
+                asyncio.run(self.db_module.select_data("teste", {}))
+            except TimeExceedError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join(5)
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
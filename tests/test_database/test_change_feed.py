@@ -0,0 +1,159 @@
+"""
+module: test_change_feed
+
+Test cases for the PollingChangeFeed and ChangeStreamFeed classes
+"""
+import unittest
+import unittest.mock
+
+import pymongo.errors
+
+from src.database.change_feed import Change, ChangeStreamFeed, \
+    PollingChangeFeed, open_change_feed
+from src.database.memory_module import MemoryModule
+from src.database.updated_at_decorator import UpdatedAtDecorator
+
+
+class FakeClock:
+    """ Clock moved by hand """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPollingChangeFeed(unittest.TestCase):
+    """ Class to test the PollingChangeFeed class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.clock = FakeClock()
+        # two clients sharing the database
+        self.mine = UpdatedAtDecorator(self.memory, instance_id="mine",
+                                       clock=self.clock)
+        self.other = UpdatedAtDecorator(self.memory, instance_id="other",
+                                        clock=self.clock)
+        self.feed = PollingChangeFeed(self.memory, instance_id="mine",
+                                      lag=2.0, clock=self.clock)
+
+    def test_reports_the_writes_of_other_clients(self):
+        """ Test that the writes of the other clients are reported once """
+        self.other.insert_data("users", {"_id": "u1"})
+        self.mine.insert_data("users", {"_id": "u2"})
+        self.clock.now = 101.0
+        self.other.update_data("elements", {"_id": "e1"}, {"title": "x"})
+        self.other.insert_data("elements", {"_id": "e2"})
+        self.other.delete_data("elements", {"_id": "e2"})
+        self.assertEqual(self.feed.poll(), [
+            Change("users", "u1"), Change("elements", "e2", True)])
+
+        self.clock.now = 101.5
+        self.assertEqual(self.feed.poll(), [])
+        self.other.update_data("users", {"_id": "u1"}, {"username": "y"})
+        self.clock.now = 102.0
+        self.assertEqual(self.feed.poll(), [Change("users", "u1")])
+
+    def test_clocks_behind_are_covered(self):
+        """ Test that a write stamped a bit before the last poll is seen """
+        self.clock.now = 110.0
+        self.feed.poll()
+        self.clock.now = 109.0
+        self.other.insert_data("schedules", {"_id": "s1"})
+        self.clock.now = 111.0
+        self.assertEqual(self.feed.poll(), [Change("schedules", "s1")])
+
+    def test_collections_not_watched(self):
+        """ Test that other collections are ignored """
+        feed = PollingChangeFeed(self.memory, collections=("users",),
+                                 clock=self.clock)
+        self.other.insert_data("elements", {"_id": "e1"})
+        self.other.insert_data("users", {"_id": "u1"})
+        self.assertEqual(feed.poll(), [Change("users", "u1")])
+
+
+class TestChangeStreamFeed(unittest.TestCase):
+    """ Class to test the ChangeStreamFeed class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.mongo_module = unittest.mock.MagicMock()
+        self.stream = self.mongo_module.watch.return_value
+        self.stream.resume_token = {"_data": "1"}
+        self.feed = ChangeStreamFeed(self.mongo_module, instance_id="mine")
+
+    def _events(self, *events):
+        """ Make the stream return the events and then nothing """
+        self.stream.try_next.side_effect = list(events) + [None]
+
+    def test_poll(self):
+        """ Test that the writes of other clients are reported """
+        self._events(
+            {"operationType": "insert", "ns": {"coll": "users"},
+             "documentKey": {"_id": "u1"},
+             "fullDocument": {"_id": "u1", "updated_by": "other"}},
+            {"operationType": "update", "ns": {"coll": "elements"},
+             "documentKey": {"_id": "e1"},
+             "updateDescription": {"updatedFields": {"updated_by": "mine"}}},
+            {"operationType": "update", "ns": {"coll": "elements"},
+             "documentKey": {"_id": "e2"},
+             "updateDescription": {"updatedFields": {"title": "x"}}},
+            {"operationType": "delete", "ns": {"coll": "schedules"},
+             "documentKey": {"_id": "s1"}},
+            {"operationType": "invalidate"})
+        self.assertEqual(self.feed.poll(), [
+            Change("users", "u1"), Change("elements", "e2"),
+            Change("schedules", "s1", True)])
+        self.mongo_module.watch.assert_called_once_with(
+            ("users", "schedules", "elements"))
+
+    def test_resumes_after_an_error(self):
+        """ Test that an interrupted stream is resumed after the last change
+        seen """
+        self._events()
+        self.feed.poll()
+        self.stream.try_next.side_effect = pymongo.errors.AutoReconnect()
+        with self.assertRaises(pymongo.errors.AutoReconnect):
+            self.feed.poll()
+        self.stream.close.assert_called_once()
+        self._events({"operationType": "delete", "ns": {"coll": "users"},
+                      "documentKey": {"_id": "u1"}})
+        self.assertEqual(self.feed.poll(), [Change("users", "u1", True)])
+        self.mongo_module.watch.assert_called_with(
+            ("users", "schedules", "elements"), resume_after={"_data": "1"})
+
+    def test_restarts_when_the_change_is_gone(self):
+        """ Test that a stream that cannot be resumed is opened again """
+        self._events()
+        self.feed.poll()
+        self.feed.close()
+        self.mongo_module.watch.side_effect = \
+            pymongo.errors.OperationFailure("history lost", 286)
+        with self.assertRaises(pymongo.errors.OperationFailure):
+            self.feed.poll()
+        self.mongo_module.watch.side_effect = None
+        self._events()
+        self.feed.poll()
+        self.mongo_module.watch.assert_called_with(
+            ("users", "schedules", "elements"), resume_after=None)
+
+    def test_open_change_feed_falls_back_to_polling(self):
+        """ Test that a server without change streams is polled """
+        self.mongo_module.watch.side_effect = \
+            pymongo.errors.OperationFailure("not a replica set", 40573)
+        memory = MemoryModule()
+        feed = open_change_feed(memory, instance_id="mine",
+                                mongo_module=self.mongo_module)
+        self.assertIsInstance(feed, PollingChangeFeed)
+        self.mongo_module.ensure_updated_at_indexes.assert_called_once()
+        self.mongo_module.watch.side_effect = None
+        self.assertIsInstance(open_change_feed(
+            memory, mongo_module=self.mongo_module), ChangeStreamFeed)
+        self.assertIsInstance(open_change_feed(memory), PollingChangeFeed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+module: test_deadline
+
+Test cases for the deadline, timeout and TimeoutDecorator utils
+"""
+import asyncio
+import threading
+import time
+import unittest
+
+from src.database.memory_module import MemoryModule
+from src.database.utils import deadline, remaining_time, check_deadline, \
+    timeout, TimeExceedError, TimeoutDecorator
+
+
+class TestDeadline(unittest.TestCase):
+    """ Class to test the deadline context manager """
+
+    def test_no_deadline(self):
+        """ Test that there is no deadline outside a block """
+        self.assertIsNone(remaining_time())
+        check_deadline()
+
+    def test_remaining_time(self):
+        """ Test the time left inside a block """
+        with deadline(0.5):
+            self.assertTrue(0 < remaining_time() <= 0.5)
+        self.assertIsNone(remaining_time())
+
+    def test_nested_deadlines(self):
+        """ Test that an inner block cannot extend the outer deadline """
+        with deadline(0.1):
+            with deadline(10):
+                self.assertLessEqual(remaining_time(), 0.1)
+            with deadline(0.01):
+                self.assertLessEqual(remaining_time(), 0.01)
+            self.assertGreater(remaining_time(), 0.01)
+
+    def test_check_deadline(self):
+        """ Test that an expired deadline raises TimeExceedError """
+        with deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(TimeExceedError):
+                check_deadline()
+
+    def test_deadline_is_per_thread(self):
+        """ Test that a deadline does not leak to other threads """
+        seen = []
+        with deadline(1):
+            thread = threading.Thread(target=lambda: seen.append(
+                remaining_time()))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [None])
+
+    def test_deadline_is_per_task(self):
+        """ Test that concurrent tasks keep their own deadlines """
+        async def task(seconds):
+            with deadline(seconds):
+                await asyncio.sleep(0)
+                return remaining_time()
+
+        async def main():
+            return await asyncio.gather(task(0.5), task(10))
+
+        short, long = asyncio.run(main())
+        self.assertLessEqual(short, 0.5)
+        self.assertGreater(long, 0.5)
+
+
+class TestTimeout(unittest.TestCase):
+    """ Class to test the timeout decorator """
+
+    def test_result(self):
+        """ Test that the result is returned within the timeout """
+        self.assertEqual(timeout(1)(lambda: "ok")(), "ok")
+
+    def test_timeout(self):
+        """ Test that exceeding the timeout raises TimeExceedError """
+        with self.assertRaises(TimeExceedError):
+            timeout(0.01)(lambda: time.sleep(0.05))()
+
+    def test_timeout_sets_deadline(self):
+        """ Test that the decorated function runs inside a deadline """
+        remaining = timeout(0.5)(remaining_time)()
+        self.assertTrue(0 < remaining <= 0.5)
+
+    def test_exception(self):
+        """ Test that exceptions of the function are raised """
+        def fail():
+            raise ValueError("error")
+
+        with self.assertRaises(ValueError):
+            timeout(1)(fail)()
+
+
+class TestTimeoutDecorator(unittest.TestCase):
+    """ Class to test the TimeoutDecorator class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = TimeoutDecorator(MemoryModule(), timeout_seconds=0.5)
+
+    def test_connect_is_bounded(self):
+        """ Test that connect runs inside the timeout """
+        with deadline(0):
+            with self.assertRaises(TimeExceedError):
+                self.db_module.connect()
+        self.db_module.connect()
+
+    def test_operations(self):
+        """ Test that the operations are forwarded """
+        self.db_module.connect()
+        self.db_module.insert_data("teste", {"_id": "1", "test": "a"})
+        self.assertEqual(self.db_module.select_data("teste", {"_id": "1"}),
+                         [{"_id": "1", "test": "a"}])
+
+    def test_outer_deadline(self):
+        """ Test that a request deadline bounds the decorated calls """
+        self.db_module.connect()
+        with deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(TimeExceedError):
+                self.db_module.select_data("teste", {})
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
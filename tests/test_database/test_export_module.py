@@ -0,0 +1,93 @@
+"""
+module: test_export_module
+
+Test cases for the ExportModule class
+"""
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.database.export_module import ExportModule, ExportFormatError
+from src.database.memory_module import MemoryModule
+
+
+class TestExportModule(unittest.TestCase):
+    """ Class to test the ExportModule class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        self.db_module.insert_data("users", {"_id": "user1",
+                                             "schedules": ["schedule1"]})
+        self.db_module.insert_data("users", {"_id": "user2",
+                                             "schedules": []})
+        for number in range(5):
+            self.db_module.insert_data("elements", {
+                "_id": f"event{number}", "element_type": "event",
+                "title": f"event {number}", "description": None,
+                "start": datetime(2024, 1, number + 1, 9),
+                "end": datetime(2024, 1, number + 1, 10),
+                "schedules": ["schedule1"]})
+        self.db_module.insert_data("elements", {
+            "_id": "other", "element_type": "task", "title": "other",
+            "due_date": datetime(2024, 1, 1), "schedules": ["schedule2"]})
+        self.directory = tempfile.TemporaryDirectory()
+        self.export_module = ExportModule(self.db_module)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.directory.cleanup()
+
+    def path(self, name):
+        """ Returns a path in the temporary directory """
+        return os.path.join(self.directory.name, name)
+
+    def test_export_csv(self):
+        """ Test that the elements of the user are written as CSV rows """
+        path = self.export_module.export_data("user1", path=self.path("a.csv"),
+                                              batch_size=2)
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual([row["_id"] for row in rows],
+                         [f"event{number}" for number in range(5)])
+        self.assertEqual(rows[0]["start"], "2024-01-01T09:00:00")
+        self.assertEqual(rows[0]["schedules"], '["schedule1"]')
+        self.assertEqual(rows[0]["due_date"], "")
+
+    def test_export_jsonl(self):
+        """ Test that each element is written as a JSON line """
+        path = self.export_module.export_data("user1", "jsonl",
+                                              self.path("a.jsonl"))
+        with open(path, encoding="utf-8") as file:
+            documents = [json.loads(line) for line in file]
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(documents[4]["end"], "2024-01-05T10:00:00")
+
+    def test_export_streams_documents(self):
+        """ Test that the documents come from a cursor, not from the
+        managers """
+        with patch.object(self.db_module, "iter_data",
+                          wraps=self.db_module.iter_data) as mock_iter, \
+                patch.object(self.db_module, "select_data") as mock_select:
+            self.export_module.export_data("user1", path=self.path("a.csv"),
+                                           batch_size=3)
+            mock_iter.assert_called_once_with(
+                "elements", {"schedules": {"$in": ["schedule1"]}},
+                batch_size=3)
+            mock_select.assert_not_called()
+
+    def test_export_user_without_schedules(self):
+        """ Test that a user without schedules exports only the header """
+        path = self.export_module.export_data("user2", path=self.path("a.csv"))
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 1)
+
+    def test_invalid_format(self):
+        """ Test that an unknown format raises an error """
+        with self.assertRaises(ExportFormatError):
+            self.export_module.export_data("user1", "xlsx")
@@ -0,0 +1,355 @@
+"""
+module: test_memory_module
+
+Test cases for the MemoryModule and FileModule classes
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime, date
+
+from src.database.memory_module import MemoryModule, FileModule
+from src.database.mongo_module import ConnectionDBError, DuplicatedIDError
+
+
+class TestMemoryModule(unittest.TestCase):
+    """ Class to test the MemoryModule class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+
+    def test_connect_twice(self):
+        """ Test that connecting twice raises an error """
+        with self.assertRaises(ConnectionDBError):
+            self.db_module.connect()
+
+    def test_disconnect(self):
+        """ Test that operations fail after disconnecting """
+        self.db_module.disconnect()
+        with self.assertRaises(ConnectionDBError):
+            self.db_module.select_data("teste", {})
+        with self.assertRaises(ConnectionDBError):
+            self.db_module.disconnect()
+
+    def test_insert_and_select_data(self):
+        """ Test the insert_data and select_data methods """
+        self.db_module.insert_data("teste", {"_id": "1", "test": "test"})
+        self.db_module.insert_data("teste", {"_id": "2", "test": "other"})
+
+        self.assertEqual(self.db_module.select_data("teste", {"_id": "1"}),
+                         [{"_id": "1", "test": "test"}])
+        self.assertEqual(self.db_module.select_data("teste",
+                                                    {"test": "other"}),
+                         [{"_id": "2", "test": "other"}])
+        self.assertEqual(len(self.db_module.select_data("teste", {})), 2)
+        self.assertEqual(self.db_module.select_data("teste", {"_id": "3"}),
+                         [])
+
+    def test_insert_generates_id(self):
+        """ Test that insert_data generates an _id when it is missing """
+        self.db_module.insert_data("teste", {"test": "test"})
+        result = self.db_module.select_data("teste", {"test": "test"})
+        self.assertIn("_id", result[0])
+
+    def test_insert_duplicated_id(self):
+        """ Test that inserting an existing _id raises an error """
+        self.db_module.insert_data("teste", {"_id": "1"})
+        with self.assertRaises(DuplicatedIDError):
+            self.db_module.insert_data("teste", {"_id": "1"})
+
+    def test_select_returns_copies(self):
+        """ Test that changing a selected document does not change the db """
+        self.db_module.insert_data("teste", {"_id": "1", "items": ["a"]})
+        result = self.db_module.select_data("teste", {"_id": "1"})
+        result[0]["items"].append("b")
+        self.assertEqual(
+            self.db_module.select_data("teste", {"_id": "1"})[0]["items"],
+            ["a"])
+
+    def test_select_with_operators(self):
+        """ Test conditions with operators and list fields """
+        self.db_module.insert_data("teste", {"_id": "1", "schedules": ["a"],
+                                             "start": datetime(2023, 1, 1)})
+        self.db_module.insert_data("teste", {"_id": "2", "schedules": ["b"],
+                                             "start": datetime(2023, 2, 1)})
+
+        result = self.db_module.select_data("teste", {"schedules": "a"})
+        self.assertEqual([doc["_id"] for doc in result], ["1"])
+
+        result = self.db_module.select_data(
+            "teste", {"start": {"$gte": datetime(2023, 1, 15)}})
+        self.assertEqual([doc["_id"] for doc in result], ["2"])
+
+        result = self.db_module.select_data(
+            "teste", {"schedules": {"$in": ["a", "b"]}})
+        self.assertEqual(len(result), 2)
+
+        result = self.db_module.select_data(
+            "teste", {"$or": [{"_id": "1"}, {"_id": "2"}]})
+        self.assertEqual(len(result), 2)
+
+    def test_update_data(self):
+        """ Test the update_data method """
+        self.db_module.insert_data("teste", {"_id": "1", "test": "test"})
+        self.db_module.update_data("teste", {"_id": "1"},
+                                   {"test": "test2", "other": 1})
+        self.assertEqual(self.db_module.select_data("teste", {"_id": "1"}),
+                         [{"_id": "1", "test": "test2", "other": 1}])
+
+    def test_update_data_with_operators(self):
+        """ Test update documents with $addToSet, $pull and $unset """
+        self.db_module.insert_data("teste", {"_id": "1", "items": ["a"],
+                                             "other": 1})
+        self.db_module.update_data("teste", {"_id": "1"}, {
+            "$addToSet": {"items": {"$each": ["a", "b", "c"]}},
+            "$unset": {"other": ""}})
+        self.db_module.update_data("teste", {"_id": "1"},
+                                   {"$pull": {"items": {"$in": ["b"]}}})
+        self.assertEqual(self.db_module.select_data("teste", {"_id": "1"}),
+                         [{"_id": "1", "items": ["a", "c"]}])
+
+    def test_delete_data(self):
+        """ Test that delete_data only deletes the first match """
+        self.db_module.insert_data("teste", {"_id": "1", "test": "test"})
+        self.db_module.insert_data("teste", {"_id": "2", "test": "test"})
+        self.db_module.delete_data("teste", {"test": "test"})
+        self.assertEqual(len(self.db_module.select_data("teste", {})), 1)
+
+    def test_insert_many_and_select_many_by_ids(self):
+        """ Test the insert_many_data and select_many_by_ids methods """
+        self.db_module.insert_many_data("teste", [
+            {"_id": "1", "test": "a"},
+            {"_id": "2", "test": "b"},
+            {"_id": "3", "test": "c"}])
+        result = self.db_module.select_many_by_ids("teste", ["3", "1", "4"])
+        self.assertEqual(sorted(document["_id"] for document in result),
+                         ["1", "3"])
+        self.assertEqual(self.db_module.select_many_by_ids("teste", []), [])
+
+    def test_insert_many_duplicated_id(self):
+        """ Test that insert_many_data keeps the documents before a
+        duplicated id """
+        self.db_module.insert_data("teste", {"_id": "2"})
+        with self.assertRaises(DuplicatedIDError):
+            self.db_module.insert_many_data("teste",
+                                            [{"_id": "1"}, {"_id": "2"},
+                                             {"_id": "3"}])
+        self.assertEqual(len(self.db_module.select_data("teste", {})), 2)
+
+    def test_bulk_update(self):
+        """ Test the bulk_update method """
+        self.db_module.insert_many_data("teste", [{"_id": "1", "test": "a"},
+                                                  {"_id": "2", "test": "b"}])
+        self.db_module.bulk_update("teste", [
+            ({"_id": "1"}, {"$set": {"test": "x"}}),
+            ({"_id": "2"}, {"test": "y"})])
+        self.assertEqual(self.db_module.select_data("teste", {}),
+                         [{"_id": "1", "test": "x"},
+                          {"_id": "2", "test": "y"}])
+
+    def test_delete_many_data(self):
+        """ Test that delete_many_data deletes every match """
+        self.db_module.insert_many_data("teste", [
+            {"_id": "1", "test": "test"},
+            {"_id": "2", "test": "test"},
+            {"_id": "3", "test": "other"}])
+        self.db_module.delete_many_data("teste", {"test": "test"})
+        self.assertEqual(self.db_module.select_data("teste", {}),
+                         [{"_id": "3", "test": "other"}])
+
+    def test_iter_data(self):
+        """ Test that iter_data yields projected copies lazily """
+        for number in range(3):
+            self.db_module.insert_data("teste", {"_id": str(number),
+                                                 "test": "test",
+                                                 "other": number})
+        documents = self.db_module.iter_data("teste", {"test": "test"},
+                                             {"other": 1}, batch_size=2)
+        first = next(documents)
+        self.assertEqual(first, {"_id": "0", "other": 0})
+        first["other"] = 10
+        self.assertEqual(list(documents), [{"_id": "1", "other": 1},
+                                           {"_id": "2", "other": 2}])
+        self.assertEqual(self.db_module.select_one("teste", {"_id": "0"}),
+                         {"_id": "0", "test": "test", "other": 0})
+
+    def test_select_one(self):
+        """ Test the select_one method with and without projection """
+        self.db_module.insert_data("teste", {"_id": "1", "test": "a",
+                                             "other": 1})
+        self.assertEqual(self.db_module.select_one("teste", {"_id": "1"}),
+                         {"_id": "1", "test": "a", "other": 1})
+        self.assertEqual(self.db_module.select_one("teste", {"_id": "1"},
+                                                   {"test": 1}),
+                         {"_id": "1", "test": "a"})
+        self.assertEqual(self.db_module.select_one("teste", {"_id": "1"},
+                                                   {"test": 1, "_id": 0}),
+                         {"test": "a"})
+        self.assertEqual(self.db_module.select_one("teste", {"_id": "1"},
+                                                   {"other": 0}),
+                         {"_id": "1", "test": "a"})
+        self.assertIsNone(self.db_module.select_one("teste", {"_id": "2"}))
+
+    def test_count_data(self):
+        """ Test the count_data method """
+        self.db_module.insert_many_data("teste", [
+            {"_id": "1", "test": "test"},
+            {"_id": "2", "test": "test"},
+            {"_id": "3", "test": "other"}])
+        self.assertEqual(self.db_module.count_data("teste", {"test": "test"}),
+                         2)
+        self.assertEqual(self.db_module.count_data("teste", {}, limit=1), 1)
+        self.assertEqual(self.db_module.count_data("teste", {"_id": "4"},
+                                                   limit=1), 0)
+
+    def test_select_elements_in_range(self):
+        """ Test the select_elements_in_range method """
+        self.db_module.insert_many_data("elements", [
+            {"_id": "1", "schedules": ["a"],
+             "display_start": datetime(2024, 1, 2),
+             "display_end": datetime(2024, 1, 3)},
+            {"_id": "2", "schedules": ["a", "b"],
+             "display_start": datetime(2024, 1, 1),
+             "display_end": datetime(2024, 1, 2)},
+            {"_id": "3", "schedules": ["b"],
+             "display_start": datetime(2024, 1, 10),
+             "display_end": datetime(2024, 1, 11)},
+            {"_id": "4", "schedules": ["c"],
+             "display_start": datetime(2024, 1, 1),
+             "display_end": datetime(2024, 1, 31)}])
+        result = self.db_module.select_elements_in_range(
+            ["a", "b"], datetime(2024, 1, 1), datetime(2024, 1, 5))
+        self.assertEqual([document["_id"] for document in result],
+                         ["2", "1"])
+
+    def test_match_none(self):
+        """ Test that None matches missing fields, like in MongoDB """
+        self.db_module.insert_many_data("teste", [
+            {"_id": "1", "test": None}, {"_id": "2"},
+            {"_id": "3", "test": "a"}])
+
+        def ids(condition):
+            return sorted(document["_id"] for document in
+                          self.db_module.select_data("teste", condition))
+
+        self.assertEqual(ids({"test": None}), ["1", "2"])
+        self.assertEqual(ids({"test": {"$ne": None}}), ["3"])
+        self.assertEqual(ids({"test": {"$ne": "a"}}), ["1", "2"])
+        self.assertEqual(ids({"test": {"$in": [None, "a"]}}), ["1", "2", "3"])
+
+    def test_count_elements_by_day(self):
+        """ Test the count_elements_by_day method """
+        self.db_module.insert_many_data("elements", [
+            {"_id": "1", "schedules": ["a"], "element_type": "event",
+             "display_start": datetime(2024, 1, 2, 10),
+             "display_end": datetime(2024, 1, 2, 11, 30)},
+            {"_id": "2", "schedules": ["a", "b"], "element_type": "task",
+             "display_start": datetime(2024, 1, 2, 12),
+             "display_end": datetime(2024, 1, 2, 12)},
+            {"_id": "3", "schedules": ["b"], "element_type": "reminder",
+             "display_start": datetime(2024, 1, 3, 9),
+             "display_end": datetime(2024, 1, 3, 9)},
+            {"_id": "4", "schedules": ["a"], "element_type": "event",
+             "display_start": datetime(2023, 12, 31, 23),
+             "display_end": datetime(2024, 1, 1, 1)},
+            {"_id": "5", "schedules": ["a"], "element_type": "event",
+             "display_start": datetime(2024, 1, 4, 9),
+             "display_end": datetime(2024, 1, 4, 10),
+             "recurrence": {"frequency": "daily"}},
+            {"_id": "6", "schedules": ["c"], "element_type": "event",
+             "display_start": datetime(2024, 1, 2, 9),
+             "display_end": datetime(2024, 1, 2, 10)}])
+        counts = self.db_module.count_elements_by_day(
+            ["a", "b"], datetime(2024, 1, 1), datetime(2024, 2, 1))
+        self.assertEqual(counts, {
+            date(2024, 1, 2): {"event": 1, "task": 1, "reminder": 0,
+                               "busy_minutes": 90},
+            date(2024, 1, 3): {"event": 0, "task": 0, "reminder": 1,
+                               "busy_minutes": 0}})
+
+
+class TestFileModule(unittest.TestCase):
+    """ Class to test the FileModule class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "calendar.log")
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        self.directory.cleanup()
+
+    def test_data_survives_reconnection(self):
+        """ Test that the log is replayed on a new connection """
+        db_module = FileModule(self.path)
+        db_module.connect()
+        db_module.insert_data("teste", {"_id": "1", "test": "test",
+                                        "date": datetime(2023, 1, 1)})
+        db_module.insert_data("teste", {"_id": "2", "test": "test"})
+        db_module.update_data("teste", {"_id": "1"}, {"test": "test2"})
+        db_module.delete_data("teste", {"_id": "2"})
+        db_module.disconnect()
+
+        db_module = FileModule(self.path)
+        db_module.connect()
+        self.assertEqual(db_module.select_data("teste", {}),
+                         [{"_id": "1", "test": "test2",
+                           "date": datetime(2023, 1, 1)}])
+        db_module.disconnect()
+
+    def test_legacy_elements_backfilled_on_connect(self):
+        """ Test that the elements logged without their display interval
+        get it when the log is replayed, and are found by range queries """
+        db_module = FileModule(self.path)
+        db_module.connect()
+        db_module.insert_data("elements", {
+            "_id": "legacy", "element_type": "task", "title": "legacy",
+            "due_date": datetime(2024, 1, 5, 12), "state": "incomplete",
+            "description": "", "schedules": ["s1"]})
+        db_module.insert_data("elements", {"_id": "broken",
+                                           "element_type": "task"})
+        db_module.disconnect()
+
+        db_module = FileModule(self.path)
+        db_module.connect()
+        found = db_module.select_elements_in_range(
+            ["s1"], datetime(2024, 1, 1), datetime(2024, 2, 1))
+        self.assertEqual([element["_id"] for element in found], ["legacy"])
+        self.assertEqual(found[0]["display_start"],
+                         datetime(2024, 1, 5, 11, 50))
+        self.assertEqual(found[0]["display_end"], datetime(2024, 1, 5, 12))
+        db_module.disconnect()
+
+        # the backfill was logged, so it is not computed again
+        db_module = FileModule(self.path)
+        db_module.connect()
+        self.assertEqual(db_module.count_data(
+            "elements", {"display_start": {"$exists": False}}), 1)
+        db_module.disconnect()
+
+    def test_compact(self):
+        """ Test that compact keeps only the current documents """
+        db_module = FileModule(self.path)
+        db_module.connect()
+        for index in range(5):
+            db_module.update_data("teste", {"_id": "1"}, {"index": index})
+        db_module.insert_data("teste", {"_id": "1", "index": 0})
+        for index in range(5):
+            db_module.update_data("teste", {"_id": "1"}, {"index": index})
+        db_module.compact()
+        db_module.disconnect()
+
+        with open(self.path, encoding="utf-8") as log_file:
+            self.assertEqual(len(log_file.readlines()), 1)
+
+        db_module.connect()
+        self.assertEqual(db_module.select_data("teste", {"_id": "1"}),
+                         [{"_id": "1", "index": 4}])
+        db_module.disconnect()
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
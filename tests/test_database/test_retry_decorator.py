@@ -0,0 +1,202 @@
+"""
+module: test_retry_decorator
+
+Test cases for the RetryDecorator and CircuitBreaker classes
+"""
+import unittest
+import unittest.mock
+
+import pymongo.errors
+
+from src.database.memory_module import MemoryModule
+from src.database.mongo_module import DuplicatedIDError
+from src.database.retry_decorator import RetryDecorator, CircuitBreaker, \
+    CircuitOpenError
+from src.database.utils import TimeExceedError, deadline
+
+
+class FakeClock:
+    """ Clock moved by hand """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """ Class to test the CircuitBreaker class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                                      clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        """ Test that consecutive failures open the breaker """
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.trips, 1)
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_success_resets_failures(self):
+        """ Test that only consecutive failures count """
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial(self):
+        """ Test that a single trial call is let through after the reset
+        timeout """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_opens_again(self):
+        """ Test that a failed trial call opens the breaker again """
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.trips, 2)
+
+
+class TestRetryDecorator(unittest.TestCase):
+    """ Class to test the RetryDecorator class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.decorated = unittest.mock.MagicMock()
+        self.sleep = unittest.mock.MagicMock()
+        self.db_module = RetryDecorator(
+            self.decorated, max_attempts=3,
+            breaker=CircuitBreaker(failure_threshold=5), sleep=self.sleep)
+
+    def test_retries_transient_errors(self):
+        """ Test that a read is retried until it succeeds """
+        self.decorated.select_data.side_effect = [
+            pymongo.errors.AutoReconnect("reconnecting"),
+            TimeExceedError("Timeout"),
+            [{"_id": "1"}]]
+        self.assertEqual(self.db_module.select_data("teste", {}),
+                         [{"_id": "1"}])
+        self.assertEqual(self.decorated.select_data.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        metrics = self.db_module.metrics()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["retries_by_operation"], {"select_data": 2})
+        self.assertEqual(metrics["state"], CircuitBreaker.CLOSED)
+        self.assertEqual(metrics["consecutive_failures"], 0)
+
+    def test_backoff_is_capped(self):
+        """ Test that the waits are jittered below the doubling limit """
+        self.db_module = RetryDecorator(self.decorated, max_attempts=5,
+                                        base_delay=0.1, max_delay=0.3,
+                                        sleep=self.sleep)
+        self.decorated.select_one.side_effect = \
+            pymongo.errors.AutoReconnect("down")
+        with self.assertRaises(pymongo.errors.AutoReconnect):
+            self.db_module.select_one("teste", {})
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        for delay, limit in zip(delays, [0.1, 0.2, 0.3, 0.3]):
+            self.assertTrue(0 <= delay <= limit)
+
+    def test_gives_up_after_max_attempts(self):
+        """ Test that the last error is raised after max_attempts """
+        self.decorated.count_data.side_effect = ConnectionError("down")
+        with self.assertRaises(ConnectionError):
+            self.db_module.count_data("teste", {})
+        self.assertEqual(self.decorated.count_data.call_count, 3)
+        self.assertEqual(self.db_module.metrics()["failures"], 3)
+
+    def test_does_not_retry_inserts(self):
+        """ Test that inserts and non $set updates are not retried """
+        self.decorated.insert_data.side_effect = ConnectionError("down")
+        self.decorated.update_data.side_effect = ConnectionError("down")
+        with self.assertRaises(ConnectionError):
+            self.db_module.insert_data("teste", {"_id": "1"})
+        with self.assertRaises(ConnectionError):
+            self.db_module.update_data("teste", {"_id": "1"},
+                                       {"$addToSet": {"items": "a"}})
+        self.assertEqual(self.decorated.insert_data.call_count, 1)
+        self.assertEqual(self.decorated.update_data.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_retries_set_updates(self):
+        """ Test that updates that only set fields are retried """
+        self.decorated.update_data.side_effect = [ConnectionError("down"),
+                                                  None]
+        self.db_module.update_data("teste", {"_id": "1"}, {"test": "a"})
+        self.decorated.bulk_update.side_effect = [ConnectionError("down"),
+                                                  None]
+        self.db_module.bulk_update("teste", [({"_id": "1"},
+                                              {"$set": {"test": "a"}})])
+        self.assertEqual(self.db_module.metrics()["retries_by_operation"],
+                         {"update_data": 1, "bulk_update": 1})
+
+    def test_does_not_retry_other_errors(self):
+        """ Test that errors answered by the database are raised at once and
+        do not count as failures """
+        self.decorated.select_one.side_effect = DuplicatedIDError("id")
+        with self.assertRaises(DuplicatedIDError):
+            self.db_module.select_one("teste", {})
+        self.assertEqual(self.decorated.select_one.call_count, 1)
+        self.assertEqual(self.db_module.metrics()["consecutive_failures"], 0)
+
+    def test_no_retry_past_deadline(self):
+        """ Test that a retry that would wait past the deadline is not
+        made """
+        self.decorated.select_data.side_effect = ConnectionError("down")
+        with deadline(0), self.assertRaises(ConnectionError):
+            self.db_module.select_data("teste", {})
+        self.assertEqual(self.decorated.select_data.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_fails_fast_when_open(self):
+        """ Test that the calls fail at once once the breaker is open """
+        self.db_module = RetryDecorator(
+            self.decorated, max_attempts=3,
+            breaker=CircuitBreaker(failure_threshold=2), sleep=self.sleep)
+        self.decorated.select_data.side_effect = ConnectionError("down")
+        with self.assertRaises(CircuitOpenError):
+            self.db_module.select_data("teste", {})
+        self.assertEqual(self.decorated.select_data.call_count, 2)
+        with self.assertRaises(CircuitOpenError):
+            self.db_module.select_one("teste", {})
+        self.decorated.select_one.assert_not_called()
+        metrics = self.db_module.metrics()
+        self.assertEqual(metrics["state"], CircuitBreaker.OPEN)
+        self.assertEqual(metrics["trips"], 1)
+        self.assertEqual(metrics["rejected"], 2)
+
+    def test_with_memory_module(self):
+        """ Test that the operations are forwarded to the decorated module """
+        db_module = RetryDecorator(MemoryModule())
+        db_module.connect()
+        db_module.insert_data("teste", {"_id": "1", "test": "a"})
+        db_module.update_data("teste", {"_id": "1"}, {"test": "b"})
+        self.assertEqual(db_module.select_one("teste", {"_id": "1"}),
+                         {"_id": "1", "test": "b"})
+        self.assertEqual(list(db_module.iter_data("teste", {})),
+                         [{"_id": "1", "test": "b"}])
+        self.assertEqual(str(db_module), "@retry(" + str(MemoryModule()) +
+                         ")")
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
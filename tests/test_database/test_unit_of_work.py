@@ -0,0 +1,167 @@
+"""
+module: test_unit_of_work
+
+Test cases for the UnitOfWork class
+"""
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from src.calendar_elements.element_management import ElementManagement
+from src.database.memory_module import MemoryModule
+from src.database.unit_of_work import UnitOfWork
+from src.observer.change_tracker import ChangeTracker
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+class FakeSubject(ChangeTracker):
+    """ Minimal tracked object with an id and a to_dict method """
+    def __init__(self, subject_id, value):
+        super().__init__()
+        self.id = subject_id
+        self.set_value(value)
+
+    def set_value(self, value):
+        """ Sets the value """
+        self.value = value
+        self._mark_changed("value")
+
+    def to_dict(self):
+        """ Dictionary representation """
+        return {"_id": self.id, "value": self.value}
+
+
+class TestUnitOfWork(unittest.TestCase):
+    """ Class to test the UnitOfWork class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MagicMock()
+        self.unit_of_work = UnitOfWork(self.db_module)
+
+    def test_register_coalesces_changes(self):
+        """ Test that several changes of an object become one write """
+        subject = FakeSubject("1", "a")
+        self.unit_of_work.register("teste", subject)
+        subject.set_value("b")
+        self.unit_of_work.register("teste", subject)
+        self.assertEqual(self.unit_of_work.pending, 1)
+
+        self.assertEqual(self.unit_of_work.flush(), 1)
+        self.db_module.bulk_update.assert_called_once_with(
+            "teste", [({"_id": "1"}, {"$set": {"value": "b"}})])
+        self.assertEqual(self.unit_of_work.pending, 0)
+        self.assertFalse(subject.has_changes())
+
+    def test_flush_skips_unchanged_objects(self):
+        """ Test that objects without changes are not written """
+        subject = FakeSubject("1", "a")
+        subject.clear_changes()
+        self.unit_of_work.register("teste", subject)
+        self.assertEqual(self.unit_of_work.flush(), 0)
+        self.db_module.bulk_update.assert_not_called()
+
+    def test_flush_one_bulk_update_per_collection(self):
+        """ Test that flush sends a single bulk_update per collection """
+        self.unit_of_work.register("first", FakeSubject("1", "a"))
+        self.unit_of_work.register("first", FakeSubject("2", "a"))
+        self.unit_of_work.register("second", FakeSubject("3", "a"))
+        self.unit_of_work.flush()
+        self.assertEqual(self.db_module.bulk_update.call_count, 2)
+
+    def test_discard(self):
+        """ Test that discarded objects are not written """
+        self.unit_of_work.register("teste", FakeSubject("1", "a"))
+        self.assertTrue(self.unit_of_work.is_pending("teste", "1"))
+        self.unit_of_work.discard("teste", "1")
+        self.assertFalse(self.unit_of_work.is_pending("teste", "1"))
+        self.unit_of_work.flush()
+        self.db_module.bulk_update.assert_not_called()
+
+    def test_transaction_boundary(self):
+        """ Test that only the outermost with block flushes """
+        with self.unit_of_work:
+            with self.unit_of_work:
+                self.unit_of_work.register("teste", FakeSubject("1", "a"))
+            self.db_module.bulk_update.assert_not_called()
+        self.db_module.bulk_update.assert_called_once()
+
+    def test_transaction_error_keeps_pending(self):
+        """ Test that a failed transaction does not flush """
+        with self.assertRaises(ValueError):
+            with self.unit_of_work:
+                self.unit_of_work.register("teste", FakeSubject("1", "a"))
+                raise ValueError()
+        self.db_module.bulk_update.assert_not_called()
+        self.assertEqual(self.unit_of_work.pending, 1)
+
+    def test_failed_flush_keeps_pending(self):
+        """ Test that objects stay dirty when the bulk write fails """
+        self.db_module.bulk_update.side_effect = ConnectionError()
+        subject = FakeSubject("1", "a")
+        self.unit_of_work.register("teste", subject)
+        with self.assertRaises(ConnectionError):
+            self.unit_of_work.flush()
+        self.assertTrue(self.unit_of_work.is_pending("teste", "1"))
+        self.assertEqual(subject.get_changes(), {"$set": {"value": "a"}})
+
+    def test_timer(self):
+        """ Test the periodic flush """
+        self.unit_of_work.start(0.01)
+        self.unit_of_work.register("teste", FakeSubject("1", "a"))
+        deadline = time.time() + 2
+        while self.unit_of_work.pending and time.time() < deadline:
+            time.sleep(0.01)
+        self.unit_of_work.stop()
+        self.db_module.bulk_update.assert_called_once()
+
+
+class TestUnitOfWorkManagers(unittest.TestCase):
+    """ Class to test the UnitOfWork with the managers """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        self.unit_of_work = UnitOfWork(self.db_module)
+        for manager in [ScheduleManagement.get_instance(self.db_module),
+                        ElementManagement.get_instance(self.db_module),
+                        UserManagement.get_instance(self.db_module)]:
+            manager.unit_of_work = self.unit_of_work
+        self.db_module.insert_data("schedules", {
+            "_id": "schedule", "title": "title", "description": None,
+            "permissions": {}, "elements": []})
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def test_element_changes_are_written_on_flush(self):
+        """ Test that element setters only reach the database on flush """
+        element = ElementManagement.get_instance().create_element(
+            "event", "element", "title", ["schedule"],
+            start=datetime(2023, 1, 1, 10), end=datetime(2023, 1, 1, 11),
+            description=None)
+
+        element.set_title("new title")
+        element.set_description("new description")
+        stored = self.db_module.select_data("elements", {"_id": "element"})
+        self.assertEqual(stored[0]["title"], "title")
+
+        self.unit_of_work.flush()
+        stored = self.db_module.select_data("elements", {"_id": "element"})
+        self.assertEqual(stored[0]["title"], "new title")
+        self.assertEqual(stored[0]["description"], "new description")
+        stored = self.db_module.select_data("schedules", {"_id": "schedule"})
+        self.assertEqual(stored[0]["elements"], ["element"])
+
+
+if __name__ == "__main__": # pragma: no cover
+    unittest.main() # pragma: no cover
@@ -0,0 +1,116 @@
+"""
+module: test_updated_at_decorator
+
+Test cases for the UpdatedAtDecorator class
+"""
+import unittest
+
+from src.database.memory_module import MemoryModule
+from src.database.updated_at_decorator import UpdatedAtDecorator, \
+    DELETIONS_COLLECTION
+
+
+class FakeClock:
+    """ Clock moved by hand """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestUpdatedAtDecorator(unittest.TestCase):
+    """ Class to test the UpdatedAtDecorator class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.memory = MemoryModule()
+        self.memory.connect()
+        self.clock = FakeClock()
+        self.db_module = UpdatedAtDecorator(self.memory, instance_id="a",
+                                            clock=self.clock)
+
+    def _stored(self, collection_name, document_id):
+        """ The stored document, with its stamps """
+        return self.memory.select_one(collection_name, {"_id": document_id})
+
+    def test_insert_is_stamped(self):
+        """ Test that inserted documents are stamped """
+        self.db_module.insert_data("users", {"_id": "u1", "username": "x"})
+        self.db_module.insert_many_data("elements", [{"_id": "e1"},
+                                                     {"_id": "e2"}])
+        self.assertEqual(self._stored("users", "u1"), {
+            "_id": "u1", "username": "x", "updated_at": 100.0,
+            "updated_by": "a"})
+        self.assertEqual(self._stored("elements", "e2")["updated_at"], 100.0)
+
+    def test_update_is_stamped(self):
+        """ Test that updates stamp the document, with fields or operators """
+        self.db_module.insert_data("schedules", {"_id": "s1", "elements": []})
+        self.clock.now = 110.0
+        self.db_module.update_data("schedules", {"_id": "s1"},
+                                   {"title": "new"})
+        self.assertEqual(self._stored("schedules", "s1")["updated_at"], 110.0)
+        self.clock.now = 120.0
+        self.db_module.update_data("schedules", {"_id": "s1"},
+                                   {"$addToSet": {"elements": "e1"}})
+        self.clock.now = 130.0
+        self.db_module.bulk_update("schedules", [({"_id": "s1"},
+                                                  {"title": "bulk"})])
+        stored = self._stored("schedules", "s1")
+        self.assertEqual(stored["elements"], ["e1"])
+        self.assertEqual(stored["title"], "bulk")
+        self.assertEqual(stored["updated_at"], 130.0)
+
+    def test_reads_are_not_stamped(self):
+        """ Test that the stamps are removed from the documents read """
+        self.db_module.insert_data("users", {"_id": "u1", "username": "x"})
+        expected = {"_id": "u1", "username": "x"}
+        self.assertEqual(self.db_module.select_one("users", {"_id": "u1"}),
+                         expected)
+        self.assertEqual(self.db_module.select_data("users", {}), [expected])
+        self.assertEqual(self.db_module.select_many_by_ids("users", ["u1"]),
+                         [expected])
+        self.assertEqual(list(self.db_module.iter_data("users", {})),
+                         [expected])
+
+    def test_deletes_are_recorded(self):
+        """ Test that deleted documents are recorded with a stamp """
+        self.db_module.insert_many_data("elements", [
+            {"_id": "e1", "kind": "a"}, {"_id": "e2", "kind": "b"},
+            {"_id": "e3", "kind": "b"}])
+        self.db_module.delete_data("elements", {"_id": "e1"})
+        self.db_module.delete_many_data("elements", {"kind": "b"})
+        self.db_module.delete_data("elements", {"_id": "missing"})
+        deletions = self.memory.select_data(DELETIONS_COLLECTION, {})
+        self.assertEqual(sorted(deletion["document_id"]
+                                for deletion in deletions),
+                         ["e1", "e2", "e3"])
+        self.assertTrue(all(deletion["collection"] == "elements" and
+                            deletion["updated_by"] == "a"
+                            for deletion in deletions))
+        self.assertEqual(self.memory.count_data("elements", {}), 0)
+
+    def test_other_collections_are_not_stamped(self):
+        """ Test that collections not watched are written as they are """
+        self.db_module.insert_data("other", {"_id": "1"})
+        self.db_module.update_data("other", {"_id": "1"}, {"x": 1})
+        self.db_module.delete_data("other", {"_id": "1"})
+        self.assertEqual(self.memory.count_data(DELETIONS_COLLECTION, {}), 0)
+
+    def test_purge_deletions(self):
+        """ Test that old deletion records are purged """
+        self.db_module.insert_many_data("users", [{"_id": "u1"},
+                                                  {"_id": "u2"}])
+        self.db_module.delete_data("users", {"_id": "u1"})
+        self.clock.now = 200.0
+        self.db_module.delete_data("users", {"_id": "u2"})
+        self.db_module.purge_deletions(50)
+        self.assertEqual([deletion["document_id"] for deletion in
+                          self.memory.select_data(DELETIONS_COLLECTION, {})],
+                         ["u2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Test cases for the DailyAggregates class
+"""
+import threading
+import unittest
+import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+
+from src.calendar_elements.daily_aggregates import DailyAggregates, \
+    month_window
+from src.calendar_elements.element_management import ElementManagement
+from src.calendar_elements.recurrence import RecurrenceRule
+from src.database.memory_module import MemoryModule
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+class TestDailyAggregates(unittest.TestCase):
+    """
+    Test cases for the DailyAggregates class
+    """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        self.schedule_management = ScheduleManagement.get_instance(
+            self.db_module)
+        UserManagement.get_instance(self.db_module)
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        for schedule_id in ("s1", "s2"):
+            self.db_module.insert_data("schedules", {
+                "_id": schedule_id, "title": schedule_id,
+                "description": None, "permissions": {}, "elements": []})
+        self._event("meeting", ["s1", "s2"], datetime(2024, 1, 5, 10),
+                    datetime(2024, 1, 5, 11))
+        self.element_management.create_element(
+            "task", "task", "task", ["s1"], due_date=datetime(2024, 1, 5, 18),
+            description=None, state="todo")
+        self._event("weekly", ["s2"], datetime(2024, 1, 1, 8),
+                    datetime(2024, 1, 1, 8, 30),
+                    recurrence=RecurrenceRule("weekly"))
+
+        # drop the elements from memory, as if they were never loaded
+        ElementManagement._instance = None
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        self.aggregates = DailyAggregates(self.db_module,
+                                          self.element_management)
+        self.element_management.subscribe(self.aggregates.element_changed)
+        self.schedule_management.subscribe(self.aggregates.schedule_changed)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def _event(self, title, schedules, start, end, **kwargs):
+        return self.element_management.create_element(
+            "event", title, title, schedules, start=start, end=end,
+            description=None, **kwargs)
+
+    def test_month_window(self):
+        """ Test the window of a month """
+        self.assertEqual(month_window(2024, 12), (datetime(2024, 12, 1),
+                                                  datetime(2025, 1, 1)))
+
+    def test_month(self):
+        """ Test the counts of a month, with an element in two schedules
+        counted once and the occurrences of a recurring element """
+        counts = self.aggregates.month(["s1", "s2"], 2024, 1)
+        self.assertEqual(counts[date(2024, 1, 5)], {
+            "event": 1, "task": 1, "reminder": 0, "busy_minutes": 60})
+        for day in (1, 8, 15, 22, 29):
+            self.assertEqual(counts[date(2024, 1, day)], {
+                "event": 1, "task": 0, "reminder": 0, "busy_minutes": 30})
+        self.assertEqual(len(counts), 6)
+
+    def test_month_does_not_load_elements(self):
+        """ Test that only the recurring elements are loaded """
+        self.aggregates.month(["s1", "s2"], 2024, 1)
+        self.assertEqual(list(self.element_management.elements), ["weekly"])
+
+    def test_month_is_cached(self):
+        """ Test that a month is computed once """
+        with unittest.mock.patch.object(
+                self.db_module, "count_elements_by_day",
+                wraps=self.db_module.count_elements_by_day) as count:
+            self.aggregates.month(["s1"], 2024, 1)
+            self.aggregates.month(["s1"], 2024, 1)
+            count.assert_called_once()
+
+    def test_element_changed_while_month_is_counted(self):
+        """ Test that a change published while a month is counted does not
+        wait for the count, and the month is counted again after it """
+        started = threading.Event()
+        release = threading.Event()
+        count_elements_by_day = self.db_module.count_elements_by_day
+
+        def slow_count(*args):
+            started.set()
+            release.wait(5)
+            return count_elements_by_day(*args)
+
+        with unittest.mock.patch.object(
+                self.db_module, "count_elements_by_day",
+                side_effect=slow_count) as count, \
+                ThreadPoolExecutor(max_workers=1) as loader:
+            month = loader.submit(self.aggregates.month, ["s1"], 2024, 1)
+            self.assertTrue(started.wait(5))
+            self._event("lunch", ["s1"], datetime(2024, 1, 9, 12),
+                        datetime(2024, 1, 9, 13))
+            self.assertFalse(month.done())
+            release.set()
+            counts = month.result(timeout=5)
+
+        self.assertEqual(count.call_count, 2)
+        self.assertEqual(counts[date(2024, 1, 9)]["event"], 1)
+        self.assertEqual(self.aggregates.month(["s1"], 2024, 1), counts)
+
+    def test_created_and_deleted_element(self):
+        """ Test that created and deleted elements patch the counts """
+        self.aggregates.month(["s1"], 2024, 1)
+        with unittest.mock.patch.object(
+                self.db_module, "count_elements_by_day") as count:
+            self._event("new", ["s1"], datetime(2024, 1, 5, 14),
+                        datetime(2024, 1, 5, 16))
+            self.assertEqual(self.aggregates.month(["s1"], 2024, 1)[
+                date(2024, 1, 5)]["busy_minutes"], 180)
+            self.element_management.delete_element("new")
+            self.element_management.delete_element("task")
+            self.assertEqual(self.aggregates.month(["s1"], 2024, 1), {
+                date(2024, 1, 5): {"event": 1, "task": 0, "reminder": 0,
+                                   "busy_minutes": 60}})
+            count.assert_not_called()
+
+    def test_moved_element(self):
+        """ Test that a moved element moves its counts """
+        new = self._event("new", ["s1"], datetime(2024, 1, 10, 9),
+                          datetime(2024, 1, 10, 10))
+        counts = self.aggregates.month(["s1"], 2024, 1)
+        self.assertIn(date(2024, 1, 10), counts)
+        new.set_interval(datetime(2024, 1, 12, 9), datetime(2024, 1, 12, 10))
+        counts = self.aggregates.month(["s1"], 2024, 1)
+        self.assertNotIn(date(2024, 1, 10), counts)
+        self.assertEqual(counts[date(2024, 1, 12)]["event"], 1)
+
+    def test_changed_element_counted_by_the_database(self):
+        """ Test that an element whose old day is not known is counted
+        again """
+        self.aggregates.month(["s1"], 2024, 1)
+        meeting = self.element_management.get_element("meeting")
+        meeting.set_interval(datetime(2024, 1, 20, 10),
+                             datetime(2024, 1, 20, 11))
+        counts = self.aggregates.month(["s1"], 2024, 1)
+        self.assertEqual(counts[date(2024, 1, 20)]["event"], 1)
+        self.assertEqual(counts[date(2024, 1, 5)]["event"], 0)
+
+    def test_refreshed_element_is_counted_again(self):
+        """ Test that an element changed by another client makes its
+        schedules be counted again """
+        self.aggregates.month(["s1"], 2024, 1)
+        meeting = self.element_management.get_element("meeting")
+        with unittest.mock.patch.object(
+                self.db_module, "count_elements_by_day",
+                wraps=self.db_module.count_elements_by_day) as count:
+            self.aggregates.element_changed(ElementManagement.REFRESHED,
+                                            meeting)
+            self.aggregates.month(["s1"], 2024, 1)
+            count.assert_called_once()
+
+    def test_deleted_schedule(self):
+        """ Test that the counts of a deleted schedule are dropped """
+        self.aggregates.month(["s2"], 2024, 1)
+        self.aggregates.month(["s1"], 2024, 1)
+        self.aggregates.schedule_changed(ScheduleManagement.DELETED,
+                                         unittest.mock.Mock(id="s2"))
+        self.assertEqual([key[0] for key in self.aggregates._months],
+                         [frozenset(["s1"])])
+
+
+if __name__ == '__main__': # pragma: no cover
+    unittest.main() # pragma: no cover
@@ -253,6 +253,8 @@ class TestEventElement(unittest.TestCase):
             "schedules": self.schedules,
             "start": self.start,
             "end": self.end,
+            "display_start": self.start,
+            "display_end": self.end,
         }
         self.assertDictEqual(self.event.to_dict(), expected_dict)
 
@@ -269,6 +271,7 @@ class TestEventElement(unittest.TestCase):
             ["schedule1"],
             "description1",
         )
+        ElementManagement._instance = None
         element_management = ElementManagement.get_instance(database_module=MagicMock())
         element_management.update_element = MagicMock()
         element.attach(element_management)
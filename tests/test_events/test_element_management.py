@@ -52,28 +52,69 @@ class TestElementManagement(unittest.TestCase):
         Check that element_exists returns True if the element exists in the 
         database
         """
-        self.db_module.select_data = MagicMock(return_value={"_id": "id",
-                                                             "title": "title",
-                                                             "schedules": ["schedule1", "schedule2"],
-                                                             "element_type": "event",
-                                                             "start": "start",
-                                                             "end": "end",
-                                                             "description": "description"})
+        self.db_module.count_data = MagicMock(return_value=1)
         result = self.element_management.element_exists("id")
         self.assertTrue(result)
-        self.db_module.select_data.assert_called_with(
-            "elements", {"_id": "id"})
+        self.db_module.count_data.assert_called_with(
+            "elements", {"_id": "id"}, limit=1)
+        self.db_module.select_data.assert_not_called()
 
     def test_element_does_not_exist(self):
         """ 
         Check that element_exists returns False if the element does not 
         exist in the database 
         """
-        self.db_module.select_data = MagicMock(return_value=None)
+        self.db_module.count_data = MagicMock(return_value=0)
         result = self.element_management.element_exists("id")
         self.assertFalse(result)
-        self.db_module.select_data.assert_called_with(
+        self.db_module.count_data.assert_called_with(
+            "elements", {"_id": "id"}, limit=1)
+
+    def test_missing_element_is_negative_cached(self):
+        """
+        Check that a missing element is only looked up once, until it is
+        created
+        """
+        self.db_module.select_one = MagicMock(return_value=None)
+        self.assertIsNone(self.element_management.find_element("id"))
+        self.assertFalse(self.element_management.element_exists("id"))
+        with self.assertRaises(ElementDoesNotExistError):
+            self.element_management.get_element("id")
+        self.db_module.select_one.assert_called_once_with(
             "elements", {"_id": "id"})
+        self.db_module.count_data.assert_not_called()
+
+        self.element_management.negative_cache.discard("id")
+        self.db_module.count_data = MagicMock(return_value=1)
+        self.assertTrue(self.element_management.element_exists("id"))
+
+    def test_find_missing_elements(self):
+        """
+        Check that find_missing_elements queries the elements that are not
+        loaded at once and returns the ones that do not exist
+        """
+        self.element_management.elements = {"loaded": MagicMock(spec=Element)}
+        self.db_module.select_many_by_ids = MagicMock(
+            return_value=[{"_id": "id1"}])
+        result = self.element_management.find_missing_elements(
+            ["loaded", "id1", "id2", "id1"])
+        self.assertEqual(result, ["id2"])
+        self.db_module.select_many_by_ids.assert_called_once_with(
+            "elements", ["id1", "id2"])
+
+    def test_elements_cache_is_bounded(self):
+        """
+        Check that the least recently used elements are dropped, and stay
+        observed by the manager
+        """
+        element_management = ElementManagement(self.db_module, cache_size=1)
+        first = MagicMock(spec=Element)
+        second = MagicMock(spec=Element)
+        element_management.elements["id1"] = first
+        element_management.elements["id2"] = second
+        self.assertNotIn("id1", element_management.elements)
+        first.detach.assert_not_called()
+        self.assertEqual(element_management.elements.stats()["evictions"], 1)
 
     def test_get_element_id_exists_on_dict(self):
         """ Check that get_element returns the element if it exists in the 
@@ -104,15 +145,16 @@ class TestElementManagement(unittest.TestCase):
     def test_get_element_id_exists_in_database(self):
         """ Check that get_element returns the element if it exists in the 
         database """
-        self.element_management.db_module.select_data = MagicMock(return_value=[{"_id": "id",
-                                                                                 "title": "title",
-                                                                                 "schedules": ["schedule1", "schedule2"],
-                                                                                 "element_type": "event",
-                                                                                 "start": datetime(2021, 1, 1),
-                                                                                 "end": datetime(2021, 1, 2),
-                                                                                 "description": "description"}])
-        self.element_management.element_exists = MagicMock(return_value=True)
+        self.element_management.db_module.select_one = MagicMock(return_value={"_id": "id",
+                                                                               "title": "title",
+                                                                               "schedules": ["schedule1", "schedule2"],
+                                                                               "element_type": "event",
+                                                                               "start": datetime(2021, 1, 1),
+                                                                               "end": datetime(2021, 1, 2),
+                                                                               "description": "description"})
         result = self.element_management.get_element("id")
+        self.element_management.db_module.select_one.assert_called_once_with(
+            "elements", {"_id": "id"})
         self.assertEqual(result.title, "title")
         self.assertEqual(result.schedules, ["schedule1", "schedule2"])
         self.assertEqual(result.element_type, "event")
@@ -124,7 +166,7 @@ class TestElementManagement(unittest.TestCase):
         """ Check that get_element raises ElementDoesNotExistError if the element 
         does not exist in the database """
         element = 'element'
-        self.element_management.element_exists = MagicMock(return_value=False)
+        self.element_management.db_module.select_one = MagicMock(return_value=None)
         with self.assertRaises(ElementDoesNotExistError):
             self.element_management.get_element(element)
 
@@ -132,10 +174,23 @@ class TestElementManagement(unittest.TestCase):
         """ Check that update_element updates the element if it exists in the 
         database """
         element = Mock()
+        element.get_changes.return_value = {"$set": {"title": "title"}}
+        self.element_management.elements = {"id": element}
+        self.element_management.element_exists = MagicMock(return_value=True)
+        self.element_management.update_element("id")
+        element.get_changes.assert_called()
+        self.db_module.update_data.assert_called_once_with(
+            "elements", {"_id": "id"}, {"$set": {"title": "title"}})
+        element.clear_changes.assert_called_once()
+
+    def test_update_element_without_changes(self):
+        """ Check that update_element does not write an unchanged element """
+        element = Mock()
+        element.get_changes.return_value = {}
         self.element_management.elements = {"id": element}
         self.element_management.element_exists = MagicMock(return_value=True)
         self.element_management.update_element("id")
-        element.to_dict.assert_called()
+        self.db_module.update_data.assert_not_called()
 
     def test_update_element_id_does_not_exist(self):
         """ Check that update_element raises ElementDoesNotExistError if the 
@@ -151,30 +206,30 @@ class TestElementManagement(unittest.TestCase):
         element_id = "id"
         self.element_management.db_module.delete_data = MagicMock()
 
-        def mock_select_data(collection, query: dict):
+        def mock_select_one(collection, query: dict, projection=None):
             if collection == "elements" and query == {"_id": "id"}:
-                return [{"_id": "id",
+                return {"_id": "id",
                         "title": "title",
                          "schedules": ["schedule1", "schedule2"],
                          "element_type": "event",
                          "start": datetime(2021, 1, 1),
                          "end": datetime(2021, 1, 2),
-                         "description": "description"}]
+                         "description": "description"}
             if collection == "schedules" and query == {"_id": "schedule1"}:
-                return [{"_id": "schedule1",
+                return {"_id": "schedule1",
                         "title": "title1",
                          "description": "description",
                          "permissions": {"user1": 'owner', "user2": "editor"},
-                         "elements": ["id", "element2"]}]
+                         "elements": ["id", "element2"]}
             if collection == "schedules" and query == {"_id": "schedule2"}:
-                return [{"_id": "schedule2",
+                return {"_id": "schedule2",
                         "title": "title2",
                          "description": "description",
                          "permissions": {"user1": 'owner', "user2": "editor"},
-                         "elements": ["id"]}]
+                         "elements": ["id"]}
 
-        self.element_management.db_module.select_data = MagicMock(
-            side_effect=mock_select_data)
+        self.element_management.db_module.select_one = MagicMock(
+            side_effect=mock_select_one)
         self.element_management.delete_element(element_id)
         self.element_management.db_module.delete_data.assert_called_once_with("elements",
                                                                              {"_id": "id"})
@@ -192,29 +247,29 @@ class TestElementManagement(unittest.TestCase):
         in the database """
         self.element_management.db_module.delete_data = MagicMock()
 
-        def mock_select_data(collection, query):
+        def mock_select_one(collection, query, projection=None):
             if collection == "elements" and query == {"_id": "id"}:
-                return [{"_id": "id",
+                return {"_id": "id",
                         "title": "title",
                          "schedules": ["schedule1", "schedule2"],
                          "element_type": "event",
                          "start": datetime(2021, 1, 1),
                          "end": datetime(2021, 1, 2),
-                         "description": "description"}]
+                         "description": "description"}
             if collection == "schedules" and query == {"_id": "schedule1"}:
-                return [{"_id": "schedule1",
+                return {"_id": "schedule1",
                         "title": "title1",
                          "description": "description",
                          "permissions": {"user1": 'owner', "user2": "editor"},
-                         "elements": ["id", "element2"]}]
+                         "elements": ["id", "element2"]}
             if collection == "schedules" and query == {"_id": "schedule2"}:
-                return [{"_id": "schedule2",
+                return {"_id": "schedule2",
                         "title": "title2",
                          "description": "description",
                          "permissions": {"user1": 'owner', "user2": "editor"},
-                         "elements": ["id"]}]
-        self.element_management.db_module.select_data = MagicMock(
-            side_effect=mock_select_data)
+                         "elements": ["id"]}
+        self.element_management.db_module.select_one = MagicMock(
+            side_effect=mock_select_one)
         self.element_management.db_module.insert_data = MagicMock()
         element_id = "id"
         title = "title"
@@ -1,7 +1,7 @@
 """Module for testing the ReminderElement class."""
 
 from unittest.mock import MagicMock, PropertyMock
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 import unittest
 
@@ -232,6 +232,8 @@ class TestReminderElement(unittest.TestCase):
             "title": self.title,
             "description": self.description,
             "reminder_date": self.reminder_date,
+            "display_start": self.reminder_date - timedelta(minutes=10),
+            "display_end": self.reminder_date,
             "schedules": self.schedules,
             "element_type": self.element_type
         }
@@ -244,6 +246,7 @@ class TestReminderElement(unittest.TestCase):
         """
         element = ReminderElement("element1", "title1", datetime(
             2021, 1, 1), ["schedule1"], "description1")
+        ElementManagement._instance = None
         element_management = ElementManagement.get_instance(
             database_module=MagicMock())
         element_management.update_element = MagicMock()
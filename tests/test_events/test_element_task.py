@@ -2,7 +2,7 @@
 
 import unittest
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, PropertyMock
 
 from src.user.user_model import User
@@ -255,6 +255,8 @@ class TestTaskElement(unittest.TestCase):
             "title": self.title,
             "description": self.description,
             "due_date": self.due_date,
+            "display_start": self.due_date - timedelta(minutes=10),
+            "display_end": self.due_date,
             "state": self.state,
             "schedules": self.schedules,
             "element_type": self.element_type
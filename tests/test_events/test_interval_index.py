@@ -0,0 +1,235 @@
+""" Tests for the IntervalIndex class and ElementManagement.query_range """
+
+import sys
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.calendar_elements.interval_index import IntervalIndex
+from src.calendar_elements.element_management import ElementManagement, \
+    merge_window
+from src.database.memory_module import MemoryModule
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+def day(number: int, hour: int = 0) -> datetime:
+    """ Returns a datetime in January 2024 """
+    return datetime(2024, 1, number, hour)
+
+
+class TestIntervalIndex(unittest.TestCase):
+    """ Tests for IntervalIndex class """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.index = IntervalIndex()
+        self.index.add("a", day(1), day(3))
+        self.index.add("b", day(2), day(2, 12))
+        self.index.add("c", day(5), day(6))
+        self.index.add("long", day(1), day(20))
+        self.index.add("empty", day(10), day(10))
+
+    def test_query(self):
+        """ Check that query returns the overlapping keys, sorted by start """
+        self.assertEqual(self.index.query(day(2, 6), day(5)),
+                         ["a", "long", "b"])
+        self.assertEqual(self.index.query(day(10), day(11)),
+                         ["long", "empty"])
+        self.assertEqual(self.index.query(day(21), day(22)), [])
+
+    def test_query_is_half_open(self):
+        """ Check that intervals touching the window are not returned """
+        self.assertEqual(self.index.query(day(3), day(5)), ["long"])
+
+    def test_add_moves_and_remove(self):
+        """ Check that the index follows the changes """
+        self.index.query(day(1), day(2))
+        self.index.add("c", day(1, 1), day(1, 2))
+        self.index.remove("long")
+        self.assertEqual(self.index.query(day(1), day(2)), ["a", "c"])
+        self.assertNotIn("long", self.index)
+        self.assertEqual(len(self.index), 4)
+
+    def test_matches_linear_scan(self):
+        """ Check query against a scan of every interval """
+        index = IntervalIndex()
+        intervals = {}
+        for number in range(200):
+            start = day(1) + timedelta(hours=(number * 37) % 500)
+            end = start + timedelta(hours=(number * 11) % 48)
+            intervals[number] = (start, end)
+            index.add(number, start, end)
+        for hours in range(0, 520, 13):
+            start = day(1) + timedelta(hours=hours)
+            end = start + timedelta(hours=24)
+            expected = {key for key, (item_start, item_end)
+                        in intervals.items()
+                        if item_start < end and (item_end > start
+                                                 or item_start >= start)}
+            self.assertEqual(set(index.query(start, end)), expected)
+
+    def test_changes_between_queries(self):
+        """ Check that changes made between queries update the index in
+        place and keep it balanced """
+        index = IntervalIndex()
+        intervals = {}
+        for number in range(2000):
+            key = (number * 7) % 500
+            if number % 5 == 4:
+                index.remove(key)
+                intervals.pop(key, None)
+            else:
+                start = day(1) + timedelta(hours=(number * 37) % 500)
+                end = start + timedelta(hours=number % 30)
+                index.add(key, start, end)
+                intervals[key] = (start, end)
+            start = day(1) + timedelta(hours=(number * 13) % 520)
+            end = start + timedelta(hours=12)
+            expected = [key for key, (item_start, item_end)
+                        in intervals.items()
+                        if item_start < end and (item_end > start
+                                                 or item_start >= start)]
+            found = index.query(start, end)
+            self.assertEqual(set(found), set(expected))
+            self.assertEqual([intervals[key][0] for key in found],
+                             sorted(intervals[key][0] for key in expected))
+        self.assertEqual(len(index), len(intervals))
+
+        def depth(node):
+            if node is None:
+                return 0
+            return 1 + max(depth(node.left), depth(node.right))
+        self.assertLess(depth(index._root), 40)
+
+
+class TestQueryRange(unittest.TestCase):
+    """ Tests for ElementManagement.query_range """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        ScheduleManagement.get_instance(self.db_module)
+        UserManagement.get_instance(self.db_module)
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        for schedule_id in ["schedule1", "schedule2"]:
+            self.db_module.insert_data("schedules", {
+                "_id": schedule_id, "title": "title", "description": None,
+                "permissions": {}, "elements": []})
+        self.element_management.create_element(
+            "event", "event", "title", ["schedule1"],
+            start=day(1, 10), end=day(1, 11), description=None)
+        self.element_management.create_element(
+            "task", "task", "title", ["schedule1", "schedule2"],
+            due_date=day(15, 10), description=None, state="todo")
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def query_ids(self, schedule_ids, start, end):
+        """ Returns the ids of the elements returned by query_range """
+        return [element.id for element in self.element_management.query_range(
+            schedule_ids, start, end)]
+
+    def test_query_range_loads_from_database(self):
+        """ Check that the index is built from the stored elements """
+        self.element_management.elements.invalidate()
+        self.assertEqual(self.query_ids(["schedule1"], day(1), day(31)),
+                         ["event", "task"])
+        self.assertEqual(self.query_ids(["schedule2"], day(1), day(2)), [])
+        self.assertEqual(self.query_ids(["schedule1", "schedule2"],
+                                        day(15), day(16)), ["task"])
+
+    def test_index_follows_changes(self):
+        """ Check that created, changed and deleted elements are indexed """
+        self.assertEqual(self.query_ids(["schedule2"], day(1), day(31)),
+                         ["task"])
+        self.element_management.create_element(
+            "event", "new", "title", ["schedule2"],
+            start=day(3, 10), end=day(3, 11), description=None)
+        self.element_management.get_element("event").set_interval(
+            day(20, 10), day(20, 11))
+        self.element_management.delete_element("task")
+
+        self.assertEqual(self.query_ids(["schedule2"], day(1), day(31)),
+                         ["new"])
+        self.assertEqual(self.query_ids(["schedule1"], day(1), day(19)), [])
+        self.assertEqual(self.query_ids(["schedule1"], day(20), day(21)),
+                         ["event"])
+
+    def test_loaded_windows_are_not_queried_again(self):
+        """ Check that a window inside a loaded one uses the local index """
+        with patch.object(self.db_module, "select_elements_in_range",
+                          wraps=self.db_module.select_elements_in_range) \
+                as mock_select:
+            self.query_ids(["schedule1"], day(1), day(31))
+            self.query_ids(["schedule1"], day(15), day(16))
+            self.query_ids(["schedule1", "schedule2"], day(2), day(3))
+        self.assertEqual(mock_select.call_count, 2)
+        mock_select.assert_called_with(["schedule2"], day(2), day(3))
+
+    def test_indexes_shared_with_background_loads(self):
+        """ Check that indexing elements while another thread loads new
+        schedules does not change the indexes under the iteration """
+        element = self.element_management.get_element("event")
+        errors = []
+
+        def load():
+            try:
+                for number in range(300):
+                    self.element_management.query_range(
+                        [f"loaded{number}"], day(1), day(31))
+            except Exception as error: # pylint: disable=broad-except
+                errors.append(error)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            loader = threading.Thread(target=load)
+            loader.start()
+            while loader.is_alive():
+                try:
+                    self.element_management._index_element(element)
+                except RuntimeError as error:
+                    errors.append(error)
+                    break
+            loader.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual(errors, [])
+
+    def test_index_invalidated_during_load(self):
+        """ Check that a window whose index was dropped while it was being
+        queried is loaded again """
+        select = self.db_module.select_elements_in_range
+
+        def invalidated_select(*args):
+            self.element_management.invalidate_index("schedule1")
+            return select(*args)
+
+        with patch.object(self.db_module, "select_elements_in_range",
+                          side_effect=invalidated_select):
+            self.query_ids(["schedule1"], day(1), day(31))
+        self.assertEqual(self.query_ids(["schedule1"], day(1), day(31)),
+                         ["event", "task"])
+
+    def test_merge_window(self):
+        """ Check that overlapping and touching windows are merged """
+        windows = merge_window([], day(1), day(3))
+        windows = merge_window(windows, day(5), day(6))
+        self.assertEqual(windows, [(day(1), day(3)), (day(5), day(6))])
+        self.assertEqual(merge_window(windows, day(3), day(5)),
+                         [(day(1), day(6))])
+
+
+if __name__ == '__main__':
+    unittest.main()
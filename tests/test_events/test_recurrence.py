@@ -0,0 +1,245 @@
+""" Tests for the recurrence rules and the recurring elements """
+
+import unittest
+from datetime import datetime, timedelta
+
+from src.calendar_elements.recurrence import RecurrenceRule, \
+    ElementOccurrence, add_months
+from src.calendar_elements.element_types import EventElement, TaskElement
+from src.calendar_elements.element_management import ElementManagement
+from src.database.memory_module import MemoryModule
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+def day(number: int, hour: int = 0, month: int = 1) -> datetime:
+    """ Returns a datetime in 2024 """
+    return datetime(2024, month, number, hour)
+
+
+def starts(rule, first_start, first_end, start, end):
+    """ Returns the starts of the occurrences of a rule in a window """
+    return [occurrence_start for occurrence_start, _ in
+            rule.occurrences(first_start, first_end, start, end)]
+
+
+class TestRecurrenceRule(unittest.TestCase):
+    """ Tests for the RecurrenceRule class """
+
+    def test_invalid_rules(self):
+        """ Check that invalid rules are rejected """
+        with self.assertRaises(ValueError):
+            RecurrenceRule("yearly")
+        with self.assertRaises(ValueError):
+            RecurrenceRule("daily", interval=0)
+        with self.assertRaises(ValueError):
+            RecurrenceRule("daily", count=0)
+        with self.assertRaises(TypeError):
+            RecurrenceRule("daily", until="tomorrow")
+        with self.assertRaises(TypeError):
+            RecurrenceRule("daily", exceptions=["tomorrow"])
+
+    def test_weekly_occurrences_in_window(self):
+        """ Check that only the occurrences in the window are returned """
+        rule = RecurrenceRule("weekly")
+        self.assertEqual(starts(rule, day(1, 10), day(1, 11),
+                                day(10), day(24)),
+                         [day(15, 10), day(22, 10)])
+
+    def test_overlapping_occurrence_is_included(self):
+        """ Check that an occurrence that started before the window but ends
+        inside it is returned """
+        rule = RecurrenceRule("daily", interval=2)
+        self.assertEqual(starts(rule, day(1, 22), day(2, 2), day(4), day(5)),
+                         [day(3, 22)])
+
+    def test_count_until_and_exceptions(self):
+        """ Check that count, until and exceptions end or skip
+        occurrences """
+        self.assertEqual(starts(RecurrenceRule("daily", count=3),
+                                day(1, 9), day(1, 10), day(1), day(31)),
+                         [day(1, 9), day(2, 9), day(3, 9)])
+        self.assertEqual(starts(RecurrenceRule("daily", until=day(3, 9)),
+                                day(1, 9), day(1, 10), day(2), day(31)),
+                         [day(2, 9), day(3, 9)])
+        rule = RecurrenceRule("daily", count=3, exceptions=[day(2, 9)])
+        self.assertEqual(starts(rule, day(1, 9), day(1, 10), day(1), day(31)),
+                         [day(1, 9), day(3, 9)])
+
+    def test_monthly_clamps_the_day(self):
+        """ Check that monthly occurrences move to the last day of shorter
+        months """
+        rule = RecurrenceRule("monthly", count=4)
+        self.assertEqual(starts(rule, day(31, 8), day(31, 9), day(1),
+                                datetime(2025, 1, 1)),
+                         [day(31, 8), day(29, 8, month=2),
+                          day(31, 8, month=3), day(30, 8, month=4)])
+        self.assertEqual(add_months(day(31), 13), datetime(2025, 2, 28))
+
+    def test_far_window_does_not_walk_the_series(self):
+        """ Check that the expansion jumps to the window """
+        rule = RecurrenceRule("daily")
+        window_start = datetime(2124, 1, 1)
+        occurrences = list(rule.occurrences(day(1, 9), day(1, 10),
+                                            window_start,
+                                            window_start + timedelta(days=2)))
+        self.assertEqual(len(occurrences), 2)
+
+    def test_series_end(self):
+        """ Check the end of the last occurrence of a series """
+        self.assertEqual(RecurrenceRule("weekly", count=3).series_end(
+            day(1, 9), day(1, 10)), day(15, 10))
+        self.assertEqual(RecurrenceRule("daily", until=day(5, 12)).series_end(
+            day(1, 9), day(1, 10)), day(5, 10))
+        self.assertEqual(RecurrenceRule("monthly").series_end(
+            day(1, 9), day(1, 10)), datetime.max)
+
+    def test_dict_round_trip(self):
+        """ Check that a rule is stored and loaded unchanged """
+        rule = RecurrenceRule("weekly", 2, until=day(31),
+                              exceptions=[day(15)])
+        self.assertEqual(RecurrenceRule.from_dict(rule.to_dict()), rule)
+
+
+class TestRecurringElements(unittest.TestCase):
+    """ Tests for the elements with a recurrence rule """
+
+    def test_event_occurrences(self):
+        """ Check that the occurrences move the dates of the event """
+        event = EventElement("standup", "standup", day(1, 9),
+                             day(1, 10), ["schedule1"],
+                             recurrence=RecurrenceRule("daily", count=10))
+        occurrences = event.get_occurrences(day(3), day(5))
+        self.assertEqual([occurrence.start for occurrence in occurrences],
+                         [day(3, 9), day(4, 9)])
+        self.assertEqual(occurrences[0].end, day(3, 10))
+        self.assertEqual(occurrences[0].get_display_interval(),
+                         (day(3, 9), day(3, 10)))
+        self.assertEqual(occurrences[0].title, "standup")
+        self.assertEqual(occurrences[0].id, "standup")
+        self.assertEqual(occurrences[0].occurrence_id,
+                         "standup@2024-01-03T09:00:00")
+        self.assertIsInstance(occurrences[0], ElementOccurrence)
+
+    def test_single_element_occurrences(self):
+        """ Check that an element that does not repeat is its only
+        occurrence """
+        task = TaskElement("task", "task", day(2, 12), ["schedule1"])
+        self.assertEqual(task.get_occurrences(day(2), day(3)), [task])
+        self.assertEqual(task.get_occurrences(day(3), day(4)), [])
+
+    def test_to_dict_and_changes(self):
+        """ Check that the rule and the series interval are stored """
+        event = EventElement("standup", "standup", day(1, 9), day(1, 10),
+                             ["schedule1"])
+        self.assertNotIn("recurrence", event.to_dict())
+        event.set_recurrence({"frequency": "weekly", "count": 2})
+        changes = event.get_changes()["$set"]
+        self.assertEqual(changes["recurrence"]["frequency"], "weekly")
+        self.assertEqual(changes["display_end"], day(8, 10))
+        event.clear_changes()
+        event.set_recurrence(None)
+        self.assertEqual(event.get_changes()["$set"]["recurrence"], None)
+        self.assertEqual(event.get_changes()["$set"]["display_end"],
+                         day(1, 10))
+
+
+class TestQueryOccurrences(unittest.TestCase):
+    """ Tests for ElementManagement.query_occurrences """
+
+    def setUp(self):
+        """ Function that runs before each test case """
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        ScheduleManagement.get_instance(self.db_module)
+        UserManagement.get_instance(self.db_module)
+        self.element_management = ElementManagement.get_instance(
+            self.db_module)
+        self.db_module.insert_data("schedules", {
+            "_id": "schedule1", "title": "title", "description": None,
+            "permissions": {}, "elements": []})
+        self.element_management.create_element(
+            "event", "weekly", "weekly", ["schedule1"],
+            start=day(1, 10), end=day(1, 11), description=None,
+            recurrence=RecurrenceRule("weekly"))
+        self.element_management.create_element(
+            "event", "single", "single", ["schedule1"],
+            start=day(16, 8), end=day(16, 9), description=None)
+
+    def tearDown(self):
+        """ Function that runs after each test case """
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def test_series_is_stored_once(self):
+        """ Check that a series is a single document """
+        documents = self.db_module.select_data("elements", {"_id": "weekly"})
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(documents[0]["display_end"], datetime.max)
+
+    def test_query_occurrences(self):
+        """ Check that the series is expanded in the queried window, also
+        after it is loaded from the database again """
+        for _ in range(2):
+            occurrences = self.element_management.query_occurrences(
+                ["schedule1"], day(14), day(21))
+            self.assertEqual(
+                [element.get_display_interval()[0] for element in occurrences],
+                [day(15, 10), day(16, 8)])
+            self.element_management.elements.invalidate()
+            self.element_management.invalidate_index()
+        occurrences = self.element_management.query_occurrences(
+            ["schedule1"], datetime(2030, 1, 1), datetime(2030, 1, 8))
+        self.assertEqual(len(occurrences), 1)
+
+    def test_recurrence_survives_reload(self):
+        """ Check that every element type keeps its rule when it is created
+        and loaded from the database again """
+        rule = RecurrenceRule("daily", count=5)
+        self.element_management.create_element(
+            "event", "event", "event", ["schedule1"], start=day(2, 10),
+            end=day(2, 11), description=None, recurrence=rule)
+        self.element_management.create_element(
+            "task", "task", "task", ["schedule1"], due_date=day(2, 12),
+            description=None, recurrence=rule)
+        self.element_management.create_element(
+            "reminder", "reminder", "reminder", ["schedule1"],
+            reminder_date=day(2, 13), description=None, recurrence=rule)
+        for element_id in ("event", "task", "reminder"):
+            self.assertEqual(
+                self.element_management.get_element(element_id).recurrence,
+                rule)
+
+        self.element_management.elements.invalidate()
+        for element_id in ("event", "task", "reminder"):
+            element = self.element_management.get_element(element_id)
+            self.assertEqual(element.recurrence, rule)
+            self.assertEqual(len(element.get_occurrences(day(1), day(14))), 5)
+
+    def test_legacy_element_found_after_reconnect(self):
+        """ Check that an element stored without its display interval is
+        found by the range queries once the database is reconnected """
+        self.db_module.insert_data("elements", {
+            "_id": "legacy", "element_type": "event", "title": "legacy",
+            "start": day(15, 14), "end": day(15, 15), "description": None,
+            "schedules": ["schedule1"]})
+        self.assertEqual(self.element_management.query_occurrences(
+            ["schedule1"], day(14), day(21))[-1].id, "single")
+
+        self.db_module.disconnect()
+        self.db_module.connect()
+        self.element_management.invalidate_index()
+        occurrences = self.element_management.query_occurrences(
+            ["schedule1"], day(14), day(21))
+        self.assertEqual(
+            [element.get_display_interval()[0] for element in occurrences],
+            [day(15, 10), day(15, 14), day(16, 8)])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+module: test_async_mongo_module
+
+Test cases for the AsyncMongoModule class
+"""
+import unittest
+import unittest.mock
+from datetime import datetime
+
+import pymongo
+
+from src.database.async_mongo_module import AsyncMongoModule
+from src.database.mongo_module import ConnectionDBError
+from src.database.utils import elements_in_range_condition, \
+    LEGACY_ELEMENTS_CONDITION
+
+
+class TestAsyncMongoModule(unittest.IsolatedAsyncioTestCase):
+    """ Class to test the AsyncMongoModule class """
+
+    async def asyncSetUp(self):
+        """ Function that runs before each test case """
+        self.mongo_module = AsyncMongoModule(host="localhost", port=27018,
+                                             database_name="test")
+        self.client = unittest.mock.MagicMock()
+        self.client.close = unittest.mock.AsyncMock()
+        self.collection = unittest.mock.MagicMock()
+        for method in ["insert_one", "insert_many", "update_one",
+                       "delete_one", "delete_many", "find_one",
+                       "count_documents", "bulk_write", "create_index"]:
+            setattr(self.collection, method, unittest.mock.AsyncMock())
+        self.cursor = unittest.mock.MagicMock()
+        self.cursor.to_list = unittest.mock.AsyncMock(return_value=[])
+        self.cursor.sort.return_value = self.cursor
+        self.collection.find.return_value = self.cursor
+        self.client.__getitem__.return_value.__getitem__.return_value = \
+            self.collection
+        with unittest.mock.patch("pymongo.AsyncMongoClient",
+                                 return_value=self.client) as mock_client:
+            await self.mongo_module.connect()
+            mock_client.assert_called_once_with(
+                host="localhost", port=27018, username=None, password=None)
+
+    async def test_connect_creates_indexes(self):
+        """ Test that connect creates the indexes and fails if connected """
+        self.collection.create_index.assert_awaited_once_with(
+            unittest.mock.ANY, name="schedules_display_interval")
+        with self.assertRaises(ConnectionDBError):
+            await self.mongo_module.connect()
+
+    async def test_connect_backfills_display_fields(self):
+        """ Test that connect stores the display interval of the elements
+        written without it """
+        self.collection.find.assert_called_once_with(
+            LEGACY_ELEMENTS_CONDITION)
+        self.collection.bulk_write.assert_not_awaited()
+
+        self.cursor.to_list.return_value = [
+            {"_id": "1", "element_type": "event", "title": "legacy",
+             "start": datetime(2024, 1, 1, 9), "end": datetime(2024, 1, 1, 10),
+             "description": "", "schedules": ["s1"]}]
+        await self.mongo_module.ensure_indexes()
+        operations = self.collection.bulk_write.await_args.args[0]
+        self.assertEqual(operations, [pymongo.UpdateOne(
+            {"_id": "1"}, {"$set": {"display_start": datetime(2024, 1, 1, 9),
+                                    "display_end": datetime(2024, 1, 1, 10)}})])
+
+    async def test_disconnect(self):
+        """ Test that disconnect closes the client """
+        await self.mongo_module.disconnect()
+        self.client.close.assert_awaited_once()
+        with self.assertRaises(ConnectionDBError):
+            await self.mongo_module.disconnect()
+        with self.assertRaises(ConnectionError):
+            await self.mongo_module.insert_data("teste", {"_id": "1"})
+
+    async def test_writes(self):
+        """ Test that the writes use the collection methods """
+        await self.mongo_module.insert_data("teste", {"_id": "1"})
+        await self.mongo_module.update_data("teste", {"_id": "1"},
+                                            {"test": "a"})
+        await self.mongo_module.delete_data("teste", {"_id": "1"})
+        self.collection.insert_one.assert_awaited_once_with({"_id": "1"})
+        self.collection.update_one.assert_awaited_once_with(
+            {"_id": "1"}, {"$set": {"test": "a"}})
+        self.collection.delete_one.assert_awaited_once_with({"_id": "1"})
+
+    async def test_queries(self):
+        """ Test that the queries use find, find_one and count_documents """
+        self.cursor.to_list.return_value = [{"_id": "1"}]
+        self.assertEqual(await self.mongo_module.select_many_by_ids(
+            "teste", ["1", "2"]), [{"_id": "1"}])
+        self.collection.find.assert_called_with({"_id": {"$in": ["1", "2"]}})
+        self.assertEqual(await self.mongo_module.find_missing_ids(
+            "teste", ["1", "2"]), ["2"])
+
+        await self.mongo_module.select_one("teste", {"_id": "1"}, {"a": 1})
+        self.collection.find_one.assert_awaited_once_with({"_id": "1"},
+                                                          {"a": 1})
+        await self.mongo_module.count_data("teste", {}, limit=1)
+        self.collection.count_documents.assert_awaited_once_with({}, limit=1)
+
+    async def test_select_elements_in_range(self):
+        """ Test the range query on the elements """
+        start, end = datetime(2024, 1, 1), datetime(2024, 1, 2)
+        # connect looked for the elements to backfill
+        self.collection.find.reset_mock()
+        await self.mongo_module.select_elements_in_range(["s1"], start, end)
+        self.collection.find.assert_called_once_with(
+            elements_in_range_condition(["s1"], start, end))
+        self.cursor.sort.assert_called_once_with("display_start", 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
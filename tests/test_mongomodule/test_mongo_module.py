@@ -8,7 +8,13 @@ import unittest
 import logging
 import sys
 
+from datetime import datetime, date
+
+import pymongo.errors
+
 from src.database.mongo_module import MongoModule
+from src.database.utils import elements_in_range_condition, deadline, \
+    TimeExceedError, count_by_day_pipeline
 
 
 class TestMongoModule(unittest.TestCase):
@@ -74,6 +80,137 @@ class TestMongoModule(unittest.TestCase):
         self._connect_insert_and_update_data()
         self._disconnect_and_update_data()
 
+    def test_update_data_with_operators(self):
+        """ Test that update documents are sent as they are """
+        self._connect_to_database()
+        update = {"$set": {"test": "test2"},
+                  "$addToSet": {"items": {"$each": ["a"]}}}
+        with unittest.mock.patch.object(
+            self.mongo_module._db["teste"], "update_one"
+        ) as mock_update:
+            self.mongo_module.update_data(
+                collection_name="teste",
+                condition={"test": "test"},
+                new_data=update,
+            )
+            mock_update.assert_called_once_with({"test": "test"}, update)
+
+    def test_bulk_methods(self):
+        """ Test that the bulk methods use a single round-trip """
+        self._connect_to_database()
+        collection = self.mongo_module._db["teste"]
+        with unittest.mock.patch.object(collection, "insert_many") \
+                as mock_insert, \
+            unittest.mock.patch.object(collection, "find",
+                                       return_value=iter([])) as mock_find, \
+            unittest.mock.patch.object(collection, "delete_many") \
+                as mock_delete:
+            self.mongo_module.insert_many_data("teste", [{"_id": "1"},
+                                                         {"_id": "2"}])
+            self.mongo_module.select_many_by_ids("teste", ["1", "2"])
+            self.mongo_module.delete_many_data("teste", {"test": "test"})
+            mock_insert.assert_called_once_with([{"_id": "1"}, {"_id": "2"}])
+            mock_find.assert_called_once_with({"_id": {"$in": ["1", "2"]}})
+            mock_delete.assert_called_once_with({"test": "test"})
+
+    def test_iter_data(self):
+        """ Test that iter_data returns a batched find cursor """
+        self._connect_to_database()
+        collection = self.mongo_module._db["teste"]
+        with unittest.mock.patch.object(collection, "find",
+                                        return_value=iter([])) as mock_find:
+            self.assertEqual(list(self.mongo_module.iter_data(
+                "teste", {"test": "test"}, batch_size=50)), [])
+            mock_find.assert_called_once_with({"test": "test"}, None,
+                                              batch_size=50)
+
+    def test_iter_data_within_deadline(self):
+        """ Test that iter_data sends the time left as maxTimeMS """
+        self._connect_to_database()
+        collection = self.mongo_module._db["teste"]
+        with unittest.mock.patch.object(collection, "find") as mock_find:
+            with deadline(2):
+                self.mongo_module.iter_data("teste", {})
+            milliseconds = mock_find.return_value.max_time_ms.call_args[0][0]
+            self.assertTrue(0 < milliseconds <= 2000)
+
+    def test_operation_within_deadline(self):
+        """ Test that the calls inside a deadline run in a pymongo operation
+        timeout """
+        self._connect_to_database()
+        with unittest.mock.patch("pymongo.timeout") as mock_timeout:
+            self.mongo_module.select_data("teste", {})
+            mock_timeout.assert_not_called()
+            with deadline(2):
+                self.mongo_module.select_data("teste", {})
+            seconds = mock_timeout.call_args[0][0]
+            self.assertTrue(0 < seconds <= 2)
+
+    def test_operation_timeout_error(self):
+        """ Test that pymongo timeouts are raised as TimeExceedError """
+        self._connect_to_database()
+        collection = self.mongo_module._db["teste"]
+        with unittest.mock.patch.object(
+                collection, "find_one",
+                side_effect=pymongo.errors.ExecutionTimeout("timeout", 50)):
+            with deadline(2), self.assertRaises(TimeExceedError):
+                self.mongo_module.select_one("teste", {})
+            with deadline(0), self.assertRaises(TimeExceedError):
+                self.mongo_module.select_one("teste", {})
+
+    def test_select_one_and_count_data(self):
+        """ Test that select_one and count_data use find_one and
+        count_documents """
+        self._connect_to_database()
+        collection = self.mongo_module._db["teste"]
+        with unittest.mock.patch.object(collection, "find_one",
+                                        return_value=None) as mock_find_one, \
+            unittest.mock.patch.object(collection, "count_documents",
+                                       return_value=1) as mock_count:
+            self.assertIsNone(self.mongo_module.select_one(
+                "teste", {"_id": "1"}, {"test": 1}))
+            self.assertEqual(self.mongo_module.count_data(
+                "teste", {"_id": "1"}, limit=1), 1)
+            mock_find_one.assert_called_once_with({"_id": "1"}, {"test": 1})
+            mock_count.assert_called_once_with({"_id": "1"}, limit=1)
+
+    def test_connect_creates_indexes(self):
+        """ Test that connect creates the elements range index """
+        self._connect_to_database()
+        create_index = self.mongo_module._db["elements"].create_index
+        create_index.assert_called_once_with(
+            [("schedules", 1), ("display_start", 1), ("display_end", 1)],
+            name="schedules_display_interval")
+
+    def test_select_elements_in_range(self):
+        """ Test that select_elements_in_range runs a single query """
+        self._connect_to_database()
+        collection = self.mongo_module._db["elements"]
+        # connect looked for the elements to backfill
+        collection.find.reset_mock()
+        start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+        self.mongo_module.select_elements_in_range(["a", "b"], start, end)
+        collection.find.assert_called_once_with(
+            elements_in_range_condition(["a", "b"], start, end))
+        collection.find.return_value.sort.assert_called_once_with(
+            "display_start", 1)
+
+    def test_count_elements_by_day(self):
+        """ Test that count_elements_by_day runs the aggregation pipeline """
+        self._connect_to_database()
+        collection = self.mongo_module._db["elements"]
+        collection.aggregate.return_value = [
+            {"_id": "2023-12-31", "event": 1, "task": 0, "reminder": 0,
+             "busy_minutes": 60},
+            {"_id": "2024-01-02", "event": 2, "task": 1, "reminder": 0,
+             "busy_minutes": 90}]
+        start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+        counts = self.mongo_module.count_elements_by_day(["a"], start, end)
+        collection.aggregate.assert_called_once_with(
+            count_by_day_pipeline(["a"], start, end))
+        self.assertEqual(counts, {date(2024, 1, 2): {
+            "event": 2, "task": 1, "reminder": 0, "busy_minutes": 90}})
+
     def test_select_data(self):
         """ Test the select_data method """
         self._connect_to_database()
@@ -95,10 +232,12 @@ class TestMongoModule(unittest.TestCase):
         with unittest.mock.patch("pymongo.MongoClient") as mock_mongo:
             self.mongo_module.connect()
             mock_mongo.assert_called_once_with(
-                host=self.HOST, port=27018, username=None, password=None
+                host=self.HOST, port=27018, username=None, password=None,
+                serverSelectionTimeoutMS=5000, socketTimeoutMS=None
             )
             mock_mongo.assert_called_with(
-                host=self.HOST, port=27018, username=None, password=None
+                host=self.HOST, port=27018, username=None, password=None,
+                serverSelectionTimeoutMS=5000, socketTimeoutMS=None
             )
             mock_mongo.assert_called_once()
             self.assertIsNotNone(self.mongo_module._client)
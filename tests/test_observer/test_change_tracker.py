@@ -0,0 +1,90 @@
+"""
+Tests for the ChangeTracker mixin used by the models
+"""
+import unittest
+from datetime import datetime
+
+from src.calendar_elements.element_types import EventElement, TaskElement
+from src.schedule.schedule_model import Schedule
+from src.user.user_model import User
+
+
+class TestChangeTracker(unittest.TestCase):
+    """
+    Tests for the ChangeTracker mixin used by the models
+    """
+
+    def test_new_objects_have_no_changes(self):
+        """ Objects start in sync with their stored document """
+        event = EventElement("id", "title", datetime(2023, 1, 1),
+                             datetime(2023, 1, 2), ["schedule"])
+        task = TaskElement("id", "title", datetime(2023, 1, 1), ["schedule"])
+        schedule = Schedule("id", "title", None, {"user": "owner"}, ["a"])
+        user = User("id", "username", "email", ["schedule"], "hash")
+        for subject in [event, task, schedule, user]:
+            self.assertFalse(subject.has_changes())
+            self.assertEqual(subject.get_changes(), {})
+
+    def test_only_changed_fields_are_set(self):
+        """ Only the changed fields are sent with $set """
+        event = EventElement("id", "title", datetime(2023, 1, 1),
+                             datetime(2023, 1, 2), ["schedule"])
+        event.set_title("new title")
+        event.set_interval(datetime(2023, 2, 1), datetime(2023, 2, 2))
+        self.assertEqual(event.get_changes(), {"$set": {
+            "title": "new title",
+            "start": datetime(2023, 2, 1),
+            "end": datetime(2023, 2, 2),
+            "display_start": datetime(2023, 2, 1),
+            "display_end": datetime(2023, 2, 2)}})
+
+    def test_user_preferences_do_not_resend_password(self):
+        """ Changing a preference does not send the password hash """
+        user = User("id", "username", "email", [], "hash")
+        user.set_preferences({"theme": "dark"})
+        self.assertEqual(user.get_changes(),
+                         {"$set": {"user_preferences": {"theme": "dark"}}})
+
+    def test_membership_additions_and_removals(self):
+        """ List membership changes use $addToSet and $pull """
+        schedule = Schedule("id", "title", None, {"user": "owner"},
+                            ["a", "b"])
+        schedule.elements = schedule.elements + ["c"]
+        schedule.elements = schedule.elements + ["d"]
+        self.assertEqual(schedule.get_changes(),
+                         {"$addToSet": {"elements": {"$each": ["c", "d"]}}})
+        schedule.clear_changes()
+
+        schedule.elements = [e for e in schedule.elements if e != "a"]
+        self.assertEqual(schedule.get_changes(),
+                         {"$pull": {"elements": {"$in": ["a"]}}})
+
+    def test_membership_changes_cancel_out(self):
+        """ Adding and then removing an item sends nothing """
+        user = User("id", "username", "email", ["schedule"])
+        user.schedules = user.schedules + ["other"]
+        user.schedules = ["schedule"]
+        self.assertFalse(user.has_changes())
+
+    def test_membership_conflict_sets_whole_field(self):
+        """ Additions and removals on the same field fall back to $set """
+        schedule = Schedule("id", "title", None, {"user": "owner"}, ["a"])
+        schedule.elements = ["b"]
+        self.assertEqual(schedule.get_changes(),
+                         {"$set": {"elements": ["b"]}})
+
+    def test_pop_and_mark_all_changed(self):
+        """ pop_changes forgets the changes, mark_all_changed rewrites all """
+        schedule = Schedule("id", "title", None, {"user": "owner"}, ["a"])
+        schedule.set_title("other")
+        self.assertEqual(schedule.pop_changes(),
+                         {"$set": {"title": "other"}})
+        self.assertFalse(schedule.has_changes())
+
+        schedule.mark_all_changed()
+        self.assertEqual(set(schedule.get_changes()["$set"]),
+                         {"title", "description", "permissions", "elements"})
+
+
+if __name__ == '__main__': # pragma: no cover
+    unittest.main() # pragma: no cover
@@ -0,0 +1,202 @@
+"""
+Test file for free_busy.py
+"""
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from src.calendar_elements.element_management import ElementManagement
+from src.database.memory_module import MemoryModule
+from src.schedule.free_busy import FreeSlot, common_free_slots
+from src.schedule.schedule_management import ScheduleManagement
+from src.user.user_management import UserManagement
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    """Datetime of a time on the test day"""
+    return datetime(2024, 5, 10, hour, minute)
+
+
+WINDOW = (at(8), at(18))
+
+
+class TestCommonFreeSlots(unittest.TestCase):
+    """
+    Test class for common_free_slots
+    """
+
+    def test_no_busy_intervals(self):
+        """Test that the whole window is free without busy intervals"""
+        self.assertEqual(common_free_slots([], WINDOW, timedelta(hours=1)),
+                         [FreeSlot(at(8), at(18), frozenset())])
+
+    def test_merges_every_member(self):
+        """Test that a slot is free only if every member is free"""
+        busy = [(at(9), at(10), {"ana"}),
+                (at(9, 30), at(11), {"bia"}),
+                (at(13), at(14), {"ana", "bia"}),
+                (at(11), at(12), {"caio"})]
+        slots = common_free_slots(busy, WINDOW, timedelta(minutes=30))
+        self.assertEqual([(slot.start, slot.end) for slot in slots],
+                         [(at(14), at(18)), (at(8), at(9)),
+                          (at(12), at(13))])
+        self.assertTrue(all(not slot.busy_members for slot in slots))
+
+    def test_duration_and_window(self):
+        """Test that short slots and the outside of the window are dropped"""
+        busy = [(at(6), at(9), {"ana"}),
+                (at(9, 30), at(17, 30), {"bia"}),
+                (at(17, 45), at(20), {"ana"})]
+        self.assertEqual(common_free_slots(busy, WINDOW, timedelta(hours=1)),
+                         [])
+        self.assertEqual(
+            common_free_slots(busy, WINDOW, timedelta(minutes=30)),
+            [FreeSlot(at(9), at(9, 30), frozenset())])
+
+    def test_max_busy_ranks_by_busy_members(self):
+        """Test that slots with fewer busy members are ranked first"""
+        busy = [(at(8), at(12), {"ana"}),
+                (at(12), at(18), {"bia", "caio"})]
+        slots = common_free_slots(busy, WINDOW, timedelta(hours=1),
+                                  max_busy=1)
+        self.assertEqual(slots, [FreeSlot(at(8), at(12), frozenset({"ana"}))])
+        slots = common_free_slots(busy, WINDOW, timedelta(hours=1),
+                                  max_busy=2)
+        self.assertEqual(slots, [FreeSlot(at(8), at(18),
+                                          frozenset({"ana", "bia", "caio"}))])
+
+    def test_matches_brute_force(self):
+        """Test the sweep against checking every minute of the window"""
+        generator = random.Random(7)
+        members = [f"user{number}" for number in range(20)]
+        busy = []
+        for _ in range(60):
+            start = at(8) + timedelta(minutes=generator.randrange(0, 600, 5))
+            end = start + timedelta(minutes=generator.randrange(5, 90, 5))
+            busy.append((start, end, set(generator.sample(members, 2))))
+        slots = common_free_slots(busy, WINDOW, timedelta(minutes=1))
+
+        free_minutes = set()
+        for slot in slots:
+            minute = slot.start
+            while minute < slot.end:
+                free_minutes.add(minute)
+                minute += timedelta(minutes=1)
+        minute = at(8)
+        while minute < at(18):
+            expected = not any(start <= minute < end
+                               for start, end, _ in busy)
+            self.assertEqual(minute in free_minutes, expected, minute)
+            minute += timedelta(minutes=1)
+
+    def test_busy_members_match_brute_force(self):
+        """Test the slots and their busy members with max_busy against
+        checking every minute of the window, with groups shared by many
+        intervals"""
+        generator = random.Random(11)
+        members = [f"user{number}" for number in range(12)]
+        groups = [frozenset(generator.sample(members, size))
+                  for size in (1, 1, 2, 3, 12)]
+        busy = []
+        for _ in range(80):
+            start = at(8) + timedelta(minutes=generator.randrange(0, 600, 5))
+            end = start + timedelta(minutes=generator.randrange(5, 60, 5))
+            busy.append((start, end, generator.choice(groups)))
+        for max_busy in (1, 2, 4):
+            expected = []
+            minute = at(8)
+            while minute < at(18):
+                busy_members = frozenset().union(
+                    *(members for start, end, members in busy
+                      if start <= minute < end))
+                if len(busy_members) > max_busy:
+                    expected.append(None)
+                elif expected and expected[-1] is not None:
+                    expected[-1] = (expected[-1][0], minute, expected[-1][2]
+                                    | busy_members)
+                else:
+                    expected.append((minute, minute, busy_members))
+                minute += timedelta(minutes=1)
+            expected = sorted(
+                (FreeSlot(start, end + timedelta(minutes=1), busy_members)
+                 for start, end, busy_members in filter(None, expected)),
+                key=lambda slot: (len(slot.busy_members), -slot.duration,
+                                  slot.start))
+            self.assertEqual(common_free_slots(busy, WINDOW,
+                                               timedelta(minutes=1),
+                                               max_busy), expected)
+
+
+class TestFindCommonFreeSlots(unittest.TestCase):
+    """
+    Test class for ScheduleManagement.find_common_free_slots
+    """
+
+    def setUp(self):
+        """Set up for the tests"""
+        self.db_module = MemoryModule()
+        self.db_module.connect()
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+        self.schedule_management = ScheduleManagement.get_instance(
+            self.db_module)
+        UserManagement.get_instance(self.db_module)
+        element_management = ElementManagement.get_instance(self.db_module)
+
+        schedules = {"team": {"ana": "owner", "bia": "viewer"},
+                     "ana_personal": {"ana": "owner"},
+                     "bia_personal": {"bia": "owner"},
+                     "caio_personal": {"caio": "owner"}}
+        for user_id in ["ana", "bia", "caio"]:
+            self.db_module.insert_data("users", {
+                "_id": user_id, "username": user_id, "email": user_id,
+                "schedules": [schedule_id for schedule_id, permissions
+                              in schedules.items() if user_id in permissions],
+                "hashed_password": None, "user_preferences": {}})
+        for schedule_id, permissions in schedules.items():
+            self.db_module.insert_data("schedules", {
+                "_id": schedule_id, "title": schedule_id,
+                "description": None, "permissions": permissions,
+                "elements": []})
+
+        element_management.create_element(
+            "event", "standup", "standup", ["team"],
+            start=at(9), end=at(9, 30), description=None)
+        element_management.create_element(
+            "event", "dentist", "dentist", ["ana_personal"],
+            start=at(11), end=at(12), description=None)
+        element_management.create_element(
+            "event", "gym", "gym", ["bia_personal"],
+            start=at(15), end=at(17), description=None)
+        element_management.create_element(
+            "event", "other", "other", ["caio_personal"],
+            start=at(13), end=at(14), description=None)
+        element_management.create_element(
+            "task", "report", "report", ["ana_personal"],
+            due_date=at(13, 30), description=None, state="todo")
+
+    def tearDown(self):
+        """Clean up the singletons"""
+        ScheduleManagement._instance = None
+        ElementManagement._instance = None
+        UserManagement._instance = None
+
+    def test_find_common_free_slots(self):
+        """Test that only the events of the members make the group busy"""
+        slots = self.schedule_management.find_common_free_slots(
+            "team", WINDOW, timedelta(hours=1))
+        self.assertEqual([(slot.start, slot.end) for slot in slots],
+                         [(at(12), at(15)), (at(9, 30), at(11)),
+                          (at(8), at(9)), (at(17), at(18))])
+
+    def test_find_common_free_slots_max_busy(self):
+        """Test that max_busy reports who is busy in a slot"""
+        slots = self.schedule_management.find_common_free_slots(
+            "team", WINDOW, timedelta(hours=4), max_busy=1)
+        self.assertEqual(slots, [FreeSlot(at(9, 30), at(18),
+                                          frozenset({"ana", "bia"}))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,29 +58,25 @@ class TestScheduleManagement(unittest.TestCase):
         Test that schedule_exists returns True when the schedule exists
         """
         # Arrange
-        self.db_module.select_data = MagicMock(return_value=[{'_id': 'schedule1',
-                                                              'title': 'Schedule 1',
-                                                              'description': 'This is schedule 1',
-                                                              'permissions': {'user1': 'read', 'user2': 'write'},
-                                                              'elements': ['element1', 'element2']
-                                                              }])
+        self.db_module.count_data = MagicMock(return_value=1)
         result = self.schedule_management.schedule_exists('schedule1')
         # Assert
         self.assertTrue(result)
-        self.db_module.select_data.assert_called_with(
-            'schedules', {'_id': 'schedule1'})
+        self.db_module.count_data.assert_called_with(
+            'schedules', {'_id': 'schedule1'}, limit=1)
+        self.db_module.select_data.assert_not_called()
 
     def test_schedule_does_not_exist(self):
         """
         Test that schedule_exists returns False when the schedule does not exist
         """
         # Arrange
-        self.db_module.select_data = MagicMock(return_value=[])
+        self.db_module.count_data = MagicMock(return_value=0)
         result = self.schedule_management.schedule_exists('schedule1')
         # Assert
         self.assertFalse(result)
-        self.db_module.select_data.assert_called_with(
-            'schedules', {'_id': 'schedule1'})
+        self.db_module.count_data.assert_called_with(
+            'schedules', {'_id': 'schedule1'}, limit=1)
 
     def test_create_schedule(self):
         """
@@ -88,7 +84,7 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         self.db_module.insert_data = MagicMock()
-        self.db_module.select_data = MagicMock(return_value=[])
+        self.db_module.count_data = MagicMock(return_value=0)
         schedule_id = "schedule10"
         title = "Schedule 2"
         description = "This is schedule 2"
@@ -98,10 +94,10 @@ class TestScheduleManagement(unittest.TestCase):
         mock_element = MagicMock()
         with patch.object(self.user_management, 'get_user', return_value=mock_user), \
                 patch.object(self.user_management, 'update_user', return_value=None), \
-                patch.object(self.user_management, 'user_exists', return_value=True), \
+                patch.object(self.user_management, 'find_missing_users', return_value=[]), \
                 patch.object(self.element_management, 'get_element', return_value=mock_element), \
                 patch.object(self.element_management, 'update_element', return_value=None), \
-                patch.object(self.element_management, 'element_exists', return_value=True):
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]):
 
             result = self.schedule_management.create_schedule(schedule_id,
                                                               title,
@@ -192,8 +188,8 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         self.schedule_management.db_module.insert_data = MagicMock()
-        self.schedule_management.db_module.select_data = MagicMock(
-            return_value=[])
+        self.schedule_management.db_module.count_data = MagicMock(
+            return_value=0)
         invalid_titles = [None, 123, "", "   ",
                           "a" * 51]  # Covers all restrictions
         schedule_id = "schedule10"
@@ -201,8 +197,8 @@ class TestScheduleManagement(unittest.TestCase):
         permissions = {"user1": "write", "user2": "read"}
         elements = ["element2", "element3"]
         # Act & Assert
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
-                patch.object(self.element_management, 'element_exists', return_value=True):
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]):
             for title in invalid_titles:
                 with self.assertRaises((ValueError, TypeError)):
                     self.schedule_management.create_schedule(schedule_id,
@@ -217,16 +213,16 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         self.schedule_management.db_module.insert_data = MagicMock()
-        self.schedule_management.db_module.select_data = MagicMock(
-            return_value=[])
+        self.schedule_management.db_module.count_data = MagicMock(
+            return_value=0)
         invalid_descriptions = [123, "a" * 501]  # Covers all restrictions
         schedule_id = "schedule10"
         title = "Schedule 2"
         permissions = {"user1": "write", "user2": "read"}
         elements = ["element2", "element3"]
         # Act & Assert
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
-                patch.object(self.element_management, 'element_exists', return_value=True):
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]):
             for description in invalid_descriptions:
                 with self.assertRaises((ValueError, TypeError)):
                     self.schedule_management.create_schedule(schedule_id, title,
@@ -238,16 +234,16 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         self.schedule_management.db_module.insert_data = MagicMock()
-        self.schedule_management.db_module.select_data = MagicMock(
-            return_value=[])
+        self.schedule_management.db_module.count_data = MagicMock(
+            return_value=0)
         schedule_id = 123  # Non-string ID
         title = "Schedule 2"
         description = "This is schedule 2"
         permissions = {"user1": "write", "user2": "read"}
         elements = ["element2", "element3"]
         # Act & Assert
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
-                patch.object(self.element_management, 'element_exists', return_value=True):
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]):
             with self.assertRaises(TypeError):
                 self.schedule_management.create_schedule(schedule_id,
                                                          title,
@@ -261,16 +257,16 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         self.schedule_management.db_module.insert_data = MagicMock()
-        self.schedule_management.db_module.select_data = MagicMock(
-            return_value=[])
+        self.schedule_management.db_module.count_data = MagicMock(
+            return_value=0)
         schedule_id = "schedule10"
         title = "Schedule 2"
         description = "This is schedule 2"
         permissions = {}  # Empty permissions
         elements = ["element2", "element3"]
         # Act & Assert
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
-                patch.object(self.element_management, 'element_exists', return_value=True):
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]):
             with self.assertRaises(EmptyPermissionsError):
                 self.schedule_management.create_schedule(schedule_id,
                                                          title,
@@ -292,9 +288,9 @@ class TestScheduleManagement(unittest.TestCase):
         mock_element = MagicMock()
         mock_element.schedules = []
 
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
                 patch.object(self.user_management, 'get_user', return_value=mock_user), \
-                patch.object(self.element_management, 'element_exists', return_value=True), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]), \
                 patch.object(self.element_management, 'get_element', return_value=mock_element), \
                 patch.object(self.schedule_management, 'schedule_exists', return_value=False):
 
@@ -319,8 +315,8 @@ class TestScheduleManagement(unittest.TestCase):
         elements = ["element1", "nonexistent_element"]
         with patch.object(self.schedule_management, 'schedule_exists',
                           return_value=False), \
-            patch.object(ElementManagement, 'element_exists',
-                         side_effect=[True, False]):
+            patch.object(ElementManagement, 'find_missing_elements',
+                         return_value=["nonexistent_element"]):
             # Act & Assert
             with self.assertRaises(NonExistentIDError):
                 self.schedule_management.create_schedule(schedule_id,
@@ -344,9 +340,9 @@ class TestScheduleManagement(unittest.TestCase):
         mock_user = MagicMock()
         mock_user.schedules = []
 
-        with patch.object(self.user_management, 'user_exists', return_value=True), \
+        with patch.object(self.user_management, 'find_missing_users', return_value=[]), \
                 patch.object(self.user_management, 'get_user', return_value=mock_user), \
-                patch.object(self.element_management, 'element_exists', return_value=True), \
+                patch.object(self.element_management, 'find_missing_elements', return_value=[]), \
                 patch.object(self.element_management, 'get_element', return_value=mock_element), \
                 patch.object(self.schedule_management, 'schedule_exists', return_value=False):
 
@@ -370,8 +366,10 @@ class TestScheduleManagement(unittest.TestCase):
         elements = ["element1", "element2"]
         with patch.object(self.schedule_management, 'schedule_exists',
                           return_value=False), \
-            patch.object(UserManagement, 'user_exists',
-                         side_effect=[True, False]):
+            patch.object(ElementManagement, 'find_missing_elements',
+                         return_value=[]), \
+            patch.object(UserManagement, 'find_missing_users',
+                         return_value=["nonexistent_user"]):
             # Act & Assert
             with self.assertRaises(NonExistentIDError):
                 self.schedule_management.create_schedule(schedule_id,
@@ -410,17 +408,18 @@ class TestScheduleManagement(unittest.TestCase):
         description = "This is schedule 2"
         permissions = {"user1": "write", "user2": "read"}
         elements = ["element2", "element3"]
-        self.schedule_management.db_module.select_data = MagicMock(
-            return_value=[{
+        self.schedule_management.db_module.select_one = MagicMock(
+            return_value={
                 '_id': schedule_id,
                 'title': title,
                 'description': description,
                 'permissions': permissions,
                 'elements': elements
-            }])
-        self.schedule_management.schedule_exists = MagicMock(return_value=True)
+            })
         # Act
         result = self.schedule_management.get_schedule(schedule_id)
+        self.schedule_management.db_module.select_one.assert_called_once_with(
+            'schedules', {'_id': schedule_id})
         # Assert
         self.assertEqual(result.title, title)
         self.assertEqual(result.description, description)
@@ -433,8 +432,8 @@ class TestScheduleManagement(unittest.TestCase):
         """
         # Arrange
         schedule_id = "schedule10"
-        self.schedule_management.schedule_exists = MagicMock(
-            return_value=False)
+        self.schedule_management.db_module.select_one = MagicMock(
+            return_value=None)
         # Act & Assert
         with self.assertRaises(NonExistentIDError):
             self.schedule_management.get_schedule(schedule_id)
@@ -453,14 +452,18 @@ class TestScheduleManagement(unittest.TestCase):
                             permissions, elements)
         self.schedule_management.schedules[schedule_id] = schedule
         self.schedule_management.db_module.update_data = MagicMock()
+        schedule.set_title("New title")
+        schedule.elements = elements + ["element4"]
         # Act
         self.schedule_management.update_schedule(schedule_id)
         # Assert
         self.schedule_management.db_module.update_data.assert_called_once_with(
             'schedules',
             {'_id': schedule_id},
-            schedule.to_dict()
+            {'$set': {'title': 'New title'},
+             '$addToSet': {'elements': {'$each': ['element4']}}}
         )
+        self.assertFalse(schedule.has_changes())
 
     def test_update_schedule_id_doesnt_exist(self):
         """
@@ -482,14 +485,14 @@ class TestScheduleManagement(unittest.TestCase):
         # Arrange
         schedule_id = "schedule10"
         self.schedule_management.db_module.delete_data = MagicMock()
-        # Mock the return value of select_data
-        self.schedule_management.db_module.select_data.return_value = [{
+        # Mock the return value of select_one
+        self.schedule_management.db_module.select_one.return_value = {
             '_id': schedule_id,
             'title': 'Test Title',
             'description': 'Test Description',
             'permissions': {},
             'elements': []
-        }]
+        }
         # Act
         self.schedule_management.delete_schedule(schedule_id)
         # Assert
@@ -0,0 +1,84 @@
+"""
+Tests for the Availability class
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.user.availability import Availability
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    """Datetime of a time on the test day"""
+    return datetime(2024, 5, 10, hour, minute)
+
+
+class TestAvailability(unittest.TestCase):
+    """
+    Tests for the Availability class
+    """
+
+    def setUp(self):
+        self.availability = Availability([(at(13), at(14)),
+                                          (at(9), at(10)),
+                                          (at(9, 30), at(11)),
+                                          (at(16), at(17))])
+
+    def test_merges_overlapping_intervals(self):
+        """Test that overlapping busy intervals are merged"""
+        self.assertEqual(len(self.availability), 3)
+
+    def test_is_free(self):
+        """Test that is_free detects overlaps but not touching intervals"""
+        self.assertTrue(self.availability.is_free((at(8), at(9))))
+        self.assertTrue(self.availability.is_free((at(11), at(13))))
+        self.assertFalse(self.availability.is_free((at(10, 30), at(12))))
+        self.assertFalse(self.availability.is_free((at(12), at(18))))
+        self.assertFalse(self.availability.is_free((at(13, 15), at(13, 45))))
+
+    def test_is_free_many(self):
+        """Test that is_free_many checks every interval"""
+        result = self.availability.is_free_many([(at(8), at(9)),
+                                                 (at(10, 30), at(12)),
+                                                 (at(14), at(16)),
+                                                 (at(17), at(20))])
+        self.assertEqual(result.tolist(), [True, False, True, True])
+
+    def test_empty(self):
+        """Test that a user without events is always free"""
+        availability = Availability([])
+        self.assertTrue(availability.is_free((at(8), at(9))))
+        self.assertEqual(availability.free_slots(at(0), timedelta(hours=1)),
+                         [(at(0), at(0) + timedelta(days=1))])
+
+    def test_free_slots(self):
+        """Test that free_slots returns the gaps long enough"""
+        slots = self.availability.free_slots(at(12).date(),
+                                             timedelta(hours=2))
+        self.assertEqual(self.availability.free_slots(
+            at(12), timedelta(hours=3)), [(at(0), at(9)),
+                                          (at(17), at(0) + timedelta(days=1))])
+        self.assertEqual(slots, [(at(0), at(9)),
+                                 (at(11), at(13)),
+                                 (at(14), at(16)),
+                                 (at(17), at(0) + timedelta(days=1))])
+
+    def test_free_slots_window(self):
+        """Test that free_slots clips the busy intervals to the window"""
+        slots = self.availability.free_slots(None, timedelta(minutes=30),
+                                             window=(at(9, 45), at(16, 30)))
+        self.assertEqual(slots, [(at(11), at(13)), (at(14), at(16))])
+
+    def test_from_elements_only_events(self):
+        """Test that only events make the user busy"""
+        event = MagicMock(element_type='event')
+        event.get_display_interval.return_value = (at(9), at(10))
+        task = MagicMock(element_type='task')
+        task.get_display_interval.return_value = (at(11), at(11))
+        availability = Availability.from_elements([event, task])
+        self.assertEqual(len(availability), 1)
+        self.assertFalse(availability.is_free((at(9), at(12))))
+        self.assertTrue(availability.is_free((at(10), at(12))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -42,7 +42,7 @@ class TestUserManagementModule(unittest.TestCase):
         user_id = 'new_user_id'
         hashed_password = 'hashed_password'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = []
+        mock_db_module.count_data.return_value = 0
         user_management = UserManagement(mock_db_module)
         user_management.hash_password = MagicMock(
             return_value=hashed_password.encode('utf-8'))
@@ -69,7 +69,7 @@ class TestUserManagementModule(unittest.TestCase):
         user_preferences = {'preference': 'value'}
         user_id = 'existing_user_id'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = [{'_id': user_id}]
+        mock_db_module.count_data.return_value = 1
         user_management = UserManagement(mock_db_module)
 
         # Act and Assert
@@ -107,7 +107,7 @@ class TestUserManagementModule(unittest.TestCase):
                      'email': 'email', 'schedules': []}
         user = User(**user_info)
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = [user_info]
+        mock_db_module.select_one.return_value = user_info
         user_management = UserManagement(mock_db_module)
         user_management.users[user_id] = user
         # Act
@@ -122,7 +122,7 @@ class TestUserManagementModule(unittest.TestCase):
         # Arrange
         user_id = 'non_existent_user_id'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = []
+        mock_db_module.count_data.return_value = 0
         user_management = UserManagement(mock_db_module)
 
         # Act and Assert
@@ -135,8 +135,7 @@ class TestUserManagementModule(unittest.TestCase):
         # Arrange
         user_id = 'existing_user_id'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = [{'_id': user_id, 
-            'username': 'username', 'email': 'email', 'schedules': []}]
+        mock_db_module.count_data.return_value = 1
         user_management = UserManagement(mock_db_module)
 
         # Act
@@ -144,6 +143,9 @@ class TestUserManagementModule(unittest.TestCase):
 
         # Assert
         self.assertTrue(result)
+        mock_db_module.count_data.assert_called_once_with(
+            'users', {"_id": user_id}, limit=1)
+        mock_db_module.select_data.assert_not_called()
 
     def test_user_exists_returns_false(self):
         """Test that user_exists returns False when a user with the given 
@@ -151,7 +153,7 @@ class TestUserManagementModule(unittest.TestCase):
         # Arrange
         user_id = 'non_existent_user_id'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = []
+        mock_db_module.count_data.return_value = 0
         user_management = UserManagement(mock_db_module)
 
         # Act
@@ -160,6 +162,122 @@ class TestUserManagementModule(unittest.TestCase):
         # Assert
         self.assertFalse(result)
 
+    def test_get_user_single_query(self):
+        """Test that get_user fetches the user with a single select_one"""
+        # Arrange
+        user_id = 'existing_user_id'
+        mock_db_module = MagicMock()
+        mock_db_module.select_one.return_value = {
+            '_id': user_id, 'username': 'username', 'email': 'email',
+            'schedules': []}
+        user_management = UserManagement(mock_db_module)
+
+        # Act
+        user = user_management.get_user(user_id)
+
+        # Assert
+        self.assertEqual(user.username, 'username')
+        mock_db_module.select_one.assert_called_once_with(
+            'users', {"_id": user_id})
+        mock_db_module.count_data.assert_not_called()
+        mock_db_module.select_data.assert_not_called()
+
+    def test_get_users_single_query(self):
+        """Test that get_users fetches the users not loaded with a single
+        query and skips the missing ones"""
+        # Arrange
+        mock_db_module = MagicMock()
+        mock_db_module.select_many_by_ids.return_value = [
+            {'_id': 'user2', 'username': 'user2', 'email': 'email',
+             'schedules': []}]
+        user_management = UserManagement(mock_db_module)
+        loaded = User('user1', 'user1', 'email')
+        user_management.users['user1'] = loaded
+
+        # Act
+        users = user_management.get_users(['user1', 'user2', 'user3'])
+
+        # Assert
+        self.assertEqual([user.id for user in users], ['user1', 'user2'])
+        self.assertIs(users[0], loaded)
+        mock_db_module.select_many_by_ids.assert_called_once_with(
+            'users', ['user2', 'user3'])
+
+    def test_get_user_identity_map(self):
+        """Test that get_user returns the loaded instance without querying
+        the database again, until it is invalidated"""
+        # Arrange
+        user_id = 'existing_user_id'
+        mock_db_module = MagicMock()
+        mock_db_module.select_one.return_value = {
+            '_id': user_id, 'username': 'username', 'email': 'email',
+            'schedules': []}
+        user_management = UserManagement(mock_db_module)
+
+        # Act
+        first = user_management.get_user(user_id)
+        second = user_management.get_user(user_id)
+        user_management.invalidate_user(user_id)
+        third = user_management.get_user(user_id)
+
+        # Assert
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertEqual(mock_db_module.select_one.call_count, 2)
+        self.assertEqual(user_management.users.hits, 1)
+
+    def test_evicted_user_is_saved(self):
+        """Test that users dropped from the identity map are cached again
+        and saved when they change"""
+        # Arrange
+        mock_db_module = MagicMock()
+        user_management = UserManagement(mock_db_module, cache_size=1)
+        first = User('user1', 'username', 'email', [], {})
+        second = User('user2', 'username', 'email', [], {})
+        first.attach(user_management)
+        second.attach(user_management)
+        user_management.users['user1'] = first
+        user_management.users['user2'] = second
+
+        # Act
+        first.set_email('new_email')
+
+        # Assert
+        self.assertIs(user_management.users['user1'], first)
+        mock_db_module.update_data.assert_called_once()
+
+    def test_get_nonexistent_user(self):
+        """Test that get_user raises NonExistentIDError and remembers the
+        miss"""
+        # Arrange
+        mock_db_module = MagicMock()
+        mock_db_module.select_one.return_value = None
+        user_management = UserManagement(mock_db_module)
+
+        # Act and Assert
+        with self.assertRaises(NonExistentIDError):
+            user_management.get_user('non_existent_user_id')
+        self.assertIsNone(user_management.find_user('non_existent_user_id'))
+        self.assertFalse(user_management.user_exists('non_existent_user_id'))
+        mock_db_module.select_one.assert_called_once()
+        mock_db_module.count_data.assert_not_called()
+
+    def test_find_missing_users(self):
+        """Test that find_missing_users checks every user with one query"""
+        # Arrange
+        mock_db_module = MagicMock()
+        mock_db_module.select_many_by_ids.return_value = [{'_id': 'user1'}]
+        user_management = UserManagement(mock_db_module)
+
+        # Act
+        result = user_management.find_missing_users(['user1', 'user2'])
+
+        # Assert
+        self.assertEqual(result, ['user2'])
+        mock_db_module.select_many_by_ids.assert_called_once_with(
+            'users', ['user1', 'user2'])
+        mock_db_module.select_data.assert_not_called()
+
     def test_update_user(self):
         """Test that update_user calls update_data with the correct arguments"""
         # Arrange
@@ -169,16 +287,17 @@ class TestUserManagementModule(unittest.TestCase):
                  'hashed_password': None, 'user_preferences': {}}
         user = User(**user_info)
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = [user_info]
+        mock_db_module.select_one.return_value = user_info
         user_management = UserManagement(mock_db_module)
         user_management.users[user_id] = user
+        user.set_email('new_email')
 
         # Act
         user_management.update_user(user_id)
 
         # Assert
         mock_db_module.update_data.assert_called_once_with(
-            'users', {"_id": user_id}, user_info)
+            'users', {"_id": user_id}, {'$set': {'email': 'new_email'}})
 
 
     def test_update_nonexistent_user(self):
@@ -187,7 +306,7 @@ class TestUserManagementModule(unittest.TestCase):
         # Arrange
         user_id = 'non_existent_user_id'
         mock_db_module = MagicMock()
-        mock_db_module.select_data.return_value = []
+        mock_db_module.count_data.return_value = 0
         user_management = UserManagement(mock_db_module)
 
         # Act and Assert
@@ -206,7 +325,7 @@ class TestUserManagementModule(unittest.TestCase):
     #     schedule = Schedule(schedule_id, 'title', 'description', {other_user_id: permission}, [])
     #     #schedule.set_title = MagicMock()  # Mock set_title
     #     mock_db_module = MagicMock()
-    #     mock_db_module.select_data.return_value = [user_info]
+    #     mock_db_module.select_one.return_value = user_info
     #     user_management = UserManagement(mock_db_module)
     #     user_management.users[user_id] = user
     #     mock_schedule_management = MagicMock()
@@ -229,7 +348,7 @@ class TestUserManagementModule(unittest.TestCase):
         mock_schedule = MagicMock()
         self.user_management.users[user_id] = User(user_id, 'username', 'email', [], {})
         user_info = {'_id': user_id, 'username': 'username', 'email': 'email', 'schedules': []}
-        self.user_management.db_module.select_data.return_value = [user_info]  # Return a list so it can be subscripted
+        self.user_management.db_module.select_one.return_value = user_info
         with patch.object(ScheduleManagement, 'get_schedule', return_value=mock_schedule), \
             patch.object(UserManagement, 'user_exists', return_value=True):
             # Act
@@ -246,7 +365,7 @@ class TestUserManagementModule(unittest.TestCase):
         mock_schedule = MagicMock()
         self.user_management.users[user_id] = User(user_id, 'username', 'email', [], {})
         user_info = {'_id': user_id, 'username': 'username', 'email': 'email', 'schedules': []}
-        self.user_management.db_module.select_data.return_value = [user_info]  # Return a list so it can be subscripted
+        self.user_management.db_module.select_one.return_value = user_info
         with patch.object(ScheduleManagement, 'get_schedule', return_value=mock_schedule), \
             patch.object(UserManagement, 'user_exists', return_value=True):
             # Act
@@ -256,7 +375,6 @@ class TestUserManagementModule(unittest.TestCase):
 
     def test_add_schedule_to_nonexistant_user(self):
         """Test adding a schedule to a nonexistent user"""
-        self.db_module.select_data = MagicMock(return_value = [])
         self.user_management.user_exists = MagicMock(return_value=False)
         with self.assertRaises(NonExistentIDError):
             self.user_management.add_schedule_to_user("id2", "test_schedule",
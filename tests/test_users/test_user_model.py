@@ -153,73 +153,62 @@ class TestUserModel(unittest.TestCase):
         with self.assertRaises(TypeError):
             user.set_preferences({123: 'preference'})
 
+    def _mock_element(self, element_type, start, end):
+        """Create a mock element with a display interval"""
+        element = MagicMock()
+        element.element_type = element_type
+        element.get_display_interval.return_value = (start, end)
+        return element
+
     def test_check_disponibility_true(self):
         """Test that check_disponibility returns True when there are 
         no conflicts"""
         # Arrange
+        now = datetime.now()
         user = User("id", "username", "email", ["schedule1", "schedule2"])
-        mock_element1 = MagicMock()
-        mock_element1.type = 'event'
-        mock_element1.start_time = datetime.now() + timedelta(hours=3)
-        mock_element1.end_time = datetime.now() + timedelta(hours=4)
-        mock_element2 = MagicMock()
-        mock_element2.type = 'event'
-        mock_element2.start_time = datetime.now() + timedelta(hours=5)
-        mock_element2.end_time = datetime.now() + timedelta(hours=6)
-        mock_schedule1 = MagicMock()
-        mock_schedule1.get_elements.return_value = [mock_element1]
-        mock_schedule2 = MagicMock()
-        mock_schedule2.get_elements.return_value = [mock_element2]
-        mock_schedule_management = MagicMock()
-        mock_element_management = MagicMock()
-        with patch.object(self.schedule_management, 'get_instance', 
-                          return_value=mock_schedule_management), \
-            patch.object(self.schedule_management, 'get_schedule', 
-                         side_effect=lambda x: mock_schedule1 \
-                            if x == 'schedule1' else mock_schedule2), \
-            patch.object(self.element_management, 'get_instance', 
-                         return_value=mock_element_management), \
-            patch.object(self.element_management, 'get_element', 
-                         side_effect=lambda x: mock_element1 \
-                            if x == 'element_id1' else mock_element2):
+        elements = [
+            self._mock_element('event', now + timedelta(hours=3),
+                               now + timedelta(hours=4)),
+            self._mock_element('event', now + timedelta(hours=5),
+                               now + timedelta(hours=6))]
+        with patch.object(User, 'get_elements_in_range',
+                          return_value=elements) as mock_range:
             # Act
-            result = user.check_disponibility((datetime.now(),
-                                                datetime.now() + timedelta(hours=2)))
+            result = user.check_disponibility((now, now + timedelta(hours=2)))
             # Assert
             self.assertTrue(result)
+            mock_range.assert_called_once_with(now, now + timedelta(hours=2),
+                                               None)
+
+    def test_check_disponibility_conflict(self):
+        """Test that check_disponibility returns False when an event
+        overlaps the checked period"""
+        now = datetime.now()
+        user = User("id", "username", "email", ["schedule1"])
+        elements = [self._mock_element('event', now + timedelta(hours=1),
+                                       now + timedelta(hours=3))]
+        with patch.object(User, 'get_elements_in_range',
+                          return_value=elements):
+            self.assertFalse(user.check_disponibility(
+                (now, now + timedelta(hours=2))))
+            self.assertFalse(user.check_disponibility(
+                (now + timedelta(hours=2), now + timedelta(hours=4))))
 
     def test_check_disponibility_end_time_same_as_other_event_start_time(self):
         """Test that check_disponibility returns True when the end time of the 
         checked period is the same as the start time of an existing event"""
         # Arrange
+        now = datetime.now()
         user = User("id", "username", "email", ["schedule1", "schedule2"])
-        mock_element1 = MagicMock()
-        mock_element1.type = 'event'
-        mock_element1.start_time = datetime.now() + timedelta(hours=2)
-        mock_element1.end_time = datetime.now() + timedelta(hours=3)
-        mock_element2 = MagicMock()
-        mock_element2.type = 'event'
-        mock_element2.start_time = datetime.now() + timedelta(hours=4)
-        mock_element2.end_time = datetime.now() + timedelta(hours=5)
-        mock_schedule1 = MagicMock()
-        mock_schedule1.get_elements.return_value = [mock_element1]
-        mock_schedule2 = MagicMock()
-        mock_schedule2.get_elements.return_value = [mock_element2]
-        mock_schedule_management = MagicMock()
-        mock_element_management = MagicMock()
-        with patch.object(self.schedule_management, 'get_instance', 
-                          return_value=mock_schedule_management), \
-            patch.object(self.schedule_management, 'get_schedule', 
-                         side_effect=lambda x: mock_schedule1 \
-                            if x == 'schedule1' else mock_schedule2), \
-            patch.object(self.element_management, 'get_instance', 
-                         return_value=mock_element_management), \
-            patch.object(self.element_management, 'get_element', 
-                         side_effect=lambda x: mock_element1 \
-                            if x == 'element_id1' else mock_element2):
+        elements = [
+            self._mock_element('event', now + timedelta(hours=2),
+                               now + timedelta(hours=3)),
+            self._mock_element('event', now + timedelta(hours=4),
+                               now + timedelta(hours=5))]
+        with patch.object(User, 'get_elements_in_range',
+                          return_value=elements):
             # Act
-            result = user.check_disponibility((datetime.now(), 
-                                               datetime.now() + timedelta(hours=2)))
+            result = user.check_disponibility((now, now + timedelta(hours=2)))
             # Assert
             self.assertTrue(result)
 
@@ -227,38 +216,38 @@ class TestUserModel(unittest.TestCase):
         """Test that check_disponibility returns True when the checked 
         period conflicts with a non-event element"""
         # Arrange
+        now = datetime.now()
         user = User("id", "username", "email", ["schedule1", "schedule2"])
-        mock_element1 = MagicMock()
-        mock_element1.type = 'reminder'
-        mock_element1.start_time = datetime.now() + timedelta(hours=1)
-        mock_element1.end_time = datetime.now() + timedelta(hours=3)
-        mock_element2 = MagicMock()
-        mock_element2.type = 'event'
-        mock_element2.start_time = datetime.now() + timedelta(hours=4)
-        mock_element2.end_time = datetime.now() + timedelta(hours=5)
-        mock_schedule1 = MagicMock()
-        mock_schedule1.get_elements.return_value = [mock_element1]
-        mock_schedule2 = MagicMock()
-        mock_schedule2.get_elements.return_value = [mock_element2]
-        mock_schedule_management = MagicMock()
-        mock_element_management = MagicMock()
-        with patch.object(self.schedule_management, 'get_instance', 
-                          return_value=mock_schedule_management), \
-            patch.object(self.schedule_management, 'get_schedule', 
-                         side_effect=lambda x: mock_schedule1 \
-                            if x == 'schedule1' else mock_schedule2), \
-            patch.object(self.element_management, 'get_instance', 
-                         return_value=mock_element_management), \
-            patch.object(self.element_management, 'get_element', 
-                         side_effect=lambda x: mock_element1 \
-                            if x == 'element_id1' else mock_element2):
+        elements = [
+            self._mock_element('reminder', now + timedelta(hours=1),
+                               now + timedelta(hours=3)),
+            self._mock_element('event', now + timedelta(hours=4),
+                               now + timedelta(hours=5))]
+        with patch.object(User, 'get_elements_in_range',
+                          return_value=elements):
             # Act
-            result = user.check_disponibility((datetime.now(), 
-                                               datetime.now() + timedelta(hours=2)))
+            result = user.check_disponibility((now, now + timedelta(hours=2)))
 
             # Assert
             self.assertTrue(result)
 
+    def test_check_disponibility_many(self):
+        """Test that check_disponibility_many checks every period with a
+        single query for the window that covers them"""
+        now = datetime.now()
+        user = User("id", "username", "email", ["schedule1"])
+        elements = [self._mock_element('event', now + timedelta(hours=1),
+                                       now + timedelta(hours=2))]
+        times = [(now, now + timedelta(hours=1)),
+                 (now + timedelta(minutes=90), now + timedelta(hours=3)),
+                 (now + timedelta(hours=2), now + timedelta(hours=4))]
+        with patch.object(User, 'get_elements_in_range',
+                          return_value=elements) as mock_range:
+            self.assertEqual(user.check_disponibility_many(times),
+                             [True, False, True])
+            mock_range.assert_called_once_with(now, now + timedelta(hours=4),
+                                               None)
+
     def test_check_disponibility_input_type_exception(self):
         """Test that check_disponibility raises an exception when the input
         is not a tuple"""